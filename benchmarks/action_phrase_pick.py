@@ -0,0 +1,104 @@
+"""
+INFO:
+
+	Benchmark: picking a random action phrase.
+
+	Compares
+		- "sql": the old way, SELECT ... ORDER BY RANDOM() LIMIT 1 (SQLite goes through every phrase each time).
+		- "pool": database/phrases.py, a random position in a list loaded once.
+		- "pool weighted": same, but with different weights (alias method).
+		- "pool no-repeat": same, but without giving a user one of his last 3 phrases.
+
+	usage (from the repository root):
+		python benchmarks/action_phrase_pick.py --phrases 10000 --picks 20000
+
+"""
+
+import common
+
+import argparse, random, sqlite3, time
+from collections import Counter
+
+from database.phrases import SkenderPhrasePicker
+
+
+ACTIONS = ("slut", "crime", "work", "rob")
+
+
+def seed(path, phrase_count):
+	connection = sqlite3.connect(path)
+	rows = []
+	for action in ACTIONS:
+		for type_ in ("win", "lose"):
+			for index in range(phrase_count):
+				# weights 1 to 5, so the weighted run has something to do.
+				rows.append((action, type_, f"{action} {type_} phrase number {index}", index % 5 + 1))
+	connection.executemany("INSERT INTO action_phrases (action_name, type, phrase, weight) VALUES (?, ?, ?, ?)", rows)
+	connection.commit()
+	connection.close()
+
+def time_picks(function, picks):
+	with common.Timer() as timer:
+		for _ in range(picks):
+			function()
+	return timer.elapsed / picks * 1_000_000
+
+
+def main():
+	parser = argparse.ArgumentParser(description="action phrase pick: ORDER BY RANDOM() vs in-memory pools")
+	parser.add_argument("--phrases", type=int, default=10000, help="phrases per action and type")
+	parser.add_argument("--picks", type=int, default=20000)
+	parser.add_argument("--users", type=int, default=1000)
+	args = parser.parse_args()
+
+	directory, path = common.create_temp_database()
+	try:
+		seed(path, args.phrases)
+		connection = sqlite3.connect(path)
+		connection.row_factory = sqlite3.Row
+
+		# the sql way is slow, so fewer picks are enough to get a number.
+		sql_picks = max(1, min(args.picks, 500))
+		query = "SELECT phrase FROM action_phrases where action_name = ? AND type = ? ORDER BY RANDOM() LIMIT 1"
+		sql_us = time_picks(
+			lambda: connection.execute(query, (random.choice(ACTIONS), "win")).fetchone()["phrase"], sql_picks
+		)
+
+		rows = connection.execute("SELECT action_name, type, phrase, weight FROM action_phrases").fetchall()
+		unweighted_rows = [dict(row, weight=1) for row in rows]
+		connection.close()
+	finally:
+		common.remove_temp_database(directory)
+
+	with common.Timer() as load_timer:
+		uniform = SkenderPhrasePicker(no_repeat=0)
+		uniform.load(unweighted_rows)
+	weighted = SkenderPhrasePicker(no_repeat=0)
+	weighted.load(rows)
+	no_repeat = SkenderPhrasePicker(no_repeat=3)
+	no_repeat.load(rows)
+
+	uniform_us = time_picks(lambda: uniform.pick(random.choice(ACTIONS), "win"), args.picks)
+	weighted_us = time_picks(lambda: weighted.pick(random.choice(ACTIONS), "win"), args.picks)
+	no_repeat_us = time_picks(
+		lambda: no_repeat.pick(random.choice(ACTIONS), "win", random.randint(1, args.users)), args.picks
+	)
+
+	print(f"\n{args.phrases:,} phrases per (action, type), {len(rows):,} in total. Loading the pools took "
+		  f"{load_timer.elapsed * 1000:.1f} ms.")
+	print(f"  sql ORDER BY RANDOM() {sql_us:10.2f} us/pick  ({sql_picks} picks)")
+	print(f"  pool                  {uniform_us:10.2f} us/pick")
+	print(f"  pool weighted         {weighted_us:10.2f} us/pick")
+	print(f"  pool no-repeat        {no_repeat_us:10.2f} us/pick")
+
+	# quick check that the weights work: weight 5 phrases should come ~5x as often as weight 1 phrases.
+	counts = Counter()
+	for _ in range(100000):
+		phrase = weighted.pick("work", "win")
+		counts[int(phrase.rsplit(" ", 1)[1]) % 5 + 1] += 1
+	print("  weighted distribution (weight: share) " +
+		  "  ".join(f"{weight}: {counts[weight] / 100000:.3f}" for weight in sorted(counts)))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,138 @@
+"""
+INFO:
+
+	Benchmark: how much slower the writes of the bot get while a backup runs (database/backup.py).
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	A generated database (generate_database.py, --users users) is filled up to --size-mb with a padding table
+	(kept in --cache too), then opened with the database handler like the bot does. Then:
+		1. --seconds of writes without a backup (change_balance of random users, --rate per second).
+		2. the same writes while handler.backup_database() runs, until it is done.
+	Reports the latency of the writes for both, the event loop lag during the backup and the backup itself.
+
+	usage (from the repository root):
+		python benchmarks/backup_latency.py --size-mb 1024
+		python benchmarks/backup_latency.py --size-mb 1024 --pages-per-step -1 --no-compress   (one single step)
+
+"""
+
+import common
+
+import argparse, asyncio, os, random, shutil, sqlite3, tempfile, time
+
+import database_operations
+import fake_discord
+import generate_database
+
+
+# filled up to the size with rows of this many bytes.
+PADDING_ROW_BYTES = 4000
+
+
+def padded_database(directory, users, size_mb, seed):
+	template = generate_database.cached_database(directory, users, seed)
+	path = os.path.join(directory, f"generated-{users}-seed{seed}-{size_mb}mb.sqlite")
+	if os.path.exists(path):
+		return path
+	temporary = path + ".part"
+	shutil.copyfile(template, temporary)
+	connection = sqlite3.connect(temporary)
+	connection.execute("CREATE TABLE benchmark_padding (data BLOB)")
+	missing = size_mb * 1024 * 1024 - os.path.getsize(temporary)
+	rows = max(0, missing // PADDING_ROW_BYTES)
+	for start in range(0, rows, 10_000):
+		with connection:
+			connection.execute(
+				"WITH RECURSIVE numbers(number) AS (SELECT 1 UNION ALL SELECT number + 1 FROM numbers WHERE number < ?) "
+				"INSERT INTO benchmark_padding (data) SELECT randomblob(?) FROM numbers",
+				(min(10_000, rows - start), PADDING_ROW_BYTES)
+			)
+	connection.close()
+	os.replace(temporary, path)
+	return path
+
+
+async def write_at_rate(handler, users, rate, latencies, until):
+	tasks = []
+
+	async def write(arrival):
+		await handler.change_balance(generate_database.user_id(random.randint(1, users)), 1, "cash", mode="add")
+		latencies.append(time.perf_counter() - arrival)
+
+	start = time.perf_counter()
+	index = 0
+	while not until():
+		# open loop: the writes come at their time, even if the ones before are not done yet.
+		arrival = start + index / rate
+		delay = arrival - time.perf_counter()
+		if delay > 0:
+			await asyncio.sleep(delay)
+		tasks.append(asyncio.create_task(write(arrival)))
+		index += 1
+	await asyncio.gather(*tasks)
+
+async def run(args, path, work_directory):
+	client, guild = fake_discord.build_server(0, channel_count=1)
+	handler = await database_operations.open_handler(client, path)
+	# like on_ready (the backup flushes the chat rewards first, which needs the delay).
+	await handler.get_xp_infos()
+	handler.backup.directory = os.path.join(work_directory, "backups")
+	handler.backup.compress = args.compress
+	handler.backup.pages_per_step = args.pages_per_step
+	handler.backup.pause_ms = args.pause_ms
+
+	before = []
+	started = time.perf_counter()
+	await write_at_rate(handler, args.users, args.rate, before, lambda: time.perf_counter() - started > args.seconds)
+
+	during = []
+	monitor = common.LoopLagMonitor()
+	await monitor.start()
+	backup = asyncio.create_task(handler.backup_database())
+	await write_at_rate(handler, args.users, args.rate, during, backup.done)
+	lag = await monitor.stop()
+	status, info = backup.result()
+	handler.close_database()
+	if status == "error":
+		raise SystemExit(f"backup failed: {info}")
+	return before, during, lag, info
+
+
+def main():
+	parser = argparse.ArgumentParser(description="write latency of the bot during an online backup")
+	parser.add_argument("--users", type=int, default=1_000_000)
+	parser.add_argument("--size-mb", type=int, default=1024, help="database size, filled up with a padding table")
+	parser.add_argument("--rate", type=float, default=200, help="writes per second")
+	parser.add_argument("--seconds", type=float, default=10, help="writes without backup, for the comparison")
+	parser.add_argument("--pages-per-step", type=int, default=1024, help="-1 = everything in one step")
+	parser.add_argument("--pause-ms", type=float, default=5)
+	parser.add_argument("--no-compress", dest="compress", action="store_false")
+	parser.add_argument("--seed", type=int, default=1)
+	parser.add_argument("--cache", default=os.path.join(tempfile.gettempdir(), "skender-bench-databases"),
+						help="where the generated databases are kept")
+	parser.add_argument("--directory", default=None, help="where to put the working copy (use a real disk)")
+	args = parser.parse_args()
+	random.seed(args.seed)
+
+	template = padded_database(args.cache, args.users, args.size_mb, args.seed)
+	work_directory = tempfile.mkdtemp(prefix="skender-bench-", dir=args.directory)
+	try:
+		path = os.path.join(work_directory, "work.sqlite")
+		shutil.copyfile(template, path)
+		size = os.path.getsize(path)
+		before, during, lag, info = asyncio.run(run(args, path, work_directory))
+	finally:
+		common.remove_temp_database(work_directory)
+
+	print(f"\n{size / 1024 / 1024:,.0f} MiB database, {args.users:,} users, {args.rate:g} writes/s, "
+		  f"{args.pages_per_step} pages per step, {args.pause_ms:g} ms pause, compress {args.compress}")
+	print(f"  backup: {info['seconds']:.1f} s, {info['pages']:,} pages in {info['steps']:,} steps, "
+		  f"{info['size'] / 1024 / 1024:,.1f} MiB on the disk")
+	print(f"  writes without backup  {common.format_summary(common.summarize(before))}")
+	print(f"  writes during backup   {common.format_summary(common.summarize(during))}")
+	print(f"  loop lag during backup {common.format_summary(lag)}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,150 @@
+"""
+INFO:
+
+	Benchmark: xp and passive chat income for every chat message, with many active chatters.
+
+	Compares
+		- "per message": the old way, every message runs its own writes through the handler
+		  (UPDATE total_xp, UPDATE bank, UPDATE last_xp_collect, each with a commit, plus the level queries).
+		- "accumulated": handle_message_xp_and_passive_income() as it is now (database/chat_rewards.py),
+		  the flush task saves everything every --flush seconds.
+
+	The delay is set to 0, so every message gets xp and income (worst case for the database).
+	At the end, the totals in the database are checked against what was sent.
+
+	usage (from the repository root):
+		python benchmarks/chat_rewards.py --chatters 10000 --messages 50000 --channels 50
+
+"""
+
+import common
+
+import argparse, asyncio, random, sqlite3, types
+
+import database
+
+
+XP_PER_MESSAGE, INCOME_PER_MESSAGE = 10, 2
+
+
+def seed(path, user_count):
+	connection = sqlite3.connect(path)
+	connection.executemany(
+		"INSERT OR IGNORE INTO users (user_id, user_discord_nick) VALUES (?, ?)",
+		[(user_id, f"user{user_id}") for user_id in range(1, user_count + 1)]
+	)
+	# levels far apart, so only a few level ups happen (they send messages, we want the normal case).
+	connection.executemany(
+		"INSERT INTO levels (level_number, level_xp) VALUES (?, ?)",
+		[(level, level * 10000) for level in range(1, 51)]
+	)
+	connection.commit()
+	connection.close()
+
+
+class FakeChannel:
+	id = 1
+
+	async def send(self, *args, **kwargs):
+		return None
+
+
+def make_handler(path):
+	handler = database.SkenderDatabaseHandler(None, "admin", path_to_db=path)
+	handler.db_set_up = True
+	handler.channels_level_mode, handler.channels_level_handling = "exclude", []
+	handler.xp_per_msg, handler.passive_income_per_msg = XP_PER_MESSAGE, INCOME_PER_MESSAGE
+	handler.xp_and_passive_income_delay = 0
+	handler.currency_symbol = "$"
+	return handler
+
+def make_ctx(user):
+	return types.SimpleNamespace(
+		user=user, user_roles=[], user_ctx_obj=None, channel=FakeChannel(), user_mention=f"<@{user}>"
+	)
+
+
+# the statements the old handle_message_xp_and_passive_income() ran for one message.
+async def per_message(handler, user):
+	await handler.get_user_object(user)
+	await handler.execute_commit(
+		"UPDATE users SET total_xp = COALESCE(total_xp, 0) + ? WHERE user_id = ?", (XP_PER_MESSAGE, user), user=user
+	)
+	row = await handler.get_user_object(user)
+	await handler.execute(
+		"SELECT level_number FROM levels WHERE level_xp <= ? ORDER BY level_xp DESC LIMIT 1", (row["total_xp"],)
+	)
+	await handler.execute_commit(
+		"UPDATE users SET bank = bank + ? WHERE user_id = ?", (INCOME_PER_MESSAGE, user), user=user
+	)
+	await handler.execute_commit(
+		"UPDATE users SET last_xp_collect = ? WHERE user_id = ?", (database.epoch_ms(), user), user=user
+	)
+	await handler.execute(
+		"SELECT level_xp FROM levels WHERE level_number = ?", (row["current_xp_level"] + 1,)
+	)
+
+async def accumulated(handler, user):
+	await handler.handle_message_xp_and_passive_income(make_ctx(user), user)
+
+
+async def run(mode, path, chatters, messages, channels, flush_seconds):
+	handler = make_handler(path)
+	handler.chat_rewards_flush_seconds = flush_seconds
+	await handler.load_levels()
+	function = per_message if mode == "per message" else accumulated
+	if mode == "accumulated":
+		handler.start_chat_rewards_flush()
+
+	per_channel = max(1, messages // channels)
+	monitor = common.LoopLagMonitor()
+
+	async def channel():
+		for _ in range(per_channel):
+			await function(handler, random.randint(1, chatters))
+
+	await monitor.start()
+	with common.Timer() as timer:
+		await asyncio.gather(*[channel() for _ in range(channels)])
+	lag = await monitor.stop()
+
+	# what's still in memory has to be saved too, that's part of the cost.
+	with common.Timer() as flush_timer:
+		if mode == "accumulated":
+			handler.chat_rewards_task.cancel()
+			await handler.flush_chat_rewards()
+
+	totals = (await handler.execute("SELECT SUM(total_xp) AS xp, SUM(bank) AS bank FROM users")).fetchone()
+	commits = handler.engine.commit_count
+	handler.close_database()
+	return per_channel * channels, timer.elapsed, flush_timer.elapsed, lag, totals, commits
+
+
+def main():
+	parser = argparse.ArgumentParser(description="chat xp / passive income: writes per message vs batched flush")
+	parser.add_argument("--chatters", type=int, default=10000)
+	parser.add_argument("--messages", type=int, default=50000)
+	parser.add_argument("--channels", type=int, default=50, help="messages handled at the same time")
+	parser.add_argument("--flush", type=float, default=5.0, help="seconds between two flushes")
+	parser.add_argument("--directory", default=None, help="where to put the temporary database (use a real disk)")
+	args = parser.parse_args()
+
+	print(f"\n{args.chatters:,} active chatters, {args.messages:,} messages, {args.channels} at the same time")
+	for mode in ("per message", "accumulated"):
+		directory, path = common.create_temp_database(directory=args.directory)
+		try:
+			seed(path, args.chatters)
+			sent, elapsed, flush_elapsed, lag, totals, commits = asyncio.run(
+				run(mode, path, args.chatters, args.messages, args.channels, args.flush)
+			)
+		finally:
+			common.remove_temp_database(directory)
+
+		correct = totals["xp"] == sent * XP_PER_MESSAGE and totals["bank"] == sent * INCOME_PER_MESSAGE
+		print(f"  {mode:<12} {sent / elapsed:>10,.0f} messages/s  {commits:>7,} commits  "
+			  f"last flush {flush_elapsed * 1000:7.1f} ms  totals {'ok' if correct else 'WRONG'}")
+		print(f"  {'':<12} loop lag: {common.format_summary(lag)}")
+
+
+if __name__ == "__main__":
+	main()
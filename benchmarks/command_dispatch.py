@@ -0,0 +1,74 @@
+"""
+INFO:
+
+	Benchmark: finding the handler for a command (bot.py handle_message).
+
+	Compares
+		- "if/elif chain": how it was before, going through the commands one by one with
+		  "command in [...]" (a new list for every check), until the right one is found.
+		- "registry": commands.py, one dictionary lookup.
+
+	Every registered name and alias is dispatched (so the commands at the end of the chain count too),
+	plus one unknown command (normal chat starting with the prefix, goes through the whole chain).
+
+	usage (from the repository root, needs the bot's requirements since it imports bot.py):
+		python benchmarks/command_dispatch.py --rounds 2000
+
+"""
+
+import common
+
+import argparse
+
+# importing bot.py runs all the @command(...) decorators, which fills the registry.
+import bot
+from commands import command_registry
+
+
+def chain_dispatch(chain, command):
+	# like "elif command in ["deposit", "dep"]:", the list was built again for every check.
+	for names, entry in chain:
+		if command in list(names):
+			return entry
+	return None
+
+def registry_dispatch(command):
+	return command_registry.get(command)
+
+
+def main():
+	parser = argparse.ArgumentParser(description="command dispatch: if/elif chain vs registry lookup")
+	parser.add_argument("--rounds", type=int, default=2000, help="how many times every alias is dispatched")
+	args = parser.parse_args()
+
+	chain = [((entry.name,) + entry.aliases, entry) for entry in command_registry.commands]
+	names = list(command_registry.lookup) + ["not-a-command"]
+
+	# both have to find the same handler.
+	for name in names:
+		assert chain_dispatch(chain, name) is registry_dispatch(name), name
+
+	results = {}
+	for label, function in (("if/elif chain", lambda name: chain_dispatch(chain, name)),
+							("registry", registry_dispatch)):
+		with common.Timer() as timer:
+			for _ in range(args.rounds):
+				for name in names:
+					function(name)
+		results[label] = timer.elapsed / (args.rounds * len(names)) * 1_000_000_000
+
+	# worst case before: the last command of the chain.
+	last = chain[-1][0][-1]
+	with common.Timer() as timer:
+		for _ in range(args.rounds * 10):
+			chain_dispatch(chain, last)
+	last_ns = timer.elapsed / (args.rounds * 10) * 1_000_000_000
+
+	print(f"\n{len(command_registry.commands)} commands, {len(command_registry.lookup)} names and aliases")
+	for label, ns in results.items():
+		print(f"  {label:<14} {ns:10.1f} ns/dispatch (average over all aliases)")
+	print(f"  {'chain, last':<14} {last_ns:10.1f} ns/dispatch ('{last}')")
+
+
+if __name__ == "__main__":
+	main()
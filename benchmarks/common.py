@@ -0,0 +1,114 @@
+"""
+INFO:
+
+	Shared helpers for the benchmarks of the Skender discord bot.
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	The benchmarks are NOT needed to run the bot. They are here so we can check
+	that changes to the database handling actually make things faster (or at least not slower).
+
+	Run them from the repository root, e.g.:
+		python benchmarks/engine_event_loop_lag.py
+
+"""
+
+import os, sys, time, asyncio, tempfile, shutil, statistics
+
+# same trick as in database/database_migration.py: make "import database" work no matter from where we are called.
+SRC_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+if SRC_DIRECTORY not in sys.path:
+	sys.path.insert(0, SRC_DIRECTORY)
+
+import database
+
+
+"""
+TEMPORARY DATABASE
+"""
+
+# creates a new, empty database (same tables as the bot) in a temporary folder.
+# returns the folder (to delete it after) and the path to the sqlite file.
+# directory=None uses the default temp folder. Beware: on some systems that is in RAM (tmpfs),
+# so commits cost almost nothing there. Give a folder on a real disk to see the fsync cost.
+def create_temp_database(name="benchmark.sqlite", directory=None):
+	directory = tempfile.mkdtemp(prefix="skender-bench-", dir=directory)
+	path = os.path.join(directory, name)
+	database.SkenderDatabaseCreator(path).create_database()
+	return directory, path
+
+def remove_temp_database(directory):
+	shutil.rmtree(directory, ignore_errors=True)
+
+
+"""
+MEASURING
+"""
+
+def percentile(values, percent):
+	if not values:
+		return 0.0
+	ordered = sorted(values)
+	# nearest-rank, good enough for benchmarks.
+	index = max(0, min(len(ordered) - 1, int(round(percent / 100 * len(ordered))) - 1))
+	return ordered[index]
+
+def summarize(values):
+	# values are in seconds, the summary is in milliseconds.
+	if not values:
+		return {"count": 0, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+	return {
+		"count": len(values),
+		"mean_ms": statistics.fmean(values) * 1000,
+		"p50_ms": percentile(values, 50) * 1000,
+		"p95_ms": percentile(values, 95) * 1000,
+		"p99_ms": percentile(values, 99) * 1000,
+		"max_ms": max(values) * 1000,
+	}
+
+def format_summary(summary):
+	return (f"n={summary['count']:>7}  mean={summary['mean_ms']:8.3f}ms  p50={summary['p50_ms']:8.3f}ms  "
+			f"p95={summary['p95_ms']:8.3f}ms  p99={summary['p99_ms']:8.3f}ms  max={summary['max_ms']:8.3f}ms")
+
+
+# measures how late the event loop wakes up a task that sleeps for interval seconds.
+# if something blocks the loop (e.g. a sqlite3 commit waiting for the disk), the lag goes up.
+class LoopLagMonitor:
+	def __init__(self, interval=0.005):
+		self.interval = interval
+		self.lags = []
+		self.task = None
+		self.sleep_started = None
+
+	async def _run(self):
+		loop = asyncio.get_running_loop()
+		while True:
+			self.sleep_started = loop.time()
+			await asyncio.sleep(self.interval)
+			self.lags.append(max(0.0, loop.time() - self.sleep_started - self.interval))
+
+	async def start(self):
+		self.task = asyncio.get_running_loop().create_task(self._run())
+		# let the monitor start sleeping before the work begins.
+		await asyncio.sleep(0)
+
+	async def stop(self):
+		# if the loop was blocked the whole time, the monitor never woke up: count that stall too.
+		overdue = asyncio.get_running_loop().time() - self.sleep_started - self.interval
+		if overdue > 0:
+			self.lags.append(overdue)
+		self.task.cancel()
+		try:
+			await self.task
+		except asyncio.CancelledError:
+			pass
+		return summarize(self.lags)
+
+
+class Timer:
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, *args):
+		self.elapsed = time.perf_counter() - self.start
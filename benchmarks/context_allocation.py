@@ -0,0 +1,116 @@
+"""
+INFO:
+
+	Benchmark: building the CommandContext (context.py) for every message.
+
+	Compares
+		- "eager x2": the old way, two contexts per message (one for the xp, one for the commands),
+		  each building the roles list, the avatar url and the staff check right away.
+		- "lazy x1": context.py as it is now, one context per message, roles / staff / avatar only
+		  computed if someone asks for them.
+
+	Most messages are just chatting (the xp handling only needs ctx.user and ctx.channel),
+	--commands of them (in %) are commands that use ctx.staff, ctx.user_pfp and ctx.user_roles.
+
+	Measured: time per message, and the memory 100k contexts take (tracemalloc), which shows the size
+	of one context (__dict__ vs __slots__, roles list vs not computed).
+
+	usage (from the repository root):
+		python benchmarks/context_allocation.py --messages 100000 --roles 30 --commands 5
+
+"""
+
+import common
+
+import argparse, gc, random, tracemalloc, types
+
+from context import CommandContext
+
+
+# the constructor of context.py before it became lazy.
+class EagerCommandContext:
+	def __init__(self, message, admin_role, param):
+		if message.webhook_id:
+			raise ValueError("Webhook message – no context to build")
+		self.message = message
+		self.channel = message.channel
+		self.server = message.guild
+		self.param = param
+		self.user = message.author.id
+		self.user_ctx_obj = message.author
+		self.user_mention = message.author.mention
+		self.user_pfp = message.author.display_avatar.url
+		self.username = message.author.name
+		self.nickname = str(message.author.display_name)
+		self.user_roles = [role.id for role in message.author.roles]
+		self.staff = any(role.name == admin_role for role in message.author.roles)
+
+
+# discord.py objects are big, here only what the context reads.
+def make_messages(count, role_count, user_count=1000):
+	roles = [types.SimpleNamespace(id=1000 + index, name=f"role{index}") for index in range(role_count)]
+	authors = []
+	for user_id in range(1, user_count + 1):
+		authors.append(types.SimpleNamespace(
+			id=user_id, mention=f"<@{user_id}>", name=f"user{user_id}", display_name=f"User {user_id}",
+			display_avatar=types.SimpleNamespace(url=f"https://cdn.example/avatars/{user_id}.png"),
+			roles=roles,
+		))
+	channel, guild = types.SimpleNamespace(id=1), types.SimpleNamespace(id=1)
+	return [
+		types.SimpleNamespace(webhook_id=None, channel=channel, guild=guild, author=random.choice(authors))
+		for _ in range(count)
+	]
+
+def use_as_command(ctx):
+	return ctx.staff, ctx.user_pfp, 1005 in ctx.user_roles, ctx.nickname
+
+
+def eager(message, is_command):
+	xp_ctx = EagerCommandContext(message, None, None)
+	xp_ctx.user, xp_ctx.channel.id
+	command_ctx = EagerCommandContext(message, "botmaster", ["none"] * 4)
+	if is_command:
+		use_as_command(command_ctx)
+	return command_ctx
+
+def lazy(message, is_command):
+	ctx = CommandContext(message, "botmaster")
+	ctx.user, ctx.channel.id
+	ctx.param = ["none"] * 4
+	if is_command:
+		use_as_command(ctx)
+	return ctx
+
+
+def main():
+	parser = argparse.ArgumentParser(description="CommandContext: eager (two per message) vs lazy (one, __slots__)")
+	parser.add_argument("--messages", type=int, default=100000)
+	parser.add_argument("--roles", type=int, default=30, help="roles per member")
+	parser.add_argument("--commands", type=float, default=5, help="percentage of messages that are commands")
+	args = parser.parse_args()
+
+	messages = make_messages(args.messages, args.roles)
+	is_command = [random.random() * 100 < args.commands for _ in messages]
+
+	print(f"\n{args.messages:,} messages, {args.roles} roles per member, {args.commands}% commands")
+	for name, function in (("eager x2", eager), ("lazy x1", lazy)):
+		gc.collect()
+		with common.Timer() as timer:
+			for message, command in zip(messages, is_command):
+				function(message, command)
+
+		# keep them all alive to see how much memory they take.
+		gc.collect()
+		tracemalloc.start()
+		kept = [function(message, command) for message, command in zip(messages, is_command)]
+		current, peak = tracemalloc.get_traced_memory()
+		tracemalloc.stop()
+		del kept
+
+		print(f"  {name:<9} {timer.elapsed / args.messages * 1_000_000:7.2f} us/message  "
+			  f"{current / args.messages:7.1f} bytes/message kept  (peak {peak / 1024 / 1024:6.1f} MiB)")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,137 @@
+"""
+INFO:
+
+	Benchmark: checking a cooldown (last_work, last_xp_collect ...) with TEXT dates vs epoch ms.
+
+	Compares
+		- "text": the old way, the column is str(datetime.now()), so every check is a datetime.strptime()
+		  and a datetime subtraction (what check_action_delay() and the chat xp did for every command / message).
+		- "epoch ms": the column is an INTEGER (see database_migration.py, schema version 1), a check is a subtraction.
+
+	Then the migration itself: a users table like before (TEXT cooldowns) with --users users, upgraded with
+	database_migration.upgrade_schema() (every schema version, like at the start of the bot, so the leaderboard
+	indexes too), and a check that the dates became the same moments in epoch ms.
+
+	usage (from the repository root):
+		python benchmarks/cooldown_parse.py --checks 200000 --users 100000
+
+"""
+
+import common
+
+import argparse, os, random, sqlite3
+from datetime import datetime, timedelta
+
+from database import database_migration
+
+
+# the users table before schema version 1 (cooldowns as TEXT, 'none' = never).
+LEGACY_USERS_TABLE = '''
+	CREATE TABLE users (
+		user_number INTEGER PRIMARY KEY AUTOINCREMENT,
+		user_id INTEGER UNIQUE,
+		user_discord_nick TEXT,
+		cash INTEGER DEFAULT 0,
+		bank INTEGER DEFAULT 0,
+		last_slut TEXT DEFAULT 'none',
+		last_work TEXT DEFAULT 'none',
+		last_crime TEXT DEFAULT 'none',
+		last_rob TEXT DEFAULT 'none',
+		last_blackjack TEXT DEFAULT 'none',
+		last_roulette TEXT DEFAULT 'none',
+		last_single_collect TEXT DEFAULT 'none',
+		total_xp INTEGER DEFAULT 0,
+		current_xp_level INTEGER DEFAULT 0,
+		last_xp_collect TEXT DEFAULT 'none'
+	)
+'''
+DELAY_MINUTES = 10
+
+
+def random_moments(count):
+	now = datetime.now()
+	return [now - timedelta(seconds=random.uniform(0, 3 * 3600)) for _ in range(count)]
+
+# now: the same moment for both, so they give the same answer.
+def check_text(values, now):
+	ready = 0
+	for value in values:
+		passed = now - datetime.strptime(value, "%Y-%m-%d %H:%M:%S.%f")
+		ready += int(passed.total_seconds() // 60) > DELAY_MINUTES
+	return ready
+
+def check_epoch_ms(values, now):
+	now = int(now.timestamp() * 1000)
+	ready = 0
+	for value in values:
+		ready += (now - value) // 60_000 > DELAY_MINUTES
+	return ready
+
+
+def legacy_database(path, users):
+	connection = sqlite3.connect(path)
+	connection.execute(LEGACY_USERS_TABLE)
+	rows = []
+	for number, moment in enumerate(random_moments(users), start=1):
+		# like before: most users never did most things.
+		rows.append((number, f"user{number}", str(moment), str(moment) if number % 3 else "none", "none"))
+	with connection:
+		connection.executemany(
+			"INSERT INTO users (user_id, user_discord_nick, last_work, last_xp_collect, last_rob) VALUES (?, ?, ?, ?, ?)",
+			rows
+		)
+	return connection
+
+
+def main():
+	parser = argparse.ArgumentParser(description="cooldown checks: TEXT dates vs epoch ms, and the migration")
+	parser.add_argument("--checks", type=int, default=200_000)
+	parser.add_argument("--users", type=int, default=100_000, help="users for the migration, 0 = skip it")
+	parser.add_argument("--directory", default=None, help="where to put the temporary database")
+	parser.add_argument("--seed", type=int, default=1)
+	args = parser.parse_args()
+	random.seed(args.seed)
+
+	moments = random_moments(args.checks)
+	text_values = [str(moment) for moment in moments]
+	epoch_values = [int(moment.timestamp() * 1000) for moment in moments]
+
+	now = datetime.now()
+	with common.Timer() as text_timer:
+		text_ready = check_text(text_values, now)
+	with common.Timer() as epoch_timer:
+		epoch_ready = check_epoch_ms(epoch_values, now)
+
+	text_us, epoch_us = text_timer.elapsed / args.checks * 1e6, epoch_timer.elapsed / args.checks * 1e6
+	print(f"\n{args.checks:,} cooldown checks ({DELAY_MINUTES} min delay)")
+	print(f"  text (strptime)  {text_us:8.3f} us/check")
+	print(f"  epoch ms         {epoch_us:8.3f} us/check  ({text_us / epoch_us:.0f}x faster)")
+	if text_ready != epoch_ready:
+		print(f"  DIFFERENT RESULTS: {text_ready} vs {epoch_ready} ready")
+
+	if not args.users:
+		return
+	directory, _ = common.create_temp_database(directory=args.directory)
+	try:
+		connection = legacy_database(os.path.join(directory, "legacy.sqlite"), args.users)
+		expected = {
+			user_id: int(datetime.strptime(last_work, "%Y-%m-%d %H:%M:%S.%f").timestamp() * 1000)
+			for user_id, last_work in connection.execute("SELECT user_id, last_work FROM users")
+		}
+		with common.Timer() as migration_timer:
+			database_migration.upgrade_schema(connection)
+		wrong = sum(
+			1 for user_id, last_work, last_rob in connection.execute("SELECT user_id, last_work, last_rob FROM users")
+			# the SQL conversion rounds to the ms, the python one cuts: 1 ms apart is the same moment.
+			if abs(last_work - expected[user_id]) > 1 or last_rob != 0
+		)
+		connection.close()
+	finally:
+		common.remove_temp_database(directory)
+
+	print(f"\nmigration of {args.users:,} users to epoch ms: {migration_timer.elapsed:.2f} s "
+		  f"({migration_timer.elapsed / args.users * 1e6:.2f} us/user), {wrong} wrong values")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,269 @@
+"""
+INFO:
+
+	Benchmark suite: the most used / heaviest functions of the database handler, on big generated databases.
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	For every size in --sizes (default 10k, 100k and 1M users), a database is generated by generate_database.py
+	(kept in --cache and used again next time), copied, and these run against the copy:
+		get_user_object     a random user (the user cache of the handler is on, like in the bot)
+		change_balance      +cash for a random user
+		leaderboard         +lb, page 1, total
+		level_leaderboard   +level-lb, page 1
+		check_inventory     +inventory of a user who owns items
+		catalog             +catalog (the list)
+		update_incomes      +update-income (4 income roles, so the 0.3 s pause every 5 roles doesn't count)
+		money_by_role       +add-money-role to the first income role
+		clean_database      10% of the users left the server. Changes the database, so every run gets a fresh copy.
+		economy_stats       +stats
+
+	Every operation runs --runs times (--heavy-runs for the ones going through all users), but stops
+	after --budget seconds (at least one run). Measured per run: the time, and through perf.py the SQL statements
+	and the SQLite time.
+
+	The results go to --output (JSON): the sizes, the operations, the timings, and what was measured on
+	(git commit, python, sqlite). --compare old.json shows the difference to an older result file.
+
+	usage (from the repository root):
+		python benchmarks/database_operations.py --sizes 10000,100000 --output results.json
+		python benchmarks/database_operations.py --sizes 10000 --operations leaderboard,catalog --compare results.json
+
+"""
+
+import common
+
+import argparse, asyncio, json, os, platform, random, shutil, sqlite3, subprocess, sys, tempfile, time, types
+from datetime import datetime
+
+import database
+import fake_discord
+import generate_database
+
+
+# the ones going through all users get fewer runs.
+HEAVY_OPERATIONS = {"leaderboard", "level_leaderboard", "update_incomes", "money_by_role", "clean_database"}
+# 1 in LEFT_EVERY users is not on the server anymore (for clean_database).
+LEFT_EVERY = 10
+
+
+"""
+OPERATIONS
+"""
+
+async def op_get_user_object(handler, ctx, state):
+	await handler.get_user_object(state.random_user())
+
+async def op_change_balance(handler, ctx, state):
+	await handler.change_balance(state.random_user(), 10, "cash", mode="add")
+
+async def op_leaderboard(handler, ctx, state):
+	await handler.leaderboard(ctx, "Benchmark Leaderboard", 1, "-total")
+
+async def op_level_leaderboard(handler, ctx, state):
+	await handler.level_leaderboard(ctx, 1)
+
+async def op_check_inventory(handler, ctx, state):
+	ctx.user = random.choice(state.item_owners)
+	await handler.check_inventory(ctx, "self", None, None, 1)
+
+async def op_catalog(handler, ctx, state):
+	await handler.catalog(ctx, "default_list")
+
+async def op_update_incomes(handler, ctx, state):
+	await handler.update_incomes(ctx)
+
+async def op_money_by_role(handler, ctx, state):
+	await handler.change_balance_by_role(ctx, generate_database.INCOME_ROLE_IDS[0], 100, "add")
+
+async def op_clean_database(handler, ctx, state):
+	await handler.clean_database(ctx.server)
+
+async def op_economy_stats(handler, ctx, state):
+	await handler.economy_stats(ctx)
+
+OPERATIONS = {
+	"get_user_object": op_get_user_object,
+	"change_balance": op_change_balance,
+	"leaderboard": op_leaderboard,
+	"level_leaderboard": op_level_leaderboard,
+	"check_inventory": op_check_inventory,
+	"catalog": op_catalog,
+	"update_incomes": op_update_incomes,
+	"money_by_role": op_money_by_role,
+	"clean_database": op_clean_database,
+	"economy_stats": op_economy_stats,
+}
+# these change the database so much that every run needs a fresh copy.
+DESTRUCTIVE_OPERATIONS = {"clean_database"}
+
+
+"""
+RUN
+"""
+
+class BenchmarkState:
+	def __init__(self, users, item_owners):
+		self.users = users
+		self.item_owners = item_owners
+
+	def random_user(self):
+		return generate_database.user_id(random.randint(1, self.users))
+
+
+def make_context(client, guild, user):
+	return types.SimpleNamespace(
+		user=user, username=f"user{user}", user_pfp=None, user_roles=frozenset(), staff=True,
+		channel=client.channels[1], server=guild
+	)
+
+async def open_handler(client, path):
+	handler = database.SkenderDatabaseHandler(client, "botmaster", path_to_db=path)
+	await handler.get_currency_symbol(first_run=True)
+	await handler.load_config_snapshot()
+	await handler.load_levels()
+	# like bot.py on_ready: the leaderboards in memory are loaded at startup, not in the first +lb.
+	await handler.load_rank_index()
+	return handler
+
+async def run_operation(name, template, work_path, client, guild, state, runs, budget):
+	function = OPERATIONS[name]
+	destructive = name in DESTRUCTIVE_OPERATIONS
+	times, statements, sqlite_seconds = [], [], []
+	handler = None
+	started = time.perf_counter()
+
+	for run in range(runs):
+		if handler is None or destructive:
+			if handler is not None:
+				handler.close_database()
+			shutil.copyfile(template, work_path)
+			handler = await open_handler(client, work_path)
+		ctx = make_context(client, guild, state.random_user())
+
+		async with handler.perf.measure(name) as measurement:
+			with common.Timer() as timer:
+				await function(handler, ctx, state)
+		times.append(timer.elapsed)
+		statements.append(measurement.statements)
+		sqlite_seconds.append(measurement.sqlite)
+
+		if time.perf_counter() - started > budget:
+			break
+
+	handler.close_database()
+	summary = common.summarize(times)
+	summary.update({
+		"operation": name,
+		"runs_planned": runs,
+		"statements_per_run": sum(statements) / len(statements),
+		"sqlite_ms_per_run": sum(sqlite_seconds) / len(sqlite_seconds) * 1000,
+		"stopped_by_budget": len(times) < runs,
+	})
+	return summary
+
+async def run_size(args, users, operations):
+	template = generate_database.cached_database(args.cache, users, args.seed)
+	with sqlite3.connect(template) as connection:
+		item_owners = [row[0] for row in connection.execute(
+			"SELECT DISTINCT user_id FROM user_items ORDER BY user_id LIMIT 10000"
+		)]
+	state = BenchmarkState(users, item_owners)
+
+	# everyone is on the server, except every LEFT_EVERY-th user.
+	member_ids = (generate_database.user_id(number) for number in range(1, users + 1) if number % LEFT_EVERY)
+	client, guild = fake_discord.build_server(0, channel_count=1, member_ids=member_ids)
+
+	work_directory = tempfile.mkdtemp(prefix="skender-bench-", dir=args.directory)
+	results = []
+	try:
+		for name in operations:
+			runs = args.heavy_runs if name in HEAVY_OPERATIONS else args.runs
+			result = await run_operation(
+				name, template, os.path.join(work_directory, "work.sqlite"), client, guild, state, runs, args.budget
+			)
+			result["users"] = users
+			results.append(result)
+			print(f"  {users:>9,} users  {name:<18} {common.format_summary(result)}  "
+				  f"{result['statements_per_run']:>9.1f} stmts  {result['sqlite_ms_per_run']:>9.2f} ms sqlite"
+				  f"{'  (budget)' if result['stopped_by_budget'] else ''}", flush=True)
+	finally:
+		common.remove_temp_database(work_directory)
+	return results
+
+
+"""
+RESULT FILE
+"""
+
+def environment():
+	try:
+		commit = subprocess.run(
+			["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+			cwd=os.path.dirname(os.path.abspath(__file__))
+		).stdout.strip() or None
+	except OSError:
+		commit = None
+	return {
+		"date": datetime.now().isoformat(timespec="seconds"),
+		"git_commit": commit,
+		"python": sys.version.split()[0],
+		"sqlite": sqlite3.sqlite_version,
+		"platform": platform.platform(),
+	}
+
+def compare(results, path):
+	with open(path, encoding="utf-8") as file:
+		old = json.load(file)
+	before = {(result["users"], result["operation"]): result for result in old["results"]}
+	print(f"\ncompared to {path} ({old['environment'].get('git_commit')}, {old['environment'].get('date')}):")
+	compared = 0
+	for result in results:
+		previous = before.get((result["users"], result["operation"]))
+		if previous is None or not previous["p50_ms"]:
+			continue
+		compared += 1
+		ratio = result["p50_ms"] / previous["p50_ms"]
+		print(f"  {result['users']:>9,} users  {result['operation']:<18} p50 {previous['p50_ms']:10.3f} ms "
+			  f"-> {result['p50_ms']:10.3f} ms  ({ratio:6.2f}x{'  SLOWER' if ratio > 1.2 else ''})")
+	if not compared:
+		print("  nothing to compare (no size / operation in both files).")
+
+
+def main():
+	parser = argparse.ArgumentParser(description="database handler operations on generated databases")
+	parser.add_argument("--sizes", default="10000,100000,1000000", help="numbers of users, comma separated")
+	parser.add_argument("--operations", default=",".join(OPERATIONS), help="comma separated, default all")
+	parser.add_argument("--runs", type=int, default=500, help="runs of the light operations")
+	parser.add_argument("--heavy-runs", type=int, default=5, help="runs of the ones going through all users")
+	parser.add_argument("--budget", type=float, default=30.0, help="max seconds per operation and size")
+	parser.add_argument("--seed", type=int, default=1)
+	parser.add_argument("--cache", default=os.path.join(tempfile.gettempdir(), "skender-bench-databases"),
+						help="where the generated databases are kept")
+	parser.add_argument("--directory", default=None, help="where to put the working copy (use a real disk)")
+	parser.add_argument("--output", default="database_operations.json", help="the result file (JSON)")
+	parser.add_argument("--compare", default=None, help="an older result file to compare with")
+	args = parser.parse_args()
+
+	sizes = [int(size) for size in args.sizes.split(",")]
+	operations = [name.strip() for name in args.operations.split(",")]
+	for name in operations:
+		if name not in OPERATIONS:
+			raise SystemExit(f"unknown operation: {name} (known: {', '.join(OPERATIONS)})")
+
+	random.seed(args.seed)
+	print(f"\ndatabase operations, sizes {', '.join(f'{size:,}' for size in sizes)}")
+	results = []
+	for users in sizes:
+		results.extend(asyncio.run(run_size(args, users, operations)))
+
+	with open(args.output, "w", encoding="utf-8") as file:
+		json.dump({"environment": environment(), "arguments": vars(args), "results": results}, file, indent=2)
+	print(f"\nresults written to {args.output}")
+
+	if args.compare:
+		compare(results, args.compare)
+
+
+if __name__ == "__main__":
+	main()
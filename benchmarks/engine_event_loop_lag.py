@@ -0,0 +1,152 @@
+"""
+INFO:
+
+	Benchmark: event loop lag under +work / +bal traffic.
+
+	Compares
+		- "legacy": the old way, sqlite3 directly on the event loop (execute + commit after every write).
+		- "engine": database/engine.py through the database handler (writer thread + read-only readers).
+
+	While the simulated users send commands, a small task measures how late the event loop wakes it up.
+	That lag is what every other guild / message feels while the database works.
+
+	usage (from the repository root):
+		python benchmarks/engine_event_loop_lag.py --users 10000 --clients 50 --commands 200
+
+"""
+
+import common
+
+import argparse, asyncio, random, sqlite3, time
+
+import database
+
+
+"""
+LEGACY BACKEND (how database/__init__.py worked before the engine)
+"""
+
+class LegacyBackend:
+	def __init__(self, path):
+		self.database = sqlite3.connect(path)
+		self.database.execute("PRAGMA journal_mode=WAL")
+		self.database.row_factory = sqlite3.Row
+		self.db_cursor = self.database.cursor()
+		self.db_lock = asyncio.Lock()
+
+	async def execute_commit(self, query, parameters=()):
+		async with self.db_lock:
+			self.db_cursor.execute(query, parameters)
+			self.database.commit()
+
+	async def execute(self, query, parameters=()):
+		return self.db_cursor.execute(query, parameters)
+
+	def close(self):
+		self.database.close()
+
+
+"""
+ENGINE BACKEND (the handler as it is now)
+"""
+
+class EngineBackend:
+	def __init__(self, path):
+		self.handler = database.SkenderDatabaseHandler(None, "admin", path_to_db=path)
+
+	async def execute_commit(self, query, parameters=()):
+		await self.handler.execute_commit(query, parameters)
+
+	async def execute(self, query, parameters=()):
+		return await self.handler.execute(query, parameters)
+
+	def close(self):
+		self.handler.close_database()
+
+
+"""
+TRAFFIC (the SQL that +work and +bal run)
+"""
+
+def seed(path, user_count):
+	connection = sqlite3.connect(path)
+	connection.executemany(
+		"INSERT OR IGNORE INTO users (user_id, user_discord_nick, cash, bank) VALUES (?, ?, ?, ?)",
+		[(user_id, f"user{user_id}", random.randint(0, 10000), random.randint(0, 10000))
+		 for user_id in range(1, user_count + 1)]
+	)
+	connection.execute("INSERT OR IGNORE INTO actions (action_name, delay, min_revenue, max_revenue) VALUES ('work', 0, 10, 100)")
+	connection.executemany(
+		"INSERT INTO action_phrases (action_name, type, phrase) VALUES ('work', 'win', ?)",
+		[(f"You worked and earned {{amount}} ({index})",) for index in range(50)]
+	)
+	connection.commit()
+	connection.close()
+
+async def command_work(backend, user_id):
+	user_object = (await backend.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))).fetchone()
+	action = (await backend.execute("SELECT * FROM actions WHERE action_name = ?", ("work",))).fetchone()
+	(await backend.execute(
+		"SELECT phrase FROM action_phrases WHERE action_name = ? AND type = ? ORDER BY RANDOM() LIMIT 1",
+		("work", "win")
+	)).fetchone()
+	amount = random.randint(action["min_revenue"], action["max_revenue"])
+	await backend.execute_commit(
+		"UPDATE users SET cash = ?, last_work = ? WHERE user_id = ?",
+		(user_object["cash"] + amount, database.epoch_ms(), user_id)
+	)
+
+async def command_balance(backend, user_id):
+	(await backend.execute("SELECT * FROM users WHERE user_id = ?", (user_id,))).fetchone()
+	await backend.execute_commit(
+		"UPDATE users SET user_discord_nick = ? WHERE user_id = ?", (f"user{user_id}", user_id)
+	)
+
+async def client(backend, user_count, command_count, latencies):
+	for _ in range(command_count):
+		user_id = random.randint(1, user_count)
+		command = command_work if random.random() < 0.5 else command_balance
+		start = time.perf_counter()
+		await command(backend, user_id)
+		latencies.append(time.perf_counter() - start)
+
+async def run_backend(backend_class, path, args):
+	backend = backend_class(path)
+	monitor = common.LoopLagMonitor()
+	latencies = []
+	await monitor.start()
+	with common.Timer() as timer:
+		await asyncio.gather(*[
+			client(backend, args.users, args.commands, latencies) for _ in range(args.clients)
+		])
+	lag = await monitor.stop()
+	backend.close()
+	return lag, common.summarize(latencies), timer.elapsed
+
+
+def main():
+	parser = argparse.ArgumentParser(description="event loop lag: legacy sqlite3 vs database engine")
+	parser.add_argument("--users", type=int, default=10000)
+	parser.add_argument("--clients", type=int, default=50, help="simultaneous users sending commands")
+	parser.add_argument("--commands", type=int, default=200, help="commands per client")
+	parser.add_argument("--seed", type=int, default=0)
+	parser.add_argument("--directory", default=None, help="where to put the temporary database (use a real disk)")
+	args = parser.parse_args()
+
+	for name, backend_class in (("legacy", LegacyBackend), ("engine", EngineBackend)):
+		random.seed(args.seed)
+		directory, path = common.create_temp_database(directory=args.directory)
+		try:
+			seed(path, args.users)
+			lag, latency, elapsed = asyncio.run(run_backend(backend_class, path, args))
+		finally:
+			common.remove_temp_database(directory)
+
+		total = args.clients * args.commands
+		print(f"\n[{name}] {total} commands in {elapsed:.2f}s ({total / elapsed:,.0f} commands/s)")
+		print(f"  loop lag: {common.format_summary(lag)}")
+		print(f"  command : {common.format_summary(latency)}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,87 @@
+"""
+INFO:
+
+	Benchmark: group commit in database/engine.py.
+
+	1, 10 and 100 writers each write to the database as fast as they can (one UPDATE per await,
+	like execute_commit does). We measure the writes per second, how many commits were needed
+	for them and the latency each writer sees.
+
+	Compared settings:
+		- no grouping:   commit_max_statements=1, every write is its own commit (like before).
+		- group:         window 0 ms, only groups what's already queued (default of the bot).
+		- group 5ms:     waits up to 5 ms for more writes.
+		- group NORMAL:  like "group" but with synchronous=NORMAL (less durable, see engine.py).
+
+	usage (from the repository root):
+		python benchmarks/engine_group_commit.py --writes 2000 --directory /path/on/real/disk
+
+"""
+
+import common
+
+import argparse, asyncio, random, sqlite3, time
+
+from database.engine import SkenderDatabaseEngine
+
+
+SETTINGS = {
+	"no grouping": {"commit_window_ms": 0, "commit_max_statements": 1, "synchronous": "FULL"},
+	"group": {"commit_window_ms": 0, "commit_max_statements": 100, "synchronous": "FULL"},
+	"group 5ms": {"commit_window_ms": 5, "commit_max_statements": 100, "synchronous": "FULL"},
+	"group NORMAL": {"commit_window_ms": 0, "commit_max_statements": 100, "synchronous": "NORMAL"},
+}
+
+
+def seed(path, user_count):
+	connection = sqlite3.connect(path)
+	connection.executemany(
+		"INSERT OR IGNORE INTO users (user_id, user_discord_nick) VALUES (?, ?)",
+		[(user_id, f"user{user_id}") for user_id in range(1, user_count + 1)]
+	)
+	connection.commit()
+	connection.close()
+
+async def writer(engine, write_count, user_count, latencies):
+	for _ in range(write_count):
+		start = time.perf_counter()
+		await engine.write("UPDATE users SET cash = cash + ? WHERE user_id = ?", (1, random.randint(1, user_count)))
+		latencies.append(time.perf_counter() - start)
+
+async def run(engine, writers, total_writes, user_count):
+	latencies = []
+	per_writer = max(1, total_writes // writers)
+	with common.Timer() as timer:
+		await asyncio.gather(*[writer(engine, per_writer, user_count, latencies) for _ in range(writers)])
+	return latencies, timer.elapsed
+
+
+def main():
+	parser = argparse.ArgumentParser(description="group commit benchmark for the database engine")
+	parser.add_argument("--writes", type=int, default=2000, help="total writes per run")
+	parser.add_argument("--users", type=int, default=1000)
+	parser.add_argument("--writers", type=int, nargs="+", default=[1, 10, 100])
+	parser.add_argument("--directory", default=None, help="where to put the temporary database (use a real disk)")
+	args = parser.parse_args()
+
+	for writers in args.writers:
+		print(f"\n=== {writers} concurrent writer(s) ===")
+		for name, settings in SETTINGS.items():
+			directory, path = common.create_temp_database(directory=args.directory)
+			try:
+				seed(path, args.users)
+				engine = SkenderDatabaseEngine(path, **settings)
+				engine.start()
+				latencies, elapsed = asyncio.run(run(engine, writers, args.writes, args.users))
+				engine.stop()
+			finally:
+				common.remove_temp_database(directory)
+
+			per_commit = engine.statement_count / max(1, engine.commit_count)
+			print(f"  {name:<13} {engine.statement_count / elapsed:>9,.0f} writes/s  "
+				  f"{engine.commit_count / elapsed:>8,.0f} commits/s  {per_commit:6.1f} writes/commit")
+			print(f"  {'':<13} {common.format_summary(common.summarize(latencies))}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,195 @@
+"""
+INFO:
+
+	Fake discord objects for the benchmarks of the Skender discord bot (no token, no network needed).
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	Only what the bot actually uses is there: a message (content, author, channel, guild), members with roles,
+	channels that can send, a guild and a client with the functions bot.py and database/__init__.py call
+	(get_user, get_channel, fetch_channel, wait_for, change_presence, emojis).
+
+	Every call that would go to the discord API (channel.send, member.add_roles...) goes through
+	FakeHTTP.request(), which waits --discord-ms like the real API would. perf.py wraps client.http.request,
+	so the discord time of the +perf report also works with these.
+
+	used in load_test.py
+
+"""
+
+import asyncio, itertools, random
+
+
+class FakeHTTP:
+	def __init__(self, latency_ms=0.0, jitter_ms=0.0):
+		self.latency_ms = latency_ms
+		self.jitter_ms = jitter_ms
+		self.request_count = 0
+
+	async def request(self, route, **kwargs):
+		self.request_count += 1
+		delay = self.latency_ms + random.uniform(0, self.jitter_ms) if self.jitter_ms else self.latency_ms
+		# sleep(0) still gives the other tasks a turn, like a real await on the network would.
+		await asyncio.sleep(delay / 1000)
+
+
+class FakeRole:
+	__slots__ = ("id", "name", "mention", "members")
+
+	def __init__(self, role_id, name):
+		self.id = role_id
+		self.name = name
+		self.mention = f"<@&{role_id}>"
+		# the members with this role (update_incomes goes through them).
+		self.members = []
+
+	def __repr__(self):
+		return f"<FakeRole {self.name}>"
+
+
+class FakeAvatar:
+	__slots__ = ("url",)
+
+	def __init__(self, url):
+		self.url = url
+
+	def __str__(self):
+		return self.url
+
+
+# __slots__ and the names only built when asked: the db benchmarks need up to 1M of them.
+class FakeMember:
+	__slots__ = ("client", "id", "roles")
+	bot = False
+
+	def __init__(self, client, user_id, roles):
+		self.client = client
+		self.id = user_id
+		# a tuple, members with the same roles share it.
+		self.roles = roles
+
+	@property
+	def name(self):
+		return f"user{self.id}"
+
+	@property
+	def display_name(self):
+		return f"User {self.id}"
+
+	@property
+	def mention(self):
+		return f"<@{self.id}>"
+
+	@property
+	def display_avatar(self):
+		return FakeAvatar(f"https://cdn.example/avatars/{self.id}.png")
+
+	async def add_roles(self, *roles, reason=None):
+		await self.client.http.request("PUT /guilds/roles")
+		self.roles = self.roles + tuple(role for role in roles if role not in self.roles)
+
+	async def remove_roles(self, *roles, reason=None):
+		await self.client.http.request("DELETE /guilds/roles")
+		self.roles = tuple(role for role in self.roles if role not in roles)
+
+
+class FakeChannel:
+	def __init__(self, client, channel_id):
+		self.client = client
+		self.id = channel_id
+		self.name = f"channel{channel_id}"
+		self.mention = f"<#{channel_id}>"
+		# what the bot answered, counted (not kept, that would grow forever).
+		self.sent = 0
+		# embeds with the title "Error." (utilities.py send_error): a command crashed inside.
+		self.internal_errors = 0
+
+	async def send(self, content=None, embed=None, **kwargs):
+		self.sent += 1
+		if embed is not None and embed.title == "Error.":
+			self.internal_errors += 1
+		await self.client.http.request("POST /channels/messages")
+
+
+class FakeGuild:
+	def __init__(self, guild_id, roles):
+		self.id = guild_id
+		self.name = "Load Test Server"
+		self.icon = None
+		self.roles = roles
+		# a list like in discord.py, plus a dictionary for get_member().
+		self.members = []
+		self.member_lookup = {}
+
+	def add_member(self, member):
+		self.members.append(member)
+		self.member_lookup[member.id] = member
+		for role in member.roles:
+			role.members.append(member)
+
+	def get_member(self, user_id):
+		return self.member_lookup.get(int(user_id))
+
+	async def fetch_role(self, role_id):
+		for role in self.roles:
+			if role.id == int(role_id):
+				return role
+		return None
+
+
+class FakeMessage:
+	__slots__ = ("id", "content", "author", "channel", "guild", "webhook_id")
+	ids = itertools.count(1)
+
+	def __init__(self, content, author, channel, guild):
+		self.id = next(FakeMessage.ids)
+		self.content = content
+		self.author = author
+		self.channel = channel
+		self.guild = guild
+		self.webhook_id = None
+
+
+class FakeClient:
+	def __init__(self, http):
+		self.http = http
+		self.emojis = []
+		self.users = {}
+		self.channels = {}
+
+	def get_user(self, user_id):
+		return self.users.get(int(user_id))
+
+	def get_channel(self, channel_id):
+		try:
+			return self.channels.get(int(channel_id))
+		except (TypeError, ValueError):
+			return None
+
+	async def fetch_channel(self, channel_id):
+		return self.get_channel(channel_id)
+
+	# nobody answers in a load test: the setup walkthrough takes the default values.
+	async def wait_for(self, event, check=None, timeout=None):
+		raise asyncio.TimeoutError()
+
+	async def change_presence(self, status=None, activity=None):
+		return None
+
+
+# one guild with role_count roles, channel_count channels and the members with the ids in member_ids
+# (default 1 to member_count), each with roles_per_member of those roles.
+def build_server(member_count, channel_count=10, role_count=20, roles_per_member=3, latency_ms=0.0, jitter_ms=0.0,
+				 member_ids=None):
+	client = FakeClient(FakeHTTP(latency_ms, jitter_ms))
+	roles = [FakeRole(1000 + index, f"role{index}") for index in range(role_count)]
+	guild = FakeGuild(1, roles)
+	for channel_id in range(1, channel_count + 1):
+		client.channels[channel_id] = FakeChannel(client, channel_id)
+	# a few hundred role combinations shared by everyone, instead of one list per member.
+	combinations = [tuple(random.sample(roles, min(roles_per_member, role_count))) for _ in range(256)]
+	for user_id in (member_ids if member_ids is not None else range(1, member_count + 1)):
+		member = FakeMember(client, user_id, random.choice(combinations))
+		client.users[user_id] = member
+		guild.add_member(member)
+	return client, guild
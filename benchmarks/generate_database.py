@@ -0,0 +1,181 @@
+"""
+INFO:
+
+	Generates a realistic Skender database with many users, for the benchmarks of the Skender discord bot.
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	The tables are created by database.SkenderDatabaseCreator (so always the same as the bot's), then filled with:
+		- users:            --users of them. Most are poor, a few are very rich (like on a real server).
+		                    total_xp and current_xp_level match the levels table.
+		- levels:           100 levels.
+		- items_catalog:    50 items (some with a stock, some unlimited).
+		- user_items:       30% of the users own 1 to 5 different items.
+		- user_used_items:  10% of the users used 1 or 2 items.
+		- income_roles:     INCOME_ROLE_IDS (roles 1000 to 1003, same ids as fake_discord.build_server()).
+		- variables, level_channels, actions: the default values of the bot.
+
+	Same --seed, same database. Used by database_operations.py, can also be run by itself:
+		python benchmarks/generate_database.py --users 100000 --output /tmp/skender-100k.sqlite
+
+"""
+
+import common
+
+import argparse, bisect, json, os, random, sqlite3
+from datetime import datetime, timedelta
+
+import database
+
+
+# discord ids are big numbers (snowflakes), the users get USER_ID_BASE + 1, + 2, ...
+USER_ID_BASE = 100_000_000_000_000_000
+INCOME_ROLE_IDS = (1000, 1001, 1002, 1003)
+LEVEL_COUNT = 100
+ITEM_COUNT = 50
+CHUNK = 50_000
+
+# the variables the database handler reads (a fresh bot gets them from the setup walkthrough).
+DEFAULT_VARIABLES = (
+	("currency_emoji_name", "str", "unset"),
+	("income_reset", "str", "true"),
+	("common_reset_time", "str", None),
+	("last_global_income_update", "str", None),
+	("min_amount_to_blackjack", "int", "100"),
+	("max_amount_to_blackjack", "int", "0"),
+	("min_amount_to_roulette", "int", "100"),
+	("max_amount_to_roulette", "int", "0"),
+	("delay_blackjack", "int", "0"),
+	("delay_roulette", "int", "0"),
+	("levels_info_channel", "int", "0"),
+	("xp_per_msg", "int", "10"),
+	("passive_income_per_msg", "int", "0"),
+	("xp_and_passive_income_delay", "int", "5"),
+)
+DEFAULT_ACTIONS = (
+	("slut", 10, 50, 50, 400, 2, 5, None, None),
+	("crime", 60, 30, 100, 1200, 10, 20, None, None),
+	("work", 10, None, 50, 200, None, None, None, None),
+	("rob", 45, 50, None, None, 10, 20, 10, 20),
+)
+
+
+def user_id(number):
+	return USER_ID_BASE + number
+
+def level_xps():
+	# level 1 at 100 xp, then more and more xp per level.
+	return [100 * level * level for level in range(1, LEVEL_COUNT + 1)]
+
+# a lot of small balances, a few huge ones.
+def random_money(rng):
+	return int(rng.lognormvariate(7, 2)) if rng.random() < 0.9 else 0
+
+
+def generate_database(path, users, seed=1):
+	rng = random.Random(seed)
+	database.SkenderDatabaseCreator(path).create_database()
+
+	connection = sqlite3.connect(path)
+	# it's a throwaway file until it's finished, no need to wait for the disk.
+	connection.execute("PRAGMA journal_mode=WAL")
+	connection.execute("PRAGMA synchronous=OFF")
+
+	with connection:
+		connection.executemany(
+			"INSERT OR REPLACE INTO variables (var_name, var_type, var_value, var_default_value) VALUES (?, ?, ?, ?)",
+			[(name, var_type, value, value) for name, var_type, value in DEFAULT_VARIABLES]
+		)
+		connection.execute("INSERT INTO level_channels (mode, channels) VALUES (?, ?)", ("exclude", json.dumps(["none"])))
+		connection.executemany(
+			"INSERT OR IGNORE INTO actions (action_name, delay, proba, min_revenue, max_revenue, "
+			"min_lose_amount_percentage, max_lose_amount_percentage, min_gain_amount_percentage, "
+			"max_gain_amount_percentage) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+			DEFAULT_ACTIONS
+		)
+		xps = level_xps()
+		connection.executemany(
+			"INSERT OR REPLACE INTO levels (level_number, level_xp) VALUES (?, ?)",
+			list(zip(range(1, LEVEL_COUNT + 1), xps))
+		)
+		connection.executemany(
+			"INSERT INTO income_roles (role_id, role_income) VALUES (?, ?)",
+			[(role_id, 100 * (index + 1)) for index, role_id in enumerate(INCOME_ROLE_IDS)]
+		)
+
+		expiration = str(datetime.today() + timedelta(days=3650))
+		items = []
+		for number in range(1, ITEM_COUNT + 1):
+			stock = "unlimited" if number % 3 else str(rng.randint(100, 10_000))
+			items.append((
+				f"item{number}", f"Item {number}", rng.randint(10, 50_000), f"generated item {number}", 3650,
+				stock, "unlimited", "unlimited", json.dumps(["none"]), json.dumps(["none"]), json.dumps(["none"]),
+				json.dumps(["none"]), "none", "none", expiration, "EMPTY"
+			))
+		connection.executemany(
+			"INSERT INTO items_catalog (item_name, display_name, price, description, duration, amount_in_stock, "
+			"max_amount, max_amount_per_transaction, required_roles, given_roles, removed_roles, excluded_roles, "
+			"maximum_balance, reply_message, expiration_date, item_img_url) "
+			"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+			items
+		)
+
+	# the users in chunks (1M rows at once would take a lot of memory).
+	item_names = [item[0] for item in items]
+	for start in range(1, users + 1, CHUNK):
+		user_rows, item_rows, used_rows = [], [], []
+		for number in range(start, min(start + CHUNK, users + 1)):
+			total_xp = int(rng.expovariate(1 / 5000))
+			level = bisect.bisect_right(xps, total_xp)
+			user_rows.append((user_id(number), f"user{number}", random_money(rng), random_money(rng), total_xp, level))
+			if rng.random() < 0.3:
+				for item_name in rng.sample(item_names, rng.randint(1, 5)):
+					item_rows.append((user_id(number), item_name, rng.randint(1, 20)))
+			if rng.random() < 0.1:
+				for item_name in rng.sample(item_names, rng.randint(1, 2)):
+					used_rows.append((user_id(number), item_name, rng.randint(1, 5)))
+		with connection:
+			connection.executemany(
+				"INSERT INTO users (user_id, user_discord_nick, cash, bank, total_xp, current_xp_level) "
+				"VALUES (?, ?, ?, ?, ?, ?)", user_rows
+			)
+			connection.executemany("INSERT INTO user_items (user_id, item_name, amount) VALUES (?, ?, ?)", item_rows)
+			connection.executemany(
+				"INSERT INTO user_used_items (user_id, item_name, amount) VALUES (?, ?, ?)", used_rows
+			)
+
+	connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+	connection.close()
+	return path
+
+# the generated file is kept in directory and used again the next time (1M users takes a while).
+def cached_database(directory, users, seed=1):
+	os.makedirs(directory, exist_ok=True)
+	path = os.path.join(directory, f"generated-{users}-seed{seed}.sqlite")
+	if not os.path.exists(path):
+		temporary = path + ".part"
+		for leftover in (temporary, temporary + "-wal", temporary + "-shm"):
+			if os.path.exists(leftover):
+				os.remove(leftover)
+		generate_database(temporary, users, seed)
+		os.replace(temporary, path)
+	return path
+
+
+def main():
+	parser = argparse.ArgumentParser(description="generate a Skender database with many users")
+	parser.add_argument("--users", type=int, default=100_000)
+	parser.add_argument("--seed", type=int, default=1)
+	parser.add_argument("--output", required=True, help="the sqlite file to create (must not exist yet)")
+	args = parser.parse_args()
+
+	if os.path.exists(args.output):
+		raise SystemExit(f"{args.output} already exists.")
+	with common.Timer() as timer:
+		generate_database(args.output, args.users, args.seed)
+	print(f"{args.users:,} users generated in {timer.elapsed:.1f} s: {args.output} "
+		  f"({os.path.getsize(args.output) / 1024 / 1024:.1f} MiB)")
+
+
+if __name__ == "__main__":
+	main()
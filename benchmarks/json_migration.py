@@ -0,0 +1,218 @@
+"""
+INFO:
+
+	Benchmark: the migration of a legacy JSON database (database/database_migration.py) with many users.
+
+	A legacy database.json with --users users is generated (written piece by piece, so generating 500k users
+	doesn't need the memory we want to measure), then migrated to SQLite:
+		- "load":    the old way: json.load() of the whole file, every row built in lists, then executemany
+		             by chunks of 500 (default journal / synchronous).
+		- "stream":  SkenderMigration.import_json(): SkenderJsonStream reads the file piece by piece,
+		             SkenderMigration.CHUNK_ROWS rows per transaction, journal in memory and synchronous=OFF.
+		- "resume":  the streaming import gets killed (SIGKILL) in the middle, then started again:
+		             it has to go on (or start again if the file got damaged) and end with the same database.
+	Every run is in its own process, so the peak memory (max RSS) is only that run's.
+
+	usage (from the repository root):
+		python benchmarks/json_migration.py --users 500000
+		python benchmarks/json_migration.py --users 100000 --modes stream,resume
+
+"""
+
+import common
+
+import argparse, json, math, multiprocessing, os, random, resource, signal, sqlite3, tempfile
+
+from database.database_migration import SkenderMigration
+import generate_database
+
+
+ITEM_COUNT = 50
+INCOME_ROLE_COUNT = 10
+MODES = ("load", "stream", "resume")
+
+
+"""
+LEGACY FILE
+"""
+
+def legacy_user(rng, number, item_names):
+	def owned():
+		if rng.random() >= 0.3:
+			return "none"
+		return [[name, rng.randint(1, 20)] for name in rng.sample(item_names, rng.randint(1, 5))]
+	# floats like in the old bot (the migration rounds them up).
+	return {
+		"user_id": generate_database.user_id(number), "cash": round(rng.lognormvariate(7, 2), 2),
+		"bank": round(rng.lognormvariate(7, 2), 2), "items": owned(), "used_items": owned(),
+		"last_slut": "none", "last_work": "none", "last_crime": "none", "last_rob": "none",
+	}
+
+def legacy_item(number):
+	return {
+		"name": f"item{number}", "price": 100 * number, "description": f"legacy item {number}", "duration": 365,
+		"amount_in_stock": "unlimited", "required_roles": ["none"], "given_roles": ["none"],
+		"removed_roles": ["none"], "maximum_balance": "none", "reply_message": "none",
+		"expiration_date": "2030-01-01 00:00:00.000000",
+	}
+
+# returns the sum of the (rounded up) cash, to check the migrated database.
+def write_legacy_json(path, users, seed):
+	rng = random.Random(seed)
+	item_names = [f"item{number}" for number in range(1, ITEM_COUNT + 1)]
+	total_cash = 0
+	with open(path, "w", encoding="utf-8") as file:
+		# sections we don't migrate come first, the reader has to skip them.
+		file.write('{"symbols": {"currency": "coin", "income_reset": "true"}, "variables": {"work": {"delay": 10}},\n')
+		file.write('"userdata": [\n')
+		for number in range(1, users + 1):
+			user = legacy_user(rng, number, item_names)
+			total_cash += math.ceil(user["cash"])
+			file.write(("" if number == 1 else ",\n") + json.dumps(user))
+		file.write('\n],\n"items": [\n')
+		file.write(",\n".join(json.dumps(legacy_item(number)) for number in range(1, ITEM_COUNT + 1)))
+		file.write('\n],\n"income_roles": [\n')
+		file.write(",\n".join(json.dumps({"role_id": 1000 + index, "role_income": 100 * (index + 1),
+										  "last_updated": "none"}) for index in range(INCOME_ROLE_COUNT)))
+		file.write("\n]}\n")
+	return total_cash
+
+
+"""
+MIGRATIONS
+"""
+
+def new_migration(source, target):
+	migration = SkenderMigration()
+	migration.path_to_json, migration.path_to_sqlite = source, target
+	return migration
+
+def migrate_load(source, target):
+	migration = new_migration(source, target)
+	migration.start_migration()
+	data = json.load(open(source))
+	users, user_items, used_items = [], [], []
+	for user_object in data["userdata"]:
+		user_row, item_rows, used_item_rows = migration.user_rows(user_object)
+		users.append(user_row)
+		user_items.extend(item_rows)
+		used_items.extend(used_item_rows)
+	items = [migration.item_row(item) for item in data["items"]]
+	roles = [migration.income_role_row(role) for role in data["income_roles"]]
+
+	def executemany_by_chunks(query, rows, chunk=500):
+		for index in range(0, len(rows), chunk):
+			migration.db_cursor.executemany(query, rows[index:index + chunk])
+		migration.database.commit()
+
+	executemany_by_chunks("INSERT OR REPLACE INTO users (user_id, user_discord_nick, cash, bank) VALUES (?, ?, ?, ?)", users)
+	executemany_by_chunks("INSERT OR REPLACE INTO user_items (user_id, item_name, amount) VALUES (?, ?, ?)", user_items)
+	executemany_by_chunks("INSERT OR REPLACE INTO user_used_items (user_id, item_name, amount) VALUES (?, ?, ?)", used_items)
+	executemany_by_chunks(
+		"INSERT OR IGNORE INTO items_catalog (item_name, display_name, price, description, duration, amount_in_stock, "
+		"max_amount, max_amount_per_transaction, required_roles, given_roles, removed_roles, excluded_roles, "
+		"maximum_balance, reply_message, expiration_date, item_img_url) "
+		"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", items
+	)
+	executemany_by_chunks("INSERT OR REPLACE INTO income_roles (role_id, role_income) VALUES (?, ?)", roles)
+	# (made by start_migration() for the streaming import, the old way didn't have it)
+	migration.db_cursor.execute("DROP TABLE json_migration_progress")
+	migration.close_database()
+
+def migrate_stream(source, target):
+	migration = new_migration(source, target)
+	migration.start_migration()
+	migration.import_json()
+	migration.close_database()
+
+
+# in a child process: runs the migration, sends back the time and the max RSS.
+def child(function, source, target, connection):
+	before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	with common.Timer() as timer:
+		function(source, target)
+	after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	# ru_maxrss is in KiB on linux.
+	connection.send((timer.elapsed, before / 1024, after / 1024))
+
+def run_in_process(function, source, target, kill_after=None):
+	receiver, sender = multiprocessing.Pipe(duplex=False)
+	process = multiprocessing.Process(target=child, args=(function, source, target, sender))
+	process.start()
+	if kill_after is not None:
+		process.join(kill_after)
+		if process.is_alive():
+			os.kill(process.pid, signal.SIGKILL)
+			process.join()
+			return None
+	process.join()
+	if process.exitcode != 0:
+		raise SystemExit(f"migration process failed (exit code {process.exitcode})")
+	return receiver.recv()
+
+def check(target, users, total_cash):
+	connection = sqlite3.connect(target)
+	count, cash = connection.execute("SELECT COUNT(*), COALESCE(SUM(cash), 0) FROM users").fetchone()
+	roles = connection.execute("SELECT COUNT(*) FROM income_roles").fetchone()[0]
+	leftover = connection.execute(
+		"SELECT COUNT(*) FROM sqlite_master WHERE name = 'json_migration_progress'"
+	).fetchone()[0]
+	integrity = connection.execute("PRAGMA quick_check").fetchone()[0]
+	connection.close()
+	problems = []
+	if count != users or cash != total_cash:
+		problems.append(f"{count:,} users / {cash:,} cash instead of {users:,} / {total_cash:,}")
+	if roles != INCOME_ROLE_COUNT:
+		problems.append(f"{roles} income roles instead of {INCOME_ROLE_COUNT}")
+	if leftover:
+		problems.append("json_migration_progress still there")
+	if integrity != "ok":
+		problems.append(f"quick_check: {integrity}")
+	return problems
+
+
+def main():
+	parser = argparse.ArgumentParser(description="legacy JSON migration: json.load vs streaming import")
+	parser.add_argument("--users", type=int, default=500_000)
+	parser.add_argument("--modes", default=",".join(MODES), help=f"comma separated ({', '.join(MODES)})")
+	parser.add_argument("--kill-at", type=float, default=0.5, help="resume: kill after this part of the stream time")
+	parser.add_argument("--seed", type=int, default=1)
+	parser.add_argument("--directory", default=None, help="where to put the files (use a real disk)")
+	args = parser.parse_args()
+	modes = [mode.strip() for mode in args.modes.split(",")]
+	for mode in modes:
+		if mode not in MODES:
+			raise SystemExit(f"unknown mode: {mode} (known: {', '.join(MODES)})")
+	# the children get the imported modules (and sys.path) of this process.
+	multiprocessing.set_start_method("fork")
+
+	directory = tempfile.mkdtemp(prefix="skender-bench-", dir=args.directory)
+	try:
+		source = os.path.join(directory, "database.json")
+		with common.Timer() as timer:
+			total_cash = write_legacy_json(source, args.users, args.seed)
+		print(f"\nlegacy JSON with {args.users:,} users: {os.path.getsize(source) / 1024 / 1024:.1f} MiB "
+			  f"(generated in {timer.elapsed:.1f} s)")
+
+		stream_seconds = None
+		for mode in modes:
+			target = os.path.join(directory, f"{mode}.sqlite")
+			if mode == "resume":
+				# how long the stream run took (or a guess), killed after --kill-at of that.
+				kill_after = (stream_seconds or args.users / 100_000) * args.kill_at
+				killed = run_in_process(migrate_stream, source, target, kill_after=kill_after) is None
+				print(f"  resume: killed after {kill_after:.1f} s" if killed else "  resume: finished before the kill")
+			result = run_in_process(migrate_load if mode == "load" else migrate_stream, source, target)
+			elapsed, rss_before, rss_after = result
+			if mode == "stream":
+				stream_seconds = elapsed
+			problems = check(target, args.users, total_cash)
+			print(f"  {mode:<7} {elapsed:8.2f} s  {args.users / elapsed:10,.0f} users/s  "
+				  f"max RSS {rss_after:8.1f} MiB (+{rss_after - rss_before:.1f} MiB)  "
+				  f"{'ok' if not problems else 'WRONG: ' + ', '.join(problems)}")
+	finally:
+		common.remove_temp_database(directory)
+
+
+if __name__ == "__main__":
+	main()
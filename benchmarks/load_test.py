@@ -0,0 +1,239 @@
+"""
+INFO:
+
+	Load test: the whole bot (bot.py + database handler) with fake discord messages, no discord needed.
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	What it does:
+		- builds a fake server (fake_discord.py): members with roles, channels, a stub client.
+		- starts SkenderBot on a temporary database (on_ready with the default setup, like a fresh bot),
+		  then adds some levels, an item, income roles and gives every member money.
+		- sends messages like main.py on_message does: build_context, then handle_message_xp_and_passive_income
+		  and handle_message. The mix of messages is given with --mix, e.g. "chat=80,work=5,bal=5,..."
+			chat:     normal message (only xp / passive chat income).
+			work:     +work
+			bal:      +bal
+			buy-item: +buy-item <item> 1
+			lb:       +lb [page]
+			collect:  +collect
+		- --rate: messages per second (like users would send them, even if the bot is behind).
+		  --rate 0: as fast as possible, with --concurrency messages handled at the same time.
+
+	Reports the throughput, p50/p95/p99 latency of every kind of message, the event loop lag,
+	and the +perf table of the bot (where the time goes: db_lock, SQLite, discord).
+
+	usage (from the repository root, needs the bot's requirements since it imports bot.py):
+		python benchmarks/load_test.py --members 5000 --messages 20000 --rate 0 --concurrency 50
+		python benchmarks/load_test.py --messages 20000 --rate 500 --discord-ms 40 --mix chat=90,work=4,bal=4,lb=2
+
+"""
+
+import common
+
+import argparse, asyncio, contextlib, io, random, time
+
+import bot
+import fake_discord
+
+
+ITEM_NAME = "potion"
+DEFAULT_MIX = "chat=80,work=5,bal=5,buy-item=3,lb=2,collect=5"
+
+
+def parse_mix(text):
+	mix = {}
+	for part in text.split(","):
+		kind, _, weight = part.partition("=")
+		kind = kind.strip()
+		if kind not in ("chat", "work", "bal", "buy-item", "lb", "collect"):
+			raise SystemExit(f"unknown message kind in --mix: {kind}")
+		mix[kind] = float(weight or 1)
+	return mix
+
+def message_content(kind, prefix):
+	if kind == "chat":
+		return random.choice(("hello", "how is everyone doing", "gg", "lol", "anyone up for a game ?"))
+	if kind == "buy-item":
+		return f"{prefix}buy-item {ITEM_NAME} 1"
+	if kind == "lb":
+		return f"{prefix}lb" if random.random() < 0.7 else f"{prefix}lb {random.randint(2, 5)}"
+	return f"{prefix}{kind}"
+
+
+"""
+SET UP
+"""
+
+async def start_bot(args, client, path):
+	skender = bot.SkenderBot(client, "botmaster", "+", path_to_db=path)
+	# no perf_report.txt from the load test.
+	skender.perf_dump_minutes = 0
+	handler = skender.db_handler
+	handler.chat_rewards_flush_seconds = args.flush
+
+	# fresh database: the setup walkthrough in channel 1 (nobody answers, so the default values are used).
+	await skender.on_ready("load test", 1)
+
+	# the values of the test instead of the defaults.
+	for name, value in (("xp_per_msg", 10), ("passive_income_per_msg", 2),
+						("xp_and_passive_income_delay", args.xp_delay)):
+		await handler.execute_commit("UPDATE variables SET var_value = ? WHERE var_name = ?", (str(value), name))
+	await handler.execute_commit("UPDATE actions SET delay = ?", (args.action_delay,))
+	await handler.executemany(
+		"INSERT OR REPLACE INTO levels (level_number, level_xp) VALUES (?, ?)",
+		[(level, level * 500) for level in range(1, 51)]
+	)
+	# everyone starts with money, so +buy-item and +work do the full work and not just "not enough money".
+	await handler.executemany(
+		"INSERT OR IGNORE INTO users (user_id, user_discord_nick, cash, bank) VALUES (?, ?, ?, ?)",
+		[(user_id, f"user{user_id}", 1_000_000, random.randint(0, 100_000))
+		 for user_id in range(1, args.members + 1)]
+	)
+	await handler.executemany(
+		"INSERT INTO income_roles (role_id, role_income) VALUES (?, ?)",
+		[(1000 + index, 100 * (index + 1)) for index in range(5)]
+	)
+	await handler.create_new_item(
+		None, "Potion", ITEM_NAME, 10, "load test item", 365, "unlimited", "unlimited", "unlimited",
+		["none"], ["none"], ["none"], "none", "Enjoy !", "EMPTY", ["none"]
+	)
+
+	await handler.load_config_snapshot()
+	await handler.get_xp_infos()
+	await handler.load_levels()
+	return skender
+
+
+"""
+RUN
+"""
+
+# like on_message in main.py
+async def on_message(skender, message):
+	ctx = skender.build_context(message)
+	if ctx is None: return
+	await skender.handle_message_xp_and_passive_income(message, ctx)
+	await skender.handle_message(message, ctx)
+
+async def run(args, client, guild, path):
+	skender = await start_bot(args, client, path)
+
+	mix = parse_mix(args.mix)
+	kinds, weights = list(mix), list(mix.values())
+	channels = list(client.channels.values())
+	members = guild.members
+	messages = []
+	for kind in random.choices(kinds, weights, k=args.messages):
+		author = random.choice(members)
+		messages.append((kind, fake_discord.FakeMessage(
+			message_content(kind, skender.prefix), author, random.choice(channels), guild
+		)))
+
+	latencies = {kind: [] for kind in kinds}
+	failures = []
+
+	async def handle(kind, message, arrived):
+		try:
+			await on_message(skender, message)
+		except Exception as e:
+			failures.append(f"{kind}: {e!r}")
+		latencies[kind].append(time.perf_counter() - arrived)
+
+	skender.perf.reset()
+	requests_before = client.http.request_count
+	monitor = common.LoopLagMonitor()
+	await monitor.start()
+
+	# the bot prints every command, that would be most of the time here.
+	output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+	with output, common.Timer() as timer:
+		if args.rate > 0:
+			# open loop: the messages arrive at their time, even if the bot is still busy with the ones before.
+			# the latency is counted from the arrival, so waiting for the bot counts too.
+			tasks, start = [], time.perf_counter()
+			for index, (kind, message) in enumerate(messages):
+				arrival = start + index / args.rate
+				delay = arrival - time.perf_counter()
+				if delay > 0:
+					await asyncio.sleep(delay)
+				tasks.append(asyncio.create_task(handle(kind, message, arrival)))
+			await asyncio.gather(*tasks)
+		else:
+			# closed loop: --concurrency messages at the same time, the next one as soon as one is done.
+			queue = iter(messages)
+
+			async def worker():
+				for kind, message in queue:
+					await handle(kind, message, time.perf_counter())
+
+			await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+	lag = await monitor.stop()
+
+	# what is still in memory gets saved too (part of the cost, but not of the latency of the messages).
+	skender.db_handler.chat_rewards_task.cancel()
+	with common.Timer() as flush_timer:
+		await skender.db_handler.flush_chat_rewards()
+
+	report = skender.perf.report()
+	commits = skender.db_handler.engine.commit_count
+	skender.db_handler.close_database()
+	return {
+		"elapsed": timer.elapsed, "latencies": latencies, "lag": lag, "failures": failures, "report": report,
+		"commits": commits, "flush": flush_timer.elapsed, "discord_requests": client.http.request_count - requests_before,
+		"internal_errors": sum(channel.internal_errors for channel in channels),
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description="load test of the whole bot with fake discord messages")
+	parser.add_argument("--members", type=int, default=5000)
+	parser.add_argument("--channels", type=int, default=20)
+	parser.add_argument("--messages", type=int, default=20000)
+	parser.add_argument("--mix", default=DEFAULT_MIX, help=f"kind=weight,... (default {DEFAULT_MIX})")
+	parser.add_argument("--rate", type=float, default=0, help="messages per second, 0 = as fast as possible")
+	parser.add_argument("--concurrency", type=int, default=50, help="messages at the same time with --rate 0")
+	parser.add_argument("--discord-ms", type=float, default=0.0, help="simulated discord API latency")
+	parser.add_argument("--discord-jitter-ms", type=float, default=0.0, help="random extra latency, 0 to x ms")
+	parser.add_argument("--xp-delay", type=int, default=0, help="xp / passive income delay in minutes")
+	parser.add_argument("--action-delay", type=int, default=0, help="cooldown of +work etc. in minutes")
+	parser.add_argument("--flush", type=float, default=5.0, help="seconds between two chat reward flushes")
+	parser.add_argument("--seed", type=int, default=None, help="random seed, for the same messages every run")
+	parser.add_argument("--directory", default=None, help="where to put the temporary database (use a real disk)")
+	parser.add_argument("--verbose", action="store_true", help="show what the bot prints")
+	args = parser.parse_args()
+
+	if args.seed is not None:
+		random.seed(args.seed)
+
+	client, guild = fake_discord.build_server(
+		args.members, args.channels, latency_ms=args.discord_ms, jitter_ms=args.discord_jitter_ms
+	)
+	directory, path = common.create_temp_database(directory=args.directory)
+	try:
+		result = asyncio.run(run(args, client, guild, path))
+	finally:
+		common.remove_temp_database(directory)
+
+	mode = f"{args.rate:,.0f} messages/s offered" if args.rate > 0 else f"as fast as possible, {args.concurrency} at once"
+	print(f"\n{args.messages:,} messages ({mode}), {args.members:,} members, {args.channels} channels, "
+		  f"discord {args.discord_ms:g} ms")
+	print(f"  throughput: {args.messages / result['elapsed']:,.0f} messages/s  ({result['elapsed']:.2f} s)  "
+		  f"{result['commits']:,} commits  {result['discord_requests']:,} discord calls  "
+		  f"last flush {result['flush'] * 1000:.1f} ms")
+	print("  latency:")
+	for kind, values in result["latencies"].items():
+		print(f"    {kind:<9} {common.format_summary(common.summarize(values))}")
+	every = [value for values in result["latencies"].values() for value in values]
+	print(f"    {'all':<9} {common.format_summary(common.summarize(every))}")
+	print(f"  loop lag: {common.format_summary(result['lag'])}")
+	if result["failures"] or result["internal_errors"]:
+		print(f"  ERRORS: {len(result['failures'])} exceptions, {result['internal_errors']} 'Internal Error' embeds")
+		for failure in result["failures"][:5]:
+			print(f"    {failure}")
+	print("\n  +perf:")
+	print("\n".join(f"    {line}" for line in result["report"].splitlines()))
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,155 @@
+"""
+INFO:
+
+	Benchmark: the automatic maintenance of the database (database/maintenance.py, run_maintenance()).
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	A generated database (generate_database.py, --users users, kept in --cache) is copied and opened with the
+	database handler like the bot does. Then:
+		1. a write that touches every user (like an income update of everyone): the -wal file grows to the size
+		   of the users table and stays that big, until the maintenance does its TRUNCATE checkpoint.
+		   The first maintenance also runs the first PRAGMA optimize (= ANALYZE, there never was one).
+		2. clean_database: the newest --left percent of the users left the server (e.g. a wave of accounts that
+		   joined together), then the vacuum: the switch to auto_vacuum=INCREMENTAL (full VACUUM) the first time,
+		   and after a second wave the incremental vacuum.
+	After each of them, change_balance writes come in bursts of 2 s (--rate per second) and the maintenance runs
+	in the first pause (no write for --quiet-seconds), like in the bot. Reports the sizes of the files, how long
+	every step took and the latency of the writes while the maintenance ran.
+
+	usage (from the repository root):
+		python benchmarks/maintenance.py --users 1000000
+
+"""
+
+import common
+
+import argparse, asyncio, os, random, shutil, tempfile, time
+
+import database_operations
+import fake_discord
+import generate_database
+
+
+def mib(size):
+	return f"{size / 1024 / 1024:,.1f} MiB"
+
+
+async def writes_at_rate(handler, users, rate, latencies, stop):
+	tasks = []
+
+	async def write(arrival):
+		await handler.change_balance(generate_database.user_id(random.randint(1, users)), 1, "cash", mode="add")
+		latencies.append(time.perf_counter() - arrival)
+
+	start = time.perf_counter()
+	index = 0
+	while not stop.is_set():
+		# open loop: the writes come at their time, even if the ones before are not done yet.
+		arrival = start + index / rate
+		delay = arrival - time.perf_counter()
+		if delay > 0:
+			await asyncio.sleep(delay)
+		tasks.append(asyncio.create_task(write(arrival)))
+		index += 1
+	await asyncio.gather(*tasks)
+
+# like maintenance_loop(), but right when the bot got quiet instead of every check_seconds.
+async def maintain_when_quiet(handler):
+	while handler.engine.idle_seconds() < handler.maintenance.quiet_seconds:
+		await asyncio.sleep(0.01)
+	return await handler.run_maintenance()
+
+async def run(args, path):
+	# who is still on the server after each wave: the newest --left percent leave first, then the next ones.
+	wave = args.users * args.left // 100
+
+	def server(left_waves):
+		members = (generate_database.user_id(number) for number in range(1, args.users - wave * left_waves + 1))
+		return fake_discord.build_server(0, channel_count=1, member_ids=members)
+
+	# built before: with a million members it takes a while, and it would block the event loop.
+	client, _ = server(0)
+	guilds = {wave_number: server(wave_number)[1] for wave_number in (1, 2)}
+	handler = await database_operations.open_handler(client, path)
+	# like on_ready (change_balance and the chat rewards need it).
+	await handler.get_xp_infos()
+	handler.maintenance.quiet_seconds = args.quiet_seconds
+	rows, latencies = [], []
+
+	async def bursty_writes(stop):
+		while not stop.is_set():
+			burst = asyncio.Event()
+			task = asyncio.create_task(writes_at_rate(handler, args.users, args.rate, latencies, burst))
+			await asyncio.sleep(2)
+			burst.set()
+			await task
+			await asyncio.sleep(args.quiet_seconds * 2)
+
+	async def maintenance_with_writes(label):
+		stop = asyncio.Event()
+		writer = asyncio.create_task(bursty_writes(stop))
+		# let the first burst start.
+		await asyncio.sleep(0.1)
+		with common.Timer() as timer:
+			steps = await maintain_when_quiet(handler)
+		stop.set()
+		await writer
+		rows.append((label, timer.elapsed, f"{', '.join(steps) or 'nothing'}, file {mib(os.path.getsize(path))}, "
+										   f"WAL {mib(handler.wal_size())}"))
+
+	with common.Timer() as timer:
+		await handler.execute_commit("UPDATE users SET bank = bank + 1", user="all")
+	rows.append(("write to every user", timer.elapsed, f"WAL {mib(handler.wal_size())}"))
+	await maintenance_with_writes("maintenance")
+
+	for wave_number in (1, 2):
+		size_before = os.path.getsize(path)
+		with common.Timer() as timer:
+			status, counts = await handler.clean_database(guilds[wave_number])
+		pages, free, auto_vacuum = await handler.database_pages()
+		rows.append((f"clean_database wave {wave_number}", timer.elapsed,
+					 f"{counts['users']:,} users removed, {free:,} of {pages:,} pages free, file {mib(size_before)}"))
+		await maintenance_with_writes(f"maintenance wave {wave_number}")
+
+	check = (await handler.execute("PRAGMA quick_check")).fetchone()[0]
+	handler.close_database()
+	return rows, latencies, handler.maintenance.stats(), check
+
+
+def main():
+	parser = argparse.ArgumentParser(description="automatic database maintenance: checkpoint, optimize, vacuum")
+	parser.add_argument("--users", type=int, default=1_000_000)
+	parser.add_argument("--left", type=int, default=20, help="percent of the users leaving in each wave")
+	parser.add_argument("--rate", type=float, default=200, help="writes per second during the bursts")
+	parser.add_argument("--quiet-seconds", type=float, default=0.5, help="no write for that long = quiet")
+	parser.add_argument("--seed", type=int, default=1)
+	parser.add_argument("--cache", default=os.path.join(tempfile.gettempdir(), "skender-bench-databases"),
+						help="where the generated databases are kept")
+	parser.add_argument("--directory", default=None, help="where to put the working copy (use a real disk)")
+	args = parser.parse_args()
+	random.seed(args.seed)
+
+	template = generate_database.cached_database(args.cache, args.users, args.seed)
+	work_directory = tempfile.mkdtemp(prefix="skender-bench-", dir=args.directory)
+	try:
+		path = os.path.join(work_directory, "work.sqlite")
+		shutil.copyfile(template, path)
+		size = os.path.getsize(path)
+		rows, latencies, stats, check = asyncio.run(run(args, path))
+	finally:
+		common.remove_temp_database(work_directory)
+
+	print(f"\n{args.users:,} users, {mib(size)}, {args.rate:g} writes/s in bursts of 2 s "
+		  f"(the maintenance times include the wait for a quiet moment)")
+	for label, seconds, detail in rows:
+		print(f"  {label:<24} {seconds * 1000:10.1f} ms  {detail}")
+	print("  maintenance steps (in the writer thread):")
+	for step, numbers in stats.items():
+		print(f"    {step:<46} {numbers['runs']:>3}x  {numbers['total_seconds'] * 1000:10.1f} ms")
+	print(f"  writes during the maintenance  {common.format_summary(common.summarize(latencies))}")
+	print(f"  quick_check: {check}")
+
+
+if __name__ == "__main__":
+	main()
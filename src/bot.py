@@ -14,81 +14,47 @@ INFO:
 # general imports
 import discord
 import requests
+import asyncio, os
 
 # --> utilities.py			Import global utility functions.
 from utilities import SkenderUtilities
 # --> context.py			Import the "context" aka (our own) ctx, but for us to get channel etc. as easy to use objects.
 from context import CommandContext
+# --> commands.py			The command registry: @command(...) on every handler, used to find the command of a message.
+from commands import command_registry, command
 # --> database/__init__.py	Very important: the whole database handling !
 import database # includes our SkenderDatabaseHandler.
 
 
 class SkenderBot:
-	def __init__(self, client, admin_role, bot_prefix):
+	# path_to_db: another database file than database/database.sqlite (e.g. a temporary one for the benchmarks/).
+	def __init__(self, client, admin_role, bot_prefix, path_to_db=None):
 		self.client = client
 		self.prefix = bot_prefix
 		# now we can use the functions from SkenderUtilities as self.utils.function().
 		self.utils = SkenderUtilities(client, admin_role) # also pass the client.
 		# init the database handler.
-		self.db_handler = database.SkenderDatabaseHandler(client, admin_role)
+		self.db_handler = database.SkenderDatabaseHandler(client, admin_role, path_to_db=path_to_db)
 		# this gets passed to CommandContext, it could also just be set in context.py directly,
 		# but this makes it easier for the user to just edit the variables specific to his own bot in main.py
 		self.admin_role = admin_role
+		# per-command latency histograms, filled by handle_message and the database handler (see perf.py).
+		# also times every discord API call (sending messages, adding roles...).
+		self.perf = self.db_handler.perf
+		self.perf.install_discord_timer(client)
+		# every x minutes, the +perf report is appended to this file (for later analysis). 0 = never.
+		self.perf_dump_minutes = 15
+		self.perf_dump_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perf_report.txt")
+		self.perf_dump_task = None
 
 		# colors
 		self.discord_error_rgb_code = discord.Color.from_rgb(239, 83, 80)
 		self.discord_blue_rgb_code = discord.Color.from_rgb(3, 169, 244)
 		self.discord_success_rgb_code = discord.Color.from_rgb(102, 187, 106)
 
-		# all the usage values in a dictionary.
-
-		self.all_usages = {
-			"blackjack_usage": "blackjack <amount or all>",
-			"roulette_usage": "roulette <amount or all> <space>",
-			"slut_usage": "slut",
-			"crime_usage": "crime",
-			"work_usage": "work",
-			"rob_usage": "rob <user>",
-			"balance_usage": "balance [other-user]",
-			"deposit_usage": "deposit <amount or all>",
-			"withdraw_usage": "withdraw <amount or all>",
-			"give_usage": "give <@member> <amount or all>",
-			"leaderboard_usage": "leaderboard [page] [-cash | -bank | -total]",
-			"help_usage": "help",
-			"module_usage": "module [specific module]}\ntipp: use just module first.",
-			"add_money_usage": "add-money <@member> <amount>",
-			"remove_money_usage": "remove-money <@member> <amount> [cash/bank]",
-			"remove_money_role_usage": "remove-money-role <@role> <amount>",
-			"add_money_role_usage": "add-money-role <@role> <amount>",
-			"change_action_usage": "change-action <action_name> <variable> <new value>",
-			"change_variable_usage": "change-variable <variable> <new value>",
-			"change_currency_usage": "change-currency <new emoji name>",
-			"set_income_reset_usage": "set-income-reset <true/false>",
-			"remove_user_item_usage": "remove-user-item <@member> <item short name> <amount>",
-			"spawn_item_usage": "spawn-item <@member> <item short name> [amount]",
-			"clear_leaderboard_usage": "clear-db",
-			"create_item_usage": "create-item",
-			"delete_item_usage": "delete-item <item short name>",
-			"buy_item_usage": "buy-item <item short name> <amount>",
-			"give_item_usage": "give-item <@member> <item short name> [amount]",
-			"use_item_usage": "use <item short name> <amount>",
-			"inventory_usage": "inventory [page]",
-			"user_inventory_usage": "user-inventory <@member> [page]",
-			"catalog_usage": "catalog [item short name]",
-			"add_income_role_usage": "add-income-role <@role> <income>",
-			"remove_income_role_usage": "remove-income-role <@role>",
-			"update_income_role_usage": "update-income-role <@role> <new income>",
-			"list_roles_usage": "list-roles",
-			"collect_usage": "collect",
-			"update_income_usage": "update-income",
-			"add_xp_usage": "add-xp <@member> <amount>",
-			"remove_xp_usage": "remove-xp <@member> <amount>",
-			"check_level_usage": "level [@member]",
-			"all_levels_usage": "all-levels",
-			"level_leaderboard_usage": "level-lb [page]",
-			"change_levels_usage": "change-levels",
-			"set_passive_chat_income_usage": "set-passive-chat-income <new amount>"
-		}
+		# all the usage values in a dictionary, e.g. self.all_usages["deposit_usage"].
+		# they are written in the @command(...) decorator of each handler below (see commands.py).
+		self.all_usages = command_registry.all_usages()
 
 	"""
 	These functions get called through main.py
@@ -101,25 +67,56 @@ class SkenderBot:
 		await self.db_handler.create_database_default_layout(setup_channel_id)
 		# get channels loaded in the database handler
 		await self.db_handler.get_channel_infos()
+		# load the variables and actions tables into memory (config snapshot, see database/snapshots.py)
+		await self.db_handler.load_config_snapshot()
+		# and the action phrases (+work, +crime...), see database/phrases.py
+		await self.db_handler.load_action_phrases()
+		# and the levels (sorted, for the xp of every message), see load_levels()
+		await self.db_handler.load_levels()
+		# and the leaderboards (rank / page of +lb without counting in SQL), see database/ranking.py
+		await self.db_handler.load_rank_index()
 		# get xp variables loaded into database handler (xp per msg, passive income, delay for those two things)
 		await self.db_handler.get_xp_infos()
+		# save the xp and passive chat income collected in memory every few seconds
+		self.db_handler.start_chat_rewards_flush()
+		# write the perf report to a file every few minutes
+		self.start_perf_dump()
+		# a backup of the database every day (see database/backup.py)
+		self.db_handler.start_backup_task()
+		# WAL checkpoints, PRAGMA optimize and vacuum when the bot is quiet (see database/maintenance.py)
+		self.db_handler.start_maintenance_task()
 		# init the (custom) emoji (only possible here after the bot has started running)
-		self.db_handler.get_currency_symbol(first_run=True)
+		await self.db_handler.get_currency_symbol(first_run=True)
 		# show the bot as active !
 		activity = discord.Game(name=activity_msg)
 		await self.client.change_presence(status=discord.Status.online, activity=activity)
 
 		print("[BOT STARTED UP -- RUNNING]")
 
-	async def handle_message_xp_and_passive_income(self, message):
+	# the bot is stopping (see main.py): save what is only in memory, then close the database.
+	async def on_close(self):
+		if self.perf_dump_task is not None:
+			self.perf_dump_task.cancel()
+			self.perf_dump_task = None
+		await self.db_handler.shutdown_database()
+
+	# one context per message, for the xp and for the commands (see context.py).
+	# None if we can't build one (webhooks).
+	def build_context(self, message):
 		# created problems with webhooks when trying to get context for its object
 		try:
-			ctx = CommandContext(message, None, None)
+			return CommandContext(message, self.admin_role)
 		except ValueError:
-			return
-		await self.db_handler.handle_message_xp_and_passive_income(ctx, ctx.user)
+			return None
 
-	async def handle_message(self, message):
+	async def handle_message_xp_and_passive_income(self, message, ctx=None):
+		if ctx is None:
+			ctx = self.build_context(message)
+			if ctx is None: return
+		async with self.perf.measure("(chat)"):
+			await self.db_handler.handle_message_xp_and_passive_income(ctx, ctx.user)
+
+	async def handle_message(self, message, ctx=None):
 		# check if the message was supposed to be for our bot
 		# startswith() also works with a tuple.
 		if not ( message.content.startswith(self.prefix) ): return
@@ -156,203 +153,37 @@ class SkenderBot:
 
 		# very important ! we get the message channel etc. from this object without needing to always
 		# pass the variables through every function (for more see context.py).
-
-		# created problems with webhooks when trying to get context for its object
-		try:
-			ctx = CommandContext(message, self.admin_role, param)
-		except ValueError:
-			return
+		# normally already built in on_message (main.py) and shared with the xp handling.
+		if ctx is None:
+			ctx = self.build_context(message)
+			if ctx is None: return
+		ctx.param = param
 
 		# start processing the commands !
+		# every handler below registered itself with @command(...) (see commands.py),
+		# so this is one dictionary lookup, for the command name and for all its aliases.
+		entry = command_registry.get(command)
+		if entry is None:
+			return
+		# checks the admin role and the number of arguments, then calls the handler.
+		# measured under its main name, so "+bal" and "+balance" count together (see perf.py).
+		async with self.perf.measure(entry.name):
+			await command_registry.run(entry, self, ctx)
+
+	async def perf_dump_loop(self):
+		while True:
+			await asyncio.sleep(self.perf_dump_minutes * 60)
+			try:
+				# file writing is blocking, do it in a thread.
+				await asyncio.to_thread(self.perf.dump, self.perf_dump_path)
+			except Exception as e:
+				print(f"[LOG]: failed to write the perf report. Error: {e}")
 
-		if command in ["blackjack", "bj"]:
-			await self.handle_blackjack(ctx)
-			return
-
-		elif command in ["roulette"]:
-			await self.handle_roulette(ctx)
-			return
-
-		elif command in ["slut"]:
-			await self.handle_slut(ctx)
-			return
-
-		elif command in ["crime"]:
-			await self.handle_crime(ctx)
-			return
-
-		elif command in ["work"]:
-			await self.handle_work(ctx)
-			return
-
-		elif command in ["rob", "steal"]:
-			await self.handle_rob(ctx)
-			return
-
-		elif command in ["balance", "bal"]:
-			await self.handle_balance(ctx)
-			return
-
-		elif command in ["deposit", "dep"]:
-			await self.handle_deposit(ctx)
-			return
-
-		elif command in ["withdraw", "with"]:
-			await self.handle_withdraw(ctx)
-			return
-
-		elif command in ["give", "pay"]:
-			await self.handle_give(ctx)
-			return
-
-		elif command in ["leaderboard", "lb"]:
-			await self.handle_leaderboard(ctx)
-			return
-
-		elif command in ["help", "info"]:
-			await self.handle_help(ctx)
-			return
-
-		elif command in ["module", "module-info", "modules", "modules-info"]:
-			await self.handle_module(ctx)
-			return
-
-		elif command == "add-money":
-			await self.handle_change_money(ctx, mode="add")
-			return
-
-		elif command == "remove-money":
-			await self.handle_change_money(ctx, mode="remove")
-			return
-
-		# splitting change-action and change-variable for front end,
-		# but will be one command called back end.
-		elif command == "change":
-			await ctx.channel.send("Use change-action or change-variable")
-			return
-		elif command in {"change-action", "edit-action", "action-change"}:
-			await self.handle_change_action(ctx)
-			return
-		elif command in {"change-variable", "edit-variable", "variable-change"}:
-			await self.handle_change_variable(ctx)
-			return
-
-		elif command in {"change-currency", "edit-currency", "change-currency-symbol", "change-currency-emoji"}:
-			await self.handle_change_currency(ctx)
-			return
-
-		elif command in ["set-income-reset", "change-income-reset"]:
-			await self.handle_set_income_reset(ctx)
-			return
-
-		elif command in ["create-item", "new-item", "item-create"]:
-			await self.handle_create_item(ctx)
-			return
-
-		elif command in ["delete-item", "remove-item"]:
-			await self.handle_delete_item(ctx)
-			return
-
-		elif command in ["remove-user-item"]:
-			await self.handle_remove_user_item(ctx)
-			return
-
-		elif command in {"clear-db", "clean-db", "clear-database", "clean-database",
-				"clean-leaderboard", "clean-lb", "purge", "remove-gone-users", "remove-users"}:
-			await self.handle_clear_database(ctx)
-			return
-
-		elif command in ["buy-item", "get-item", "buy"]:
-			await self.handle_buy_item(ctx)
-			return
-
-		elif command in ["give-item"]:
-			await self.handle_give_item(ctx)
-			return
-
-		elif command in ["spawn-item", "spawn"]:
-			await self.handle_spawn_item(ctx)
-			return
-
-		elif command in ["use", "use-item"]:
-			await self.handle_use_item(ctx)
-			return
-
-		elif command in ["inventory", "inv"]:
-			await self.handle_inventory(ctx)
-			return
-
-		elif command in ["user-inventory", "user-inv"]:
-			await self.handle_user_inventory(ctx)
-			return
-
-		elif command in ["catalog", "items", "item-list", "list-items"]:
-			await self.handle_catalog(ctx)
-			return
-
-		elif command in ["add-income-role", "add-role-income"]:
-			await self.handle_income_role(ctx, mode="add")
-			return
-
-		elif command in ["remove-income-role", "delete-income-role", "remove-role-income", "delete-role-income"]:
-			await self.handle_income_role(ctx, mode="remove")
-			return
-
-		elif command in ["update-income-role", "update-role", "update-role-income"]:
-			await self.handle_income_role(ctx, mode="update")
-			return
-
-		elif command in ["add-money-role", "add-role-money"]:
-			await self.handle_money_role(ctx, mode="add")
-			return
-
-		elif command in ["remove-money-role", "remove-role-money"]:
-			await self.handle_money_role(ctx, mode="remove")
-			return
-
-		elif command in ["list-roles", "list-income-roles", "list-role-income", "list-incomes"]:
-			await self.handle_list_income_roles(ctx)
-			return
-
-		elif command in ["update-income", "update-incomes"]:
-			await self.handle_update_incomes(ctx)
-			return
-
-		elif command in ["collect", "get-salary", "update-income-solo"]:
-			await self.handle_collect_income(ctx)
-			return
-
-		elif command in ["stats", "economy-stats", "statistics"]:
-			await self.handle_economy_stats(ctx)
-			return
-
-		elif command in {"level", "lvl", "progress", "xp"}:
-			await self.handle_check_level(ctx)
-			return
-
-		elif command in {"all-levels", "level-info", "levels-info", "levels"}:
-			await self.handle_all_levels(ctx)
-			return
-
-		elif command in {"level-lb", "lb-level", "level-leaderboard", "leaderboard-levels", "levels-leaderboard", "lvl-lb", "lb-lvl"}:
-			await self.handle_level_leaderboard(ctx)
-			return
-
-		elif command in {"change-levels", "update-levels", "change-level", "edit-levels"}:
-			await self.handle_change_levels(ctx)
-			return
-
-		elif command in ["add-xp", "xp-add", "increase-xp"]:
-			await self.handle_xp_change(ctx, mode="add")
-			return
-
-		elif command in ["remove-xp", "del-xp", "xp-remove", "decrease-xp"]:
-			await self.handle_xp_change(ctx, mode="remove")
-			return
-
-		elif command in ["set-passive-chat-income", "set-chat-income"]:
-			await self.handle_set_passive_chat_income(ctx)
+	def start_perf_dump(self):
+		if not self.perf_dump_minutes:
 			return
+		if self.perf_dump_task is None or self.perf_dump_task.done():
+			self.perf_dump_task = asyncio.get_running_loop().create_task(self.perf_dump_loop())
 
 	# ==> now comes the actual part where we define all the functions.
 
@@ -366,6 +197,7 @@ class SkenderBot:
 	#   HELP PAGE
 	# --------------
 
+	@command("help", aliases=("info",), help_note="- shows this")
 	async def handle_help(self, ctx):
 		# default footer text, you can change this.
 		help_footer_text = "For more info, contact an admin or <kendrik2.0>."
@@ -374,239 +206,47 @@ class SkenderBot:
 
 		mode = "(staff version)" if ctx.staff else "(user version)"
 
-		embed = discord.Embed(title=f"Help System {mode}", color=color)
-
-		embed.add_field(name="stats", value="Usage: `stats`", inline=False)
-		embed.add_field(
-			name="blackjack",
-			value=f"Alias: bj  |  Usage: `{self.all_usages['blackjack_usage']}`",
-			inline=False
-		)
-		embed.add_field(
-			name="roulette",
-			value=f"Usage: `{self.all_usages['roulette_usage']}`",
-			inline=False
-		)
-		embed.add_field(name="slut", value="Usage: `slut`", inline=False)
-		embed.add_field(name="crime", value="Usage: `crime`", inline=False)
-		embed.add_field(name="work", value="Usage: `work`", inline=False)
-		embed.add_field(
-			name="rob",
-			value=f"Alias: steal  |  Usage: `{self.all_usages['rob_usage']}`",
-			inline=False
-		)
-		embed.add_field(
-			name="balance",
-			value=f"Alias: bal  |  Usage: `{self.all_usages['balance_usage']}`",
-			inline=False
-		)
-		embed.add_field(
-			name="deposit",
-			value=f"Alias: dep  |  Usage: `{self.all_usages['deposit_usage']}`",
-			inline=False
-		)
-		embed.add_field(
-			name="withdraw",
-			value=f"Alias: with  |  Usage: `{self.all_usages['withdraw_usage']}`",
-			inline=False
-		)
-		embed.add_field(
-			name="give",
-			value=f"Alias: pay  |  Usage: `{self.all_usages['give_usage']}`",
-			inline=False
-		)
-		embed.add_field(
-			name="leaderboard",
-			value=f"Alias: lb  |  Usage: `{self.all_usages['leaderboard_usage']}`",
-			inline=False
-		)
-		embed.add_field(name="help", value="Alias: info  |  Usage: `help` - shows this", inline=False)
-		embed.add_field(name="module", value="Alias: module-info  |  Usage: `module <module, e.g. slut>`", inline=False)
-		embed.set_footer(text=help_footer_text)
-		await ctx.channel.send(embed=embed)
-
-		# split because embeds have a mex length
-
-		if ctx.staff:
+		# the commands come from the registry (see commands.py), in the "section" given in their @command(...).
+		# one list = one embed (split because embeds have a max length).
+		# (section, title, info for staff). Commands that need the admin role are only shown to staff.
+		help_pages = [
+			[("general", None, None)],
+			[("staff", "STAFF ONLY", f"requires <{self.admin_role}> role")],
+			[
+				("items", "ITEM HANDLING", f"create and delete requires <{self.admin_role}> role"),
+				("income roles", "INCOME ROLES", f"create, delete and update requires <{self.admin_role}> role"),
+			],
+			[("levels", "LEVELS", f"changing levels xp requires <{self.admin_role}> role")],
+		]
+
+		for page in help_pages:
 			embed = discord.Embed(title=f"Help System {mode}", color=color)
-			embed.add_field(
-				name="----------------------\n\nSTAFF ONLY",
-				value=f"requires <{self.admin_role}> role",
-				inline=False
-			)
-			embed.add_field(
-				name="add-money",
-				value=f"Usage: `{self.all_usages['add_money_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="add-money-role",
-				value=f"Usage: `{self.all_usages['add_money_role_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="remove-money",
-				value=f"Usage: `{self.all_usages['remove_money_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="remove-money-role",
-				value=f"Usage: `{self.all_usages['remove_money_role_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="change-variable",
-				value=f"Usage: `{self.all_usages['change_variable_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="change-action",
-				value=f"Usage: `{self.all_usages['change_action_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="change-currency",
-				value=f"Usage: `{self.all_usages['change_currency_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="set-income-reset",
-				value=f"Usage: `{self.all_usages['set_income_reset_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="remove-user-item",
-				value=f"Usage: `{self.all_usages['remove_user_item_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="spawn-item",
-				value=f"Usage: `{self.all_usages['spawn_item_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="clear-db",
-				value=f"Usage: `{self.all_usages['clear_leaderboard_usage']}` - remove users from database that left the server",
-				inline=False
-			)
+			for section, title, staff_info in page:
+				section_commands = command_registry.section(section, staff=ctx.staff)
+				if not section_commands:
+					continue
+				if title:
+					embed.add_field(
+						name=f"----------------------\n\n{title}",
+						value=staff_info if ctx.staff else "",
+						inline=False
+					)
+				for entry in section_commands:
+					embed.add_field(name=entry.name, value=entry.help_text(), inline=False)
+
+			# e.g. the staff page for normal users.
+			if not embed.fields:
+				continue
 			embed.set_footer(text=help_footer_text)
 			await ctx.channel.send(embed=embed)
 
-		# split embed again.
-
-		embed = discord.Embed(title=f"Help System {mode}", color=color)
-		embed.add_field(
-			name="----------------------\n\nITEM HANDLING",
-			value=f"create and delete requires <{self.admin_role}> role" if ctx.staff else "",
-			inline=False
-		)
-
-		if ctx.staff:
-			embed.add_field(name="create-item", value="Usage: `create-item`", inline=False)
-			embed.add_field(name="delete-item", value=f"Usage: `{self.all_usages['delete_item_usage']}`", inline=False)
-
-		embed.add_field(name="buy-item", value=f"Usage: `{self.all_usages['buy_item_usage']}`", inline=False)
-		embed.add_field(name="give-item", value=f"Usage: `{self.all_usages['give_item_usage']}`", inline=False)
-		embed.add_field(name="use", value=f"Usage: `{self.all_usages['use_item_usage']}`", inline=False)
-		embed.add_field(name="inventory", value=f"Alias: inv | Usage: `{self.all_usages['inventory_usage']}`", inline=False)
-		embed.add_field(name="user-inventory", value=f"Alias: user-inv | Usage: `{self.all_usages['user_inventory_usage']}`", inline=False)
-		embed.add_field(name="catalog", value="Usage: `catalog`", inline=False)
-		embed.add_field(name="catalog (details about an item)", value="Usage: `catalog <item short name>`", inline=False)
-		embed.add_field(name="----------------------\n\nINCOME ROLES",
-						value=f"create, delete and update requires <{self.admin_role}> role" if ctx.staff else "", inline=False)
-		if ctx.staff:
-			embed.add_field(
-				name="add-income-role",
-				value=f"Usage: `{self.all_usages['add_income_role_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="remove-income-role",
-				value=f"Usage: `{self.all_usages['remove_income_role_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="update-income-role",
-				value=f"Usage: `{self.all_usages['update_income_role_usage']}`",
-				inline=False
-			)
-		# commands for everyone again
-		embed.add_field(
-			name="list-roles",
-			value="Usage: `list-roles`",
-			inline=False
-		)
-		embed.add_field(
-			name="collect",
-			value="Usage: `collect` | get your salary.\nIf you choose to use update-income, please disable this command.",
-			inline=False
-		)
-		if ctx.staff:
-			embed.add_field(
-				name="update-income",
-				value="Usage: `update-income` | Automatically updates ALL INCOMES.",
-				inline=False
-			)
-		embed.set_footer(text=help_footer_text)
-		await ctx.channel.send(embed=embed)
-
-		# split embed again
-
-		embed = discord.Embed(title=f"Help System {mode}", color=color)
-
-		embed.add_field(
-			name="----------------------\n\nLEVELS",
-			value=f"changing levels xp requires <{self.admin_role}> role" if ctx.staff else "",
-			inline=False
-		)
-
-		embed.add_field(
-			name="check level",
-			value=f"Alias: lvl | Usage: `{self.all_usages['check_level_usage']}`",
-			inline=False
-		)
-		embed.add_field(
-			name="all levels",
-			value=f"Alias: levels | Usage: `{self.all_usages['all_levels_usage']}`",
-			inline=False
-		)
-		embed.add_field(
-			name="level leaderboard",
-			value=f"Alias: lvl-lb | Usage: `{self.all_usages['level_leaderboard_usage']}`",
-			inline=False
-		)
-
-		if ctx.staff:
-			embed.add_field(
-				name="set passive chat income",
-				value=f"Usage: `{self.all_usages['set_passive_chat_income_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="change-levels",
-				value=f"Usage: `{self.all_usages['change_levels_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="add-xp",
-				value=f"Usage: `{self.all_usages['add_xp_usage']}`",
-				inline=False
-			)
-			embed.add_field(
-				name="remove-xp",
-				value=f"Usage: `{self.all_usages['remove_xp_usage']}`",
-				inline=False
-			)
-
-		embed.set_footer(text=help_footer_text)
-		await ctx.channel.send(embed=embed)
-
 		return
 
 	# -------------------
 	#    MODULE INFO
 	# -------------------
 
+	@command("module", aliases=("module-info", "modules", "modules-info"), usage="module <module, e.g. slut>")
 	async def handle_module(self, ctx):
 		# usage = self.all_usages["module_usage"]
 
@@ -626,16 +266,14 @@ class SkenderBot:
 	#   CHANGE MONEY (ADD MONEY / REMOVE MONEY)
 	# -------------------------------------------
 
+	@command("add-money", usage="add-money <@member> <amount>", staff=True, min_args=2, section="staff", mode="add")
+	@command(
+		"remove-money", usage="remove-money <@member> <amount> [cash/bank]", staff=True, min_args=2,
+		section="staff", mode="remove"
+	)
 	async def handle_change_money(self, ctx, mode="add"):
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		usage = self.all_usages["add_money_usage"] if mode == "add" else self.all_usages["remove_money_usage"]
 
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=2):
-			return
-
 		reception_user = await self.utils.get_user_id(ctx.param[1])
 		reception_user_obj = self.client.get_user(int(reception_user))
 		if not reception_user_obj:
@@ -667,16 +305,13 @@ class SkenderBot:
 	# SET INCOME RESET
 	# -------------------
 
+	@command(
+		"set-income-reset", aliases=("change-income-reset",), usage="set-income-reset <true/false>",
+		staff=True, min_args=1, section="staff"
+	)
 	async def handle_set_income_reset(self, ctx):
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		usage = self.all_usages["set_income_reset_usage"]
 
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=1):
-			return
-
 		new_value = ctx.param[1]
 		if new_value not in ["true", "false"]:
 			await self.utils.send_invalid(ctx, "true/false", usage)
@@ -692,18 +327,76 @@ class SkenderBot:
 			print(e)
 			await self.utils.send_error(ctx)
 
+	# -------------------
+	#    PERFORMANCE
+	# -------------------
+
+	@command("perf", aliases=("performance",), usage="perf [reset]", staff=True, section="staff")
+	async def handle_perf(self, ctx):
+		if ctx.param[1] == "reset":
+			self.perf.reset()
+			await self.utils.send_embed(ctx, "Performance measurements reset.", color="green")
+			return
+
+		report = self.perf.report()
+		# embed descriptions can be max 4096 chars, the slowest commands are first so we cut at the end.
+		if len(report) > 4000:
+			report = report[:4000].rsplit("\n", 1)[0] + "\n..."
+		await self.utils.send_embed(ctx, f"```\n{report}\n```", title="Performance (per command)")
+
+	# -------------------
+	#    BACKUPS
+	# -------------------
+
+	@command(
+		"backup", aliases=("backup-db", "backups"), usage="backup [list]", staff=True, section="staff",
+		help_note="- save a copy of the database now (list: show the saved copies)"
+	)
+	async def handle_backup(self, ctx):
+		if ctx.param[1] == "list":
+			backups = self.db_handler.backup.list_backups()
+			if not backups:
+				await self.utils.send_embed(ctx, "No backups yet.", title="Backups")
+				return
+			lines = [f"`{name}` - {size / 1024 / 1024:.1f} MiB" for name, size, date in backups]
+			await self.utils.send_embed(
+				ctx, "\n".join(lines) + f"\n\nfolder: `{self.db_handler.backup.directory}`", title="Backups"
+			)
+			return
+
+		await self.utils.send_embed(ctx, "Backup started, this can take a moment...")
+		try:
+			status, info = await self.db_handler.backup_database()
+			if status == "error":
+				await self.utils.send_error_report(ctx, info)
+				return
+		except Exception as e:
+			print(e)
+			await self.utils.send_error(ctx)
+			return
+
+		description = (f"{self.utils.emoji_worked} Backup saved: `{os.path.basename(info['path'])}`\n"
+					   f"{info['size'] / 1024 / 1024:.1f} MiB in {info['seconds']:.1f} seconds.")
+		if info["removed"]:
+			description += f"\n{len(info['removed'])} old backup(s) removed."
+		await self.utils.send_embed(ctx, description, color="green", name=True)
+
+	# splitting change-action and change-variable for front end,
+	# but will be one command called back end.
+	@command("change", hidden=True)
+	async def handle_change(self, ctx):
+		await ctx.channel.send("Use change-action or change-variable")
+
 	# ---------------------------------------
 	#   EDIT ACTIONS aka CHANGE ACTIONS
 	# ---------------------------------------
 
+	@command(
+		"change-action", aliases=("edit-action", "action-change"),
+		usage="change-action <action_name> <variable> <new value>", staff=True, min_args=3, section="staff"
+	)
 	async def handle_change_action(self, ctx):
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		usage = self.all_usages["change_action_usage"]
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=3):
-			return
 
 		mode = "actions"
 		action_name = ctx.param[1]
@@ -729,14 +422,12 @@ class SkenderBot:
 	#   EDIT VARIABLES aka CHANGE VARIABLES
 	# ---------------------------------------
 
+	@command(
+		"change-variable", aliases=("edit-variable", "variable-change"),
+		usage="change-variable <variable> <new value>", staff=True, min_args=2, section="staff"
+	)
 	async def handle_change_variable(self, ctx):
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		usage = self.all_usages["change_variable_usage"]
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=2):
-			return
 
 		mode = "variables"
 		variable_name = ctx.param[1]
@@ -775,16 +466,13 @@ class SkenderBot:
 	# CHANGE CURRENCY SYMBOL (EMOJI)
 	# ------------------------------
 
+	@command(
+		"change-currency", aliases=("edit-currency", "change-currency-symbol", "change-currency-emoji"),
+		usage="change-currency <new emoji name>", staff=True, min_args=1, section="staff"
+	)
 	async def handle_change_currency(self, ctx):
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		usage = self.all_usages["change_currency_usage"]
 
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=1):
-			return
-
 		new_emoji_name = ctx.param[1]
 
 		try:
@@ -807,10 +495,9 @@ class SkenderBot:
 	#     BLACKJACK
 	# -------------------
 
+	@command("blackjack", aliases=("bj",), usage="blackjack <amount or all>", min_args=1, max_args=1)
 	async def handle_blackjack(self, ctx):
 		usage = self.all_usages["blackjack_usage"]
-		if not await self.utils.check_parameter_count(ctx, usage=usage, parameter_min_amount=1, parameter_max_amount=1):
-			return
 
 		bet = await self.utils.check_amount_parameter(ctx, ctx.param[1], usage=usage, mode="flex")
 		if bet == "error": return
@@ -829,10 +516,9 @@ class SkenderBot:
 	#     ROULETTE
 	# -------------------
 
+	@command("roulette", usage="roulette <amount or all> <space>", min_args=2)
 	async def handle_roulette(self, ctx):
 		usage = self.all_usages["roulette_usage"]
-		if not await self.utils.check_parameter_count(ctx, usage=usage, parameter_min_amount=2):
-			return
 
 		bet = await self.utils.check_amount_parameter(ctx, ctx.param[1], usage=usage, mode="flex")
 		if bet == "error": return
@@ -862,6 +548,7 @@ class SkenderBot:
 	#       SLUT
 	# -------------------
 
+	@command("slut")
 	async def handle_slut(self, ctx):
 		try:
 			status, err_msg = await self.db_handler.slut(
@@ -877,6 +564,7 @@ class SkenderBot:
 	#       CRIME
 	# -------------------
 
+	@command("crime")
 	async def handle_crime(self, ctx):
 		try:
 			status, err_msg = await self.db_handler.crime(
@@ -892,6 +580,7 @@ class SkenderBot:
 	#       WORK
 	# -------------------
 
+	@command("work")
 	async def handle_work(self, ctx):
 		try:
 			status, err_msg = await self.db_handler.work(
@@ -907,10 +596,9 @@ class SkenderBot:
 	#       ROB
 	# -------------------
 
+	@command("rob", aliases=("steal",), usage="rob <user>", min_args=1, max_args=1)
 	async def handle_rob(self, ctx):
 		usage = self.all_usages["rob_usage"]
-		if not await self.utils.check_parameter_count(ctx, usage=usage, parameter_min_amount=1, parameter_max_amount=1):
-			return
 
 		user_to_rob = await self.utils.get_user_id(ctx.param[1])
 
@@ -928,6 +616,7 @@ class SkenderBot:
 	#      BALANCE
 	# -------------------
 
+	@command("balance", aliases=("bal",), usage="balance [other-user]")
 	async def handle_balance(self, ctx):
 		usage = self.all_usages["balance_usage"]
 
@@ -961,12 +650,10 @@ class SkenderBot:
 	#     DEPOSIT
 	# -------------------
 
+	@command("deposit", aliases=("dep",), usage="deposit <amount or all>", min_args=1, max_args=1)
 	async def handle_deposit(self, ctx):
 		usage = self.all_usages["deposit_usage"]
 
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=1, parameter_max_amount=1):
-			return
-
 		amount = await self.utils.check_amount_parameter(ctx, ctx.param[1], usage)
 		if amount is None: return
 
@@ -984,12 +671,10 @@ class SkenderBot:
 	#     WITHDRAW
 	# -------------------
 
+	@command("withdraw", aliases=("with",), usage="withdraw <amount or all>", min_args=1, max_args=1)
 	async def handle_withdraw(self, ctx):
 		usage = self.all_usages["withdraw_usage"]
 
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=1, parameter_max_amount=1):
-			return
-
 		amount = await self.utils.check_amount_parameter(ctx, ctx.param[1], usage)
 		if amount is None: return
 
@@ -1007,13 +692,12 @@ class SkenderBot:
 	#       GIVE
 	# -------------------
 
+	@command(
+		"give", aliases=("pay",), usage="give <@member> <amount or all>", min_args=2, max_args=2,
+		footer="Info: for items use give-item !"
+	)
 	async def handle_give(self, ctx):
 		usage = self.all_usages["give_usage"]
-		footer = "Info: for items use give-item !"
-
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=2,
-													  parameter_max_amount=2, footer=footer):
-			return
 
 		reception_user = await self.utils.get_user_id(ctx.param[1])
 		reception_user_obj = self.client.get_user(int(reception_user))
@@ -1045,16 +729,13 @@ class SkenderBot:
 	#   ITEM CREATION / Create item
 	# ---------------------------
 
+	@command("create-item", aliases=("new-item", "item-create"), staff=True, section="items")
 	async def handle_create_item(self, ctx):
 		# initialise, they will all be set during item creation process.
 		item_display_name, item_name, cost, description, max_amount_per_transaction = None, None, None, None, None
 		stock, max_amount, roles_id_required, roles_id_to_give, trial, duration = None, None, None, None, None, None
 		roles_id_to_remove, max_bal, reply_message, item_img_url, roles_id_excluded =  None, None, None, None, None
 
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		currently_creating_item = True
 		checkpoints = 0
 		last_report = ""
@@ -1451,16 +1132,13 @@ class SkenderBot:
 	#   DELETE ITEM - REMOVE ITEM
 	# ---------------------------
 
+	@command(
+		"delete-item", aliases=("remove-item",), usage="delete-item <item short name>", staff=True, min_args=1,
+		section="items"
+	)
 	async def handle_delete_item(self, ctx):
 		usage = self.all_usages["delete_item_usage"]
 
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=1):
-			return
-
 		item_name = ctx.param[1]
 
 		confirmation_msg = "This will permanently delete the item, also for every user!\nDo you wish to continue? [y/N]"
@@ -1490,16 +1168,14 @@ class SkenderBot:
 	#   REMOVE USER ITEM
 	# ---------------------------
 
+	@command(
+		"remove-user-item", usage="remove-user-item <@member> <item short name> <amount>", staff=True,
+		min_args=2, section="staff"
+	)
 	async def handle_remove_user_item(self, ctx):
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		usage = self.all_usages["remove_user_item_usage"]
 
 		# item name and player pinged as parameters.
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=2):
-			return
 
 		player_ping = await self.utils.get_user_id(ctx.param[1])
 
@@ -1533,12 +1209,14 @@ class SkenderBot:
 	#   BUY ITEM
 	# ---------------------------
 
+	@command(
+		"buy-item", aliases=("get-item", "buy"), usage="buy-item <item short name> <amount>", min_args=1,
+		section="items"
+	)
 	async def handle_buy_item(self, ctx):
 		usage = self.all_usages["buy_item_usage"]
 
 		# we need the name, but specific amount is optional.
-		if not await self.utils.check_parameter_count(ctx, usage=usage, parameter_min_amount=1):
-			return
 
 		item_name = ctx.param[1]
 
@@ -1563,12 +1241,11 @@ class SkenderBot:
 	#      GIVE ITEM
 	# --------------------
 
+	@command("give-item", usage="give-item <@member> <item short name> [amount]", min_args=2, section="items")
 	async def handle_give_item(self, ctx):
 		usage = self.all_usages["give_item_usage"]
 
 		# we need user and item, but amount can be left empty (will be set to 1).
-		if not await self.utils.check_parameter_count(ctx, usage=usage, parameter_min_amount=2):
-			return
 
 		player_mention = ctx.param[1]
 		player_ping = await self.utils.get_user_id(player_mention)
@@ -1614,16 +1291,13 @@ class SkenderBot:
 	#      if admins want to "give" someone an item without having to buy and then give it
 	# ---------------------------
 
+	@command(
+		"spawn-item", aliases=("spawn",), usage="spawn-item <@member> <item short name> [amount]", staff=True,
+		min_args=2, section="staff"
+	)
 	async def handle_spawn_item(self, ctx):
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		usage = self.all_usages["spawn_item_usage"]
 
-		if not await self.utils.check_parameter_count(ctx, usage=usage, parameter_min_amount=2):
-			return
-
 		player_mention = ctx.param[1]
 		player_ping = await self.utils.get_user_id(player_mention)
 
@@ -1662,12 +1336,13 @@ class SkenderBot:
 	# 	  USE ITEM     # this will MERELY remove the item from inventory
 	# --------------
 
+	@command(
+		"use", aliases=("use-item",), usage="use <item short name> <amount>", usage_key="use_item", min_args=1,
+		section="items"
+	)
 	async def handle_use_item(self, ctx):
 		usage = self.all_usages["use_item_usage"]
 
-		if not await self.utils.check_parameter_count(ctx, usage=usage, parameter_min_amount=1):
-			return
-
 		item_used = ctx.param[1]
 
 		amount_param = "1" if ctx.param[2] == "none" else ctx.param[2]
@@ -1689,6 +1364,7 @@ class SkenderBot:
 	#   CHECK INVENTORY (check own inventory)
 	# ---------------------------------------
 
+	@command("inventory", aliases=("inv",), usage="inventory [page]", section="items")
 	async def handle_inventory(self, ctx):
 		user_to_check, user_to_check_uname, user_to_check_pfp = "self", "self", "self"
 		usage = self.all_usages["inventory_usage"]
@@ -1718,6 +1394,7 @@ class SkenderBot:
 	#   CHECK USER INVENTORY (check inventory of another user)
 	# --------------------------------------------------------
 
+	@command("user-inventory", aliases=("user-inv",), usage="user-inventory <@member> [page]", section="items")
 	async def handle_user_inventory(self, ctx):
 		usage = self.all_usages["user_inventory_usage"]
 
@@ -1763,6 +1440,10 @@ class SkenderBot:
 	#   ITEMS CATALOG
 	# ---------------------------
 
+	@command(
+		"catalog", aliases=("items", "item-list", "list-items"), usage="catalog [item short name]",
+		section="items"
+	)
 	async def handle_catalog(self, ctx):
 		if "none" in ctx.param[1]:
 			item_check = "default_list"
@@ -1789,14 +1470,23 @@ class SkenderBot:
 	#   ADD ROLE, UPDATE ROLE, REMOVE ROLE INCOME ROLE
 	# ---------------------------
 
+	@command(
+		"add-income-role", aliases=("add-role-income",), usage="add-income-role <@role> <income>", staff=True,
+		min_args=2, section="income roles", mode="add"
+	)
+	@command(
+		"remove-income-role", aliases=("delete-income-role", "remove-role-income", "delete-role-income"),
+		usage="remove-income-role <@role>", staff=True, min_args=1, section="income roles", mode="remove"
+	)
+	@command(
+		"update-income-role", aliases=("update-role", "update-role-income"),
+		usage="update-income-role <@role> <new income>", staff=True, min_args=2, section="income roles",
+		mode="update"
+	)
 	async def handle_income_role(self, ctx, mode=None):
 
 		amount = None
 
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		if mode not in ["add", "remove", "update"]: raise ValueError("Invalid mode: ")
 
 		usage = self.all_usages[f"{mode}_income_role_usage"]
@@ -1804,11 +1494,6 @@ class SkenderBot:
 		if mode == "add":
 			await ctx.channel.send("`Info: income is DAILY one. To change a set income_role, use update-income-role`\n")
 
-		# we need at least one role parameter for all of them
-		min_parameters = 2 if mode in ["add", "update"] else 1
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=min_parameters):
-			return
-
 		role_parameter = ctx.param[1]
 
 		if mode == "remove":
@@ -1863,6 +1548,10 @@ class SkenderBot:
 	#   LIST INCOME ROLES
 	# ---------------------------
 
+	@command(
+		"list-roles", aliases=("list-income-roles", "list-role-income", "list-incomes"),
+		section="income roles"
+	)
 	async def handle_list_income_roles(self, ctx):
 		try:
 			status, err_msg = await self.db_handler.list_income_roles(
@@ -1878,20 +1567,20 @@ class SkenderBot:
 	#   ADD MONEY BY ROLE / REMOVE MONEY BY ROLE
 	# --------------------------------------------
 
+	@command(
+		"add-money-role", aliases=("add-role-money",), usage="add-money-role <@role> <amount>", staff=True,
+		min_args=2, section="staff", mode="add"
+	)
+	@command(
+		"remove-money-role", aliases=("remove-role-money",), usage="remove-money-role <@role> <amount>",
+		staff=True, min_args=2, section="staff", mode="remove"
+	)
 	async def handle_money_role(self, ctx, mode=None):
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		if mode not in ["add", "remove"]:
 			raise ValueError("Invalid mode for handle_money_role")
 
 		usage = self.all_usages[f"{mode}_money_role_usage"]
 
-		# we need two parameters: role and amount.
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=2):
-			return
-
 		# get amount and check
 		amount = await self.utils.check_amount_parameter(ctx, ctx.param[2], usage, mode="strict")
 		if amount is None:
@@ -1919,11 +1608,11 @@ class SkenderBot:
 	#   UPDATE INCOMES (GLOBAL BY MOD)
 	# ----------------------------------
 
+	@command(
+		"update-income", aliases=("update-incomes",), staff=True, section="income roles",
+		help_note="| Automatically updates ALL INCOMES."
+	)
 	async def handle_update_incomes(self, ctx):
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		try:
 			status, err_msg = await self.db_handler.update_incomes(
 				ctx
@@ -1945,6 +1634,8 @@ class SkenderBot:
 	#   UPDATE INCOME FOR YOURSELF ONLY
 	# ---------------------------
 
+	@command("collect", aliases=("get-salary", "update-income-solo"), section="income roles",
+			 help_note="| get your salary.\nIf you choose to use update-income, please disable this command.")
 	async def handle_collect_income(self, ctx):
 		try:
 			status, err_msg = await self.db_handler.update_incomes_solo(
@@ -1968,6 +1659,7 @@ class SkenderBot:
 	#   LEADERBOARD
 	# ---------------
 
+	@command("leaderboard", aliases=("lb",), usage="leaderboard [page] [-cash | -bank | -total]")
 	async def handle_leaderboard(self, ctx):
 		usage = self.all_usages["leaderboard_usage"]
 		modes = ["-cash", "-bank", "-total"]
@@ -2026,21 +1718,26 @@ class SkenderBot:
 	#   CLEAN DATABASE / REMOVE GONE USERS / CLEAN LEADERBOARD
 	# ---------------------------
 
+	@command(
+		"clear-db", aliases=("clean-db", "clear-database", "clean-database", "clean-leaderboard", "clean-lb", "purge",
+						   "remove-gone-users", "remove-users"),
+		usage="clear-db [dry-run]", usage_key="clear_leaderboard", staff=True, section="staff",
+		help_note="- remove users from database that left the server (dry-run: only count them)"
+	)
 	async def handle_clear_database(self, ctx):
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
+		# dry run: only show how many would be removed, no confirmation needed.
+		dry_run = ctx.param[1] in ("dry-run", "dry", "-dry-run")
 		# need confirmation, especially in case they want to purge their database
 		# right after the update to SkenderBot.
-		confirmed = await self.utils.confirm_command(ctx,
-					description="This will permanently delete all user instances that left the server!"
-				 	"\nDo you wish to continue? [y/N]")
-		if not confirmed:
-			return
+		if not dry_run:
+			confirmed = await self.utils.confirm_command(ctx,
+						description="This will permanently delete all user instances that left the server!"
+						"\nDo you wish to continue? [y/N]")
+			if not confirmed:
+				return
 
 		try:
-			status, err_msg = await self.db_handler.clean_database(ctx.server)
+			status, err_msg = await self.db_handler.clean_database(ctx.server, dry_run=dry_run)
 			if status == "error":
 				await self.utils.send_error_report(ctx, err_msg)
 				return
@@ -2049,8 +1746,14 @@ class SkenderBot:
 			await self.utils.send_error(ctx)
 			return
 
+		if dry_run:
+			description = (f"Dry run: {err_msg['total']} user(s) would be removed from database "
+						   f"({err_msg['users']} users, {err_msg['user_items']} user items, "
+						   f"{err_msg['user_used_items']} used items).\nUse `{self.prefix}clear-db` to remove them.")
+		else:
+			description = f"{self.utils.emoji_worked} {err_msg['total']} user(s) have been removed from database."
 		embed = discord.Embed(
-			description=f"{self.utils.emoji_worked} {err_msg} user(s) have been removed from database.",
+			description=description,
 			color=self.discord_success_rgb_code
 		)
 		embed.set_author(name=ctx.username, icon_url=ctx.user_pfp)
@@ -2062,6 +1765,7 @@ class SkenderBot:
 	#   ECONOMY STATISTICS
 	# ---------------------------
 
+	@command("stats", aliases=("economy-stats", "statistics"))
 	async def handle_economy_stats(self, ctx):
 		try:
 			status, err_msg = await self.db_handler.economy_stats(
@@ -2080,20 +1784,20 @@ class SkenderBot:
 	# -------------------------------
 
 	# info: auto xp adding and passive chat income gets handled through main.py on_message --> db_handler directly.
+	@command(
+		"add-xp", aliases=("xp-add", "increase-xp"), usage="add-xp <@member> <amount>", staff=True, min_args=2,
+		section="levels", mode="add"
+	)
+	@command(
+		"remove-xp", aliases=("del-xp", "xp-remove", "decrease-xp"), usage="remove-xp <@member> <amount>",
+		staff=True, min_args=2, section="levels", mode="remove"
+	)
 	async def handle_xp_change(self, ctx, mode="add"):
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		if mode not in ["add", "remove"]:
 			raise ValueError("mode for handle_xp_change(self, ...) must be 'add' or 'remove'")
 
 		usage = self.all_usages["add_xp_usage"] if mode == "add" else self.all_usages["remove_xp_usage"]
 
-		# we need a user and an amount
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=2):
-			return
-
 		user_ping = await self.utils.get_user_id(ctx.param[1])
 		exists, _ = self.utils.check_if_user_exists(ctx, user_ping)
 		if not exists:
@@ -2117,6 +1821,10 @@ class SkenderBot:
 	#   CHECK LEVEL
 	# ---------------
 
+	@command(
+		"level", aliases=("lvl", "progress", "xp"), usage="level [@member]", usage_key="check_level",
+		section="levels"
+	)
 	async def handle_check_level(self, ctx):
 		usage = self.all_usages["check_level_usage"]
 		if ctx.param[1] == "none":
@@ -2140,6 +1848,7 @@ class SkenderBot:
 	#   ALL LEVELS
 	# --------------
 
+	@command("all-levels", aliases=("level-info", "levels-info", "levels"), section="levels")
 	async def handle_all_levels(self, ctx):
 		# usage = self.all_usages["all_levels_usage"]
 
@@ -2156,6 +1865,8 @@ class SkenderBot:
 	#   LEVELS LEADERBOARD
 	# -----------------------
 
+	@command("level-lb", aliases=("lb-level", "level-leaderboard", "leaderboard-levels", "levels-leaderboard", "lvl-lb", "lb-lvl"),
+			 usage="level-lb [page]", usage_key="level_leaderboard", section="levels")
 	async def handle_level_leaderboard(self, ctx):
 		usage = self.all_usages["level_leaderboard_usage"]
 
@@ -2183,11 +1894,11 @@ class SkenderBot:
 	#   CHANGE LEVELS
 	# -----------------
 
+	@command(
+		"change-levels", aliases=("update-levels", "change-level", "edit-levels"), staff=True,
+		section="levels"
+	)
 	async def handle_change_levels(self, ctx):
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		# usage = self.all_usages["change_levels_usage"]
 
 		try:
@@ -2203,16 +1914,13 @@ class SkenderBot:
 	#  CHANGE PASSIVE CHAT INCOME
 	# -----------------------------
 
+	@command(
+		"set-passive-chat-income", aliases=("set-chat-income",), usage="set-passive-chat-income <new amount>",
+		staff=True, min_args=1, section="levels"
+	)
 	async def handle_set_passive_chat_income(self, ctx):
-		if not ctx.staff:
-			await self.utils.missing_admin(ctx)
-			return
-
 		usage = self.all_usages["set_passive_chat_income_usage"]
 
-		if not await self.utils.check_parameter_count(ctx, usage, parameter_min_amount=1):
-			await self.utils.send_invalid(ctx, "amount", usage)
-
 		amount = ctx.param[1]
 
 		new_value = await self.utils.check_amount_parameter(ctx, amount_param=amount, usage=usage, mode="strict")
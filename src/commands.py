@@ -0,0 +1,129 @@
+"""
+INFO:
+
+	The command registry of the Skender discord bot.
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	imported in bot.py. Every command handler there gets a decorator, e.g.:
+
+		@command("deposit", aliases=("dep",), usage="deposit <amount or all>", min_args=1, max_args=1)
+		async def handle_deposit(self, ctx):
+			...
+
+	With that, the registry knows for every command:
+		- its name and aliases (one dictionary, so finding the command for "+dep" is one lookup,
+		  instead of going through a long if/elif chain).
+		- its usage (bot.py self.all_usages and the help page are built from it).
+		- if it needs the admin role and how many arguments it needs (checked before calling the handler).
+		- in which part of the help page it goes.
+
+	A handler used for several commands (e.g. add-money and remove-money) just gets several decorators,
+	the extra keyword arguments (like mode="add") are passed to the handler.
+
+	for more info see bot.py
+
+"""
+
+import itertools
+
+
+class SkenderCommand:
+	__slots__ = (
+		"name", "handler", "aliases", "usage", "usage_key", "staff", "min_args", "max_args", "footer",
+		"section", "help_note", "hidden", "kwargs", "order",
+	)
+
+	def __init__(self, name, handler, aliases, usage, usage_key, staff, min_args, max_args, footer,
+				 section, help_note, hidden, kwargs, order):
+		self.name = name
+		self.handler = handler
+		self.aliases = tuple(aliases)
+		self.usage = usage
+		self.usage_key = usage_key
+		self.staff = staff
+		self.min_args, self.max_args = min_args, max_args
+		self.footer = footer
+		self.section = section
+		self.help_note = help_note
+		self.hidden = hidden
+		self.kwargs = kwargs
+		self.order = order
+
+	# the text for the help page, e.g. "Alias: dep  |  Usage: `deposit <amount or all>`"
+	def help_text(self):
+		text = f"Usage: `{self.usage}`"
+		if self.aliases:
+			text = f"Alias: {', '.join(self.aliases)}  |  {text}"
+		if self.help_note:
+			text = f"{text} {self.help_note}"
+		return text
+
+
+class SkenderCommandRegistry:
+	def __init__(self):
+		# name or alias -> SkenderCommand
+		self.lookup = {}
+		self.commands = []
+		# the decorators of one handler are APPLIED from the bottom up, but CALLED from the top down.
+		# we number them when called, so the help page has the order in which they are written in bot.py.
+		self.counter = itertools.count()
+
+	def command(self, name, aliases=(), usage=None, usage_key=None, staff=False, min_args=None, max_args=None,
+				footer=None, section="general", help_note=None, hidden=False, **kwargs):
+		order = next(self.counter)
+
+		def decorator(handler):
+			self.add(SkenderCommand(
+				name, handler, aliases,
+				usage=usage or name,
+				# the key in self.all_usages, e.g. "buy-item" -> "buy_item" (then used as "buy_item_usage").
+				usage_key=usage_key or name.replace("-", "_"),
+				staff=staff, min_args=min_args, max_args=max_args, footer=footer,
+				section=section, help_note=help_note, hidden=hidden, kwargs=kwargs, order=order
+			))
+			return handler
+
+		return decorator
+
+	def add(self, entry):
+		for alias in (entry.name,) + entry.aliases:
+			if alias in self.lookup:
+				raise ValueError(f"command or alias '{alias}' registered twice "
+								 f"({self.lookup[alias].handler.__name__} and {entry.handler.__name__})")
+			self.lookup[alias] = entry
+		self.commands.append(entry)
+		self.commands.sort(key=lambda command: command.order)
+
+	def get(self, name):
+		return self.lookup.get(name)
+
+	# for bot.py self.all_usages, e.g. {"deposit_usage": "deposit <amount or all>", ...}
+	def all_usages(self):
+		return {f"{entry.usage_key}_usage": entry.usage for entry in self.commands}
+
+	# the commands of one part of the help page, in the order they are written in bot.py.
+	def section(self, section, staff=False):
+		return [
+			entry for entry in self.commands
+			if entry.section == section and not entry.hidden and (staff or not entry.staff)
+		]
+
+	# checks the admin role and the number of arguments, then calls the handler.
+	# bot: the SkenderBot (self in bot.py), the handlers are its methods.
+	async def run(self, entry, bot, ctx):
+		if entry.staff and not ctx.staff:
+			await bot.utils.missing_admin(ctx)
+			return
+		if entry.min_args is not None or entry.max_args is not None:
+			if not await bot.utils.check_parameter_count(
+				ctx, entry.usage, parameter_min_amount=entry.min_args, parameter_max_amount=entry.max_args,
+				footer=entry.footer
+			):
+				return
+		await entry.handler(bot, ctx, **entry.kwargs)
+
+
+# the one registry of the bot, used as @command(...) in bot.py.
+command_registry = SkenderCommandRegistry()
+command = command_registry.command
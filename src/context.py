@@ -9,12 +9,30 @@ INFO:
 		without an extra context class, we would always need to pass the channel, username, user_pfp etc. variables.
 		now we can just get it over here and pass it inside the bot with a central variable "ctx".
 
+	ONE context per message (built in main.py on_message through bot.py build_context()), used for both
+	the xp / passive chat income and the commands.
+	Most messages are just chatting and never need the roles, the avatar etc. So those are only computed
+	the first time someone asks for them (ctx.user_roles, ctx.staff, ctx.user_pfp, ctx.nickname),
+	and then kept for the rest of the message.
+
+	__slots__: no __dict__ for every message, and a typo like ctx.usr = ... raises an error instead of
+	silently creating a new variable.
+
 	for more info see bot.py
 
 """
 
+# "not computed yet" (None can't be used for that, it could be a real value).
+_NOT_SET = object()
+
+
 class CommandContext:
-	def __init__(self, message, admin_role, param):
+	__slots__ = (
+		"message", "channel", "server", "param", "user", "user_ctx_obj", "admin_role",
+		"_user_roles", "_staff", "_user_pfp", "_nickname",
+	)
+
+	def __init__(self, message, admin_role, param=None):
 
 		# skip if just a webhook (no actual user object)
 		if message.webhook_id:
@@ -24,16 +42,49 @@ class CommandContext:
 		self.message = message
 		self.channel = message.channel
 		self.server = message.guild
+		# set by bot.py handle_message() once we know it's a command.
 		self.param = param
 		self.user = message.author.id
 		self.user_ctx_obj = message.author
-		self.user_mention = message.author.mention
-		self.user_pfp = message.author.display_avatar.url
-		self.username = message.author.name
-		self.nickname = str(message.author.display_name)
-		self.user_roles = [role.id for role in message.author.roles]
-
 		# some stuff will be only for staff, which will be recognizable by a specific admin-only role
 		# for example, admin_role could be "botmaster".
-		self.staff = any(role.name == admin_role for role in message.author.roles)
-		# print("staff status : ", staff_request)
+		self.admin_role = admin_role
+
+		# computed when needed, see the properties below.
+		self._user_roles = _NOT_SET
+		self._staff = _NOT_SET
+		self._user_pfp = _NOT_SET
+		self._nickname = _NOT_SET
+
+	@property
+	def user_mention(self):
+		return self.user_ctx_obj.mention
+
+	@property
+	def username(self):
+		return self.user_ctx_obj.name
+
+	@property
+	def user_roles(self):
+		# a frozenset: "role_id in ctx.user_roles" doesn't need to go through a list.
+		if self._user_roles is _NOT_SET:
+			self._user_roles = frozenset(role.id for role in self.user_ctx_obj.roles)
+		return self._user_roles
+
+	@property
+	def staff(self):
+		if self._staff is _NOT_SET:
+			self._staff = any(role.name == self.admin_role for role in self.user_ctx_obj.roles)
+		return self._staff
+
+	@property
+	def user_pfp(self):
+		if self._user_pfp is _NOT_SET:
+			self._user_pfp = self.user_ctx_obj.display_avatar.url
+		return self._user_pfp
+
+	@property
+	def nickname(self):
+		if self._nickname is _NOT_SET:
+			self._nickname = str(self.user_ctx_obj.display_name)
+		return self._nickname
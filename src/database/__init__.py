@@ -24,8 +24,39 @@ import discord
 import sqlite3, json
 # for utility functions
 from utilities import SkenderUtilities
+# the versions of the database structure (schema_version table, upgrade_schema()), see the end of database/database_migration.py.
+from database import database_migration
+# runs all SQLite work on its own threads (writer thread + read-only connections).
+# --> database/engine.py
+from database.engine import SkenderDatabaseEngine
+# keeps the most used user rows in memory (LRU cache), see get_user_object().
+# --> database/cache.py
+from database.cache import SkenderUserCache
+# read-only, typed copy of the tables "variables" and "actions", see load_config_snapshot().
+# and the parsed items catalog, see get_item_catalog(), and the levels, see load_levels().
+# --> database/snapshots.py
+from database.snapshots import SkenderConfigSnapshot, SkenderCatalogItem, SkenderLevelTable
+# the action phrases in memory (random pick without SQL, weights, no repeats), see load_action_phrases().
+# --> database/phrases.py
+from database.phrases import SkenderPhrasePicker
+# xp and passive chat income collected in memory and saved every few seconds, see flush_chat_rewards().
+# --> database/chat_rewards.py
+from database.chat_rewards import SkenderChatRewards
+# the leaderboards in memory (rank and page without counting in SQL), see refresh_rank_index().
+# --> database/ranking.py
+from database.ranking import SkenderRankIndex, RANK_COLUMNS
+# online backups of the database while the bot runs (sqlite3 backup API), see backup_database().
+# --> database/backup.py
+from database.backup import SkenderBackup
+# WAL checkpoints, PRAGMA optimize / ANALYZE and vacuum when the bot is quiet, see run_maintenance().
+# --> database/maintenance.py
+from database.maintenance import SkenderMaintenance
+
+# per-command latency histograms (wall, db_lock wait, SQLite, discord, statements), shown by +perf in bot.py.
+from perf import SkenderPerf
 # miscellaneous
-import os, random, math, asyncio, re, subprocess
+import os, random, math, asyncio, re, subprocess, contextlib, contextvars, time
+from types import MappingProxyType
 
 # maybe for later:
 # from discord.ui import View, Button
@@ -62,10 +93,38 @@ class LeaderboardViewer(View):
         self.
 """
 
+# the cooldowns of the users table (last_work, last_single_collect, last_xp_collect ...) are saved as
+# milliseconds since 1970 (epoch ms), 0 = never. Checking one is a subtraction, no date to parse.
+def epoch_ms():
+	return time.time_ns() // 1_000_000
+
 # only as a separate class so that we can call it through database_migration.py
 # explanations for the things we do here are in the actual class SkenderDatabaseHandler below.
 # this is just for the create_database function !
 class SkenderDatabaseCreator:
+	# the users table. Also used by database_migration.py when the table has to be built again.
+	# the last_xyz cooldowns are milliseconds since 1970 (epoch ms, UTC), 0 = never.
+	# (they were TEXT before, 'none' or str(datetime), which had to be parsed for every cooldown check)
+	USERS_TABLE = '''
+		CREATE TABLE IF NOT EXISTS {name} (
+			user_number INTEGER PRIMARY KEY AUTOINCREMENT,
+			user_id INTEGER UNIQUE,
+			user_discord_nick TEXT,
+			cash INTEGER DEFAULT 0,
+			bank INTEGER DEFAULT 0,
+			last_slut INTEGER DEFAULT 0,
+			last_work INTEGER DEFAULT 0,
+			last_crime INTEGER DEFAULT 0,
+			last_rob INTEGER DEFAULT 0,
+			last_blackjack INTEGER DEFAULT 0,
+			last_roulette INTEGER DEFAULT 0,
+			last_single_collect INTEGER DEFAULT 0,
+			total_xp INTEGER DEFAULT 0,
+			current_xp_level INTEGER DEFAULT 0,
+			last_xp_collect INTEGER DEFAULT 0
+		)
+	'''
+
 	def __init__(self, path):
 		self.path_to_db = path
 		self.database, self.db_cursor = None, None
@@ -74,6 +133,9 @@ class SkenderDatabaseCreator:
 	def create_database(self):
 		self.database = sqlite3.connect(self.path_to_db)
 		self.db_cursor = self.database.cursor()
+		# only does something for a new (empty) file, changing it later needs a VACUUM (see database/maintenance.py).
+		# lets PRAGMA incremental_vacuum give the pages freed by clean_database back to the disk.
+		self.db_cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
 
 		# adding default sqlite config into the file if creating new
 		# all the users will get created automatically in the function self.get_user_object()
@@ -93,25 +155,8 @@ class SkenderDatabaseCreator:
 		# user_number will track all users that ever existed, even if they get deleted later on with clean_database.
 		# last_single_called moved here, was scattered around each role before (only relevant if you use +collect).
 		# new: now also adding columns for level handling.
-		self.db_cursor.execute('''
-			CREATE TABLE IF NOT EXISTS users (
-				user_number INTEGER PRIMARY KEY AUTOINCREMENT,
-				user_id INTEGER UNIQUE,
-				user_discord_nick TEXT,
-				cash INTEGER DEFAULT 0,
-				bank INTEGER DEFAULT 0,
-				last_slut TEXT DEFAULT 'none',
-				last_work TEXT DEFAULT 'none',
-				last_crime TEXT DEFAULT 'none',
-				last_rob TEXT DEFAULT 'none',
-				last_blackjack TEXT DEFAULT 'none',
-				last_roulette TEXT DEFAULT 'none',
-				last_single_collect TEXT DEFAULT 'none',
-				total_xp INTEGER DEFAULT 0,
-				current_xp_level INTEGER DEFAULT 0,
-				last_xp_collect TEXT DEFAULT 'none'
-		)
-		''')
+		# (the net_worth column and the leaderboard indexes are added by the schema versions, see the end of this function)
+		self.db_cursor.execute(self.USERS_TABLE.format(name="users"))
 
 		# table user_items (was in userdata before)
 		self.db_cursor.execute('''
@@ -157,15 +202,18 @@ class SkenderDatabaseCreator:
 		# action info is not a primary key because else you could only have 1 phrase per action.
 		# phrase id is not really useful but for logging info I chose to add it.
 		# CHECK makes sure that the value is either "win" or "lose" (was "win_phrases" / "lose_phrases" before)
+		# weight: how often the phrase comes compared to the others (2 = twice as often, 0 = never).
 		self.db_cursor.execute('''
 			CREATE TABLE IF NOT EXISTS action_phrases (
 			phrase_id INTEGER PRIMARY KEY AUTOINCREMENT,
 			action_name TEXT,
 			type TEXT CHECK(type in ('win', 'lose')),
 			phrase TEXT,
+			weight INTEGER DEFAULT 1,
 			FOREIGN KEY (action_name) REFERENCES actions(action_name)
 		)
 		''')
+		# (databases created before the weight column existed get it through the schema versions)
 
 		# table items_catalog ("items" before)
 		self.db_cursor.execute('''
@@ -274,8 +322,14 @@ class SkenderDatabaseCreator:
 		)
 		''')
 
-		# commit and close database file
+		# commit
 		self.database.commit()
+
+		# new columns, indexes, changed types... everything that was added after the tables above were first created.
+		# every change is applied only once per file, see SCHEMA VERSIONS in database_migration.py.
+		database_migration.upgrade_schema(self.database)
+
+		# close database file
 		self.database.close()
 
 		return
@@ -285,7 +339,7 @@ class SkenderDatabaseCreator:
 
 class SkenderDatabaseHandler:
 	# always called when imported in main.py
-	def __init__(self, client, admin_role):
+	def __init__(self, client, admin_role, path_to_db=None):
 		# important to avoid race conditions: lock database !
 		# --> only one process can write to the database at the same time.
 		# but since we also activated WAL (see below), we don't prevent the bot from reading data.
@@ -294,6 +348,11 @@ class SkenderDatabaseHandler:
 		# ==> for the implementation, see def execute_commit(self, ...) and def executemany(self, ...)
 		# we can simply set up the lock there and have it working for the entire code.
 		# splitting execute (no lock) and execute_commit (with lock) to avoid unnecessary coroutines.
+		# edit: the actual SQLite work now happens in the database engine (database/engine.py), on its own threads.
+		# the lock is only held while handing a write over to the writer thread, never while SQLite works on it.
+		# exception: self.transaction() holds it for the whole transaction (see there).
+		# the running transaction of the current task (asyncio copies this per task), None if there is none.
+		self.current_transaction = contextvars.ContextVar("skender_transaction", default=None)
 
 		# INFO: I'm going to just keep the database open, not put it as an option to close at the end of each function.
 		# Reasons: makes the code and handling all returns way more complex, doesn't suit the "bot" characteristics
@@ -301,20 +360,69 @@ class SkenderDatabaseHandler:
 		# And: the risk of data loss should be very low because we always commit directly, so even if the database
 		# gets closed abruptly, we should be safe.
 
-		# init these variables as None which means that no database is opened and no cursor is set
-		self.database, self.db_cursor = None, None
-		# --> self.get_currency_symbol()
+		# init as None which means that no database is opened (see self.open_database()).
+		self.engine = None
+		# the version of the database structure, see upgrade_schema().
+		self.schema_version = None
+		# group commit settings of the engine, see the INFO in database/engine.py.
+		# window 0 = don't wait for more writes, only group what's already queued (no extra delay).
+		# synchronous "FULL" = every commit is on the disk before we continue, "NORMAL" = faster but
+		# the last commits could be lost if the machine loses power (a crash of the bot is fine with both).
+		self.db_commit_window_ms = 0
+		self.db_commit_max_statements = 100
+		self.db_synchronous = "FULL"
+		# the last used user rows (see get_user_object). Every write on a user has to invalidate him,
+		# --> execute_commit(..., user=user_id) or user="all" for many users at once.
+		self.user_cache = SkenderUserCache(max_size=10000)
+		# the leaderboards in memory. Every user marked in forget_user() is read again before the next lookup.
+		# enabled False: rank and page come from SQL (see get_leaderboard_page()).
+		# verify True: every lookup is also done in SQL and compared (slow, to check the index).
+		self.rank_index = SkenderRankIndex()
+		self.rank_index_enabled = True
+		self.rank_index_verify = False
+		self.rank_index_lock = asyncio.Lock()
+		# --> await self.get_currency_symbol()
 		self.currency_symbol = None
 		# --> self.get_channel_infos()
 		self.default_variable_info, self.level_channels_info = None, None
 		# --> self.get_xp_infos()
 		self.xp_per_msg, self.passive_income_per_msg, self.xp_and_passive_income_delay = None, None, None
+		# --> self.load_config_snapshot(), the variables and actions tables (see database/snapshots.py).
+		self.config = None
+		# --> await self.get_item_catalog(), item_name -> SkenderCatalogItem (without the stock).
+		# None = not loaded (yet) or invalidated, see forget_item_catalog().
+		self.item_catalog = None
+		self.item_catalog_generation = 0
+		# --> self.load_levels(), the levels table as sorted lists (see SkenderLevelTable in database/snapshots.py).
+		self.levels = None
+		# --> self.handle_message_xp_and_passive_income(), saved by self.flush_chat_rewards() every few seconds.
+		self.chat_rewards = SkenderChatRewards()
+		self.chat_rewards_flush_seconds = 5
+		self.chat_rewards_flush_lock = asyncio.Lock()
+		self.chat_rewards_task = None
+		# every execute / execute_commit / transaction adds its numbers to the running command (see perf.py).
+		self.perf = SkenderPerf()
+		# --> self.load_action_phrases(). no_repeat: a user doesn't get one of his last 3 phrases again.
+		self.action_phrases = SkenderPhrasePicker(no_repeat=3, max_keys=10000)
 		self.level_channel_objects = []
 		# we do the path from the main.py file, so we go into the db folder, then select
 		base_directory = os.path.dirname(os.path.abspath(__file__))
 		self.path_to_db = os.path.join(base_directory, "database.sqlite")
+		# path_to_db can be given to use another file (e.g. a temporary database for the benchmarks/).
+		if path_to_db is not None:
+			self.path_to_db = path_to_db
 		old_json_path = os.path.join(base_directory, "database.json")
 		self.client = client
+		# --> self.backup_database(): a copy of the database every backup_interval_hours (0 = only with +backup),
+		# in the folder "backups" next to the database. Keeps the last 7, compressed, none older than 30 days.
+		self.backup = SkenderBackup(os.path.join(os.path.dirname(os.path.abspath(self.path_to_db)), "backups"))
+		self.backup_interval_hours = 24
+		self.backup_lock = asyncio.Lock()
+		self.backup_task = None
+		# --> self.run_maintenance(): checkpoints the WAL, keeps the statistics of the query planner up to date and
+		# gives free pages back after a big clean_database, when the bot is quiet.
+		self.maintenance = SkenderMaintenance()
+		self.maintenance_task = None
 
 		# initiate utils (../utilities.py)
 		self.utils = SkenderUtilities(client, admin_role)
@@ -343,7 +451,8 @@ class SkenderDatabaseHandler:
 			print("\nOld JSON Database found, but also new SQLite version.\n"
 				  "If you already migrated, you can ignore this (maybe rename database.json"
 				  " to old_db.json to avoid this message.\nIf you did not migrate yet, please DELETE the SQLite file "
-				  "and then run the bot again (A SQLite file will be created and added automatically during migration.")
+				  "and then run the bot again (A SQLite file will be created and added automatically during migration.\n"
+				  "If the migration got stopped in the middle, choose [2]: it goes on where it stopped.")
 
 			while 1:
 				user_input = input("Do you want to [1] continue or [2] migrate ? ")
@@ -415,7 +524,8 @@ class SkenderDatabaseHandler:
 		else:
 			# check if exists but is empty
 			self.open_database()
-			default_var = self.db_cursor.execute(
+			# the event loop is not running yet (we're still in __init__), so we can wait for the result directly.
+			default_var = self.engine.read_blocking(
 				"SELECT var_value FROM variables WHERE var_name = ?",
 				("income_reset",)
 			).fetchone()
@@ -434,6 +544,10 @@ class SkenderDatabaseHandler:
 				self.open_database()
 				self.db_set_up = True
 
+		# bring the structure of the file up to date (new columns, indexes, changed types ...), also if the
+		# creator above didn't run (empty database). Nothing to do most of the time, see upgrade_schema().
+		self.upgrade_schema()
+
 		# get CURRENCY SYMBOL ==> done through ../main.py in @on_ready, because the bot needs to actually run first,
 		# else we can't fetch any emojis from servers.
 		# if you want to change the currency symbol, edit it in the database or by change_currency_emoji().
@@ -664,7 +778,7 @@ class SkenderDatabaseHandler:
 							break
 
 						if key == "currency_emoji_name":
-							try_emoji, info = self.get_currency_symbol(test=True, new_emoji=user_input, first_run=False)
+							try_emoji, info = await self.get_currency_symbol(test=True, new_emoji=user_input, first_run=False)
 							if try_emoji == "error":
 								await setup_channel.send(info)
 								continue
@@ -849,15 +963,15 @@ class SkenderDatabaseHandler:
 		self.db_set_up = True
 
 	# very important.
-	def get_currency_symbol(self, test=False, new_emoji="default", first_run=False):
+	async def get_currency_symbol(self, test=False, new_emoji="default", first_run=False):
 
 		# when first starting the self.client, just try to get the emoji set in the database.
 		if first_run: # called through ../main.py
 			try:
-				currency_symbol = self.execute(
+				currency_symbol = (await self.execute(
 					"SELECT var_value FROM variables WHERE var_name = ?",
 					("currency_emoji_name", )
-				).fetchone()["var_value"]
+				)).fetchone()["var_value"]
 			except Exception as e:
 				print(f"ERROR. Database may have problems. Error code: {e}")
 				currency_symbol = "unset"
@@ -930,11 +1044,11 @@ class SkenderDatabaseHandler:
 	# run this separately, called in main.py.
 	# ran after creation etc. so we only need to do it once.
 	async def get_channel_infos(self):
-		row = self.execute("SELECT mode FROM level_channels LIMIT 1").fetchone()
+		row = (await self.execute("SELECT mode FROM level_channels LIMIT 1")).fetchone()
 
 		self.channels_level_mode = row["mode"] if row else None
 
-		levels_json = self.execute("SELECT channels FROM level_channels LIMIT 1").fetchone()
+		levels_json = (await self.execute("SELECT channels FROM level_channels LIMIT 1")).fetchone()
 		if levels_json is None:
 			self.channels_level_handling = []
 		else:
@@ -951,10 +1065,10 @@ class SkenderDatabaseHandler:
 				self.channels_level_handling = []
 				print(f"ERR (not critical): could not load included/excluded channels. Error code: {e}")
 
-		result = self.execute(
+		result = (await self.execute(
 			"SELECT var_value FROM variables WHERE var_name = ?",
 			("levels_info_channel",)
-		).fetchone()
+		)).fetchone()
 
 		self.channel_level_info = None
 		if result:
@@ -973,106 +1087,254 @@ class SkenderDatabaseHandler:
 
 	# get infos from variables that we won't need to fetch every time
 	async def get_xp_infos(self):
-		# we should be able to easily fetchone()[0] directly, should not be NULL.
-		self.xp_per_msg = self.execute(
-			"SELECT var_value FROM variables WHERE var_name = ?",
-			("xp_per_msg",)
-		).fetchone()
-
-		self.xp_per_msg = self.xp_per_msg["var_value"] if self.xp_per_msg else 0
-
-		self.passive_income_per_msg = self.execute(
-			"SELECT var_value FROM variables WHERE var_name = ?",
-			("passive_income_per_msg",)
-		).fetchone()
-
-		self.passive_income_per_msg = self.passive_income_per_msg["var_value"] if self.passive_income_per_msg else 0
-
-		self.xp_and_passive_income_delay = self.execute(
-			"SELECT var_value FROM variables WHERE var_name = ?",
-			("xp_and_passive_income_delay",)
-		).fetchone()
-
-		if self.xp_and_passive_income_delay:
-			self.xp_and_passive_income_delay = self.xp_and_passive_income_delay["var_value"]
-		else:
-			self.xp_and_passive_income_delay = 0
-
-		# set to integers
-		self.xp_per_msg = int(self.xp_per_msg)
-		self.passive_income_per_msg = int(self.passive_income_per_msg)
-		self.xp_and_passive_income_delay = int(self.xp_and_passive_income_delay)
-
+		# they come from the config snapshot (already converted to int, 0 if not set).
+		config = await self.get_config()
+		self.xp_per_msg = config.xp_per_msg
+		self.passive_income_per_msg = config.passive_income_per_msg
+		self.xp_and_passive_income_delay = config.xp_and_passive_income_delay
+
+	# (re)load the tables "variables" and "actions" into a new, read-only snapshot and replace the old one.
+	# called in bot.py on_ready() and after every change of a variable or action.
+	# the commands read self.config instead of asking the database every time.
+	async def load_config_snapshot(self):
+		variable_rows = (await self.execute("SELECT * FROM variables")).fetchall()
+		action_rows = (await self.execute("SELECT * FROM actions")).fetchall()
+		# a simple assignment: everyone either has the old or the new snapshot, never something in between.
+		self.config = SkenderConfigSnapshot.from_rows(variable_rows, action_rows)
+		return self.config
+
+	async def get_config(self):
+		if self.config is None:
+			await self.load_config_snapshot()
+		return self.config
+
+	# (re)load the table "levels". Called in bot.py on_ready() and after change_levels saved new levels.
+	# with it, a chat message doesn't need any SQL query to know the level of a user.
+	async def load_levels(self):
+		level_rows = (await self.execute("SELECT level_number, level_xp FROM levels")).fetchall()
+		self.levels = SkenderLevelTable.from_rows(level_rows)
+		return self.levels
+
+	async def get_levels(self):
+		if self.levels is None:
+			await self.load_levels()
+		return self.levels
 
 	"""
 	GLOBAL FUNCTIONS
 	"""
 
 	def open_database(self):
-		if self.database is None:
+		if self.engine is None:
 			# print(f"[LOG]: Opening database !")
 			# this also creates the file automatically, if it does not exist !
-			self.database = sqlite3.connect(self.path_to_db)
-			# WAL means Write-Ahead Logging. Useful for multiple simultaneous accesses.
-			# this is VERY IMPORTANT, KEEP IT THIS WAY IF YOU DON'T KNOW WHAT YOU'RE DOING.
-			self.database.execute("PRAGMA journal_mode=WAL")
-
-			# row allows us to get the data from sql as python dict. Probably very useful.
-			# beware: it is readonly !
-			# also VERY IMPORTANT, KEEP IT THIS WAY (except if you want to re-write the whole bot).
-			self.database.row_factory = sqlite3.Row
-			self.db_cursor = self.database.cursor()
-
-	def commit(self):
-		# if it is None, then we didn't open the database so there is nothing to commit,
-		# but it means that we wanted to access the database, so we can open it as a safe result
-		if self.database is None:
-			self.open_database()
-			return
-		# else db is open, commit.
-		# print(f"[LOG]: Committing to database !")
-		self.database.commit()
+			# the engine sets WAL mode and sqlite3.Row for us (see database/engine.py).
+			# both are VERY IMPORTANT, KEEP IT THIS WAY IF YOU DON'T KNOW WHAT YOU'RE DOING.
+			self.engine = SkenderDatabaseEngine(
+				self.path_to_db,
+				commit_window_ms=self.db_commit_window_ms,
+				commit_max_statements=self.db_commit_max_statements,
+				synchronous=self.db_synchronous
+			)
+			self.engine.start()
+
+	# applies the schema versions of database/database_migration.py that this file doesn't have yet.
+	# own connection, with the engine closed: nothing else writes while the structure changes.
+	# a long rewrite is done in chunks, if the bot gets stopped in the middle, it goes on from there at the next start.
+	def upgrade_schema(self):
+		self.close_database()
+		connection = sqlite3.connect(self.path_to_db)
+		try:
+			database_migration.upgrade_schema(connection)
+			self.schema_version = database_migration.current_schema_version(connection)
+		finally:
+			connection.close()
+		print(f"[LOG]: database structure version {self.schema_version} (newest: {database_migration.SCHEMA_VERSION}).")
 
 	def close_database(self):
-		if self.database is not None:
+		if self.engine is not None:
 			# print("[LOG]: Closing database !")
-			self.database.commit()
-			self.database.close()
-		self.database = None
-		self.db_cursor = None
+			pending = self.chat_rewards.stats()["pending_users"]
+			if pending:
+				# only shutdown_database() can still save them (it has to await the flush).
+				print(f"[LOG]: closing the database with unsaved chat xp / income of {pending} user(s).")
+			# stop() first finishes every write that is still queued, nothing gets lost.
+			self.engine.stop()
+		self.engine = None
+
+	# when the bot stops (see SkenderBot.on_close()): stop the background tasks, save the chat xp / income
+	# that is still only in memory, then close. Like backup_database(), the flush comes before the engine stops.
+	async def shutdown_database(self):
+		tasks = [task for task in (self.chat_rewards_task, self.backup_task, self.maintenance_task) if task is not None]
+		for task in tasks:
+			task.cancel()
+		# wait until they really stopped (a flush or backup running right now ends first).
+		await asyncio.gather(*tasks, return_exceptions=True)
+		self.chat_rewards_task, self.backup_task, self.maintenance_task = None, None, None
+
+		if self.engine is not None and self.chat_rewards.stats()["pending_users"]:
+			try:
+				saved = await self.flush_chat_rewards()
+				print(f"[LOG]: saved the chat xp / income of {saved} user(s) before closing the database.")
+			except Exception as e:
+				print(f"[LOG]: failed to save chat xp / income before closing the database. Error: {e}")
+		self.close_database()
 
-	async def execute_commit(self, query, parameters=(), commit=True):
+	# user: if the query changes a row in the users table, give the user_id (or "all" if it changes many users)
+	# so the user cache (see get_user_object) forgets it.
+	async def execute_commit(self, query, parameters=(), commit=True, user=None):
 		if not commit: raise ValueError("Are you trying to use self.execute() ?")
-		if self.database is None or self.db_cursor is None:
+		if self.engine is None:
 			self.open_database()
+		if user is not None:
+			self.forget_user(user)
 		# avoid race conditions
+		# the lock is only held to queue the job. The writer thread executes and commits it,
+		# so the event loop (and the lock) don't wait for the disk.
+		# inside self.transaction(): we already have the lock, the transaction commits at the end.
+		transaction = self.current_transaction.get()
+		if transaction is not None:
+			result = await transaction.write(query, parameters)
+			self.perf.add_query(result)
+			return result
+		lock_start = time.perf_counter()
 		async with self.db_lock:
-			result = self.db_cursor.execute(query, parameters)
-			# commit should be set to True when calling this function in the following contexts:
-			# INSERT, UPDATE, DELETE, CREATE, DROP, ALTER etc.
-			self.commit()
+			self.perf.add_lock_wait(time.perf_counter() - lock_start)
+			future = self.engine.submit_write(query, parameters)
+		# commit should be set to True when calling this function in the following contexts:
+		# INSERT, UPDATE, DELETE, CREATE, DROP, ALTER etc.
+		# --> the writer thread always commits. The result is a QueryResult (see database/engine.py).
+		# writes arriving at the same time share one commit (group commit), but we only get
+		# the result once that commit is done, so after the await the change is saved.
+		try:
+			result = await asyncio.wrap_future(future)
+			self.perf.add_query(result)
 			return result
-
-	# separate execute and execute with commit, since else we would need to await every SELECT,
-	# which may reduce performance.
-	def execute(self, query, parameters=()):
-		if self.database is None or self.db_cursor is None:
+		finally:
+			# again after the write: someone could have read (and cached) the old row in the meantime.
+			if user is not None:
+				self.forget_user(user)
+
+	# separate execute and execute with commit, since execute (SELECT) doesn't need the lock
+	# and goes to the read-only connections of the engine.
+	# usage: (await self.execute(...)).fetchone(), same as with a cursor before.
+	async def execute(self, query, parameters=()):
+		if self.engine is None:
 			self.open_database()
-		result = self.db_cursor.execute(query, parameters)
+		# inside self.transaction() we need to see our own changes that are not committed yet.
+		transaction = self.current_transaction.get()
+		if transaction is not None:
+			result = await transaction.read(query, parameters)
+		else:
+			result = await self.engine.read(query, parameters)
+		self.perf.add_query(result)
 		return result
 
 	# executemany is always with commit
-	async def executemany(self, query, parameters=(), commit=True):
+	async def executemany(self, query, parameters=(), commit=True, user=None):
 		if not commit: raise ValueError("error, need to commit !!")
-		if self.database is None or self.db_cursor is None:
+		if self.engine is None:
 			self.open_database()
+		if user is not None:
+			self.forget_user(user)
+		transaction = self.current_transaction.get()
+		if transaction is not None:
+			result = await transaction.write(query, parameters, many=True)
+			self.perf.add_query(result)
+			return result
+		lock_start = time.perf_counter()
 		async with self.db_lock:
-			result = self.db_cursor.executemany(query, parameters)
-			self.commit()
+			self.perf.add_lock_wait(time.perf_counter() - lock_start)
+			future = self.engine.submit_write(query, parameters, many=True)
+		try:
+			result = await asyncio.wrap_future(future)
+			self.perf.add_query(result)
 			return result
+		finally:
+			if user is not None:
+				self.forget_user(user)
+
+	# removes a user (or "all" users) from the user cache.
+	# inside a transaction, also once it is finished: until the commit, others still read the old row
+	# and could put it back into the cache.
+	# and marks him for the leaderboards in memory (see refresh_rank_index()).
+	def forget_user(self, user):
+		if user == "all":
+			self.user_cache.clear()
+		else:
+			user = int(user)
+			self.user_cache.invalidate(user)
+		self.rank_index.mark(user)
+		transaction = self.current_transaction.get()
+		if transaction is not None:
+			transaction.on_finish.append(lambda: self.forget_user_now(user))
+
+	# the same for many users at once (bulk updates). The user cache is simply emptied,
+	# the leaderboards in memory only read these users again (and not everyone, like with "all").
+	def forget_users(self, user_ids):
+		user_ids = [int(user_id) for user_id in user_ids]
+		self.user_cache.clear()
+		self.rank_index.mark_many(user_ids)
+		transaction = self.current_transaction.get()
+		if transaction is not None:
+			transaction.on_finish.append(lambda: self.forget_users(user_ids))
+
+	def forget_user_now(self, user):
+		if user == "all":
+			self.user_cache.clear()
+		else:
+			self.user_cache.invalidate(user)
+		self.rank_index.mark(user)
+
+	# unit of work for commands that write several times:
+	#
+	#	async with self.transaction() as transaction:
+	#		... checks (return "error", ... is fine here, nothing gets saved) ...
+	#		await self.change_balance(...)
+	#		await self.safe_items_update(...)
+	#		await transaction.commit()
+	#	... send messages, add roles (after the commit, so we don't keep the database waiting for discord) ...
+	#
+	# everything inside goes through self.execute / self.execute_commit as usual, but in ONE transaction
+	# (BEGIN IMMEDIATE ... COMMIT, so only one fsync). If we leave the block without transaction.commit(),
+	# because of an error or an early return, everything is rolled back.
+	# The lock is held for the whole block, so keep discord calls out of it.
+	@contextlib.asynccontextmanager
+	async def transaction(self):
+		if self.engine is None:
+			self.open_database()
+
+		# already in a transaction (e.g. a function using it is called by another one): just join it.
+		# the lock is not re-entrant, so we can't take it again here.
+		transaction = self.current_transaction.get()
+		if transaction is not None:
+			transaction.depth += 1
+			commits_before = transaction.inner_commits
+			try:
+				yield transaction
+			finally:
+				transaction.depth -= 1
+				# the inner block did not reach its commit: the outer one can't commit either.
+				if transaction.inner_commits == commits_before:
+					transaction.rollback_only = True
+			return
+
+		lock_start = time.perf_counter()
+		async with self.db_lock:
+			# the writer thread can still be busy with the writes queued before, BEGIN waits for them too.
+			transaction = await self.engine.begin()
+			self.perf.add_lock_wait(time.perf_counter() - lock_start)
+			token = self.current_transaction.set(transaction)
+			try:
+				yield transaction
+			finally:
+				self.current_transaction.reset(token)
+				if not transaction.finished:
+					await transaction.rollback()
+				self.perf.add_sqlite(transaction.commit_seconds)
 
 	# this is to split the execute in chunks in case there is a lot to do
-	async def executemany_by_chunks(self, query, data, chunk=1000):
+	async def executemany_by_chunks(self, query, data, chunk=1000, user=None):
 		# in case there are a huge bunch of people, split it a bit.
 		# but: chunk should not be too small in case between our edits another process wants to also edit
 		# the database values we want to change. So this should be kept relatively high to avoid race conditions.
@@ -1084,22 +1346,11 @@ class SkenderDatabaseHandler:
 				# execute from 0 to 1000, then 1000 to 2000 etc.
 				await self.executemany(
 					query,
-					data[index:index+chunk], commit=True
+					data[index:index+chunk], commit=True, user=user
 				)
 			except Exception as e:
 				raise Exception(f"Error updating chunk at {index // chunk}: {e}")
 
-	# I don't know how useful these will be, but it's good to have them
-	def fetchone(self):
-		if self.database is None:
-			self.open_database()
-		# will fetch wherever the cursor is at. So it depends on what was executed before calling this function.
-		return self.db_cursor.fetchone()
-	def fetchall(self):
-		if self.database is None:
-			self.open_database()
-		return self.db_cursor.fetchall()
-
 	async def change_balance(self, user_id, amount, balance_obj="cash", mode="replace"):
 		# update (not insert, since we already have our user), commit and close
 		# safe execute does all that automatically.
@@ -1110,17 +1361,17 @@ class SkenderDatabaseHandler:
 		if mode == "replace":
 			await self.execute_commit(
 				f"UPDATE users SET {balance_obj} = ? WHERE user_id = ?",
-				(amount, user_id)
+				(amount, user_id), user=user_id
 			)
 		elif mode == "add":
 			await self.execute_commit(
 				f"UPDATE users SET {balance_obj} = {balance_obj} + ? WHERE user_id = ?",
-				(amount, user_id)
+				(amount, user_id), user=user_id
 			)
 		elif mode == "subtract":
 			await self.execute_commit(
 				f"UPDATE users SET {balance_obj} = {balance_obj} - ? WHERE user_id = ?",
-				(amount, user_id)
+				(amount, user_id), user=user_id
 			)
 		elif mode == "pass":
 			# in this case we don't change the balance (e.g. blackjack returned "bust") but only update last used.
@@ -1141,20 +1392,30 @@ class SkenderDatabaseHandler:
 
 	async def get_user_object(self, user_id_searched, fail_safe=False):
 		user_id_searched = int(user_id_searched)
-		self.open_database()
+
+		# first look in the user cache (not inside a transaction: there we have to see our own, uncommitted changes).
+		use_cache = self.current_transaction.get() is None
+		if use_cache:
+			user_object = self.user_cache.get(user_id_searched)
+			if user_object is not None:
+				return user_object
+			cache_token = self.user_cache.fill_token()
+
 		# info: the ? and tuple is to prevent sql injections, apparently. Which is not necessary here but still cool.
 		# we need fetchone() because else we just set the cursor without actually fetching data
 		# no need for fetchall() because user_id is unique.
 		# we fetch select into a tuple (user_to_find, ...) because the ... will be all the data.
 		# we could also select specific data, like: SELECT user_id, user_discord_nick ... (user_to_find, user_nick) etc.
-		user_object = self.execute(
+		user_object = (await self.execute(
 			f"SELECT * FROM users WHERE user_id = ?", (user_id_searched, )
-		).fetchone()
+		)).fetchone()
 
 		# info: we get a tuple but because of sqlite.Row above, we can also access like a python dict.
 		# fetchone() returns "None" if nothing is found.
 		# if it is not none, just return the user (and None, because we return "error" if we're in fail_safe mode)
 		if user_object is not None:
+			if use_cache:
+				self.user_cache.put(user_id_searched, user_object, cache_token)
 			return user_object
 
 		# info: fail_safe just means that we don't create the user if we didn't find them.
@@ -1183,12 +1444,12 @@ class SkenderDatabaseHandler:
 		# commit set to True, because we need to commit after INSERT / UPDATE ...
 		await self.execute_commit(
 			"INSERT INTO users (user_id, user_discord_nick) VALUES (?, ?)",
-			new_user_object
+			new_user_object, user=user_id_searched
 		)
 		# now get user object and return it
-		user_object = self.execute(
+		user_object = (await self.execute(
 			f"SELECT * FROM users WHERE user_id = ?", (user_id_searched, )
-		).fetchone()
+		)).fetchone()
 		return user_object
 
 	@staticmethod
@@ -1222,7 +1483,7 @@ class SkenderDatabaseHandler:
 		# because SQLite checks itself and doesn't do the UPDATE if the value didn't change.
 		await self.execute_commit(
 			"UPDATE users SET user_discord_nick = ? WHERE user_id = ?",
-			(user_nickname, user)
+			(user_nickname, user), user=user
 		)
 		return None
 
@@ -1255,20 +1516,17 @@ class SkenderDatabaseHandler:
 	# this function checks gamble limits. Limits can be amounts of money (min / max possible bet)
 	# or a time limit (i.e. a cooldown before being able to bet again)
 	#	for the time limit see function --> check_action_delay(self, ...) below this one.
-	def check_gamble_amount_limits(self, game, user_cash, bet):
+	async def check_gamble_amount_limits(self, game, user_cash, bet):
 		# check amount limits !
 		if game not in ["roulette", "blackjack"]:
 			raise ValueError("function parameter <game> must be either 'roulette' or 'blackjack'.")
 
-		min_amount = self.execute(f"SELECT * FROM variables WHERE var_name = 'min_amount_to_{game}' ").fetchone()
-		max_amount = self.execute(f"SELECT * FROM variables WHERE var_name = 'max_amount_to_{game}' ").fetchone()
+		config = await self.get_config()
+		min_amount = config.variable(f"min_amount_to_{game}")
+		max_amount = config.variable(f"max_amount_to_{game}")
 
-		if min_amount is None or max_amount is None:
-			raise ValueError("Error while fetching from database. Please contact an admin.")
-		elif min_amount["var_type"] == "int" and max_amount["var_type"] == "int":
-			min_amount = int(min_amount["var_value"])
-			max_amount = int(max_amount["var_value"])
-		else:
+		# the snapshot already converted them to int (if var_type is int).
+		if not isinstance(min_amount, int) or not isinstance(max_amount, int):
 			raise ValueError("Error while fetching from database. Please contact an admin.")
 
 		if bet == "all": bet = user_cash
@@ -1291,40 +1549,33 @@ class SkenderDatabaseHandler:
 		return "success", "success", bet
 
 	# check delay (cooldown) for an action or gambling.
-	def check_action_delay(self, action_name, user_object, mode="action"):
+	async def check_action_delay(self, action_name, user_object, mode="action"):
 		# returns "run" --> cooldown passed or "delay" --> not enough time passed.
 		# delay will be in SECONDS for Gambling and in MINUTES for Actions like slut/work...
 
 		# technically, "action_name" is unprecise, because it can also be gamble_name.
+		config = await self.get_config()
 		if mode == "action":
 			# get from table "actions" where every action has a delay set.
-
-			delay = self.execute(
-				"SELECT delay FROM actions WHERE action_name = ?",
-				(action_name,)
-			).fetchone()["delay"]
+			delay = config.action(action_name).delay
 		elif mode == "gamble":
 			# for gambling, the bigger variables are in the table "variables".
-			# btw: no risk for SQL injections since only our code calls this and checks everything.
-			delay = self.execute(f"SELECT var_value FROM variables WHERE var_name = 'delay_{action_name}' ").fetchone()
-			if not delay: return "error", "unknown error"
-			delay = int(delay["var_value"])
+			delay = config.variable(f"delay_{action_name}")
+			if delay is None: return "error", "unknown error"
+			delay = int(delay)
 		else:
 			raise ValueError("mode must be either 'action' or 'gamble'.")
 
 		# if it is the user's first time using the action/gamble, we can skip the whole check.
-		last_run_string = user_object[f"last_{action_name}"] # always the same layout: last_slut, last_roulette ...
-		if last_run_string == "none":
+		last_run = user_object[f"last_{action_name}"] # always the same layout: last_slut, last_roulette ...
+		if not last_run:
 			return "run", None
 
 		# else: not the first run, so check the time passed and if that is enough for delay.
-		now = datetime.now()
-		# get a time object from the string
-		last_run = datetime.strptime(last_run_string, '%Y-%m-%d %H:%M:%S.%f')
-		# calculate difference, see if it works
-		passed_time = now - last_run
+		# both in epoch ms (see epoch_ms()), so just a subtraction.
+		passed_ms = epoch_ms() - last_run
 		# calculate, different for gambling (delay is in seconds) and for actions (delay is in minutes).
-		elapsed = int(passed_time.total_seconds()) if mode == "gamble" else int(passed_time.total_seconds() // 60) # get int and not float.
+		elapsed = passed_ms // 1000 if mode == "gamble" else passed_ms // 60_000
 		# <= 0 to be sure, but == 0 should be enough since we turn to int above.
 		if elapsed <= 0:
 			elapsed = 1
@@ -1356,10 +1607,10 @@ class SkenderDatabaseHandler:
 
 	# update last used values (last_slut, last_roulette ...)
 	async def actions_write_last_run(self, ctx, action):
-		current_time = str(datetime.now())
+		current_time = epoch_ms()
 		await self.execute_commit(
 			f"UPDATE users SET last_{action} =  ? WHERE user_id = ?",
-			(current_time, ctx.user)
+			(current_time, ctx.user), user=ctx.user
 		)
 		# print(f"WRITTEN {current_time} TO {ctx.user} AS <last_{action}>")
 
@@ -1377,14 +1628,14 @@ class SkenderDatabaseHandler:
 
 		# check amount limits
 		user_cash = user_object["cash"]
-		status, msg, bet = self.check_gamble_amount_limits(game, user_cash, bet)
+		status, msg, bet = await self.check_gamble_amount_limits(game, user_cash, bet)
 		# "error" = amount not correct. we keep "error" because that is the central way we interact with ../main.py
 		if status == "error":
 			# the error messages are formatted in the check function directly.
 			return status, msg, None, None, None
 
 		# check time limit
-		status, delay_remaining = self.check_action_delay(game, user_object, mode="gamble")
+		status, delay_remaining = await self.check_action_delay(game, user_object, mode="gamble")
 
 		if status == "delay":
 			await self.send_cooldown_embed(ctx, game, delay_remaining, mode="gamble")
@@ -1476,7 +1727,7 @@ class SkenderDatabaseHandler:
 		user_object = await self.get_user_object(ctx.user)
 
 		# check time limit
-		status, delay_remaining = self.check_action_delay(action, user_object)
+		status, delay_remaining = await self.check_action_delay(action, user_object)
 
 		if status == "delay":
 			await self.send_cooldown_embed(ctx, action, delay_remaining, mode="action")
@@ -1489,18 +1740,26 @@ class SkenderDatabaseHandler:
 
 		return "run", user_object
 
-	def get_random_action_phrase(self, action, type_):
-		phrase = self.execute(
-			"SELECT phrase FROM action_phrases where action_name = ? AND type = ? ORDER BY RANDOM() LIMIT 1",
-			(action, type_)
-		).fetchone()["phrase"]
+	# load all action phrases into memory (see database/phrases.py).
+	# called in bot.py on_ready(). If you add or edit phrases, call it again so the changes are used.
+	async def load_action_phrases(self):
+		rows = (await self.execute("SELECT action_name, type, phrase, weight FROM action_phrases")).fetchall()
+		self.action_phrases.load(rows)
+
+	# user: so the same user doesn't get the same phrases again and again.
+	async def get_random_action_phrase(self, action, type_, user=None):
+		# maybe the phrases were not loaded yet, or added since: (re)load once.
+		if not self.action_phrases.loaded or not self.action_phrases.has(action, type_):
+			await self.load_action_phrases()
+		phrase = self.action_phrases.pick(action, type_, user)
+		if phrase is None:
+			raise ValueError(f"No {type_} phrases found for action {action}.")
 		return phrase
 
-	def calculate_action_loss(self, action, user_object):
-		min_loss_percentage, max_loss_percentage = self.execute(
-			"SELECT min_lose_amount_percentage, max_lose_amount_percentage FROM actions WHERE action_name = ?",
-			(action,)
-		).fetchone()
+	async def calculate_action_loss(self, action, user_object):
+		action_config = (await self.get_config()).action(action)
+		min_loss_percentage = action_config.min_lose_amount_percentage
+		max_loss_percentage = action_config.max_lose_amount_percentage
 		loss_percentage = random.randint(min_loss_percentage, max_loss_percentage)
 		# we lose a certain amount of the total net worth, even if that brings us in a deficit in cash.
 		balance = user_object["cash"] + user_object["bank"]
@@ -1509,16 +1768,15 @@ class SkenderDatabaseHandler:
 		return round(loss, 0)
 
 	async def actions_run(self, ctx, action, user_object, user_to_rob=None):
+		# all values of the action (proba, revenues...) from the config snapshot, no need to ask the database.
+		action_config = (await self.get_config()).action(action)
 
 		if action == "work":
 			# there is no probability for work, it always works.
 			success = True
 		else:
 			# will always return an INT between 0 and 100. Only other case is for work (see above).
-			proba = self.execute(
-				"SELECT proba FROM actions WHERE action_name = ?",
-				(action,)
-			).fetchone()["proba"]
+			proba = action_config.proba
 			# random.random() gives float between 0.0 and 1.0 (1.0 being excluded).
 			# our probability value is between 0 and 100, so we divide it by 100.
 			# if our probability to win is greater than the "dice roll", then it returns True.
@@ -1527,11 +1785,11 @@ class SkenderDatabaseHandler:
 
 		if not success:
 			# get a loss phrase, directly only choosing one random from the table through sql.
-			lose_phrase = self.get_random_action_phrase(action, "lose")
+			lose_phrase = await self.get_random_action_phrase(action, "lose", ctx.user)
 
 			# for losing, slut, crime and rob have the same functioning ; work will never not success.
 			# --> if action in ["slut", "crime", "rob"]:
-			loss = self.calculate_action_loss(action, user_object)
+			loss = await self.calculate_action_loss(action, user_object)
 
 			# write changes to database and update "last_..."
 			await self.actions_write_balance(ctx, loss, mode="subtract")
@@ -1545,25 +1803,21 @@ class SkenderDatabaseHandler:
 		# else: we won. with "rob" you gain a percentage from someone else, all other work with a min- and max-revenue.
 
 		# get a phrase, works same for all.
-		win_phrase = self.get_random_action_phrase(action, "win")
+		win_phrase = await self.get_random_action_phrase(action, "win", ctx.user)
 		# init win as 0, calculate below.
 		win = 0
 
 		# handle "normal" actions
 		if action in ["slut", "crime", "work"]:
 			# range values (absolute amounts)
-			min_win, max_win = self.execute(
-				"SELECT min_revenue, max_revenue FROM actions WHERE action_name = ?", (action,)
-			).fetchone()
+			min_win, max_win = action_config.min_revenue, action_config.max_revenue
 			# how much we made
 			win = random.randint(min_win, max_win)
 		# handle robbing specifically.
 		elif action in ["rob"]:
 			# range values for rob are a certain percentage from what someone else has on hand, not an absolute amount.
-			min_win_percentage, max_win_percentage = self.execute(
-				"SELECT min_gain_amount_percentage, max_gain_amount_percentage FROM actions WHERE action_name = ?",
-				(action,)
-			).fetchone()
+			min_win_percentage = action_config.min_gain_amount_percentage
+			max_win_percentage = action_config.max_gain_amount_percentage
 			# actual percentage
 			win_percentage = random.randint(min_win_percentage, max_win_percentage)
 
@@ -1588,7 +1842,7 @@ class SkenderDatabaseHandler:
 			user_balance = user_object["cash"] + user_object["bank"]
 
 			if robbed_balance < user_balance:
-				loss = self.calculate_action_loss(action, user_object)
+				loss = await self.calculate_action_loss(action, user_object)
 
 				msg = (f"{self.error_emoji} You've been fined {str(self.currency_symbol)} "
 					   f"**{self.format_number_separator(loss)}** for trying to rob a person poorer than you."),
@@ -1681,10 +1935,12 @@ class SkenderDatabaseHandler:
 		# check if user exists (-> main.py: if we check ourselves, user_to_check = user, else it's from the other user.)
 		# no need for fail_safe option because that is already checked in main.py before calling this function
 		user_object = await self.get_user_object(user_to_check)
+		# the passive chat income of the last seconds is still in memory (see flush_chat_rewards()), but it's his.
+		bank = user_object["bank"] + self.chat_rewards.pending_income(user_to_check)
 
 		check_cash = self.format_number_separator(user_object["cash"])
-		check_bank = self.format_number_separator(user_object["bank"])
-		check_bal = self.format_number_separator(user_object["cash"] + user_object["bank"])
+		check_bank = self.format_number_separator(bank)
+		check_bal = self.format_number_separator(user_object["cash"] + bank)
 		# :02 means "always at least 2 numbers after comma" and gives us 10:04 and not 10:4.
 		formatted_time = str(f"{datetime.now().hour:02}:{datetime.now().minute:02}")
 
@@ -1740,18 +1996,21 @@ class SkenderDatabaseHandler:
 	#
 
 	async def deposit(self, ctx, amount):
-		# get user
-		user_object = await self.get_user_object(ctx.user)
-
-		# also removes money from cash
-		status, msg = await self.check_and_change_funds(ctx, user_object, amount)
-		if status == "error":
-			return status, msg
-		# so we know the amount if we said "all"
-		if status == "success": amount = int(msg)
-
-		await self.change_balance(ctx.user, amount, balance_obj="cash", mode="subtract")
-		await self.change_balance(ctx.user, amount, balance_obj="bank", mode="add")
+		# one transaction: both balances change together (or not at all), with only one commit.
+		async with self.transaction() as transaction:
+			# get user
+			user_object = await self.get_user_object(ctx.user)
+
+			# also removes money from cash
+			status, msg = await self.check_and_change_funds(ctx, user_object, amount)
+			if status == "error":
+				return status, msg
+			# so we know the amount if we said "all"
+			if status == "success": amount = int(msg)
+
+			await self.change_balance(ctx.user, amount, balance_obj="cash", mode="subtract")
+			await self.change_balance(ctx.user, amount, balance_obj="bank", mode="add")
+			await transaction.commit()
 
 		# inform user
 		msg = (f"{self.worked_emoji} Deposited {str(self.currency_symbol)} "
@@ -1765,18 +2024,21 @@ class SkenderDatabaseHandler:
 	#
 
 	async def withdraw(self, ctx, amount):
-		# get user
-		user_object = await self.get_user_object(ctx.user)
-
-		# also adds money to cash
-		status, msg = await self.check_and_change_funds(ctx, user_object, amount, mode="bank")
-		if status == "error":
-			return status, msg
-		# so we know the amount if we said "all"
-		if status == "success": amount = int(msg)
-
-		await self.change_balance(ctx.user, amount, balance_obj="bank", mode="subtract")
-		await self.change_balance(ctx.user, amount, balance_obj="cash", mode="add")
+		# one transaction: both balances change together (or not at all), with only one commit.
+		async with self.transaction() as transaction:
+			# get user
+			user_object = await self.get_user_object(ctx.user)
+
+			# also adds money to cash
+			status, msg = await self.check_and_change_funds(ctx, user_object, amount, mode="bank")
+			if status == "error":
+				return status, msg
+			# so we know the amount if we said "all"
+			if status == "success": amount = int(msg)
+
+			await self.change_balance(ctx.user, amount, balance_obj="bank", mode="subtract")
+			await self.change_balance(ctx.user, amount, balance_obj="cash", mode="add")
+			await transaction.commit()
 
 		# inform user
 		msg = (f"{self.worked_emoji} Withdrew {str(self.currency_symbol)} "
@@ -1797,17 +2059,22 @@ class SkenderDatabaseHandler:
 			await self.send_confirmation(ctx, msg, color="red")
 			return None, None
 
-		# get user
-		user_object = await self.get_user_object(ctx.user)
+		# one transaction: the money can't leave one user without arriving at the other one.
+		async with self.transaction() as transaction:
+			# get user
+			user_object = await self.get_user_object(ctx.user)
+			# create the receiving user if needed, else the UPDATE below would not find him.
+			await self.get_user_object(reception_user)
 
-		status, msg = await self.check_and_change_funds(ctx, user_object, amount)
-		if status == "error":
-			return status, msg
-		# so we know the amount if we said "all"
-		if status == "success": amount = int(msg)
+			status, msg = await self.check_and_change_funds(ctx, user_object, amount)
+			if status == "error":
+				return status, msg
+			# so we know the amount if we said "all"
+			if status == "success": amount = int(msg)
 
-		await self.change_balance(ctx.user, amount, balance_obj="cash", mode="subtract")
-		await self.change_balance(reception_user, amount, balance_obj="cash", mode="add")
+			await self.change_balance(ctx.user, amount, balance_obj="cash", mode="subtract")
+			await self.change_balance(reception_user, amount, balance_obj="cash", mode="add")
+			await transaction.commit()
 
 		# inform user
 		msg = (f"{self.worked_emoji} {recept_user_obj.mention} has received your "
@@ -1866,10 +2133,10 @@ class SkenderDatabaseHandler:
 
 			# OPTION 1 : first look if he meant a variable.
 
-			row_info = self.execute(
+			row_info = (await self.execute(
 				"SELECT * FROM variables WHERE var_name = ?",
 				(module,)
-			).fetchone()
+			)).fetchone()
 
 			if row_info:
 
@@ -1888,9 +2155,9 @@ class SkenderDatabaseHandler:
 				return "success", "success"
 
 			# OPTION 2: module seems to either action or wrong input
-			fetch = self.execute(
+			fetch = (await self.execute(
 				"SELECT * FROM actions WHERE action_name = ?", (module,)
-			).fetchone()
+			)).fetchone()
 			if not fetch:
 				return "error", "Module with that name was not found (use module all)."
 
@@ -1950,9 +2217,9 @@ class SkenderDatabaseHandler:
 		#	4: default value.
 		#	5: 1 if primary key, else 0.
 
-		all_variables_info = self.execute(
+		all_variables_info = (await self.execute(
 			"SELECT * FROM variables"
-		).fetchall()
+		)).fetchall()
 
 		# for the variables. We only have 1 row per variable.
 
@@ -1981,9 +2248,9 @@ class SkenderDatabaseHandler:
 
 		# now for the actions. There, we actually deal with rows.
 
-		actions_columns = self.execute(
+		actions_columns = (await self.execute(
 			"SELECT * FROM actions"
-		).fetchall()
+		)).fetchall()
 
 		embed = discord.Embed(color=self.discord_blue_rgb_code)
 		embed.title = "TABLE 'ACTIONS'"
@@ -2033,10 +2300,10 @@ class SkenderDatabaseHandler:
 
 		if mode == "actions":
 			# check if action exists
-			result = self.execute(
+			result = (await self.execute(
 				"SELECT * FROM actions WHERE action_name = ?",
 				(action_name,)
-			).fetchone()
+			)).fetchone()
 
 			if not result:
 				return "error", "action not found."
@@ -2059,6 +2326,8 @@ class SkenderDatabaseHandler:
 				f"UPDATE actions SET {variable_name} = ? WHERE action_name = ?",
 				(new_value, action_name)
 			)
+			# new config snapshot, so the change applies directly.
+			await self.load_config_snapshot()
 
 			# inform
 			await ctx.channel.send(f"{self.worked_emoji} {variable_name} for {action_name} set to {new_value}")
@@ -2073,10 +2342,10 @@ class SkenderDatabaseHandler:
 				return "error", "You cannot change common_reset_time or last_global_income_update."
 
 			# check if variable exists
-			result = self.execute(
+			result = (await self.execute(
 				"SELECT * FROM variables WHERE var_name = ?",
 				(variable_name,)
-			).fetchone()
+			)).fetchone()
 
 			if not result:
 				return "error", "Variable not found."
@@ -2090,6 +2359,9 @@ class SkenderDatabaseHandler:
 				"UPDATE variables SET var_value = ? WHERE var_name = ?",
 				(new_value, variable_name)
 			)
+			# new config snapshot, so the change applies directly (xp variables included).
+			await self.load_config_snapshot()
+			await self.get_xp_infos()
 
 			# inform
 			msg = f"{self.worked_emoji} {variable_name} set to {new_value}"
@@ -2106,12 +2378,12 @@ class SkenderDatabaseHandler:
 
 	async def change_currency_symbol(self, ctx, new_emoji_name):
 		# old emoji
-		old_value = self.execute(
+		old_value = (await self.execute(
 			"SELECT var_value FROM variables WHERE var_name = ?",
 			("currency_emoji_name",)
-		).fetchone()["var_value"]
+		)).fetchone()["var_value"]
 
-		status, msg = self.get_currency_symbol(True, new_emoji_name)
+		status, msg = await self.get_currency_symbol(True, new_emoji_name)
 		if status == "error":
 			return status, msg
 
@@ -2120,6 +2392,7 @@ class SkenderDatabaseHandler:
 			"UPDATE variables SET var_value = ? WHERE var_name = ?",
 			(new_emoji_name, "currency_emoji_name")
 		)
+		await self.load_config_snapshot()
 
 		# no verification btw.
 		# inform user
@@ -2140,6 +2413,7 @@ class SkenderDatabaseHandler:
 			"UPDATE variables SET var_value = ? WHERE var_name = ?",
 			(new_income_reset, "income_reset")
 		)
+		await self.load_config_snapshot()
 
 		# inform user
 		msg = f"{self.worked_emoji}  Changed income-reset to　`{new_income_reset}`"
@@ -2159,9 +2433,12 @@ class SkenderDatabaseHandler:
 			"UPDATE variables SET var_value = ? WHERE var_name = ?",
 			(new_value, "passive_income_per_msg")
 		)
+		# new config snapshot, the new income applies directly (no reboot needed anymore).
+		await self.load_config_snapshot()
+		await self.get_xp_infos()
 
 		# inform user
-		msg = f"{self.worked_emoji}  Changed passive chat income to　`{new_value}`\n**Please REBOOT Bot to apply.**"
+		msg = f"{self.worked_emoji}  Changed passive chat income to　`{new_value}`"
 		footer = "info: income is per message, with the same cooldown as for gaining xp."
 		await self.send_confirmation(ctx, msg, color="green", footer=footer)
 
@@ -2181,10 +2458,10 @@ class SkenderDatabaseHandler:
 			max_bal, reply_message, item_img_url, roles_id_excluded
 	):
 
-		result = self.execute(
+		result = (await self.execute(
 			"SELECT 1 FROM items_catalog WHERE item_name = ?",
 			(item_name, )
-		).fetchone()
+		)).fetchone()
 
 		if result: return "error", f"{self.error_emoji} Item with such name already exists."
 
@@ -2206,6 +2483,7 @@ class SkenderDatabaseHandler:
 				json.dumps(roles_id_to_give), json.dumps(roles_id_to_remove),
  				json.dumps(roles_id_excluded), max_bal, reply_message, expiration_date, item_img_url)
 		)
+		self.forget_item_catalog()
 
 		return "success", "success"
 
@@ -2222,6 +2500,7 @@ class SkenderDatabaseHandler:
 		)
 
 		if not result: return "error", f"{self.error_emoji} Item not found."
+		self.forget_item_catalog()
 
 		# also delete from inventories
 		await self.execute_commit(
@@ -2238,23 +2517,20 @@ class SkenderDatabaseHandler:
 	async def remove_user_item(self, ctx, item_name, amount_removed, reception_user, recept_user_obj, usage=""):
 		amount_removed = int(amount_removed)
 
-		result = self.execute("SELECT * FROM user_items WHERE user_id = ?", (reception_user,)).fetchone()
+		result = (await self.execute("SELECT * FROM user_items WHERE user_id = ?", (reception_user,))).fetchone()
 
 		if not result:
 			return "error", f"{self.error_emoji} User does not have any items."
 
-		possessed_items = self.check_user_item_amount(reception_user, item_name)
+		possessed_items = await self.check_user_item_amount(reception_user, item_name)
 
-		if not result:
+		if not possessed_items:
 			return "error", f"{self.error_emoji} User does not possess the specified item."
 		if possessed_items - amount_removed < 0:
 			return "error", (f"{self.error_emoji} User does not have the necessary amount of `{item_name}` (info: has {possessed_items}).\n"
 							 f"Usage: `{usage}`")
 
-		await self.execute_commit(
-			"UPDATE user_items SET amount = amount - ? WHERE user_id = ? AND item_name = ?",
-			(amount_removed, reception_user, item_name)
-		)
+		await self.apply_inventory_changes([(reception_user, item_name, -amount_removed)])
 
 		# inform user
 		msg = (f"{self.worked_emoji} Removed {self.format_number_separator(amount_removed)} "
@@ -2268,28 +2544,51 @@ class SkenderDatabaseHandler:
 	COMMON ITEM HANDLING FUNCTIONS
 	"""
 
-	def check_user_item_amount(self, user, item_name, mode="specific"):
+	# the items_catalog, already parsed (roles as sets, limits as int/None, expiration as datetime).
+	# Loaded the first time it's needed and kept until an item gets created or removed.
+	# the stock is not in there, see SkenderCatalogItem in database/snapshots.py.
+	async def get_item_catalog(self):
+		catalog = self.item_catalog
+		if catalog is not None:
+			return catalog
+		# same trick as the user cache: if an item got created / removed while we were reading, don't keep it.
+		generation = self.item_catalog_generation
+		rows = (await self.execute("SELECT * FROM items_catalog")).fetchall()
+		catalog = MappingProxyType(SkenderCatalogItem.from_rows(rows))
+		if generation == self.item_catalog_generation:
+			self.item_catalog = catalog
+		return catalog
+
+	async def get_catalog_item(self, item_name):
+		return (await self.get_item_catalog()).get(item_name)
+
+	def forget_item_catalog(self):
+		self.item_catalog = None
+		self.item_catalog_generation += 1
+
+	async def check_user_item_amount(self, user, item_name, mode="specific"):
 		# if called with mode="any", we check if the user has any items at all.
 		if mode == "any":
 			# print(user, type(user))
 			# with limit to have a fast check if someone has a lot of items
-			any_items_owned = self.execute("SELECT 1 FROM user_items WHERE user_id = ? LIMIT 1",
-										   (user,)).fetchall()
+			any_items_owned = (await self.execute("SELECT 1 FROM user_items WHERE user_id = ? LIMIT 1",
+										   (user,))).fetchall()
 
 			# print(any_items_owned)
 
 			return True if any_items_owned else False
 
-		already_owned = self.execute("SELECT amount FROM user_items WHERE user_id = ? AND item_name = ?",
-									 (user, item_name)).fetchone()
+		already_owned = (await self.execute("SELECT amount FROM user_items WHERE user_id = ? AND item_name = ?",
+									 (user, item_name))).fetchone()
 		# set to 0 if already_owned is None.
 		already_owned_amount = already_owned["amount"] if already_owned else 0
 		return already_owned_amount
 
 	# we can merge updating user_items and user_used_items with the same function,
 	# since they both have the same columns (user_id, item_name, amount).
+	# the user has to be registered already (every caller has his user object). For users who might not be,
+	# or for many changes at once, see apply_inventory_changes().
 	async def safe_items_update(self, table, user, item_name, new_amount, mode="replace"):
-		await self.get_user_object(user)
 		# check if table exists. We know that these two tables definitely exist,
 		#	so we don't need an extra "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)"
 		# btw: I just learned that for "in/not in" checks, {} is faster than [] and ()
@@ -2300,25 +2599,61 @@ class SkenderDatabaseHandler:
 		if mode not in {"replace", "add"}:
 			return "error", "only 'replace' or 'add' mode can be used (FUNC: safe_items_update)."
 
-		# check if row already exists
-		row_exists = self.execute(f"SELECT 1 FROM {table} WHERE user_id = ? AND item_name = ?",
-								  (user, item_name)).fetchone()
+		# before: SELECT to see if the row exists, then INSERT or UPDATE.
+		# now ONE statement: insert the row, or if (user_id, item_name) is already there (primary key), update it.
+		set_mode = "amount = amount + excluded.amount" if mode == "add" else "amount = excluded.amount"
+		await self.execute_commit(
+			f"INSERT INTO {table} (user_id, item_name, amount) VALUES (?, ?, ?) "
+			f"ON CONFLICT(user_id, item_name) DO UPDATE SET {set_mode}",
+			(user, item_name, new_amount)
+		)
+		# worked.
+		return "success", "success"
 
-		# now create a new row or update the existing one
-		set_mode = "amount = amount + ?" if mode == "add" else "amount = ?"
+	# many inventory changes at once: changes = [(user_id, item_name, +/- amount), ...]
+	# one UPSERT for all of them, in one transaction (joins the running one, if there is one).
+	# users that are not registered yet get created first (like get_user_object would), also in one statement.
+	# the amounts are NOT checked here: if something is removed, the caller checks that the user has enough.
+	# used by level rewards, give / spawn item and remove-user-item.
+	async def apply_inventory_changes(self, changes, table="user_items"):
+		if table not in {"user_items", "user_used_items"}:
+			return "error", "only user_items and user_used_items table able to modify."
 
-		if not row_exists:
-			await self.execute_commit(
-				f"INSERT INTO {table} VALUES (?, ?, ?)",
-				(user, item_name, new_amount)
-			)
-		else:
-			await self.execute_commit(
-				f"UPDATE {table} SET {set_mode} WHERE user_id = ? AND item_name = ?",
-				(new_amount, user, item_name)
+		# the same user and item twice --> one row.
+		deltas = {}
+		for user, item_name, amount in changes:
+			key = (int(user), item_name)
+			deltas[key] = deltas.get(key, 0) + amount
+		if not deltas:
+			return "success", 0
+		user_ids = {user for user, _ in deltas}
+
+		async with self.transaction() as transaction:
+			await self.create_missing_users(user_ids)
+			await self.executemany(
+				f"INSERT INTO {table} (user_id, item_name, amount) VALUES (?, ?, ?) "
+				f"ON CONFLICT(user_id, item_name) DO UPDATE SET amount = amount + excluded.amount",
+				[(user, item_name, amount) for (user, item_name), amount in deltas.items()]
 			)
-		# worked.
-		return "success", "success"
+			await transaction.commit()
+		return "success", len(deltas)
+
+	# creates the users we don't know yet, with the same nickname get_user_object() would give them.
+	async def create_missing_users(self, user_ids):
+		rows = []
+		for user_id in user_ids:
+			try:
+				user_nickname = self.escape_nickname(str(self.client.get_user(user_id).name))
+			except Exception:
+				# not in the cache of discord -> id will be used as nickname.
+				user_nickname = str(user_id)
+			rows.append((user_id, user_nickname))
+		await self.executemany(
+			"INSERT OR IGNORE INTO users (user_id, user_discord_nick) VALUES (?, ?)", rows
+		)
+		# a new user is new in the leaderboards (the user cache never has users that don't exist).
+		for user_id in user_ids:
+			self.forget_user(user_id)
 
 
 	"""
@@ -2336,114 +2671,107 @@ class SkenderDatabaseHandler:
 		except:
 			return "error", "amount not integer"
 
-		# get variables
-		item = self.execute(
-			"SELECT * FROM items_catalog WHERE item_name = ?",
-			(item_name,)).fetchone()
+		# the parsed catalog row (cached), see get_item_catalog().
+		item = await self.get_catalog_item(item_name)
 		if not item:
 			return "error", "Item not found."
 
-		# get the display name
-		# this automatically checks, if such a key exists (else: none), else it takes the item_name.
-		# before it was checked through another SQLite query.
-		item_display_name = item["display_name"] or item_name
-
-		item_price = item["price"]
-		# since roles are saved as json lists, we need to load it too.
-		req_roles = json.loads(item["required_roles"])
-		give_roles = json.loads(item["given_roles"])
-		rem_roles = json.loads(item["removed_roles"])
-		excluded_roles = json.loads(item["excluded_roles"])
-		max_bal = item["maximum_balance"]
-		remaining_stock = item["amount_in_stock"]
-		max_amount = item["max_amount"]
-		max_amount_per_transaction = item["max_amount_per_transaction"]
-		expiration_date = item["expiration_date"]
-		reply_message = item["reply_message"]
-
-		# calculate expiration
-		today = datetime.today()
-		expire = datetime.strptime(expiration_date, "%Y-%m-%d %H:%M:%S.%f")
-		if today > expire:
-			return "error", f"{self.error_emoji} Item has already expired. Expiring date was {expiration_date}"
+		# a set, so the role checks below are set operations and not loops over a list.
+		user_roles = frozenset(ctx.user_roles)
+
+		# check expiration (None: never expires)
+		if item.expiration_date is not None and datetime.today() > item.expiration_date:
+			return "error", f"{self.error_emoji} Item has already expired. Expiring date was {item.expiration_date}"
 		# else we're good
 
-		# 1. check req roles. Using all() because he needs ALL of those roles.
-		# info: [int(role) in user_roles for role in req_roles]
-		# 	will check if role is in user_roles for every role in req_roles. So it loops automatically.
-		if req_roles != ["none"] and not all(int(role) in ctx.user_roles for role in req_roles):
+		# 1. check req roles. He needs ALL of those roles, so nothing may be left after removing his roles.
+		if item.required_roles - user_roles:
 			return "error", f"{self.error_emoji} User does not seem to have all required roles."
 
-		# 2. check excluded roles. Using any() because even ONE excluded role is enough to block.
-		if excluded_roles != ["none"]:
-			has_excluded = [int(role) in ctx.user_roles for role in excluded_roles] # example: [False, False, False, True]
-			# has_excluded is automatically True if there is one True in the list.
-			if any(has_excluded):
-				return "error", f"{self.error_emoji} User possesses excluded role (id: {has_excluded[0]})."
-
-		# 3. check if enough money
-		sum_price = round(item_price * amount, 0)
-		user_object = await self.get_user_object(ctx.user)
-		user_cash = user_object["cash"]
-		if user_cash < sum_price:
-			return "error", (f"{self.error_emoji} Not enough money in cash to purchase.\n"
-							 f"to pay: {sum_price} ; in cash: {user_cash}")
-
-		# 4. check if not too much money
-		user_bal = user_object["bank"] + user_cash
-		if max_bal != "none" and user_bal > max_bal:
-			return "error", (f"{self.error_emoji} You have too much money to purchase.\n"
-							 f"net worth: {self.format_number_separator(user_bal)} ; max bal: {max_bal}")
-
-		# 5. check if not too many items already owned / to be owned
-		already_owned_amount = self.check_user_item_amount(ctx.user, item_name)
-		if max_amount != "unlimited":
-			max_amount = int(max_amount)
-			if already_owned_amount + amount > max_amount:
-				return "error", (f"{self.error_emoji} You have too many items or would own too many.\n"
-					f"You can buy **{self.format_number_separator(max_amount - already_owned_amount)}** {item_name}(s)")
-
-		# 5.1: check if not too many at once
-		if max_amount_per_transaction != "unlimited":
-			max_amount_per_transaction = int(max_amount_per_transaction)
-			if amount > max_amount_per_transaction:
-				return "error", (f"{self.error_emoji} You cannot buy so many items at once.\n"
-				f"You can buy **{self.format_number_separator(max_amount_per_transaction)}** {item_name}(s) at once")
-
-
-		# --> those were the checks, now we execute.
-
-		# 6. remove money
-		await self.change_balance(ctx.user, sum_price, mode="subtract")
-
-		# 7. check if enough in stock or not, subtract stock
-		# this is a bit tricky because remaining_stock can be either unlimited or a number (as string).
-		if remaining_stock != "unlimited":
-			remaining_stock = int(remaining_stock)
-			if remaining_stock - amount < 0:
+		# 2. check excluded roles. Even ONE excluded role is enough to block.
+		has_excluded = item.excluded_roles & user_roles
+		if has_excluded:
+			return "error", f"{self.error_emoji} User possesses excluded role (id: {min(has_excluded)})."
+
+		# everything from here to adding it to the inventory is ONE transaction:
+		# if any check fails (early return) or something goes wrong, nothing gets saved. And it's only one commit.
+		async with self.transaction() as transaction:
+			# 3. check if enough money
+			sum_price = round(item.price * amount, 0)
+			user_object = await self.get_user_object(ctx.user)
+			user_cash = user_object["cash"]
+			if user_cash < sum_price:
+				return "error", (f"{self.error_emoji} Not enough money in cash to purchase.\n"
+								 f"to pay: {sum_price} ; in cash: {user_cash}")
+
+			# 4. check if not too much money
+			user_bal = user_object["bank"] + user_cash
+			if item.maximum_balance is not None and user_bal > item.maximum_balance:
+				return "error", (f"{self.error_emoji} You have too much money to purchase.\n"
+								 f"net worth: {self.format_number_separator(user_bal)} ; "
+								 f"max bal: {self.format_number_separator(item.maximum_balance)}")
+
+			# 5. check if not too many items already owned / to be owned
+			already_owned_amount = await self.check_user_item_amount(ctx.user, item_name)
+			max_amount = item.max_amount
+			if max_amount is not None:
+				if already_owned_amount + amount > max_amount:
+					return "error", (f"{self.error_emoji} You have too many items or would own too many.\n"
+						f"You can buy **{self.format_number_separator(max_amount - already_owned_amount)}** {item_name}(s)")
+
+			# 5.1: check if not too many at once
+			max_amount_per_transaction = item.max_amount_per_transaction
+			if max_amount_per_transaction is not None:
+				if amount > max_amount_per_transaction:
+					return "error", (f"{self.error_emoji} You cannot buy so many items at once.\n"
+					f"You can buy **{self.format_number_separator(max_amount_per_transaction)}** {item_name}(s) at once")
+
+
+			# --> those were the checks, now we execute.
+
+			# 6. check if enough in stock or not, subtract stock
+			# (checked before taking the money, else we could take it and then say "not enough in stock").
+			# the stock changes with every purchase, so it's not in the catalog cache: read it here, in the transaction.
+			# this is a bit tricky because remaining_stock can be either unlimited or a number (as string).
+			remaining_stock = (await self.execute(
+				"SELECT amount_in_stock FROM items_catalog WHERE item_name = ?",
+				(item_name,))).fetchone()
+			if not remaining_stock:
+				# removed in the meantime
+				return "error", "Item not found."
+			remaining_stock = remaining_stock["amount_in_stock"]
+			if str(remaining_stock).lower() != "unlimited":
+				remaining_stock = int(remaining_stock)
+				if remaining_stock - amount < 0:
 					return "error", f"{self.error_emoji} Not enough remaining in stock ({remaining_stock} remaining)."
-			await self.execute_commit(
-				"UPDATE items_catalog SET amount_in_stock = amount_in_stock - ? WHERE item_name = ?",
-				( int(remaining_stock) - amount, item_name),
-			)
-		# else if unlimited: skip.
+				await self.execute_commit(
+					"UPDATE items_catalog SET amount_in_stock = ? WHERE item_name = ?",
+					(remaining_stock - amount, item_name),
+				)
+			# else if unlimited: skip.
+
+			# 7. remove money
+			await self.change_balance(ctx.user, sum_price, mode="subtract")
+
+			# 8. add to inventory (create a new row if he did not have that item yet, else - on conflict - update).
+			new_amount = already_owned_amount + amount
+			await self.safe_items_update("user_items", ctx.user, item_name, new_amount)
 
-		# 8. add to inventory (create a new row if he did not have that item yet, else - on conflict - update).
-		new_amount = already_owned_amount + amount
-		await self.safe_items_update("user_items", ctx.user, item_name, new_amount)
+			await transaction.commit()
 
+		# the purchase is saved, now the discord part (outside the transaction, discord can be slow).
 		# 9. check remove roles
-		if rem_roles != ["none"]:
-			await self.utils.add_or_remove_roles_user(ctx, ctx.user_ctx_obj, rem_roles, mode="remove")
+		if item.removed_roles:
+			await self.utils.add_or_remove_roles_user(ctx, ctx.user_ctx_obj, item.removed_roles, mode="remove")
 
 		# 10. check give roles
-		if give_roles != ["none"]:
-			await self.utils.add_or_remove_roles_user(ctx, ctx.user_ctx_obj, give_roles, mode="add")
+		if item.given_roles:
+			await self.utils.add_or_remove_roles_user(ctx, ctx.user_ctx_obj, item.given_roles, mode="add")
 
 		# done ! -> inform user
-		msg = (f"You have bought {amount} {item_display_name} and paid {str(self.currency_symbol)} "
+		msg = (f"You have bought {amount} {item.display_name} and paid {str(self.currency_symbol)} "
 			   f"**{self.format_number_separator(sum_price)}**")
-		await self.send_confirmation(ctx, msg, color="blue", footer=reply_message)
+		await self.send_confirmation(ctx, msg, color="blue", footer=item.reply_message)
 
 		return "success", "success"
 
@@ -2453,31 +2781,25 @@ class SkenderDatabaseHandler:
 
 	async def give_item(self, ctx, item_name, amount, reception_user, recept_user_object, spawn_mode):
 
-		item_exists = self.execute("SELECT * FROM items_catalog WHERE item_name = ?",
-								   (item_name,)).fetchone()
+		item_exists = await self.get_catalog_item(item_name)
 		if not item_exists:
 			return "error", f"{self.error_emoji} Item not found (needs to be created before spawning)."
 
-		user_items_amount = self.execute(
-			"SELECT amount FROM user_items WHERE item_name = ? AND user_id = ?",
-			(item_name, ctx.user)
-		).fetchone()
-		user_items_amount = user_items_amount["amount"] if user_items_amount else 0
-
 		try:
-			# if it's not just an admin spawning an item
-			# then we remove the given items from the giving user.
-			if not spawn_mode:  # not doing this if an admin just spawns an item
-				if user_items_amount < amount:
-					return "error", f"{self.error_emoji} You do not have enough items of that item to give."
-
-				# else: goes through
-				new_amount = user_items_amount - amount
-				await self.safe_items_update("user_items", ctx.user, item_name, new_amount)
-			# now handling the reception side
-			reception_user_items_amount = self.check_user_item_amount(reception_user, item_name)
-			reception_new_amount = reception_user_items_amount + amount
-			await self.safe_items_update("user_items", reception_user, item_name, reception_new_amount)
+			# one transaction: the items are only taken from the giver if the receiver gets them.
+			async with self.transaction() as transaction:
+				# if it's not just an admin spawning an item
+				# then we remove the given items from the giving user.
+				changes = [(reception_user, item_name, amount)]
+				if not spawn_mode:  # not doing this if an admin just spawns an item
+					user_items_amount = await self.check_user_item_amount(ctx.user, item_name)
+					if user_items_amount < amount:
+						return "error", f"{self.error_emoji} You do not have enough items of that item to give."
+					# else: goes through
+					changes.append((ctx.user, item_name, -amount))
+				# the reception side is created if he is not registered yet.
+				await self.apply_inventory_changes(changes)
+				await transaction.commit()
 
 		except Exception as e:
 			print("Error while giving/spawning item:", e)
@@ -2500,25 +2822,28 @@ class SkenderDatabaseHandler:
 
 	async def use_item(self, ctx, item_name, amount):
 
-		user_items = self.execute("SELECT * FROM user_items WHERE user_id = ? AND item_name = ?",
-								  (ctx.user, item_name)).fetchone()
-		if not user_items:
-			return "error", f"{self.error_emoji} You do not have the specified item."
-		else: user_item_amount = user_items["amount"]
-
-		# use items
-		if user_item_amount < amount:
-			return "error", f"{self.error_emoji} You do not have enough items of that item to use."
-
-		# else proceed
-		# increase the user_used_items table. Default mode is to just replace, but
-		# since we work with two different tables, the easiest way is just to say "increase" in the other function
-		# and not double-check here, if he already used those items etc.
-		await self.safe_items_update("user_used_items", ctx.user, item_name, amount, mode="add")
-
-		# remove items the user has
-		new_owned_amount = user_item_amount - amount
-		await self.safe_items_update("user_items", ctx.user, item_name, new_owned_amount, mode="replace")
+		# one transaction: used items are only counted if they are also removed from the inventory.
+		async with self.transaction() as transaction:
+			user_items = (await self.execute("SELECT * FROM user_items WHERE user_id = ? AND item_name = ?",
+									  (ctx.user, item_name))).fetchone()
+			if not user_items:
+				return "error", f"{self.error_emoji} You do not have the specified item."
+			else: user_item_amount = user_items["amount"]
+
+			# use items
+			if user_item_amount < amount:
+				return "error", f"{self.error_emoji} You do not have enough items of that item to use."
+
+			# else proceed
+			# increase the user_used_items table. Default mode is to just replace, but
+			# since we work with two different tables, the easiest way is just to say "increase" in the other function
+			# and not double-check here, if he already used those items etc.
+			await self.safe_items_update("user_used_items", ctx.user, item_name, amount, mode="add")
+
+			# remove items the user has
+			new_owned_amount = user_item_amount - amount
+			await self.safe_items_update("user_items", ctx.user, item_name, new_owned_amount, mode="replace")
+			await transaction.commit()
 
 		# inform user
 		plural = "s" if amount > 1 else ""
@@ -2549,7 +2874,7 @@ class SkenderDatabaseHandler:
 			local_user_pfp = ctx.user_pfp
 
 		# first check: any items ?
-		any_items = self.check_user_item_amount(user, None, mode="any")
+		any_items = await self.check_user_item_amount(user, None, mode="any")
 		if not any_items:
 			title = "inventory"
 			msg = "**Inventory empty. No items owned.**"
@@ -2559,8 +2884,8 @@ class SkenderDatabaseHandler:
 
 		# else: make inventory checkup.
 		# get all the items he still has (skip those with amount at 0)
-		user_items = self.execute("SELECT * FROM user_items WHERE user_id = ? AND amount > 0",
-								  (user,)).fetchall()
+		user_items = (await self.execute("SELECT * FROM user_items WHERE user_id = ? AND amount > 0",
+								  (user,))).fetchall()
 		# example return:
 		#	[
 		#		{"user_id": ..., "item_name": ..., "amount": ...}
@@ -2596,10 +2921,10 @@ class SkenderDatabaseHandler:
 			# this gives us (?, ?, ?) with ? being the amount of names we're fetching.
 			fetch_all_query = f"({','.join(['?'] * len(all_names))})"
 			# now fetch
-			all_item_infos = self.execute(
+			all_item_infos = (await self.execute(
 				f"SELECT * FROM items_catalog WHERE item_name IN {fetch_all_query}",
 				all_names
-			).fetchall()
+			)).fetchall()
 
 			# create all_amounts dictionary, since we need to be able to easily access it below.
 			all_amounts = {obj["item_name"]: obj["amount"] for obj in user_items}
@@ -2641,7 +2966,7 @@ class SkenderDatabaseHandler:
 
 	async def catalog(self, ctx, item_check):
 
-		all_items_raw = self.execute("SELECT * FROM items_catalog").fetchall()
+		all_items_raw = (await self.execute("SELECT * FROM items_catalog")).fetchall()
 		all_items = {item["item_name"]: item for item in all_items_raw}
 
 		if not all_items:
@@ -2800,13 +3125,13 @@ class SkenderDatabaseHandler:
 	COMMON ROLE HANDLING FUNCTIONS
 	"""
 
-	def get_all_income_roles(self, mode="default"):
-		roles = self.execute("SELECT * FROM income_roles").fetchall()
+	async def get_all_income_roles(self, mode="default"):
+		roles = (await self.execute("SELECT * FROM income_roles")).fetchall()
 		return roles
 
-	def role_exists(self, role_id):
-		exists = self.execute("SELECT 1 FROM income_roles WHERE role_id = ?",
-							  (role_id, )).fetchone()
+	async def role_exists(self, role_id):
+		exists = (await self.execute("SELECT 1 FROM income_roles WHERE role_id = ?",
+							  (role_id, ))).fetchone()
 		return exists is not None
 
 	async def update_income_roles(self, role_id, mode="none", role_income=None):
@@ -2823,9 +3148,9 @@ class SkenderDatabaseHandler:
 			return None, None
 
 		# checks to see if it is able to be updated / inserted.
-		if mode == "insert" and self.role_exists(role_id):
+		if mode == "insert" and await self.role_exists(role_id):
 			return "error", f"{self.error_emoji} Role already exists as income role."
-		if mode == "update" and not self.role_exists(role_id):
+		if mode == "update" and not await self.role_exists(role_id):
 			return "error", f"{self.error_emoji} Role to update was not found as registered income role."
 
 		if mode == "insert":
@@ -2901,7 +3226,7 @@ class SkenderDatabaseHandler:
 		description = ""
 		current = 0
 
-		all_income_roles = self.get_all_income_roles()
+		all_income_roles = await self.get_all_income_roles()
 
 		if not all_income_roles:
 			return "error", "There are no income roles set currently !"
@@ -2943,37 +3268,35 @@ class SkenderDatabaseHandler:
 
 		# moderator can choose to also set accumulation (i.e.: called 2 days ago, now again = 2 payments) to false.
 		# if its value is true, everyone just gets 1 income payment per role
-		reset_status = self.execute(
-			"SELECT var_value FROM variables WHERE var_name = ?",
-			("income_reset", )
-		).fetchone()["var_value"]
+		config = await self.get_config()
+		reset_status = config.variable("income_reset")
 
 		# inform that we're starting
 		await ctx.channel.send(f"```\nStarting global income update with income_reset set to {reset_status}...\n"
 						   f"This may take some time to complete.\n```")
 
 		# get all roles
-		all_income_roles = self.get_all_income_roles()
+		all_income_roles = await self.get_all_income_roles()
 		# log errors when trying to fetch roles through discord API
 		role_error = 0
 		# init a grouped msg
 		block = ""
-		# init a grouped sqlite update
-		grouped_update = []
+		# member id -> what he gets in total (all his income roles together), so one row per member.
+		# before, every role did a get_user_object() per member (and an INSERT + commit for new ones)
+		# and every role of a member was its own UPDATE.
+		incomes = {}
+		# member id -> member, for the nickname of the ones not registered yet.
+		members = {}
 
 		# calculate time
-		last_global_income_update_row = self.execute(
-			"SELECT var_value FROM variables WHERE var_name = ?",
-			("last_global_income_update", )
-		).fetchone()
+		last_global_income_update_str = config.variable("last_global_income_update")
 		reset_time = datetime.min.time()
 		now = datetime.now()
 
-		if last_global_income_update_row is None or last_global_income_update_row[0] is None:
+		if last_global_income_update_str is None:
 			# emergency ! we never updated all incomes. Set date to yesterday, so that everyone can collect.
 			last_global_income_update = datetime.combine(now.date() - timedelta(days=1), reset_time)
 		else:
-			last_global_income_update_str = last_global_income_update_row[0]
 			last_global_income_update = datetime.strptime(last_global_income_update_str, "%Y-%m-%d %H:%M:%S.%f")
 
 		days_passed = (now - last_global_income_update).days
@@ -2992,14 +3315,10 @@ class SkenderDatabaseHandler:
 				role_error += 1
 				continue
 
-			# go through all the server members who have that role
+			# go through all the server members who have that role (discord.py has them in its cache, no API call).
 			for member in role_obj.members:
-				# used to create the user in case he wasn't registered yet
-				uid_obj = await self.get_user_object(member.id)
-				uid = uid_obj["user_id"]
-
-				# append our grouped sqlite update
-				grouped_update.append((income_total, uid))
+				incomes[member.id] = incomes.get(member.id, 0) + income_total
+				members[member.id] = member
 
 			block += (f"`[{index}/{len(all_income_roles)}]` @{role_obj.name}, "
 					  f"you have received your income ({self.currency_symbol} "
@@ -3023,15 +3342,28 @@ class SkenderDatabaseHandler:
 		new_midnight = datetime.combine( now.date(), reset_time )
 		# format to string with microseconds, else there is inconsistency in the way we save time strings.
 		new_midnight_formatted = str(new_midnight.strftime("%Y-%m-%d %H:%M:%S.%f"))
-		await self.execute_commit(
-			"UPDATE variables SET var_value = ? WHERE var_name = ?",
-			(new_midnight_formatted, "last_global_income_update")
-		)
-
-		# actually make the update of each balance in the database
-		command = "UPDATE users SET bank = bank + ? WHERE user_id = ?"
-		await self.executemany_by_chunks(command, grouped_update)
 
+		# actually make the update of each balance in the database: one UPSERT per member.
+		# not registered yet --> created with his income as bank (the default bank is 0),
+		# else --> bank + income. Everything and the new last_global_income_update in ONE transaction:
+		# either everyone got paid and the date moved, or (error) nothing happened and it can be run again.
+		upsert_rows = [
+			(user_id, self.escape_nickname(str(members[user_id].name)), income)
+			for user_id, income in incomes.items()
+		]
+		async with self.transaction() as transaction:
+			await self.executemany(
+				"INSERT INTO users (user_id, user_discord_nick, bank) VALUES (?, ?, ?) "
+				"ON CONFLICT(user_id) DO UPDATE SET bank = bank + excluded.bank",
+				upsert_rows
+			)
+			self.forget_users(incomes)
+			await self.execute_commit(
+				"UPDATE variables SET var_value = ? WHERE var_name = ?",
+				(new_midnight_formatted, "last_global_income_update")
+			)
+			await transaction.commit()
+		await self.load_config_snapshot()
 
 		if role_error == 0:
 			return "success", "success"
@@ -3078,15 +3410,12 @@ class SkenderDatabaseHandler:
 		# date turns year-month-day hours-minutes-seconds to just year-month-day.
 		today = now.date()
 		# global collect date
-		lgc_str = self.execute(
-			"SELECT var_value FROM variables WHERE var_name = ?",
-			("common_reset_time", )
-		).fetchone()
-		if lgc_str is None or lgc_str["var_value"] is None:
+		config = await self.get_config()
+		lgc_str = config.variable("common_reset_time")
+		if lgc_str is None:
 			# emergency ! we never collected. Set date to yesterday, so that everyone can collect.
 			last_global_collect = datetime.combine(now.date() - timedelta(days=1), reset_time)
 		else:
-			lgc_str = lgc_str["var_value"]
 			last_global_collect = datetime.strptime(lgc_str, "%Y-%m-%d %H:%M:%S.%f")
 		last_global_collect_day = last_global_collect.date()
 
@@ -3100,21 +3429,57 @@ class SkenderDatabaseHandler:
 				"UPDATE variables SET var_value = ? WHERE var_name = ?",
 				(new_midnight_formatted, "common_reset_time")
 			)
+			await self.load_config_snapshot()
 
-		# when the user last collected
-		lsc_str = self.execute(
-			"SELECT last_single_collect FROM users WHERE user_id = ?",
-			(ctx.user, )
-		).fetchone()["last_single_collect"]
-		# returns None if we never collected before, so we can safely go ahead and let them collect.
-		if not lsc_str or lsc_str.lower() == "none":
-			last_single_collected = datetime.combine(now.date() - timedelta(days=1), reset_time)
-			new_day = True
-		# only else we check time.
-		else:
-			last_single_collected = datetime.strptime(lsc_str, "%Y-%m-%d %H:%M:%S.%f")
-			# calculate difference. If he last collected BEFORE today, then he can collect.
-			new_day = last_single_collected.date() < last_global_collect.date()
+		# get an "all roles" dict directly to make less database requests.
+		all_income_roles = await self.get_all_income_roles()
+		# check for matches
+		matching_roles = [ role for role in all_income_roles if role["role_id"] in ctx.user_roles ]
+		# get income reset value
+		income_reset = config.income_reset
+
+		# the cooldown check and the payment in one transaction: two +collect of the same user at the same time
+		# can't both see the old last_single_collect and both get paid. (no discord calls in here, they come after)
+		async with self.transaction() as transaction:
+			# when the user last collected
+			# (epoch ms, see epoch_ms())
+			lsc_ms = (await self.execute(
+				"SELECT last_single_collect FROM users WHERE user_id = ?",
+				(ctx.user, )
+			)).fetchone()["last_single_collect"]
+			# None if the user isn't registered, 0 if we never collected before, so we can safely go ahead and let them collect.
+			if not lsc_ms:
+				last_single_collected = datetime.combine(now.date() - timedelta(days=1), reset_time)
+				new_day = True
+			# only else we check time.
+			else:
+				# local time, like common_reset_time.
+				last_single_collected = datetime.fromtimestamp(lsc_ms / 1000)
+				# calculate difference. If he last collected BEFORE today, then he can collect.
+				new_day = last_single_collected.date() < last_global_collect.date()
+
+			if new_day and matching_roles:
+				if income_reset:
+					# only get 1 times your income.
+					payment_multiplier = 1
+				else:
+					days_passed = ( last_global_collect - last_single_collected ).days
+					if days_passed < 0: days_passed = 0
+					# every income multiplied by the amount of days you didn't collect.
+					payment_multiplier = days_passed
+				total_new_income = sum(role["role_income"] * payment_multiplier for role in matching_roles)
+
+				# update balance in database
+				await self.execute_commit(
+					"UPDATE users SET bank = bank + ? WHERE user_id = ?",
+					(total_new_income, ctx.user), user=ctx.user
+				)
+				# update the collect time in database
+				await self.execute_commit(
+					"UPDATE users SET last_single_collect = ? WHERE user_id = ?",
+					(int(now.timestamp() * 1000), ctx.user), user=ctx.user
+				)
+				await transaction.commit()
 
 		# return and inform if not new_day (i.e. payout date not yet reset)
 		# else: payout date has not yet reset.
@@ -3127,13 +3492,7 @@ class SkenderDatabaseHandler:
 			await ctx.channel.send(f"`⌛ You already collected! Reset in: {formatted_time_remaining} hours.`")
 			return "success", "success"
 
-		# else we can start collecting income !
-
-		# get an "all roles" dict directly to make less database requests.
-		all_income_roles = self.get_all_income_roles()
-
-		# check for matches
-		matching_roles = [ role for role in all_income_roles if role["role_id"] in ctx.user_roles ]
+		# else we collected the income !
 
 		# inform if there are no matching roles return.
 		if not matching_roles:
@@ -3141,28 +3500,13 @@ class SkenderDatabaseHandler:
 										 footer="You can try again with an income role.")
 			return "success", "success"
 
-		# get income reset value
-		income_reset = self.execute(
-			"SELECT var_value FROM variables WHERE var_name = ?",
-			("income_reset",)
-		).fetchone()["var_value"]
-		if income_reset.lower().strip() == "true":
-			# only get 1 times your income.
-			payment_multiplier = 1
-		else:
-			days_passed = ( last_global_collect - last_single_collected ).days
-			if days_passed < 0: days_passed = 0
-			# every income multiplied by the amount of days you didn't collect.
-			payment_multiplier = days_passed
-
 		# get the role objects for the matching roles (for a role.mention in the embed)
 		role_objects = {}
 		for role in matching_roles:
 			obj = await self.utils.get_role_object(ctx, role["role_id"])
 			role_objects[ role["role_id"] ] = obj
 
-		# now get the new income and format an embed.
-		total_new_income = 0
+		# now format an embed.
 
 		# init embed
 		embed = discord.Embed(title="payday!", color=self.discord_blue_rgb_code)
@@ -3183,18 +3527,6 @@ class SkenderDatabaseHandler:
 			final_report += (f"`{index}` - "
 							 f"{role_objects[role['role_id']].mention}\t"
 							 f"{amount_display}")
-			total_new_income += amount * payment_multiplier
-
-		# update balance in database
-		await self.execute_commit(
-			"UPDATE users SET bank = bank + ? WHERE user_id = ?",
-			(total_new_income, ctx.user)
-		)
-		# update the collect time in database
-		await self.execute_commit(
-			"UPDATE users SET last_single_collect = ? WHERE user_id = ?",
-			(str(now), ctx.user)
-		)
 
 		# add a total income info to the embed.
 		# adjust description for income_reset = False
@@ -3231,46 +3563,47 @@ class SkenderDatabaseHandler:
 		if not role_obj:
 			return "error", f"{self.error_emoji} Role not found."
 
-		all_income_roles = self.get_all_income_roles()
+		all_income_roles = await self.get_all_income_roles()
 
-		role = [ r[income_role] for r in all_income_roles if r["role_id"] == income_role]
+		role = [ r for r in all_income_roles if r["role_id"] == income_role]
 
 		if not role:
 			return "error", f"{self.error_emoji} Role exists, but not registered as income role in database."
 
-		all_role_members = [ member.id for member in role_obj.members ]
-
-		# because we use executemany below and executemany requires a list of tuples.
-		all_changes = []
-
-		# for better performance, we use asyncio.gather. It executes the SQLite queries parallely
-		# and does not require to await self.get_user_object for every user (also: no need for an extra await here !)
-		all_user_data = await asyncio.gather( *(self.get_user_object(user) for user in all_role_members) )
+		# the members of the role go into a TEMP table (only exists for this connection, never saved in the file),
+		# then ONE relative UPDATE for all of them. Before: a get_user_object() per member and the new bank
+		# calculated in python and written back as a fixed value, so a change in between (e.g. +work) got lost.
+		member_rows = [(member.id, self.escape_nickname(str(member.name))) for member in role_obj.members]
 
-		for user_id, user_object in zip(all_role_members, all_user_data):
-
-			user_bank = user_object["bank"]
-			user_cash = user_object["cash"]
-			user_balance = user_bank + user_cash
-
-			if mode == "remove":
-				if user_balance - amount < 0:
-					# set bank to negative of what user has in cash.
-					# allows us to still just edit bank variable and not bank and cash.
-					user_bank = -user_cash
-				else:
-					user_bank -= amount
-			elif mode == "add":
-				user_bank += amount
-
-			# add the tuple
-			all_changes.append( (user_bank, user_id) )
+		if mode == "remove":
+			# not below 0 in total: then bank = negative of what the user has in cash.
+			# allows us to still just edit bank variable and not bank and cash.
+			new_bank = "CASE WHEN cash + bank - :amount < 0 THEN -cash ELSE bank - :amount END"
+		else:
+			new_bank = "bank + :amount"
 
-		# execute in batches
-		query = "UPDATE users SET bank = ? WHERE user_id = ?"
-		await self.executemany_by_chunks(query, all_changes)
+		# all in one transaction: the writes of everyone else wait, nobody sees half of it.
+		# the temp table is on the connection of the writer thread, like everything in a transaction.
+		async with self.transaction() as transaction:
+			await self.execute_commit(
+				"CREATE TEMP TABLE IF NOT EXISTS role_members (user_id INTEGER PRIMARY KEY, user_discord_nick TEXT)"
+			)
+			await self.execute_commit("DELETE FROM temp.role_members")
+			await self.executemany("INSERT OR IGNORE INTO temp.role_members VALUES (?, ?)", member_rows)
+			# the members that are not registered yet (before: created one by one by get_user_object).
+			await self.execute_commit(
+				"INSERT OR IGNORE INTO users (user_id, user_discord_nick) SELECT user_id, user_discord_nick "
+				"FROM temp.role_members"
+			)
+			await self.execute_commit(
+				f"UPDATE users SET bank = {new_bank} WHERE user_id IN (SELECT user_id FROM temp.role_members)",
+				{"amount": amount}
+			)
+			self.forget_users(row[0] for row in member_rows)
+			await self.execute_commit("DROP TABLE temp.role_members")
+			await transaction.commit()
 
-		return len(all_role_members)
+		return "success", len(member_rows)
 
 
 	#
@@ -3282,12 +3615,14 @@ class SkenderDatabaseHandler:
 		if mode not in ["add", "remove"]:
 			raise ValueError("Mode for handling_money_role needs to be add or remove.")
 
-		executed_instances = await self.change_balance_by_role(ctx, income_role, amount, mode=mode)
+		status, executed_instances = await self.change_balance_by_role(ctx, income_role, amount, mode=mode)
+		if status == "error":
+			return status, executed_instances
 
 		# inform user
 		done = "removed" if mode == "remove" else "added"
 		msg = (f"{self.worked_emoji} You have {done} {self.currency_symbol} {self.format_number_separator(amount)} "
-			   f"from a total of {self.format_number_separator(len(executed_instances))} users with that role !")
+			   f"from a total of {self.format_number_separator(executed_instances)} users with that role !")
 		await self.send_confirmation(ctx, msg)
 
 		return "success", "success"
@@ -3301,97 +3636,219 @@ class SkenderDatabaseHandler:
 	# REMOVE USERS / REMOVE GONE USERS / CLEAN LEADERBOARD / CLEAN DATABASE
 	#
 
-	async def clean_database(self, server):
+	# dry_run: only count, nothing gets deleted.
+	# returns "success", {"total": users removed, "users" / "user_items" / "user_used_items": rows per table}
+	async def clean_database(self, server, dry_run=False):
 		# we will remove all users from the users table
 		# + from user items and user used items.
 		# info: we have ON DELETE CASCADE set for the tables but there can still be incoherences between
 		# the table users and the other tables, so we will run 3 times total for 3 tables.
 
-		# all members who are currently on the server
-		# using a set comprehension (only adds each ID once; could also use list comprehension tho, since ID is unique)
-		all_current_members_id = {member.id for member in server.members}
-
-		# all users from users table.
-		# fetchall() returns a tuple, so we will only use (id, ) later.
-		all_users_id = self.execute("SELECT user_id FROM users").fetchall()
-
-		# all users from user_items table
-		all_user_items_id = self.execute("SELECT user_id FROM user_items").fetchall()
-
-		# all users from user_used_items table
-		all_user_used_items_id = self.execute("SELECT user_id FROM user_used_items").fetchall()
-
-		# will be a list of tuples for executemany at the end.
-		# set instead of list to have every ID just once (else a lot would double/triple because we have 3 runs)
-		users_to_remove = set()
-		# run through the list
+		# before, we loaded every user_id of the 3 tables into python and compared them with the members there.
+		# now the members who are currently on the server go into a TEMP table (only for this connection,
+		# never saved in the file) and SQLite does the comparison: DELETE ... WHERE user_id NOT IN (temp table).
+		tables = ("users", "user_items", "user_used_items")
+		gone = "user_id NOT IN (SELECT user_id FROM temp.current_members)"
+
+		# one transaction: the temp table lives on the connection of the writer thread, and the reads in a
+		# transaction go there too. Dry run = we just never commit, so even the temp table is rolled back.
+		async with self.transaction() as transaction:
+			await self.execute_commit("CREATE TEMP TABLE IF NOT EXISTS current_members (user_id INTEGER PRIMARY KEY)")
+			await self.execute_commit("DELETE FROM temp.current_members")
+			await self.executemany(
+				"INSERT OR IGNORE INTO temp.current_members VALUES (?)", [(member.id, ) for member in server.members]
+			)
 
-		for target_list in [all_users_id, all_user_items_id, all_user_used_items_id]:
-			for (user_id, ) in target_list:
-				if user_id not in all_current_members_id:
-					# pass as tuple executemany awaits a list of tuples and not just a list.
-					users_to_remove.add( (user_id, ))
+			counts = {"total": (await self.execute(
+				f"SELECT COUNT(*) FROM (SELECT user_id FROM users UNION SELECT user_id FROM user_items "
+				f"UNION SELECT user_id FROM user_used_items) WHERE {gone}"
+			)).fetchone()[0]}
+			for table in tables:
+				counts[table] = (await self.execute(f"SELECT COUNT(*) FROM {table} WHERE {gone}")).fetchone()[0]
 
-		# update database.
-		amount_removed = len(users_to_remove)
+			if dry_run or not counts["total"]:
+				return "success", counts
 
-		queries = [
-			"DELETE FROM users WHERE user_id = ?",
-			"DELETE FROM user_items WHERE user_id = ?",
-			"DELETE FROM user_used_items WHERE user_id = ?"
-		]
-		# turn set to list again
-		users_to_remove = list(users_to_remove)
-		for query in queries:
-			await self.executemany_by_chunks(query, users_to_remove)
+			# the removed users, for the user cache and the leaderboards in memory.
+			removed_users = [row[0] for row in (await self.execute(f"SELECT user_id FROM users WHERE {gone}")).fetchall()]
+			for table in tables:
+				await self.execute_commit(f"DELETE FROM {table} WHERE {gone}")
+			self.forget_users(removed_users)
+			await self.execute_commit("DROP TABLE temp.current_members")
+			await transaction.commit()
+		# the deleted rows left free pages in the file, the next maintenance checks if a vacuum is worth it.
+		self.maintenance.purged(counts["total"])
 
-		# close, return the amount of users removed
-		return "success", amount_removed
+		return "success", counts
 
 	#
 	# LEADERBOARD
 	#
 
-	async def leaderboard(self, ctx, full_name, page_number, mode):
-		# get mode first
-		if mode == "-cash":
-			query = "cash"
-		elif mode == "-bank":
-			query = "bank"
-		else: # default "-total":
-			query = "cash + bank"
-
-		# bot at the same time. Before, we selected first balance and then id but that led to errors.
-		combined_query = f"SELECT user_id, {query} AS total FROM users"
-
-		results = self.execute(combined_query).fetchall()
-
-		if not results:
-			return "error", "no user created to show leaderboard !"
-
-		# unpack values since fetchall() returns tuples (like this: ((a, ...), (b, ...) ...)
-		all_bal = [row["total"] for row in results]
-
-		# get the user data and unpack the id's
-		all_users = [row["user_id"] for row in results]
-
-		# --> data is set, now sort
-
-		# zip gives us a list of [ (user1_id, user1_bal) ... ] so we can grab bal for each user by x[1]
-		combined_list = list(zip(all_users, all_bal))
+	# the column the leaderboard is sorted by (never user input, so it can go into the query directly).
+	# net_worth and total_xp have an index (see SkenderDatabaseCreator), the pages come straight out of it.
+	# cash and bank alone have none (every balance change would have to update two more indexes),
+	# SQLite still only keeps the 10 best rows while going through the table instead of sorting all of it.
+	LEADERBOARD_COLUMNS = {"-cash": "cash", "-bank": "bank", "-total": "net_worth", "xp": "total_xp"}
+
+	# the leaderboards in memory (database/ranking.py): every user with cash, bank and total_xp.
+	# called at startup (bot.py on_ready) and again when everything was marked (user="all").
+	async def load_rank_index(self):
+		self.rank_index.mark("all")
+		await self.refresh_rank_index()
+
+	# users: None = everyone, else a set of user_ids.
+	async def read_rank_index_users(self, users):
+		columns = "user_id, user_number, COALESCE(cash, 0), COALESCE(bank, 0), COALESCE(total_xp, 0)"
+		try:
+			if users is None:
+				rows = (await self.execute(f"SELECT {columns} FROM users")).fetchall()
+				self.rank_index.load(tuple(row) for row in rows)
+				print(f"[LOG]: rank index loaded ({len(self.rank_index)} users).")
+				return
+			users = list(users)
+			# 500 per query, SQLite has a limit of variables per statement.
+			for index in range(0, len(users), 500):
+				chunk = users[index:index + 500]
+				rows = (await self.execute(
+					f"SELECT {columns} FROM users WHERE user_id IN ({', '.join('?' * len(chunk))})", chunk
+				)).fetchall()
+				found = {row[0]: tuple(row)[1:] for row in rows}
+				for user_id in chunk:
+					# not found: the user was deleted (e.g. clean_database).
+					self.rank_index.update(user_id, found.get(user_id))
+		except Exception:
+			# we don't know what is in the index now, load everything next time.
+			self.rank_index.mark("all")
+			raise
+
+	# reads the users written since the last lookup again (see forget_user()), before every rank / page lookup.
+	async def refresh_rank_index(self):
+		arrival = self.rank_index.refreshes
+		async with self.rank_index_lock:
+			# with many +lb at the same time, they would all wait for each other's read here.
+			# a refresh that started after we arrived already has every write done before that, we can skip ours.
+			if self.rank_index.refreshes > arrival:
+				return
+			self.rank_index.refreshes += 1
+			dirty = self.rank_index.take_dirty()
+			if dirty is True:
+				await self.read_rank_index_users(None)
+			elif dirty:
+				await self.read_rank_index_users(dirty)
+
+	# a mismatch in verification mode: told in the console, and everything is loaded again at the next lookup.
+	def rank_index_mismatch(self, what, from_index, from_sql):
+		self.rank_index.mismatches += 1
+		self.rank_index.mark("all")
+		print(f"[LOG]: rank index mismatch ({what}): index {from_index}, SQL {from_sql}. Loading it again.")
+
+	# one page of a leaderboard, with the nickname in the same row (no query per user anymore).
+	# returns page_count, page_number (corrected if out of range), rows (user_id, nickname, total, current_xp_level).
+	async def get_leaderboard_page(self, column, page_number, ranks_per_page=10):
+		if not self.rank_index_enabled:
+			return await self.get_leaderboard_page_sql(column, page_number, ranks_per_page)
+
+		await self.refresh_rank_index()
+		user_count = len(self.rank_index)
+		if not user_count:
+			return 0, 1, []
+		page_count = math.ceil(user_count / ranks_per_page)
+		if page_number > page_count or page_number < 1:
+			page_number = 1
 
+		# the index knows who is on the page, SQLite gives us their names (primary key lookups).
+		user_numbers = self.rank_index.page(column, (page_number - 1) * ranks_per_page, ranks_per_page)
+		found = (await self.execute(
+			f"SELECT user_number, user_id, COALESCE(user_discord_nick, user_id) AS nickname, {column} AS total, "
+			f"current_xp_level FROM users WHERE user_number IN ({', '.join('?' * len(user_numbers))})",
+			user_numbers
+		)).fetchall()
+		by_number = {row["user_number"]: row for row in found}
+		# a user deleted in the meantime is simply not shown.
+		rows = [by_number[number] for number in user_numbers if number in by_number]
+
+		if self.rank_index_verify:
+			sql_page = await self.get_leaderboard_page_sql(column, page_number, ranks_per_page)
+			from_index = (page_count, page_number, [row["user_id"] for row in rows])
+			from_sql = (sql_page[0], sql_page[1], [row["user_id"] for row in sql_page[2]])
+			if from_index != from_sql:
+				self.rank_index_mismatch(f"{column} page {page_number}", from_index, from_sql)
+				return sql_page
+		return page_count, page_number, rows
+
+	# the position of a user in a leaderboard (1 = first). None if the user is not in the database.
+	async def get_leaderboard_rank(self, column, user_id):
+		if not self.rank_index_enabled:
+			return await self.get_leaderboard_rank_sql(column, user_id)
+
+		await self.refresh_rank_index()
+		rank = self.rank_index.rank(column, user_id)
+
+		if self.rank_index_verify:
+			sql_rank = await self.get_leaderboard_rank_sql(column, user_id)
+			if rank != sql_rank:
+				self.rank_index_mismatch(f"{column} rank of {user_id}", rank, sql_rank)
+				return sql_rank
+		return rank
+
+	# the same in SQL (rank_index_enabled False, and for the verification).
+	async def get_leaderboard_page_sql(self, column, page_number, ranks_per_page=10):
+		user_count = (await self.execute("SELECT COUNT(*) FROM users")).fetchone()[0]
+		if not user_count:
+			return 0, 1, []
+		# ceil gives us next number (29.02 = 30 pages)
+		page_count = math.ceil(user_count / ranks_per_page)
+		# if he wants page 2000 but there is only 1 page
+		if page_number > page_count or page_number < 1:
+			page_number = 1
 
-		# now sort(key, ...) will sort it as such:
-		#  - reverse = True to show the highest values (highest bal) first for leaderboard.
-		#  - lambda x: x[1] is an inline function for def returnX(x): return x[1]
-		#    in this case: x[1] will be the balance, which is what we want to sort our values as.
+		# equal totals: who registered first comes first (user_number), like before.
+		rows = (await self.execute(
+			f"SELECT user_id, COALESCE(user_discord_nick, user_id) AS nickname, {column} AS total, current_xp_level "
+			f"FROM users ORDER BY {column} DESC, user_number LIMIT ? OFFSET ?",
+			(ranks_per_page, (page_number - 1) * ranks_per_page)
+		)).fetchall()
+		return page_count, page_number, rows
+
+	# everyone with more, plus everyone with the same but registered before him. Counted through the index.
+	async def get_leaderboard_rank_sql(self, column, user_id):
+		row = (await self.execute(
+			f"SELECT user_number, {column} AS total FROM users WHERE user_id = ?", (user_id,)
+		)).fetchone()
+		if row is None:
+			return None
+		return (await self.execute(
+			f"SELECT (SELECT COUNT(*) FROM users WHERE {column} > :total) "
+			f"+ (SELECT COUNT(*) FROM users WHERE {column} = :total AND user_number < :number) + 1",
+			{"total": row["total"], "number": row["user_number"]}
+		)).fetchone()[0]
+
+	# compares the WHOLE leaderboards in memory with SQL. Returns column --> number of wrong positions
+	# (all 0 = fine). Goes through every user, so not for every command (see rank_index_verify for that).
+	async def verify_rank_index(self):
+		await self.refresh_rank_index()
+		wrong = {}
+		for column in RANK_COLUMNS:
+			sql_order = [row[0] for row in (await self.execute(
+				f"SELECT user_number FROM users ORDER BY COALESCE({column}, 0) DESC, user_number"
+			)).fetchall()]
+			index_order = self.rank_index.order(column)
+			wrong[column] = sum(a != b for a, b in zip(sql_order, index_order)) + abs(len(sql_order) - len(index_order))
+			if wrong[column]:
+				self.rank_index_mismatch(f"{column}, whole leaderboard", f"{wrong[column]} wrong", "")
+		return wrong
 
-		combined_list.sort(key=lambda x: x[1], reverse=True)
+	@staticmethod
+	def rank_suffix(position):
+		if position == 1: return "st"
+		elif position == 2: return "nd"
+		elif position == 3: return "rd"
+		return ""
 
-		# unpack list with zip unpack operator, gives us 2 lists again, but now in the right order.
-		all_users, all_bal = zip(*combined_list)
-		# back to list so we can edit the info later.
-		all_users = list(all_users) ; all_bal = list(all_bal)
+	async def leaderboard(self, ctx, full_name, page_number, mode):
+		# get mode first, default "-total"
+		column = self.LEADERBOARD_COLUMNS.get(mode, "net_worth")
 
 		# info: in old json version, we fetched the user nickname everytime we built the leaderboard.
 		# now we save it in the users table. It gets added the first time, when a user is created.
@@ -3402,66 +3859,26 @@ class SkenderDatabaseHandler:
 		# so the bot does check more often if the nickname changed, but less database operations to change the nickname.
 		# someone who does not call his balance often will probably not care about leaderboard as well.
 
-		# default user lb position. Will be kept, if we don't find him (unlikely).
-		user_lb_position = 10000
-
-		# use names instead of just ID, except if we cannot find names
-		# so for example if someone left the server
-		for i, user_id in enumerate(all_users):
-			result = self.execute(
-				"SELECT user_discord_nick FROM users WHERE user_id = ?",
-				(user_id,)).fetchone()
-			if result:
-				cached_nickname = result["user_discord_nick"]
-			# else: if none found in the database, fetchone returns None
-			else:
-				cached_nickname = str(user_id)
-
-			if user_id == ctx.user:
-				# the position our user is at in the leaderboard
-				user_lb_position = i + 1
-
-			# update
-			all_users[i] = cached_nickname
-
-		# making nice number formats
-		for i in range(len(all_bal)):
-			all_bal[i] = self.format_number_separator(all_bal[i])
-
-		# 10 ranks per page
+		# before, we fetched the whole table, sorted it in python and looked up the nickname of every single user,
+		# just to show 10 of them. Now SQLite gives us only the page we show.
+		# the chat income of the last seconds (not flushed yet, see flush_chat_rewards()) only counts here
+		# after the next flush, a few seconds at most. Writing it first for every +lb costs a whole commit.
 		ranks_per_page = 10
-		# ceil gives us next number (29.02 = 30 pages)
-		page_count = math.ceil(len(all_bal) / ranks_per_page)
+		page_count, page_number, rows = await self.get_leaderboard_page(column, page_number, ranks_per_page)
 
-		# getting page number
-		if page_count == 1:
-			page_number = 1
-		# if he wants page 2000 but there is only 1 page
-		if page_number > page_count or page_number < 1:
-			page_number = 1
+		if not rows:
+			return "error", "no user created to show leaderboard !"
 
-		# our selection !
-		index_start = (page_number - 1) * ranks_per_page
-		index_end = index_start + ranks_per_page
-		user_selection = all_users[index_start: index_end]
-		bal_selection = all_bal[index_start: index_end]
+		# default user lb position. Will be kept, if we don't find him (unlikely).
+		user_lb_position = await self.get_leaderboard_rank(column, ctx.user) or 10000
 
 		# making the formatted !
-		if page_number == 1:
-			i = 0
-		else:
-			"""
-			this is because if we call page 2 we wanna start at 20
-			edit (26.04.24): page 2 should be starting at 10 obviously lol, 3 starts at 2.
-			without this we would have 1-10 on page 1 and then 21-30 on page 2.
-			"""
-			i = (page_number - 1) * ranks_per_page
-
-		leaderboard_formatted = f""
-		for i_i in range(len(user_selection)):
-			leaderboard_formatted += (f"\n**{str(i + 1)}.** {user_selection[i_i]}"
-									  f" • {str(self.currency_symbol)} {bal_selection[i_i]}")
-			i += 1
+		# page 1 starts at 1, page 2 at 11 etc.
+		first_rank = (page_number - 1) * ranks_per_page + 1
+		leaderboard_formatted = ""
+		for rank, row in enumerate(rows, start=first_rank):
+			leaderboard_formatted += (f"\n**{rank}.** {row['nickname']}"
+									  f" • {str(self.currency_symbol)} {self.format_number_separator(row['total'])}")
 
 		# inform user
 		color = self.discord_blue_rgb_code
@@ -3469,14 +3886,7 @@ class SkenderDatabaseHandler:
 
 		embed.set_author(name=full_name,
 						 icon_url=ctx.server.icon.url if ctx.server.icon else None)
-		if user_lb_position == 1:
-			pos_name = "st"
-		elif user_lb_position == 2:
-			pos_name = "nd"
-		elif user_lb_position == 3:
-			pos_name = "rd"
-		else:
-			pos_name = ""
+		pos_name = self.rank_suffix(user_lb_position)
 		# position - 1 because if we are at position 1, and we do 1 // 0, we would get 0 instead of page 1.
 		# and + 1 page at the end because in our calculation, we omit that lb starts at page 1 and not 0.
 		user_page = (user_lb_position - 1) // ranks_per_page + 1
@@ -3502,7 +3912,7 @@ class SkenderDatabaseHandler:
 		# before, we did SELECT * FROM users,
 		# then we looped through users and added their cash and bank and third for total_total we added all.
 		# with SQLite, it is now easier.
-		stats = self.execute("SELECT SUM(cash) AS total_cash, SUM(bank) AS total_bank FROM users").fetchone()
+		stats = (await self.execute("SELECT SUM(cash) AS total_cash, SUM(bank) AS total_bank FROM users")).fetchone()
 
 		total_cash = stats["total_cash"] or 0
 		total_bank = stats["total_bank"] or 0
@@ -3544,23 +3954,6 @@ class SkenderDatabaseHandler:
 	Gaining XP.
 	"""
 
-	#
-	# CHECK IF DELAY RAN OUT
-	#
-
-	def check_xp_delay(self, last):
-		try:
-			now = datetime.now()
-			# get a time object from the string
-			last_run = datetime.strptime(last, '%Y-%m-%d %H:%M:%S.%f')
-			# calculate (this is more precise than seconds // 60 > delay)
-			return (now - last_run).total_seconds() > self.xp_and_passive_income_delay * 60
-		except Exception as e:
-			print(f"Error when checking xp delay (skipping & trying fix), error code: {e}")
-			# in any case, just return True.
-			# it will set the time variable again anyway, which will fix it.
-			return True
-
 	#
 	# LEVELER - HANDLE XP / GAIN XP AND PASSIVE CHAT INCOME PER MESSAGE
 	#
@@ -3571,9 +3964,7 @@ class SkenderDatabaseHandler:
 
 		# don't gain xp if there are no levels set up.
 		# but still gain passive chat income.
-		any_levels = self.execute(
-			"SELECT * FROM levels"
-		).fetchone()
+		any_levels = bool(await self.get_levels())
 
 		# check if right channel first
 		if self.channels_level_mode == "include" and ctx.channel.id not in self.channels_level_handling:
@@ -3581,51 +3972,260 @@ class SkenderDatabaseHandler:
 		elif self.channels_level_mode == "exclude" and ctx.channel.id in self.channels_level_handling:
 			return "success", "success"
 
-		last_counted_message = self.execute(
-			"SELECT last_xp_collect FROM users WHERE user_id = ?",
-			(user, )
-		).fetchone()
+		# the xp, income and delay are kept in memory and saved every few seconds (see flush_chat_rewards()),
+		# so a message doesn't write anything itself. The first message of a user loads him from the database
+		# (through get_user_object: creates the user if needed).
+		entry = self.chat_rewards.get(user)
+		if entry is None:
+			entry = self.chat_rewards.load(user, await self.get_user_object(user))
 
-		if not last_counted_message:
-			await self.get_user_object(user)
-			last_counted_message = self.execute(
-				"SELECT last_xp_collect FROM users WHERE user_id = ?",
-				(user, )
-			).fetchone()
+		# delay is both for xp and passive chat income. (epoch ms, like last_xp_collect in the database)
+		now = epoch_ms()
+		if not self.chat_rewards.delay_passed(entry, now, self.xp_and_passive_income_delay * 60):
+			return "success", "success"
 
-		last_counted_message_string = last_counted_message["last_xp_collect"]
+		# else: delay passed.
+		# only gain xp if there are any levels. Also PASSIVE INCOME !
+		self.chat_rewards.collect(
+			entry, now,
+			xp=self.xp_per_msg if any_levels else 0,
+			income=max(0, self.passive_income_per_msg)
+		)
 
-		if last_counted_message_string != "none":
-			delay_passed = self.check_xp_delay(last_counted_message_string)
-		else:
-			delay_passed = True
+		# the level is calculated with the xp in memory, so level ups come right away (not at the next flush).
+		await self.calculate_current_level_simple(ctx, user)
 
-		# delay is both for xp and passive chat income.
+		return "success", "success"
 
-		if not delay_passed:
-			return "success", "success"
 
-		# else: delay passed.
+	#
+	# SAVE THE COLLECTED XP / PASSIVE CHAT INCOME
+	#
 
-		# only gain xp if there are any levels
-		if any_levels:
-			# add the xp (also automatically calculates if new level)
-			await self.change_user_xp(ctx, user, self.xp_per_msg, "add")
+	# writes what handle_message_xp_and_passive_income() collected: one executemany per column, one transaction.
+	# called every self.chat_rewards_flush_seconds by the task of start_chat_rewards_flush().
+	async def flush_chat_rewards(self):
+		# the lock: never two flushes at the same time (e.g. the task and a shutdown).
+		async with self.chat_rewards_flush_lock:
+			taken = self.chat_rewards.take_pending()
+			if taken:
+				xp_rows, income_rows, collect_rows = self.chat_rewards.build_rows(taken)
+				try:
+					async with self.transaction() as transaction:
+						if xp_rows:
+							await self.executemany(
+								"UPDATE users SET total_xp = COALESCE(total_xp, 0) + ? WHERE user_id = ?", xp_rows
+							)
+						if income_rows:
+							await self.executemany("UPDATE users SET bank = bank + ? WHERE user_id = ?", income_rows)
+						if collect_rows:
+							await self.executemany("UPDATE users SET last_xp_collect = ? WHERE user_id = ?", collect_rows)
+						# the cached rows of those users are old now (done once the transaction is finished).
+						for user_id in taken:
+							self.forget_user(user_id)
+						await transaction.commit()
+				except Exception:
+					# keep it for the next flush.
+					self.chat_rewards.restore(taken)
+					raise
+				self.chat_rewards.flushes += 1
+				self.chat_rewards.flushed_rows += len(xp_rows) + len(income_rows) + len(collect_rows)
+
+			self.chat_rewards.drop_idle(epoch_ms(), self.xp_and_passive_income_delay * 60)
+			return len(taken)
+
+	async def chat_rewards_flush_loop(self):
+		while True:
+			await asyncio.sleep(self.chat_rewards_flush_seconds)
+			try:
+				async with self.perf.measure("(chat flush)"):
+					await self.flush_chat_rewards()
+			except Exception as e:
+				# don't let the task die, we try again next time.
+				print(f"[LOG]: failed to save chat xp / income, will retry. Error: {e}")
 
-		# also PASSIVE INCOME !
-		if self.passive_income_per_msg > 0:
-			await self.change_balance(user, self.passive_income_per_msg, "bank", mode="add")
+	# called in bot.py on_ready().
+	def start_chat_rewards_flush(self):
+		if self.chat_rewards_task is None or self.chat_rewards_task.done():
+			self.chat_rewards_task = asyncio.get_running_loop().create_task(self.chat_rewards_flush_loop())
 
-		# update last xp / passive chat income collect date.
-		await self.execute_commit(
-			"UPDATE users SET last_xp_collect = ? WHERE user_id = ?",
-			(datetime.now(), user)
-		)
+	"""
+	BACKUPS
+	"""
 
-		await self.calculate_current_level_simple(ctx, user)
+	# a copy of the whole database, made while the bot keeps running (see database/backup.py).
+	# returns "success", info of the backup (path, size, seconds...) or "error", message.
+	async def backup_database(self):
+		# only one at a time (a second +backup while one is running makes no sense).
+		if self.backup_lock.locked():
+			return "error", "A backup is already running."
+		async with self.backup_lock:
+			# what the chatters got in the last seconds goes in too.
+			await self.flush_chat_rewards()
+			try:
+				# the copy and the compression take a while: in a thread, the bot goes on meanwhile.
+				info = await asyncio.to_thread(self.backup.run, self.path_to_db)
+			except Exception as e:
+				print(f"[LOG]: backup of the database failed. Error: {e}")
+				return "error", f"Backup failed: {e}"
+		print(f"[LOG]: database backup saved: {info['path']} ({info['size'] / 1024 / 1024:.1f} MiB, "
+			  f"{info['seconds']:.1f} s, {len(info['removed'])} old backup(s) removed).")
+		return "success", info
+
+	async def backup_loop(self):
+		interval = self.backup_interval_hours * 3600
+		while True:
+			# counted from the last backup, so a bot restarted every few hours still makes its backups.
+			backups = await asyncio.to_thread(self.backup.list_backups)
+			waited = (datetime.now() - backups[0][2]).total_seconds() if backups else interval
+			# but not right at the start, when the bot loads everything.
+			await asyncio.sleep(max(60.0, interval - waited))
+			try:
+				async with self.perf.measure("(backup)"):
+					status, _ = await self.backup_database()
+			except Exception as e:
+				# don't let the task die, we try again next time.
+				print(f"[LOG]: backup of the database failed, will retry. Error: {e}")
+				status = "error"
+			if status == "error":
+				# (e.g. the disk is full) try again in an hour, not every minute.
+				await asyncio.sleep(min(interval, 3600))
+
+	def start_backup_task(self):
+		if not self.backup_interval_hours:
+			return
+		if self.backup_task is None or self.backup_task.done():
+			self.backup_task = asyncio.get_running_loop().create_task(self.backup_loop())
 
-		return "success", "success"
+	"""
+	MAINTENANCE
+	"""
+
+	# one statement alone on the writer connection, outside of any transaction (see database/engine.py).
+	# script: for statements that need to be stepped to the end (see SkenderDatabaseEngine._run_maintenance()).
+	async def execute_maintenance(self, query, script=False):
+		if self.engine is None:
+			self.open_database()
+		async with self.db_lock:
+			future = self.engine.submit("maintenance", query, many=script)
+		result = await asyncio.wrap_future(future)
+		self.perf.add_query(result)
+		return result
 
+	def wal_size(self):
+		try:
+			return os.path.getsize(self.path_to_db + "-wal")
+		except OSError:
+			return 0
+
+	# (pages in the file, free pages, auto_vacuum: 0 = none, 1 = full, 2 = incremental)
+	# read on the writer connection: a reader can still show the values from before the last VACUUM.
+	async def database_pages(self):
+		pages = (await self.execute_maintenance("PRAGMA page_count")).fetchone()[0]
+		free = (await self.execute_maintenance("PRAGMA freelist_count")).fetchone()[0]
+		auto_vacuum = (await self.execute_maintenance("PRAGMA auto_vacuum")).fetchone()[0]
+		return pages, free, auto_vacuum
+
+	# one round, called every few seconds by maintenance_loop(). What runs is decided by
+	# SkenderMaintenance.plan() (database/maintenance.py). Returns the steps that ran.
+	async def run_maintenance(self):
+		if self.engine is None:
+			return []
+		# a backup reads one snapshot until it's done: a checkpoint can't get past it (a TRUNCATE would wait for it).
+		if self.backup_lock.locked():
+			return []
+		quiet = self.engine.idle_seconds() >= self.maintenance.quiet_seconds
+		done = []
+		for step, mode in self.maintenance.plan(self.wal_size(), quiet):
+			if step == "checkpoint":
+				await self.checkpoint_wal(mode)
+			elif step == "optimize":
+				await self.optimize_database()
+			elif step == "vacuum":
+				await self.vacuum_free_pages()
+			done.append(step)
+		return done
+
+	# mode: PASSIVE (copies what it can without waiting) or TRUNCATE (everything, then the -wal file is emptied).
+	async def checkpoint_wal(self, mode="PASSIVE"):
+		wal_before = self.wal_size()
+		start = time.perf_counter()
+		busy, wal_frames, copied_frames = (await self.execute_maintenance(f"PRAGMA wal_checkpoint({mode})")).fetchone()
+		detail = f"WAL {wal_before / 1024 / 1024:.1f} -> {self.wal_size() / 1024 / 1024:.1f} MiB"
+		# (after a TRUNCATE that worked, the WAL is empty and both are 0)
+		if wal_frames > 0:
+			detail += f", {copied_frames} of {wal_frames} frames copied"
+		if busy:
+			detail += ", readers in the way"
+		self.maintenance.record(f"checkpoint {mode}", time.perf_counter() - start, detail)
+
+	async def analyze_database(self):
+		# only looks at analysis_limit rows per index: a bit less exact, but fast even with millions of users.
+		await self.execute_maintenance(f"PRAGMA analysis_limit = {int(self.maintenance.analysis_limit)}")
+		await self.execute_maintenance("ANALYZE")
+
+	# PRAGMA optimize only runs ANALYZE again where the tables changed a lot since the last time.
+	# but it needs a first ANALYZE to compare with.
+	async def optimize_database(self):
+		start = time.perf_counter()
+		analyzed = (await self.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1'")).fetchone()[0]
+		if analyzed:
+			await self.execute_maintenance(f"PRAGMA analysis_limit = {int(self.maintenance.analysis_limit)}")
+			await self.execute_maintenance("PRAGMA optimize")
+		else:
+			await self.analyze_database()
+		self.maintenance.last_optimize = time.monotonic()
+		self.maintenance.record("optimize" if analyzed else "first ANALYZE", time.perf_counter() - start)
+
+	# gives the free pages (after clean_database) back to the disk, if there are enough of them.
+	async def vacuum_free_pages(self):
+		pages, free, auto_vacuum = await self.database_pages()
+		self.maintenance.vacuum_wanted = False
+		if not pages or free * 100 / pages < self.maintenance.vacuum_free_percent:
+			return
+		start = time.perf_counter()
+		size_before = os.path.getsize(self.path_to_db)
+		if auto_vacuum == 0:
+			# an older file: incremental_vacuum doesn't work there. The switch needs the whole file rewritten once,
+			# every write waits meanwhile (that's why we only do it when the bot is quiet).
+			step = "VACUUM (switched to auto_vacuum=INCREMENTAL)"
+			await self.execute_maintenance("PRAGMA auto_vacuum = INCREMENTAL")
+			await self.execute_maintenance("VACUUM")
+		else:
+			step = "incremental vacuum"
+			remaining = free
+			# in small steps, the writes of the bot go in between.
+			while remaining:
+				await self.execute_maintenance(
+					f"PRAGMA incremental_vacuum({int(self.maintenance.vacuum_pages_per_step)})", script=True
+				)
+				remaining = (await self.execute_maintenance("PRAGMA freelist_count")).fetchone()[0]
+				# the bot got busy again: the rest at the next quiet moment.
+				if remaining and self.engine.idle_seconds() < self.maintenance.quiet_seconds:
+					self.maintenance.vacuum_wanted = True
+					break
+		# the tables are a lot smaller now, and the vacuum went through the WAL.
+		await self.analyze_database()
+		await self.checkpoint_wal("TRUNCATE")
+		self.maintenance.record(
+			step, time.perf_counter() - start,
+			f"{free:,} of {pages:,} pages were free, file {size_before / 1024 / 1024:.1f} -> "
+			f"{os.path.getsize(self.path_to_db) / 1024 / 1024:.1f} MiB"
+		)
+
+	async def maintenance_loop(self):
+		while True:
+			await asyncio.sleep(self.maintenance.check_seconds)
+			try:
+				async with self.perf.measure("(maintenance)"):
+					await self.run_maintenance()
+			except Exception as e:
+				# don't let the task die, next round is another try.
+				print(f"[LOG]: database maintenance failed. Error: {e}")
+
+	def start_maintenance_task(self):
+		if self.maintenance_task is None or self.maintenance_task.done():
+			self.maintenance_task = asyncio.get_running_loop().create_task(self.maintenance_loop())
 
 	"""
 	Level calculations (current level, level rewards...)
@@ -3636,26 +4236,23 @@ class SkenderDatabaseHandler:
 	# (simple means it is calculated through SQLite directly)
 
 	async def calculate_current_level_simple(self, ctx, user, auto_update=True):
-		# create if not exist
-		await self.get_user_object(user)
-		# get xp
-		row = self.execute(
-			"SELECT current_xp_level, total_xp FROM users WHERE user_id = ?",
-			(user,)
-		).fetchone()
-
-		if row is not None:
-			user_level, user_xp = row
+		# if he chatted recently, the chat rewards have his xp including what is not saved yet.
+		entry = self.chat_rewards.get(user)
+		if entry is not None:
+			user_level, user_xp = entry.level, entry.total_xp
 		else:
-			user_xp = 0 ; user_level = 0
+			# create if not exist, get xp (from the user cache if possible)
+			row = await self.get_user_object(user)
 
-		# we should change this if working with multiple users at once, but for one user this will do.
-		# order by descending so that we catch the first ("LIMIT 1") level we actually reached the xp for.
-		row = self.execute(
-			"SELECT level_number FROM levels WHERE level_xp <= ? ORDER BY level_xp DESC LIMIT 1",
-			(user_xp, )
-		).fetchone()
-		current_level = row["level_number"] if row else 0
+			if row is not None:
+				user_level, user_xp = row["current_xp_level"], row["total_xp"]
+			else:
+				user_xp = 0 ; user_level = 0
+
+		# the highest level he reached the xp for, and the xp of the next one (None if there is none).
+		# one binary search in the levels loaded in memory, see load_levels().
+		levels = await self.get_levels()
+		current_level, next_level_xp = levels.resolve(user_xp)
 
 		# we set user_lvl in each user row instead of calculating it everytime.
 		if not auto_update:
@@ -3664,21 +4261,17 @@ class SkenderDatabaseHandler:
 		# if the user was removed XP through the remove-xp command,
 		# then we also want to decrease his level again.
 		if current_level > user_level or current_level < user_level:
+			if entry is not None:
+				entry.level = current_level
 			await self.execute_commit(
 				"UPDATE users SET current_xp_level = ? WHERE user_id = ?",
-				(current_level, user)
+				(current_level, user), user=user
 			)
 			await self.level_up(ctx, current_level)
 
-		next_level_xp = self.execute(
-			"SELECT level_xp FROM levels WHERE level_number = ?",
-			(current_level+1,)
-		).fetchone()
-
-		if not next_level_xp:
+		if next_level_xp is None:
 			return current_level, "highest level reached."
 
-		next_level_xp = next_level_xp["level_xp"] if next_level_xp else 0
 		# if we're already at the top, it may return a negative value. So put to 0 at least.
 		xp_remaining = max(0, next_level_xp - user_xp)
 
@@ -3688,12 +4281,12 @@ class SkenderDatabaseHandler:
 	# GET LEVEL REWARD
 	#
 
-	def get_level_reward(self, level_number):
+	async def get_level_reward(self, level_number):
 		# get the rewards.
-		rewards_row = self.execute(
+		rewards_row = (await self.execute(
 			"SELECT * FROM level_rewards WHERE level_number = ?",
 			(level_number,)
-		).fetchone()
+		)).fetchone()
 
 		rewards_row = rewards_row if rewards_row else None
 
@@ -3734,19 +4327,24 @@ class SkenderDatabaseHandler:
 		user_obj = ctx.user_ctx_obj
 
 		# get the rewards
-		money, items, add_roles, remove_roles = self.get_level_reward(new_level)
-
-		# add money
-		await self.change_balance(ctx.user, money, "bank", "add")
+		money, items, add_roles, remove_roles = await self.get_level_reward(new_level)
 
-		# add the items
+		# money and items in one transaction (one commit), the roles and messages come after.
+		async with self.transaction() as transaction:
+			# add money (None if there is no reward for this level, don't add NULL to the bank !)
+			if money:
+				await self.change_balance(ctx.user, money, "bank", "add")
 
-		if items:
-			item_msg = "\n".join(f"• {item_name}: {amount}" for item_name, amount in items.items())
-			for item_name, amount in items.items():
-				await self.safe_items_update("user_items", ctx.user, item_name, amount, mode="add")
-		else:
-			item_msg = None
+			# add the items
+			if items:
+				item_msg = "\n".join(f"• {item_name}: {amount}" for item_name, amount in items.items())
+				# all reward items in one statement.
+				await self.apply_inventory_changes(
+					[(ctx.user, item_name, amount) for item_name, amount in items.items()]
+				)
+			else:
+				item_msg = None
+			await transaction.commit()
 
 		# add the roles
 		added_roles_mention = await self.utils.add_or_remove_roles_user(
@@ -3764,7 +4362,7 @@ class SkenderDatabaseHandler:
 
 			embed.title = "You received:"
 
-			if money > 0:
+			if money and money > 0:
 				embed.add_field(name= "💰 Money", value=f"{self.currency_symbol} {money}.", inline=False)
 			if items:
 				embed.add_field(name="📦 Items", value=f"{item_msg}", inline=False)
@@ -3799,12 +4397,16 @@ class SkenderDatabaseHandler:
 	async def check_current_level(self, ctx, user):
 		current_level, remaining_xp = await self.calculate_current_level_simple(ctx, user)
 
-		total_xp = self.execute(
+		total_xp = (await self.execute(
 			"SELECT total_xp FROM users WHERE user_id = ?",
 			(user,)
-		).fetchone()
+		)).fetchone()
 
 		total_xp = total_xp["total_xp"] if total_xp else "error"
+		# xp from chatting that is not saved yet.
+		entry = self.chat_rewards.get(user)
+		if entry is not None:
+			total_xp = entry.total_xp
 
 		description = (f"🎯 **Current Level:** `Level {current_level}`.\n"
 					   f"✨ **Total XP:** `{total_xp}`\n"
@@ -3829,8 +4431,10 @@ class SkenderDatabaseHandler:
 		# so it shouldn't be a big problem.
 		await self.execute_commit(
 			f"UPDATE users SET total_xp = COALESCE(total_xp, 0) {operator} ? WHERE user_id = ?",
-			(amount, user)
+			(amount, user), user=user
 		)
+		# if he chatted recently, his xp is also in memory.
+		self.chat_rewards.xp_changed(user, amount if mode == "add" else -amount)
 
 		await self.calculate_current_level_simple(ctx, user, auto_update=True)
 
@@ -3845,7 +4449,7 @@ class SkenderDatabaseHandler:
 	async def list_all_levels(self, ctx, mode="levels"):
 
 		# all levels
-		levels_row = self.execute("SELECT * FROM levels").fetchall()
+		levels_row = (await self.execute("SELECT * FROM levels")).fetchall()
 
 		levels_and_xp = None
 
@@ -3888,7 +4492,7 @@ class SkenderDatabaseHandler:
 			for level_number, xp in current_level:
 
 				# get the rewards
-				money, items, add_roles, remove_roles = self.get_level_reward(level_number)
+				money, items, add_roles, remove_roles = await self.get_level_reward(level_number)
 
 				# items
 				item_msg = "\n".join(f"• {item_name}: {amount}" for item_name, amount in items.items()) if items else "—"
@@ -3938,79 +4542,27 @@ class SkenderDatabaseHandler:
 	async def level_leaderboard(self, ctx, page_number):
 
 		# info: this is a mashed up and revisited version of the normal leaderboard(self, ...) function here.
+		# the page comes from SQLite, sorted by total_xp through its index (see get_leaderboard_page()).
+		# level and xp come from the same row (before, two separate SELECTs were put together by position).
 
-		all_rows = self.execute(
-			"SELECT current_xp_level, total_xp FROM users"
-		).fetchall()
+		# (same as leaderboard(): the chat xp not flushed yet counts after the next flush.)
+		ranks_per_page = 10
+		page_count, page_number, rows = await self.get_leaderboard_page(
+			self.LEADERBOARD_COLUMNS["xp"], page_number, ranks_per_page
+		)
 
-		if not all_rows:
+		if not rows:
 			return "error", "no users created yet !"
 
-		# unpack values since fetchall() returns tuples
-		all_levels = [row[0] for row in all_rows]
-		all_total_xp = [row[1] for row in all_rows]
-
-		# get the user data and unpack the id's
-		raw_users = self.execute("SELECT user_id FROM users").fetchall()
-		all_users = [row[0] for row in raw_users]
-
-		# zip gives us a list of [ (user1_id, user1_bal) ... ] so we can grab bal for each user by x[1]
-		combined_list = list(zip(all_users, all_total_xp, all_levels))
-
-		combined_list.sort(key=lambda x: x[1], reverse=True)
-
-		# unpack list with zip unpack operator, gives us 2 lists again, but now in the right order.
-		all_users, all_total_xp, all_levels = zip(*combined_list)
-		# back to list so we can edit the info later.
-		all_users = list(all_users) ; all_levels = list(all_levels) ; all_total_xp = list(all_total_xp)
-
 		# default user lb position. Will be kept, if we don't find him (unlikely).
-		user_lb_position = 10000
-
-		for i, user_id in enumerate(all_users):
-			result = self.execute(
-				"SELECT user_discord_nick FROM users WHERE user_id = ?",
-				(user_id,)).fetchone()
-
-			cached_nickname = result["user_discord_nick"] if result else str(user_id)
-
-			if user_id == ctx.user:
-				# the position our user is at in the leaderboard
-				user_lb_position = i + 1
-
-			# update
-			all_users[i] = cached_nickname
-
-		# 10 ranks per page
-		ranks_per_page = 10
-		# ceil gives us next number (29.02 = 30 pages)
-		page_count = math.ceil(len(all_levels) / ranks_per_page)
-
-		# getting page number
-		if page_count == 1:
-			page_number = 1
-		# in case he wants page 20 but there are only 10.
-		if page_number > page_count or page_number < 1:
-			page_number = 1
-
-		# our selection !
-		index_start = (page_number - 1) * ranks_per_page
-		index_end = index_start + ranks_per_page
-		user_selection = all_users[index_start: index_end]
-		level_selection = all_levels[index_start: index_end]
-		total_xp_selection = all_total_xp[index_start: index_end]
+		user_lb_position = await self.get_leaderboard_rank(self.LEADERBOARD_COLUMNS["xp"], ctx.user) or 10000
 
 		# making the formatted !
-		if page_number == 1:
-			i = 0
-		else:
-			i = (page_number - 1) * ranks_per_page
-
-		leaderboard_formatted = f""
-		for i_i in range(len(user_selection)):
-			leaderboard_formatted += (f"\n**{str(i + 1)}.** {user_selection[i_i]}"
-									  f" • level `{level_selection[i_i]}` • total xp `{total_xp_selection[i_i]}`")
-			i += 1
+		first_rank = (page_number - 1) * ranks_per_page + 1
+		leaderboard_formatted = ""
+		for rank, row in enumerate(rows, start=first_rank):
+			leaderboard_formatted += (f"\n**{rank}.** {row['nickname']}"
+									  f" • level `{row['current_xp_level']}` • total xp `{row['total']}`")
 
 		# inform user
 		color = self.discord_blue_rgb_code
@@ -4025,14 +4577,7 @@ class SkenderDatabaseHandler:
 			name=name,
 			icon_url=ctx.server.icon.url if ctx.server.icon else None
 		)
-		if user_lb_position == 1:
-			pos_name = "st"
-		elif user_lb_position == 2:
-			pos_name = "nd"
-		elif user_lb_position == 3:
-			pos_name = "rd"
-		else:
-			pos_name = ""
+		pos_name = self.rank_suffix(user_lb_position)
 		# position - 1 because if we are at position 1, and we do 1 // 0, we would get 0 instead of page 1.
 		# and + 1 page at the end because in our calculation, we omit that lb starts at page 1 and not 0.
 		user_page = (user_lb_position - 1) // ranks_per_page + 1
@@ -4173,10 +4718,10 @@ class SkenderDatabaseHandler:
 				user_input = int(user_input)
 
 				# see if we have all items below
-				check_level = self.execute(
+				check_level = (await self.execute(
 					"SELECT * FROM levels WHERE level_number = ?",
 					(user_input - 1,)
-				).fetchone()
+				)).fetchone()
 
 				if not check_level:
 					await ctx.channel.send("Level does not exist. Moving into new setup.")
@@ -4295,10 +4840,7 @@ class SkenderDatabaseHandler:
 										invalid = True
 										break
 
-									check = self.execute(
-										"SELECT * FROM items_catalog WHERE item_name = ?",
-										(item_name,)
-									).fetchone()
+									check = await self.get_catalog_item(item_name)
 									if not check:
 										await self.utils.send_error_report(
 											ctx,
@@ -4446,6 +4988,9 @@ class SkenderDatabaseHandler:
 				chunk=500
 			)
 
+			# the levels are kept in memory for the chat messages, so load them again.
+			await self.load_levels()
+
 		await ctx.channel.send("\n## Please reboot the bot for changes to come into effect !")
 
 		return "success", "success"
@@ -0,0 +1,156 @@
+"""
+INFO:
+
+	Online backups of the database of the Skender discord bot (made while the bot is running).
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	imported in database/__init__.py and used there as self.backup.xyz() (see backup_database()).
+
+	Why ?
+		Copying database.sqlite while the bot writes to it is not safe: with WAL, the newest changes are in
+		database.sqlite-wal, and a copy made in the middle of a checkpoint can be broken.
+
+	How ?
+		SQLite's backup API (sqlite3.Connection.backup), on its own connection, in a worker thread:
+			- it copies pages_per_step pages, then waits pause_ms, then the next pages... so the disk is not
+			  busy with the backup only, and the progress can be shown.
+			- before the first step, the connection starts a read transaction: every step reads the same
+			  snapshot of the database. Without it, the backup starts again from page 1 every time the bot
+			  writes something (it never finishes on a busy server). With WAL, a reader never blocks the
+			  writer, so the bot writes normally during the backup. (the WAL file can only be checkpointed
+			  up to the snapshot until the backup is done, so it grows a bit meanwhile)
+		Then the copy is checked (PRAGMA quick_check), compressed (gzip, optional), and the old backups
+		are deleted (keep the last `keep`, and none older than max_age_days).
+
+	The files: backups/skender-backup-<date>_<time>.sqlite(.gz), next to the database.
+	Restore: stop the bot, unzip the backup (e.g. gunzip), replace database.sqlite with it (and delete
+	database.sqlite-wal / -shm if they are there), start the bot.
+
+"""
+
+import gzip, os, shutil, sqlite3, time
+from datetime import datetime, timedelta
+
+
+class SkenderBackup:
+	PREFIX = "skender-backup-"
+
+	def __init__(self, directory, keep=7, max_age_days=30, compress=True, pages_per_step=1024, pause_ms=5):
+		self.directory = directory
+		# how many backups we keep (the newest ones), and the max age (0 = no max age).
+		self.keep = keep
+		self.max_age_days = max_age_days
+		self.compress = compress
+		# 1024 pages of 4 KiB = 4 MiB per step.
+		self.pages_per_step = pages_per_step
+		self.pause_ms = pause_ms
+		# (pages done, pages in total) of the running backup, None if there is none.
+		self.progress = None
+		# the info of the last backup (see run()), and counters.
+		self.last_backup = None
+		self.backups_made, self.backups_failed = 0, 0
+
+	# blocking (copying and compressing a big file takes a while): call it in a thread.
+	# source_path: the database. Returns the info of the new backup (path, size, pages, steps, seconds, removed).
+	def run(self, source_path):
+		started = time.perf_counter()
+		os.makedirs(self.directory, exist_ok=True)
+		self.remove_unfinished()
+
+		name = f"{self.PREFIX}{datetime.now():%Y-%m-%d_%H-%M-%S}.sqlite"
+		part_path = os.path.join(self.directory, name + ".part")
+		final_path = os.path.join(self.directory, name + (".gz" if self.compress else ""))
+
+		steps = 0
+
+		def step_done(status, remaining, total):
+			nonlocal steps
+			steps += 1
+			self.progress = (total - remaining, total)
+			# time.sleep releases the GIL: the bot goes on normally meanwhile.
+			if self.pause_ms:
+				time.sleep(self.pause_ms / 1000)
+
+		source = sqlite3.connect(source_path, isolation_level=None)
+		target = sqlite3.connect(part_path, isolation_level=None)
+		try:
+			# the snapshot every step reads (see INFO): a read transaction needs a first read to start.
+			source.execute("BEGIN")
+			source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+			source.backup(target, pages=self.pages_per_step, progress=step_done)
+			source.execute("COMMIT")
+			# the copy has the journal mode of the database (WAL), a backup should be one single file.
+			target.execute("PRAGMA journal_mode=DELETE")
+			pages = target.execute("PRAGMA page_count").fetchone()[0]
+			check = target.execute("PRAGMA quick_check").fetchone()[0]
+		except BaseException:
+			self.backups_failed += 1
+			target.close()
+			os.remove(part_path)
+			raise
+		finally:
+			self.progress = None
+			source.close()
+			target.close()
+		if check != "ok":
+			self.backups_failed += 1
+			os.remove(part_path)
+			raise RuntimeError(f"the backup copy is damaged (quick_check: {check})")
+
+		if self.compress:
+			compressed_path = part_path + ".gz"
+			with open(part_path, "rb") as file, gzip.open(compressed_path, "wb", compresslevel=6) as compressed:
+				shutil.copyfileobj(file, compressed, 1 << 20)
+			os.remove(part_path)
+			part_path = compressed_path
+		# only now it gets its real name: a file without .part is always a complete backup.
+		os.replace(part_path, final_path)
+
+		removed = self.rotate()
+		self.backups_made += 1
+		self.last_backup = {
+			"path": final_path, "size": os.path.getsize(final_path), "pages": pages, "steps": steps,
+			"seconds": time.perf_counter() - started, "removed": removed, "date": datetime.now(),
+		}
+		return self.last_backup
+
+	# left over by a backup that was stopped in the middle (only one runs at a time, see backup_database()).
+	def remove_unfinished(self):
+		for name in os.listdir(self.directory):
+			if name.startswith(self.PREFIX) and (name.endswith(".part") or name.endswith(".part.gz")):
+				os.remove(os.path.join(self.directory, name))
+
+	# the backups, newest first: (name, size in bytes, datetime).
+	def list_backups(self):
+		if not os.path.isdir(self.directory):
+			return []
+		backups = []
+		for name in os.listdir(self.directory):
+			if not name.startswith(self.PREFIX) or not (name.endswith(".sqlite") or name.endswith(".sqlite.gz")):
+				continue
+			path = os.path.join(self.directory, name)
+			backups.append((name, os.path.getsize(path), datetime.fromtimestamp(os.path.getmtime(path))))
+		# the date is in the name, so sorting by name is sorting by date.
+		backups.sort(reverse=True)
+		return backups
+
+	# deletes what is too much / too old, never the newest one. Returns the names removed.
+	def rotate(self):
+		removed = []
+		oldest_allowed = datetime.now() - timedelta(days=self.max_age_days) if self.max_age_days else None
+		for index, (name, size, date) in enumerate(self.list_backups()):
+			if index == 0:
+				continue
+			if index >= self.keep or (oldest_allowed is not None and date < oldest_allowed):
+				os.remove(os.path.join(self.directory, name))
+				removed.append(name)
+		return removed
+
+	def stats(self):
+		return {
+			"made": self.backups_made,
+			"failed": self.backups_failed,
+			"running": self.progress,
+			"last": self.last_backup["path"] if self.last_backup else None,
+		}
@@ -0,0 +1,83 @@
+"""
+INFO:
+
+	In-memory caches of the Skender discord bot.
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	imported in database/__init__.py and used there as self.user_cache.xyz()
+
+	SkenderUserCache:
+		get_user_object() is called a lot, often several times for the same user in one command
+		(e.g. buy_item calls it, then safe_items_update calls it again) and for every chat message.
+		So we keep the last used user rows in memory (LRU = least recently used get thrown out first).
+
+		The rows are sqlite3.Row objects, which are READONLY, so it is safe to give the same object to everyone.
+
+		Every write on the users table has to invalidate the user (see execute_commit(..., user=...)).
+		Problem: a read that started BEFORE a write could finish AFTER it and put the old row back.
+		That's why every invalidation increases self.generation, and a row is only stored if no invalidation
+		happened since the read started (see fill_token() and put()).
+
+	for more info see database/__init__.py
+
+"""
+
+from collections import OrderedDict
+
+
+class SkenderUserCache:
+	def __init__(self, max_size=10000):
+		self.max_size = max(1, int(max_size))
+		# user_id -> sqlite3.Row, the most recently used is at the end.
+		self.rows = OrderedDict()
+		# increased on every invalidation, see INFO above.
+		self.generation = 0
+
+		# counters, to see if the cache actually helps.
+		self.hits, self.misses, self.evictions, self.invalidations = 0, 0, 0, 0
+
+	def get(self, user_id):
+		row = self.rows.get(user_id)
+		if row is None:
+			self.misses += 1
+			return None
+		self.rows.move_to_end(user_id)
+		self.hits += 1
+		return row
+
+	# call this BEFORE reading the row from the database, and give the result to put().
+	def fill_token(self):
+		return self.generation
+
+	def put(self, user_id, row, token):
+		# something was written while we were reading, our row might already be old.
+		if token != self.generation:
+			return
+		self.rows[user_id] = row
+		self.rows.move_to_end(user_id)
+		while len(self.rows) > self.max_size:
+			self.rows.popitem(last=False)
+			self.evictions += 1
+
+	def invalidate(self, user_id):
+		self.generation += 1
+		self.invalidations += 1
+		self.rows.pop(user_id, None)
+
+	def clear(self):
+		self.generation += 1
+		self.invalidations += 1
+		self.rows.clear()
+
+	def stats(self):
+		total = self.hits + self.misses
+		return {
+			"size": len(self.rows),
+			"max_size": self.max_size,
+			"hits": self.hits,
+			"misses": self.misses,
+			"hit_rate": self.hits / total if total else 0.0,
+			"evictions": self.evictions,
+			"invalidations": self.invalidations,
+		}
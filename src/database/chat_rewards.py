@@ -0,0 +1,167 @@
+"""
+INFO:
+
+	XP and passive chat income of the Skender discord bot, collected in memory and saved in batches.
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	imported in database/__init__.py and used there as self.chat_rewards.xyz()
+
+	Why ?
+		Before, every chat message that got xp did 3 UPDATEs (xp, bank, last_xp_collect), each with its own commit.
+		With many active chatters, that's a lot of writes for a few points of xp.
+
+	How ?
+		Every user who chatted recently has an entry here with:
+			- last_collect: when he last got xp / income, in epoch ms like last_xp_collect in the database
+			  (the delay is checked here, not in the database).
+			- total_xp and level: what he has INCLUDING what is not saved yet, so level ups are seen right away.
+			- pending_xp, pending_income, pending_collect: what still has to be written to the database.
+		Every few seconds, SkenderDatabaseHandler.flush_chat_rewards() takes everything pending and writes it
+		with one executemany per column, all in one transaction (--> database/__init__.py).
+
+		The xp and income are written as "+ pending" (not as the new total), so if an admin changes the xp
+		or the bank of the user in the meantime, nothing gets lost.
+
+		+bal adds the pending income to the bank it shows, +lb and +level-lb only see it after the next flush.
+		When the bot stops, SkenderDatabaseHandler.shutdown_database() saves what is left.
+
+	Beware: if the bot crashes, what was not flushed yet (a few seconds of chatting) is lost.
+
+"""
+
+class SkenderChatRewardEntry:
+	# __slots__: there can be thousands of those, so no __dict__ for each.
+	__slots__ = ("last_collect", "total_xp", "level", "pending_xp", "pending_income", "pending_collect", "flushes_idle")
+
+	def __init__(self, last_collect, total_xp, level):
+		self.last_collect = last_collect
+		self.total_xp = total_xp
+		self.level = level
+		self.pending_xp, self.pending_income, self.pending_collect = 0, 0, None
+		# how many flushes had nothing to write for this user, see drop_idle().
+		self.flushes_idle = 0
+
+	def has_pending(self):
+		return bool(self.pending_xp or self.pending_income or self.pending_collect is not None)
+
+
+class SkenderChatRewards:
+	def __init__(self):
+		# user_id -> SkenderChatRewardEntry
+		self.entries = {}
+		# counters, to see how much the batching saves.
+		self.collects, self.flushes, self.flushed_rows = 0, 0, 0
+
+	@staticmethod
+	def parse_collect(value):
+		# saved as epoch ms, 0 = never. Anything else counts as "never" too, so the delay is passed
+		# (and the next flush writes a correct value again).
+		if not isinstance(value, int) or value <= 0:
+			return None
+		return value
+
+	def get(self, user_id):
+		return self.entries.get(user_id)
+
+	# row: the user row from the database (get_user_object).
+	def load(self, user_id, row):
+		# someone else could have loaded him while we were waiting for the row: keep that one.
+		entry = self.entries.get(user_id)
+		if entry is None:
+			entry = SkenderChatRewardEntry(
+				self.parse_collect(row["last_xp_collect"]), row["total_xp"] or 0, row["current_xp_level"] or 0
+			)
+			self.entries[user_id] = entry
+		return entry
+
+	# now: epoch ms.
+	@staticmethod
+	def delay_passed(entry, now, delay_seconds):
+		return entry.last_collect is None or now - entry.last_collect > delay_seconds * 1000
+
+	def collect(self, entry, now, xp, income):
+		entry.last_collect = now
+		entry.pending_collect = now
+		entry.total_xp += xp
+		entry.pending_xp += xp
+		entry.pending_income += income
+		entry.flushes_idle = 0
+		self.collects += 1
+
+	# xp written directly to the database (e.g. add-xp / remove-xp), keep our total in sync.
+	def xp_changed(self, user_id, amount):
+		entry = self.entries.get(user_id)
+		if entry is not None:
+			entry.total_xp += amount
+
+	def forget(self, user_id):
+		if user_id == "all":
+			self.entries.clear()
+		else:
+			self.entries.pop(user_id, None)
+
+	# what +bal adds to the bank: the income not saved yet.
+	def pending_income(self, user_id):
+		entry = self.entries.get(user_id)
+		return entry.pending_income if entry is not None else 0
+
+	# takes everything pending out of the entries.
+	# returns user_id -> (xp, income, collect), give it back with restore() if writing it failed.
+	def take_pending(self):
+		taken = {}
+		for user_id, entry in self.entries.items():
+			if not entry.has_pending():
+				continue
+			taken[user_id] = (entry.pending_xp, entry.pending_income, entry.pending_collect)
+			entry.pending_xp, entry.pending_income, entry.pending_collect = 0, 0, None
+		return taken
+
+	def restore(self, taken):
+		for user_id, (xp, income, collect) in taken.items():
+			entry = self.entries.get(user_id)
+			if entry is None:
+				continue
+			entry.pending_xp += xp
+			entry.pending_income += income
+			# a newer collect (from a message during the failed flush) wins.
+			if entry.pending_collect is None:
+				entry.pending_collect = collect
+
+	# the rows for the three executemany (one per column).
+	@staticmethod
+	def build_rows(taken):
+		xp_rows, income_rows, collect_rows = [], [], []
+		for user_id, (xp, income, collect) in taken.items():
+			if xp:
+				xp_rows.append((xp, user_id))
+			if income:
+				income_rows.append((income, user_id))
+			if collect is not None:
+				collect_rows.append((collect, user_id))
+		return xp_rows, income_rows, collect_rows
+
+	# forget users who are done chatting, so the dict doesn't grow forever.
+	# only if their delay is over (else we'd need the database to check it again) and if the LAST flush
+	# had nothing for them either: a read of their row that started before the last flush could still
+	# come back with the old xp, so we keep our (correct) numbers one flush longer.
+	def drop_idle(self, now, delay_seconds):
+		idle = []
+		for user_id, entry in self.entries.items():
+			if entry.has_pending():
+				continue
+			entry.flushes_idle += 1
+			if entry.flushes_idle >= 2 and self.delay_passed(entry, now, delay_seconds):
+				idle.append(user_id)
+		for user_id in idle:
+			del self.entries[user_id]
+		return len(idle)
+
+	def stats(self):
+		return {
+			"active_users": len(self.entries),
+			"pending_users": sum(1 for entry in self.entries.values() if entry.has_pending()),
+			"collects": self.collects,
+			"flushes": self.flushes,
+			"flushed_rows": self.flushed_rows,
+		}
@@ -57,26 +57,131 @@ import os, sys
 # I didn't notice the bug at first, because I ran the code through PyCharm directly, which seems to handle it automatically.
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-import argparse, json, sqlite3, shutil, math
+import argparse, json, sqlite3, shutil, math, inspect, re, time
 from datetime import datetime
 
 # to create database structure
 import database
 
 
+"""
+STREAMING JSON READER
+"""
+
+# the legacy database is one big JSON object: {"userdata": [...], "items": [...], "income_roles": [...], ...}.
+# json.load() would read all of it into memory at once (and then we built every row too): with a big server,
+# that's several GB. This reads the file piece by piece and gives the elements of the lists we need one at a time.
+# (standard library only: json.JSONDecoder.raw_decode() decodes one value out of a string, starting at a position)
+class SkenderJsonStream:
+	# the first character after a number.
+	NUMBER_END = re.compile(r"[^0-9eE+\-.]")
+
+	def __init__(self, path, sections, block_size=1 << 20):
+		self.file = open(path, encoding="utf-8")
+		self.sections = set(sections)
+		self.block_size = block_size
+		self.decoder = json.JSONDecoder()
+		# the part of the file we have in memory, and how far we are in it.
+		self.buffer, self.position = "", 0
+		self.end_of_file = False
+		# characters read so far (for the progress, ~ bytes for a JSON file that's mostly ASCII).
+		self.characters_read = 0
+
+	def close(self):
+		self.file.close()
+
+	# reads the next block. Returns False at the end of the file.
+	def fill(self):
+		if self.end_of_file:
+			return False
+		data = self.file.read(self.block_size)
+		if not data:
+			self.end_of_file = True
+			return False
+		self.characters_read += len(data)
+		# what we already read can go.
+		self.buffer = self.buffer[self.position:] + data
+		self.position = 0
+		return True
+
+	# the next character that isn't a space (not consumed), "" at the end of the file.
+	def peek(self):
+		while True:
+			while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+				self.position += 1
+			if self.position < len(self.buffer):
+				return self.buffer[self.position]
+			if not self.fill():
+				return ""
+
+	def expect(self, characters):
+		character = self.peek()
+		if character == "" or character not in characters:
+			raise ValueError(f"invalid JSON: expected {characters!r} but got {character!r} "
+							 f"(around character {self.characters_read - len(self.buffer) + self.position:,})")
+		self.position += 1
+		return character
+
+	# one value (object, list, string, number...) starting at the current position.
+	def decode_value(self):
+		if self.peek() in "-0123456789":
+			# a number at the end of the block could go on in the next one (123|45 or 1.|5): read until
+			# something that can't be part of it. (objects, lists, strings... fail to decode if they are cut)
+			while not self.NUMBER_END.search(self.buffer, self.position) and self.fill():
+				pass
+		while True:
+			try:
+				value, self.position = self.decoder.raw_decode(self.buffer, self.position)
+				return value
+			except json.JSONDecodeError:
+				# probably cut in the middle by the end of the block: read more and try again.
+				if not self.fill():
+					raise
+
+	# yields (section, element) for every element of the lists in sections, in the order of the file.
+	# everything else (e.g. "symbols", "variables") is read and forgotten.
+	def __iter__(self):
+		self.expect("{")
+		if self.peek() == "}":
+			return
+		while True:
+			key = self.decode_value()
+			self.expect(":")
+			if key in self.sections and self.peek() == "[":
+				self.expect("[")
+				if self.peek() == "]":
+					self.expect("]")
+				else:
+					while True:
+						yield key, self.decode_value()
+						if self.expect(",]") == "]":
+							break
+			else:
+				self.decode_value()
+			if self.expect(",}") == "}":
+				return
+
+
+"""
+JSON MIGRATION (legacy JSON --> SQLite)
+"""
+
 class SkenderMigration:
+	# the parts of the JSON we move, in the order of the progress report.
+	SECTIONS = ("userdata", "items", "income_roles")
+	# rows per transaction. Big transactions: one commit costs the same for 10 rows or 100k rows.
+	CHUNK_ROWS = 100_000
+
 	def __init__(self):
 		self.db_cursor = None
 		self.database = None
-		self.json_income_roles = None
-		self.json_items = None
-		self.json_userdata = None
-		self.json_all_data = None
 		self.path_to_sqlite = None
 		self.path_to_json = None
 		self.source_version = None
 		self.target_version = None
 		self.db_creator = None
+		# section --> elements already saved by an earlier run that crashed / got stopped (see load_progress()).
+		self.resume_from = {}
 
 	def parse_arguments(self):
 		# description gets shown if using python database_migration.py --help.
@@ -110,21 +215,7 @@ class SkenderMigration:
 		self.source_version = args.source_version
 		self.target_version = args.target_version
 
-	def executemany_by_chunks(self, query, data, chunk=500):
-		# index starts at 0, then will be 500, then 1000...
-		for index in range(0, len(data), chunk):
-			try:
-				# execute from 0 to 499, then 500 to 999 etc.
-				self.db_cursor.executemany(
-					query,
-					data[index:index+chunk]
-				)
-			except Exception as e:
-				raise Exception(f"Error updating chunk at {index // chunk}: {e}")
-		# commit
-		self.database.commit()
-
-	def start_migration(self):
+	def create_backup(self):
 		# create backups
 		print("Creating a backup in case anything goes wrong...")
 		timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M")
@@ -145,13 +236,7 @@ class SkenderMigration:
 
 		print(f"Backup complete, saved as {backup_path}.")
 
-		try:
-			self.json_all_data = json.load(open(self.path_to_json))
-		except json.JSONDecodeError as e:
-			print(f"Error while loading JSON: {e}")
-			print("Closing migration script. You should probably also stop the bot.")
-			quit()
-
+	def start_migration(self):
 		# "symbols" ! (in new database: variables).
 		# --> not done through migration, this will just all be setup at the setup walkthrough
 		# also: even tho we will create a database.sqlite, the database handler will still know that it has to
@@ -164,12 +249,17 @@ class SkenderMigration:
 		# If you want to back up action_phrases that you created, please do so manually through a sqlite browser
 		# or contact me (see repository / my GitHub profile).
 
-		# user data !
-		self.json_userdata = self.json_all_data["userdata"]
-		# items !
-		self.json_items = self.json_all_data["items"]
-		# income roles !
-		self.json_income_roles = self.json_all_data["income_roles"]
+		# user data, items and income roles are read piece by piece from the JSON in import_json().
+
+		# a file left by a migration that got stopped in the middle: we go on where it stopped.
+		# but: during the import, SQLite keeps its journal in memory (see import_json()), so if the process was
+		# killed in the middle of a transaction, the file can be broken. Then we just start again from zero.
+		if os.path.exists(self.path_to_sqlite) and self.load_progress() and not self.database_intact():
+			print("The database of the stopped migration is damaged, starting again from the beginning...")
+			for leftover in (self.path_to_sqlite, self.path_to_sqlite + "-journal", self.path_to_sqlite + "-wal"):
+				if os.path.exists(leftover):
+					os.remove(leftover)
+			self.resume_from = {}
 
 		# create database structure
 		self.db_creator = database.SkenderDatabaseCreator(self.path_to_sqlite)
@@ -179,65 +269,91 @@ class SkenderMigration:
 		self.database = sqlite3.connect(self.path_to_sqlite)
 		self.db_cursor = self.database.cursor()
 
-	def insert_users(self):
-		# Move userdata>>used_items to table "user_used_items".
-		# Move userdata>>items to "user_items".
-
-		insert_users_data = []
-		insert_user_items_data = []
-		insert_user_used_items_data = []
-
-		for user_object in self.json_userdata:
-			user_id = user_object["user_id"]
-			# could be floats, but need to be integers in new system
-			cash = math.ceil(user_object["cash"])
-			bank = math.ceil(user_object["bank"])
-			# set nickname to user id for now, will be updated for everyone when calling +balance.
-			# the other option, fetching all nicknames, would take way too much time
-			# and would be complicated to implement since we don't interact with a bot but just database data.
-			discord_nick_name = user_id
-
-			# we will not move last_work, last_rob etc., since that has no real impact.
-			# everyone will just be able to do it once when the new system is applied.
-
-			# in Legacy Version, there were no levels, so we don't need to move total_xp, current_xp_level.
-			# put as tuple directly
-			insert_users_data.append( (user_id, discord_nick_name, cash, bank) )
-
-			# now for owned items
-			items = user_object["items"]
-			if items == "none":
-				pass
-			else:
-				for item in items:
-					item_name = item[0]
-					item_amount = item[1]
-					insert_user_items_data.append( (user_id, item_name, item_amount) )
-
-			# now for used items
-			# the problem here is that if there were no used items, it would just be set as "none".
-			used_items = user_object["used_items"]
-			if used_items == "none":
-				pass
-			else:
-				for item in used_items:
-					item_name = item[0]
-					item_amount = item[1]
-					insert_user_used_items_data.append( (user_id, item_name, item_amount) )
-
-		# put into chunks
-		query = "INSERT OR REPLACE INTO users (user_id, user_discord_nick, cash, bank) VALUES (?, ?, ?, ?)"
-		self.executemany_by_chunks(query, insert_users_data)
-
-		# put into chunks
-		query = "INSERT OR REPLACE INTO user_items (user_id, item_name, amount) VALUES (?, ?, ?)"
-		self.executemany_by_chunks(query, insert_user_items_data)
+		# what is already done, saved with every chunk. Dropped once the migration is finished.
+		self.db_cursor.execute('''
+			CREATE TABLE IF NOT EXISTS json_migration_progress (
+				section TEXT PRIMARY KEY,
+				source TEXT,
+				done INTEGER
+			)
+		''')
+		self.database.commit()
+		if self.resume_from:
+			print("Resuming the migration that was stopped: " +
+				  ", ".join(f"{done:,} {section}" for section, done in self.resume_from.items()) + " already done.")
 
-		# put into chunks
-		query = "INSERT OR REPLACE INTO user_used_items (user_id, item_name, amount) VALUES (?, ?, ?)"
-		self.executemany_by_chunks(query, insert_user_used_items_data)
+	# the same JSON file as last time ? (path and size, a changed file starts from zero)
+	def source_signature(self):
+		return f"{os.path.abspath(self.path_to_json)}|{os.path.getsize(self.path_to_json)}"
 
-	def insert_items(self):
+	def load_progress(self):
+		self.resume_from = {}
+		connection = sqlite3.connect(self.path_to_sqlite)
+		try:
+			rows = connection.execute("SELECT section, source, done FROM json_migration_progress").fetchall()
+		except sqlite3.DatabaseError:
+			# no progress table: not a stopped migration.
+			# (or a broken file: then we couldn't resume anyway, and database_intact() says so)
+			rows = []
+		finally:
+			connection.close()
+		signature = self.source_signature()
+		self.resume_from = {section: done for section, source, done in rows if source == signature and done}
+		return bool(self.resume_from)
+
+	def database_intact(self):
+		connection = sqlite3.connect(self.path_to_sqlite)
+		try:
+			return connection.execute("PRAGMA quick_check").fetchone()[0] == "ok"
+		except sqlite3.DatabaseError:
+			return False
+		finally:
+			connection.close()
+
+	# one user of the JSON --> his row in users, and the rows in user_items and user_used_items.
+	@staticmethod
+	def user_rows(user_object):
+		# Move userdata>>used_items to table "user_used_items".
+		# Move userdata>>items to "user_items".
+		user_id = user_object["user_id"]
+		# could be floats, but need to be integers in new system
+		cash = math.ceil(user_object["cash"])
+		bank = math.ceil(user_object["bank"])
+		# set nickname to user id for now, will be updated for everyone when calling +balance.
+		# the other option, fetching all nicknames, would take way too much time
+		# and would be complicated to implement since we don't interact with a bot but just database data.
+		discord_nick_name = user_id
+
+		# we will not move last_work, last_rob etc., since that has no real impact.
+		# everyone will just be able to do it once when the new system is applied.
+
+		# in Legacy Version, there were no levels, so we don't need to move total_xp, current_xp_level.
+		# put as tuple directly
+		user_row = (user_id, discord_nick_name, cash, bank)
+
+		# now for owned items
+		item_rows = []
+		items = user_object["items"]
+		if items != "none":
+			for item in items:
+				item_name = item[0]
+				item_amount = item[1]
+				item_rows.append( (user_id, item_name, item_amount) )
+
+		# now for used items
+		# the problem here is that if there were no used items, it would just be set as "none".
+		used_item_rows = []
+		used_items = user_object["used_items"]
+		if used_items != "none":
+			for item in used_items:
+				item_name = item[0]
+				item_amount = item[1]
+				used_item_rows.append( (user_id, item_name, item_amount) )
+
+		return user_row, item_rows, used_item_rows
+
+	@staticmethod
+	def item_row(item):
 		# Compatability problems:
 		#	- old items without display name: display name = short name.
 		#	- old items without user_pfp.
@@ -245,104 +361,348 @@ class SkenderMigration:
 		#	- old items without max_amount --> set to "unlimited".
 		#	- old items without max_amount_per_transaction --> set to "unlimited".
 		# 	Move: name -> item_name.
+		name = item["name"]
 
-		insert_items_data = []
-
-		for item in self.json_items:
-			name = item["name"]
-
-			try:
-				display_name = item["display_name"]
-			except:
-				display_name = name
-
-			price = item["price"]
-			description = item["description"]
-			duration = item["duration"]
-			amount_in_stock = item["amount_in_stock"]
-			try:
-				max_amount = item["max_amount"]
-			except:
-				max_amount = "unlimited"
-			required_roles = item["required_roles"]
-			given_roles = item["given_roles"]
-			removed_roles = item["removed_roles"]
-			try:
-				excluded_roles = item["excluded_roles"]
-			except:
-				excluded_roles = ["none"]
-			maximum_balance = item["maximum_balance"]
-			reply_message = item["reply_message"]
-			expiration_date = item["expiration_date"]
-			try:
-				item_img_url = item["item_img_url"]
-			except:
-				item_img_url = "EMPTY"
-
-			# max_amount_per_transaction didn't exist before Skender v2.0
-			max_amount_per_transaction = "unlimited"
-
-			insert_items = (
-				name, display_name, price, description, duration, amount_in_stock, max_amount,
-				max_amount_per_transaction, json.dumps(required_roles), json.dumps(given_roles),
-				json.dumps(removed_roles), json.dumps(excluded_roles), maximum_balance, reply_message,
-				expiration_date, item_img_url
-			)
-
-			insert_items_data.append(insert_items)
-
-		query = """
-			INSERT OR IGNORE INTO items_catalog (
-				item_name, display_name, price, description, duration,
-				amount_in_stock, max_amount, max_amount_per_transaction, required_roles, given_roles,
-				removed_roles, excluded_roles, maximum_balance, reply_message,
-				expiration_date, item_img_url
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
-
-		self.executemany_by_chunks(query, insert_items_data)
+		try:
+			display_name = item["display_name"]
+		except:
+			display_name = name
+
+		price = item["price"]
+		description = item["description"]
+		duration = item["duration"]
+		amount_in_stock = item["amount_in_stock"]
+		try:
+			max_amount = item["max_amount"]
+		except:
+			max_amount = "unlimited"
+		required_roles = item["required_roles"]
+		given_roles = item["given_roles"]
+		removed_roles = item["removed_roles"]
+		try:
+			excluded_roles = item["excluded_roles"]
+		except:
+			excluded_roles = ["none"]
+		maximum_balance = item["maximum_balance"]
+		reply_message = item["reply_message"]
+		expiration_date = item["expiration_date"]
+		try:
+			item_img_url = item["item_img_url"]
+		except:
+			item_img_url = "EMPTY"
+
+		# max_amount_per_transaction didn't exist before Skender v2.0
+		max_amount_per_transaction = "unlimited"
+
+		return (
+			name, display_name, price, description, duration, amount_in_stock, max_amount,
+			max_amount_per_transaction, json.dumps(required_roles), json.dumps(given_roles),
+			json.dumps(removed_roles), json.dumps(excluded_roles), maximum_balance, reply_message,
+			expiration_date, item_img_url
+		)
 
-	def insert_income_roles(self):
+	@staticmethod
+	def income_role_row(role):
 		# --> every variable stays the same but last_single_called is removed.
 		#	(it was unnecessary and is now saved for every user specifically).
 		# we're not moving last_updated --> set to a single last_global_income_update variable
 		# instead of having the same last_updated string for every role anyway.
+		return role["role_id"], role["role_income"]
+
+	# reads the JSON piece by piece (SkenderJsonStream) and inserts CHUNK_ROWS rows per transaction,
+	# with the progress of every section saved in the same transaction (--> resume after a crash).
+	def import_json(self):
+		queries = {
+			"users": "INSERT OR REPLACE INTO users (user_id, user_discord_nick, cash, bank) VALUES (?, ?, ?, ?)",
+			"user_items": "INSERT OR REPLACE INTO user_items (user_id, item_name, amount) VALUES (?, ?, ?)",
+			"user_used_items": "INSERT OR REPLACE INTO user_used_items (user_id, item_name, amount) VALUES (?, ?, ?)",
+			"items_catalog": """
+				INSERT OR IGNORE INTO items_catalog (
+					item_name, display_name, price, description, duration,
+					amount_in_stock, max_amount, max_amount_per_transaction, required_roles, given_roles,
+					removed_roles, excluded_roles, maximum_balance, reply_message,
+					expiration_date, item_img_url
+				) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+			"income_roles": "INSERT OR REPLACE INTO income_roles (role_id, role_income) VALUES (?, ?)",
+		}
+		pending = {table: [] for table in queries}
+		# section --> elements read (the skipped ones of a resumed run included).
+		read = {section: 0 for section in self.SECTIONS}
+		signature = self.source_signature()
+		total_size = max(1, os.path.getsize(self.path_to_json))
+
+		# only for the import: no journal on the disk and no waiting for the disk at every commit.
+		# a crash in the middle can break the file, start_migration() checks that before resuming.
+		old_journal_mode = self.db_cursor.execute("PRAGMA journal_mode").fetchone()[0]
+		old_synchronous = self.db_cursor.execute("PRAGMA synchronous").fetchone()[0]
+		self.db_cursor.execute("PRAGMA journal_mode=MEMORY")
+		self.db_cursor.execute("PRAGMA synchronous=OFF")
+
+		started = time.perf_counter()
+		rows_written = 0
+
+		def flush():
+			nonlocal rows_written
+			with self.database:
+				for table, rows in pending.items():
+					if rows:
+						self.db_cursor.executemany(queries[table], rows)
+						rows_written += len(rows)
+						rows.clear()
+				self.db_cursor.executemany(
+					"INSERT OR REPLACE INTO json_migration_progress (section, source, done) VALUES (?, ?, ?)",
+					[(section, signature, done) for section, done in read.items()]
+				)
+			elapsed = max(time.perf_counter() - started, 1e-9)
+			print(f"  {read['userdata']:,} users, {read['items']:,} items, {read['income_roles']:,} income roles  "
+				  f"({stream.characters_read / total_size:.0%} of the file, {rows_written / elapsed:,.0f} rows/s)")
 
-		insert_income_roles_data = []
+		stream = SkenderJsonStream(self.path_to_json, self.SECTIONS)
+		try:
+			for section, element in stream:
+				read[section] += 1
+				# already saved by the run that got stopped.
+				if read[section] <= self.resume_from.get(section, 0):
+					continue
+				if section == "userdata":
+					user_row, item_rows, used_item_rows = self.user_rows(element)
+					pending["users"].append(user_row)
+					pending["user_items"].extend(item_rows)
+					pending["user_used_items"].extend(used_item_rows)
+				elif section == "items":
+					pending["items_catalog"].append(self.item_row(element))
+				else:
+					pending["income_roles"].append(self.income_role_row(element))
+
+				if sum(len(rows) for rows in pending.values()) >= self.CHUNK_ROWS:
+					flush()
+			flush()
+		except (ValueError, KeyError, TypeError) as e:
+			# ValueError includes json.JSONDecodeError.
+			print(f"Error while reading the JSON: {e}")
+			print("What was read until here is saved, run the migration again once the file is fixed to continue.")
+			print("Closing migration script. You should probably also stop the bot.")
+			quit()
+		finally:
+			stream.close()
 
-		for role in self.json_income_roles:
-			role_id = role["role_id"]
-			role_income = role["role_income"]
-			insert_income_roles_data.append( (role_id, role_income) )
+		# finished: no resume needed anymore, back to the normal settings.
+		self.db_cursor.execute("DROP TABLE json_migration_progress")
+		self.database.commit()
+		self.db_cursor.execute(f"PRAGMA synchronous={old_synchronous}")
+		self.db_cursor.execute(f"PRAGMA journal_mode={old_journal_mode}")
 
-		query = f"INSERT OR REPLACE INTO income_roles (role_id, role_income) VALUES (?, ?)"
-		self.executemany_by_chunks(query, insert_income_roles_data)
+		elapsed = time.perf_counter() - started
+		print(f"Imported {rows_written:,} rows in {elapsed:.1f} s ({rows_written / max(elapsed, 1e-9):,.0f} rows/s).")
+		return rows_written
 
 	def close_database(self):
 		self.database.commit()
 		self.database.close()
 
 
+"""
+SCHEMA VERSIONS (changes to the SQLite structure of existing databases)
+"""
+
+# the JSON migration above is done once by hand. The changes below are applied automatically:
+# SkenderDatabaseHandler.__init__ calls upgrade_schema() at every start (and create_database() too, for the
+# scripts that only use SkenderDatabaseCreator), and every change is only applied once per database file.
+
+# Add a change:
+#	- write a function step(connection, progress) below. It has to be idempotent (check if the change is already
+#	  there: old files got some changes through add_missing_column before this existed, new files are created
+#	  with the newest CREATE TABLE).
+#	- add it at the END of SCHEMA_STEPS with the next number. Never change the number of a step that was released.
+# A step runs in one transaction. Long rewrites of data can be a generator instead: everything until a yield is
+# one transaction, the yielded value (e.g. the last user_number done) is saved in schema_version.progress with it,
+# and if the bot gets stopped in the middle, the step gets it back as progress at the next start and goes on from there.
+
+# rows per transaction of a long rewrite (a chunk of 1M users takes ~100 ms, so the write lock is never held long).
+SCHEMA_CHUNK_ROWS = 50_000
+
+# the cooldowns of the users table, milliseconds since 1970 (epoch ms) since version 1.
+COOLDOWN_COLUMNS = (
+	"last_slut", "last_work", "last_crime", "last_rob", "last_blackjack", "last_roulette",
+	"last_single_collect", "last_xp_collect"
+)
+
+
+def table_columns(connection, table):
+	# row: (cid, name, type, notnull, default, pk, hidden). xinfo and not table_info: that one hides generated columns.
+	return connection.execute(f"PRAGMA table_xinfo({table})").fetchall()
+
+def table_exists(connection, table):
+	return connection.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone() is not None
+
+# CREATE TABLE IF NOT EXISTS does not add new columns to tables that already exist, so we do it here.
+# (no table: nothing to do, it gets created with the column)
+def add_missing_column(connection, table, column, definition):
+	if table_exists(connection, table) and column not in [row[1] for row in table_columns(connection, table)]:
+		print(f"[LOG]: adding column {column} to table {table}.")
+		connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+# the old TEXT value --> epoch ms. They were saved with str(datetime.now()) (local time, like "2025-05-04 13:37:00.123456"),
+# julianday() reads that, 'utc' converts it from local time. 'none' or anything unreadable --> 0 (= never).
+def text_to_epoch_ms(column):
+	return (
+		f"CASE WHEN typeof({column}) = 'integer' THEN {column} "
+		f"ELSE COALESCE(CAST(ROUND((julianday({column}, 'utc') - 2440587.5) * 86400000) AS INTEGER), 0) END"
+	)
+
+
+# version 1: the cooldowns were TEXT and had to be parsed (datetime.strptime) for every +work, +collect, chat xp...
+# --> INTEGER epoch ms, a cooldown check is a subtraction now.
+# SQLite can't change the type of a column, so the users table is built again: copied into users_rebuild
+# SCHEMA_CHUNK_ROWS users at a time (progress: the last user_number copied), then swapped.
+def users_cooldowns_epoch_ms(connection, progress):
+	columns = table_columns(connection, "users")
+	# hidden 2 / 3 = generated column (net_worth), those can't be copied (and are added again by version 3).
+	copied = [row[1] for row in columns if row[6] not in (2, 3)]
+
+	if progress is None or not table_exists(connection, "users_rebuild"):
+		types = {row[1]: row[2].upper() for row in columns}
+		if all(types.get(column) == "INTEGER" for column in COOLDOWN_COLUMNS):
+			# created like that, nothing to do.
+			return
+		connection.execute("DROP TABLE IF EXISTS users_rebuild")
+		connection.execute(database.SkenderDatabaseCreator.USERS_TABLE.format(name="users_rebuild"))
+		progress = 0
+		yield progress
+
+	total = connection.execute("SELECT COALESCE(MAX(user_number), 0) FROM users").fetchone()[0]
+	values = [text_to_epoch_ms(column) if column in COOLDOWN_COLUMNS else column for column in copied]
+	while True:
+		last = connection.execute(
+			"SELECT MAX(user_number) FROM (SELECT user_number FROM users WHERE user_number > ? "
+			"ORDER BY user_number LIMIT ?)", (progress, SCHEMA_CHUNK_ROWS)
+		).fetchone()[0]
+		if last is None:
+			break
+		connection.execute(
+			f"INSERT INTO users_rebuild ({', '.join(copied)}) SELECT {', '.join(values)} FROM users "
+			f"WHERE user_number > ? AND user_number <= ?", (progress, last)
+		)
+		progress = last
+		print(f"[LOG]: users copied up to user_number {progress:,} of {total:,}.")
+		yield progress
+
+	# user_number counts every user that ever existed (AUTOINCREMENT), so the counter is kept too.
+	sequence = connection.execute("SELECT seq FROM sqlite_sequence WHERE name = 'users'").fetchone()
+	# the indexes are gone with the old table, version 4 creates them again.
+	connection.execute("DROP TABLE users")
+	connection.execute("ALTER TABLE users_rebuild RENAME TO users")
+	if sequence is not None:
+		connection.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'users'", (sequence[0],))
+
+# version 2: how often a phrase comes compared to the others (see database/phrases.py).
+def action_phrases_weight(connection, progress):
+	add_missing_column(connection, "action_phrases", "weight", "INTEGER DEFAULT 1")
+
+# version 3: for the leaderboards: the net worth as a (generated) column, so it can have an index.
+# VIRTUAL: computed when read, nothing more to save. The index is kept up to date by SQLite itself.
+def users_net_worth(connection, progress):
+	add_missing_column(connection, "users", "net_worth", "INTEGER GENERATED ALWAYS AS (cash + bank) VIRTUAL")
+
+# version 4: + user_number: same order for equal totals as before (first registered first), and the pages
+# come directly out of the index (ORDER BY ... LIMIT 10 OFFSET x, no sorting of the whole table).
+def users_leaderboard_indexes(connection, progress):
+	connection.execute("CREATE INDEX IF NOT EXISTS idx_users_net_worth ON users(net_worth DESC, user_number)")
+	connection.execute("CREATE INDEX IF NOT EXISTS idx_users_total_xp ON users(total_xp DESC, user_number)")
+
+# (version, name, step). In order, only ever add at the end.
+SCHEMA_STEPS = (
+	(1, "users cooldowns as epoch ms", users_cooldowns_epoch_ms),
+	(2, "action_phrases.weight", action_phrases_weight),
+	(3, "users.net_worth", users_net_worth),
+	(4, "leaderboard indexes", users_leaderboard_indexes),
+)
+SCHEMA_VERSION = SCHEMA_STEPS[-1][0]
+
+
+# one row per step: state 'running' (a generator that didn't finish yet, with its progress) or 'done'.
+def create_schema_version_table(connection):
+	connection.execute('''
+		CREATE TABLE IF NOT EXISTS schema_version (
+			version INTEGER PRIMARY KEY,
+			name TEXT,
+			state TEXT CHECK(state in ('running', 'done')),
+			progress INTEGER,
+			applied_at INTEGER
+		)
+	''')
+	connection.commit()
+
+# the highest version of the file with everything before it done (0 = none).
+def current_schema_version(connection):
+	create_schema_version_table(connection)
+	done = {row[0] for row in connection.execute("SELECT version FROM schema_version WHERE state = 'done'")}
+	version = 0
+	for number, _, _ in SCHEMA_STEPS:
+		if number not in done:
+			break
+		version = number
+	return version
+
+def save_schema_step(connection, version, name, state, progress):
+	connection.execute(
+		"INSERT OR REPLACE INTO schema_version (version, name, state, progress, applied_at) VALUES (?, ?, ?, ?, ?)",
+		(version, name, state, progress, database.epoch_ms())
+	)
+
+# applies every step that isn't done yet, in order. connection: a sqlite3 connection nobody else writes with
+# in the meantime (the bot calls this before its database engine starts).
+def upgrade_schema(connection):
+	create_schema_version_table(connection)
+	saved = {
+		version: (state, progress)
+		for version, state, progress in connection.execute("SELECT version, state, progress FROM schema_version")
+	}
+	for version, name, step in SCHEMA_STEPS:
+		state, progress = saved.get(version, (None, None))
+		if state == "done":
+			continue
+		if state == "running":
+			print(f"[LOG]: resuming database structure version {version} ({name}) at {progress:,}...")
+		else:
+			print(f"[LOG]: upgrading database structure to version {version} ({name})...")
+
+		started = time.perf_counter()
+		connection.commit()
+		connection.execute("BEGIN IMMEDIATE")
+		try:
+			result = step(connection, progress)
+			if inspect.isgenerator(result):
+				# every yield: save the progress with this chunk, and the next chunk is a new transaction.
+				for progress in result:
+					save_schema_step(connection, version, name, "running", progress)
+					connection.execute("COMMIT")
+					connection.execute("BEGIN IMMEDIATE")
+			save_schema_step(connection, version, name, "done", None)
+			connection.execute("COMMIT")
+		except BaseException:
+			# (BaseException: also for Ctrl+C in the middle of it)
+			# only this transaction (this chunk) is lost, the ones before stay saved.
+			connection.execute("ROLLBACK")
+			raise
+		print(f"[LOG]: database structure is now version {version} ({time.perf_counter() - started:.2f} s).")
+
+
 if __name__ == "__main__":
 
 	migration_process = SkenderMigration()
 
 	migration_process.parse_arguments()
 
+	migration_process.create_backup()
+
 	print("initiating migration...")
 	migration_process.start_migration()
 	print("initiation complete")
 
-	print("starting users migration...")
-	migration_process.insert_users()
-	print("users migration complete")
-
-	print("starting items migration...")
-	migration_process.insert_items()
-	print("items migration complete")
-
-	print("starting income roles migration...")
-	migration_process.insert_income_roles()
-	print("income roles migration complete")
+	print("starting users, items and income roles migration...")
+	migration_process.import_json()
+	print("users, items and income roles migration complete")
 
 	print("closing database...")
 	migration_process.close_database()
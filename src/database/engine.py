@@ -0,0 +1,616 @@
+"""
+INFO:
+
+	The database engine of the Skender discord bot.
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	imported in database/__init__.py and used there as self.engine.xyz()
+
+	Why does this exist ?
+		sqlite3 calls are blocking. Before, every SELECT and every commit ran directly on the asyncio
+		event loop, so while SQLite was waiting on the disk (especially fsync at commit), the whole bot
+		(every guild, every message) was waiting too.
+
+		Now all SQLite work happens on threads:
+			- ONE writer thread owns the only write connection. Writes are put into a queue and the
+			  writer thread works through them one after another. So there are never two writers at once.
+			- a small pool of READ-ONLY connections handles the SELECTs. Thanks to WAL, readers can
+			  keep reading while the writer writes.
+		The event loop only awaits the results (asyncio futures), it never waits for the disk itself.
+
+	Group commit:
+		Every commit costs an fsync (the disk has to confirm that the data is really written).
+		So when many writes arrive at the same time, the writer thread puts them all into ONE transaction
+		and commits once. Every caller only gets its result after that shared commit is done, so
+		"awaited" still means "saved".
+			- commit_window_ms: how long the writer waits for more writes after the first one.
+				0 (default) means: don't wait, only take what is already queued. Under load, a lot of writes
+				pile up during each fsync anyway, so this already batches them without adding any delay.
+			- commit_max_statements: maximum number of writes in one commit. 1 disables group commit.
+			- synchronous: the durability / latency trade-off (PRAGMA synchronous).
+				"FULL" (default): every commit is on the disk before the callers get their result.
+				"NORMAL": with WAL, still safe if the bot crashes, but the last commits can be lost
+				if the whole machine loses power. Way faster on slow disks.
+		Each write gets its own SAVEPOINT inside the shared transaction, so if one write fails,
+		only that one is rolled back and the others are still committed.
+
+	Transactions (unit of work):
+		Some commands need several writes that belong together (e.g. +buy: take the money, lower the stock,
+		add the item). With begin() we get a Transaction: the writer thread does BEGIN IMMEDIATE and from then on
+		only runs the reads and writes of that transaction, until it gets commit() or rollback().
+		Reads of the transaction also run on the writer connection, so they see the changes not committed yet.
+		Writes from anyone else wait until the transaction is finished.
+		--> used through SkenderDatabaseHandler.transaction() in database/__init__.py.
+
+	Maintenance:
+		WAL checkpoints, PRAGMA optimize, ANALYZE and VACUUM can't run inside a transaction (or shouldn't), so
+		maintenance() runs one statement alone on the writer connection, between two batches.
+		idle_seconds() tells how long no write came in, so it can be done when the bot is quiet.
+		--> used by SkenderDatabaseHandler.run_maintenance() in database/__init__.py (see database/maintenance.py).
+
+	for more info see database/__init__.py
+
+"""
+
+import sqlite3, threading, queue, asyncio, os, pathlib, time, collections
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+# the rows are already fetched inside the worker thread, so this object is safe to use on the event loop.
+# it copies the parts of sqlite3.Cursor that the handler uses: fetchone(), fetchall(), rowcount and lastrowid.
+# sqlite_seconds: how long SQLite worked on it in the thread (for the +perf measurements, see perf.py),
+# for grouped writes this includes the share of the commit.
+class QueryResult:
+	__slots__ = ("rows", "rowcount", "lastrowid", "sqlite_seconds", "_index")
+
+	def __init__(self, rows=None, rowcount=-1, lastrowid=None, sqlite_seconds=0.0):
+		self.rows = rows if rows is not None else []
+		self.rowcount = rowcount
+		self.lastrowid = lastrowid
+		self.sqlite_seconds = sqlite_seconds
+		self._index = 0
+
+	def fetchone(self):
+		# works like a cursor: every call gives the next row, None at the end.
+		if self._index >= len(self.rows):
+			return None
+		row = self.rows[self._index]
+		self._index += 1
+		return row
+
+	def fetchall(self):
+		rows = self.rows[self._index:]
+		self._index = len(self.rows)
+		return rows
+
+	def __iter__(self):
+		return iter(self.fetchall())
+
+
+# one unit of work for the writer thread.
+# kind is "write" (normal write, can be grouped with others), "maintenance" (alone, outside of any transaction)
+# or, for transactions: "begin", "read", "write", "commit", "rollback" with transaction set.
+class WriteJob:
+	__slots__ = ("kind", "query", "parameters", "many", "transaction", "future")
+
+	def __init__(self, kind="write", query=None, parameters=(), many=False, transaction=None):
+		self.kind = kind
+		self.query = query
+		self.parameters = parameters
+		# executemany instead of execute (for "maintenance": executescript, see _run_maintenance)
+		self.many = many
+		self.transaction = transaction
+		# concurrent.futures.Future, resolved by the writer thread, awaited through asyncio.wrap_future().
+		self.future = Future()
+
+
+# what SkenderDatabaseEngine.begin() returns. Everything goes to the writer thread, in order.
+# nothing is saved unless commit() is called.
+class Transaction:
+	def __init__(self, engine):
+		self.engine = engine
+		# True once commit() or rollback() was sent, no more statements after that.
+		self.finished = False
+		self.committed = False
+		# for nested blocks (SkenderDatabaseHandler.transaction() inside another one): only the outermost commits.
+		# if an inner block ended without reaching its commit(), the whole transaction has to be rolled back.
+		self.depth = 0
+		self.inner_commits = 0
+		self.rollback_only = False
+		# how long the COMMIT took in the writer thread (for perf.py).
+		self.commit_seconds = 0.0
+		# functions to call once the transaction is finished (committed or rolled back),
+		# e.g. to invalidate caches. See SkenderDatabaseHandler.forget_user().
+		self.on_finish = []
+
+	def submit(self, kind, query=None, parameters=(), many=False):
+		if self.finished:
+			raise RuntimeError("Transaction is already finished.")
+		return self.engine.submit(kind, query, parameters, many, transaction=self)
+
+	async def write(self, query, parameters=(), many=False):
+		return await asyncio.wrap_future(self.submit("write", query, parameters, many))
+
+	async def read(self, query, parameters=()):
+		return await asyncio.wrap_future(self.submit("read", query, parameters))
+
+	async def commit(self):
+		if self.depth > 0:
+			# inner block, the outer one commits.
+			self.inner_commits += 1
+			return
+		if self.rollback_only:
+			await self.rollback()
+			raise RuntimeError("Transaction was rolled back by an inner block.")
+		future = self.submit("commit")
+		# set before waiting: even if we get cancelled now, the writer thread will still commit.
+		self.finished = True
+		try:
+			result = await asyncio.wrap_future(future)
+			self.commit_seconds = result.sqlite_seconds
+			self.committed = True
+		finally:
+			self.run_on_finish()
+
+	async def rollback(self):
+		future = self.submit("rollback")
+		self.finished = True
+		try:
+			await asyncio.wrap_future(future)
+		finally:
+			self.run_on_finish()
+
+	def run_on_finish(self):
+		callbacks, self.on_finish = self.on_finish, []
+		for callback in callbacks:
+			callback()
+
+
+class SkenderDatabaseEngine:
+	def __init__(self, path, reader_count=4, commit_window_ms=0, commit_max_statements=100, synchronous="FULL"):
+		self.path_to_db = os.path.abspath(path)
+		self.reader_count = reader_count
+
+		# group commit settings, see INFO at the top of this file.
+		if synchronous.upper() not in ("FULL", "NORMAL"):
+			raise ValueError("synchronous has to be FULL or NORMAL.")
+		self.commit_window = max(0, commit_window_ms) / 1000
+		self.commit_max_statements = max(1, int(commit_max_statements))
+		self.synchronous = synchronous.upper()
+		# counters, to see how well the writes get grouped (statements per commit).
+		self.commit_count, self.statement_count = 0, 0
+		# when the last write (or transaction) came in, see idle_seconds(). Maintenance doesn't count.
+		self.last_submit = time.monotonic()
+
+		# jobs the writer thread took from the queue but could not run yet (see _collect_batch / _run_transaction).
+		# only used inside the writer thread.
+		self.waiting_jobs = collections.deque()
+
+		# the writer thread and its queue.
+		self.write_queue = queue.Queue()
+		self.writer_thread = None
+		# only ever used inside the writer thread !
+		self.write_connection = None
+
+		# the readers: every reader thread opens its own read-only connection (sqlite3 connections
+		# should not be shared between threads), see self._get_reader_connection().
+		self.reader_pool = None
+		self.reader_local = threading.local()
+		self.reader_connections = []
+		self.reader_connections_lock = threading.Lock()
+
+		self.running = False
+
+	"""
+	START / STOP
+	"""
+
+	def start(self):
+		if self.running:
+			return
+
+		# we open the write connection here already (and not in the thread) to catch errors directly.
+		self.write_connection = self._open_write_connection()
+
+		self.writer_thread = threading.Thread(target=self._writer_loop, name="skender-db-writer", daemon=True)
+		self.writer_thread.start()
+
+		self.reader_pool = ThreadPoolExecutor(max_workers=self.reader_count, thread_name_prefix="skender-db-reader")
+
+		self.running = True
+
+	def _open_write_connection(self):
+		# check_same_thread=False because it is created in start() but then only used by the writer thread.
+		# isolation_level=None means that sqlite3 does not start transactions by itself,
+		# we do BEGIN / COMMIT ourselves in the writer thread.
+		connection = sqlite3.connect(self.path_to_db, check_same_thread=False, isolation_level=None)
+		# WAL means Write-Ahead Logging. Useful for multiple simultaneous accesses.
+		# this is VERY IMPORTANT, KEEP IT THIS WAY IF YOU DON'T KNOW WHAT YOU'RE DOING.
+		# (the readers can only read while we write because of this).
+		connection.execute("PRAGMA journal_mode=WAL")
+		connection.execute(f"PRAGMA synchronous={self.synchronous}")
+		# row allows us to get the data from sql as python dict. Beware: it is readonly !
+		connection.row_factory = sqlite3.Row
+		return connection
+
+	def stop(self):
+		if not self.running:
+			return
+		self.running = False
+
+		# None is the signal for the writer thread to stop, after finishing everything queued before it.
+		self.write_queue.put(None)
+		self.writer_thread.join()
+		self.writer_thread = None
+
+		self.reader_pool.shutdown(wait=True)
+		self.reader_pool = None
+		with self.reader_connections_lock:
+			for connection in self.reader_connections:
+				connection.close()
+			self.reader_connections = []
+		# new thread-local storage, so the closed connections don't get used again after a restart.
+		self.reader_local = threading.local()
+
+		self.write_connection.close()
+		self.write_connection = None
+
+	"""
+	WRITER THREAD
+	"""
+
+	def _writer_loop(self):
+		while True:
+			job = self._next_job()
+			if job is None:
+				break
+
+			# the jobs taken out of the queue for this step, they get the error if anything unexpected goes wrong.
+			jobs, stop = [job], False
+			try:
+				if job.kind == "begin":
+					stop = self._run_transaction(job)
+				elif job.kind == "write" and job.transaction is None:
+					stop = self._collect_batch(jobs)
+					self._run_batch(jobs)
+				elif job.kind == "maintenance":
+					self._run_maintenance(job)
+				else:
+					self._run_stray_job(job)
+			except Exception as e:
+				# this thread must never die: else every write after this would wait forever (and the bot with it).
+				print(f"[LOG]: database writer: unexpected error, {len(jobs)} job(s) failed: {e!r}")
+				self._fail_jobs(jobs, e)
+				self._rollback()
+			if stop:
+				break
+
+		# stopping: whatever could not run anymore gets an error instead of waiting forever.
+		while self.waiting_jobs:
+			job = self.waiting_jobs.popleft()
+			if job is not None and job.future.set_running_or_notify_cancel():
+				job.future.set_exception(RuntimeError("Database engine was stopped."))
+
+	# gives the error to every job that has no result yet.
+	def _fail_jobs(self, jobs, error):
+		for job in jobs:
+			if not job.future.done():
+				job.future.set_exception(error)
+
+	# ROLLBACK if a transaction is open. It can fail itself (e.g. disk I/O error), that is only logged.
+	# if the connection is still stuck in the transaction after that, every BEGIN would fail from now on,
+	# so it is replaced by a new one (closing it rolls back what was left).
+	def _rollback(self):
+		connection = self.write_connection
+		try:
+			if connection.in_transaction:
+				connection.execute("ROLLBACK")
+			return
+		except Exception as e:
+			print(f"[LOG]: database writer: ROLLBACK failed: {e!r}")
+		try:
+			if connection.in_transaction:
+				self.write_connection = self._open_write_connection()
+				connection.close()
+				print("[LOG]: database writer: opened a new write connection.")
+		except Exception as e:
+			# the next jobs get the error of the old connection, but the writer thread keeps going.
+			print(f"[LOG]: database writer: could not open a new write connection: {e!r}")
+
+	def _next_job(self, timeout=None):
+		if self.waiting_jobs:
+			return self.waiting_jobs.popleft()
+		if timeout is None:
+			return self.write_queue.get()
+		if timeout > 0:
+			return self.write_queue.get(timeout=timeout)
+		return self.write_queue.get_nowait()
+
+	# adds more queued jobs to the batch, until the window is over or the batch is full.
+	# returns True if the stop signal (None) was found, the batch still gets written before stopping.
+	def _collect_batch(self, batch):
+		deadline = time.monotonic() + self.commit_window
+		while len(batch) < self.commit_max_statements:
+			try:
+				job = self._next_job(timeout=deadline - time.monotonic())
+			except queue.Empty:
+				break
+			if job is None:
+				return True
+			# a transaction (or anything else) ends the batch, it runs after this commit.
+			if job.kind != "write" or job.transaction is not None:
+				self.waiting_jobs.appendleft(job)
+				break
+			batch.append(job)
+		return False
+
+	def _run_batch(self, batch):
+		connection = self.write_connection
+		# the finished writes, they only get their result once the commit worked.
+		done = []
+
+		try:
+			connection.execute("BEGIN")
+		except Exception as e:
+			for job in batch:
+				if job.future.set_running_or_notify_cancel():
+					job.future.set_exception(e)
+			return
+
+		for index, job in enumerate(batch):
+			# if the caller already gave up (e.g. cancelled), skip it.
+			if not job.future.set_running_or_notify_cancel():
+				continue
+			try:
+				result = self._run_write(job)
+			except Exception as e:
+				job.future.set_exception(e)
+				# some errors (e.g. disk full) make SQLite roll back the whole transaction by itself.
+				# then the writes before were lost too, so tell them and start a new transaction.
+				if not connection.in_transaction:
+					for lost_job, result in done:
+						lost_job.future.set_exception(e)
+					done = []
+					try:
+						connection.execute("BEGIN")
+					except Exception as begin_error:
+						# no transaction for the rest of the batch either.
+						self._fail_jobs(batch[index + 1:], begin_error)
+						return
+				continue
+			done.append((job, result))
+
+		try:
+			commit_start = time.perf_counter()
+			connection.execute("COMMIT")
+			commit_seconds = time.perf_counter() - commit_start
+		except Exception as e:
+			# nothing of this batch got saved, so everyone gets the error.
+			self._rollback()
+			for job, result in done:
+				job.future.set_exception(e)
+			return
+
+		self.commit_count += 1
+		self.statement_count += len(done)
+		for job, result in done:
+			# everyone of the batch waited for the whole commit.
+			result.sqlite_seconds += commit_seconds
+			job.future.set_result(result)
+
+	# runs one write inside the shared transaction of the batch.
+	def _run_write(self, job):
+		connection = self.write_connection
+		start = time.perf_counter()
+		connection.execute("SAVEPOINT skender_write")
+		try:
+			if job.many:
+				cursor = connection.executemany(job.query, job.parameters)
+			else:
+				cursor = connection.execute(job.query, job.parameters)
+			rows = cursor.fetchall() if cursor.description else []
+		except Exception:
+			# only undo this write, not the others of the batch.
+			if connection.in_transaction:
+				connection.execute("ROLLBACK TO skender_write")
+				connection.execute("RELEASE skender_write")
+			raise
+		connection.execute("RELEASE skender_write")
+
+		return QueryResult(rows, cursor.rowcount, cursor.lastrowid, time.perf_counter() - start)
+
+	# runs a whole transaction: BEGIN IMMEDIATE, then only its own jobs until commit or rollback.
+	# returns True if the stop signal was found meanwhile.
+	def _run_transaction(self, begin_job):
+		connection = self.write_connection
+		transaction = begin_job.transaction
+
+		if not begin_job.future.set_running_or_notify_cancel():
+			return False
+		try:
+			# IMMEDIATE: take the write lock of the file directly, not only at the first write.
+			connection.execute("BEGIN IMMEDIATE")
+		except Exception as e:
+			begin_job.future.set_exception(e)
+			return False
+		begin_job.future.set_result(None)
+
+		# jobs that don't belong to this transaction, they run after it.
+		later, stop, statements, job = [], False, 0, begin_job
+		try:
+			while True:
+				job = self._next_job()
+				if job is None:
+					# stopping in the middle of a transaction: nothing of it is saved.
+					self._rollback()
+					stop = True
+					break
+				if job.transaction is not transaction:
+					later.append(job)
+					continue
+
+				# commit and rollback always run, even if the caller stopped waiting for them.
+				# else the transaction would stay open forever.
+				if job.kind in ("commit", "rollback"):
+					job.future.set_running_or_notify_cancel()
+					start = time.perf_counter()
+					try:
+						connection.execute("COMMIT" if job.kind == "commit" else "ROLLBACK")
+						error = None
+					except Exception as e:
+						error = e
+						self._rollback()
+					if not job.future.cancelled():
+						if error is None:
+							job.future.set_result(QueryResult(sqlite_seconds=time.perf_counter() - start))
+						else:
+							job.future.set_exception(error)
+					if job.kind == "commit" and error is None:
+						self.commit_count += 1
+						self.statement_count += statements
+					break
+
+				if not job.future.set_running_or_notify_cancel():
+					continue
+				start = time.perf_counter()
+				try:
+					if job.kind == "read":
+						cursor = connection.execute(job.query, job.parameters)
+						result = QueryResult(cursor.fetchall(), cursor.rowcount, cursor.lastrowid)
+					elif job.kind == "write":
+						# no savepoint needed: a failing statement undoes only itself,
+						# and the caller decides if the whole transaction is rolled back.
+						if job.many:
+							cursor = connection.executemany(job.query, job.parameters)
+						else:
+							cursor = connection.execute(job.query, job.parameters)
+						rows = cursor.fetchall() if cursor.description else []
+						result = QueryResult(rows, cursor.rowcount, cursor.lastrowid)
+						statements += 1
+					else:
+						raise RuntimeError(f"Transaction is already running, can't do {job.kind}.")
+				except Exception as e:
+					job.future.set_exception(e)
+					continue
+				result.sqlite_seconds = time.perf_counter() - start
+				job.future.set_result(result)
+		except Exception as e:
+			# something unexpected in the middle (e.g. the connection broke): the job that was running gets the error,
+			# the next jobs of this transaction get "No transaction running" (see _run_stray_job).
+			self._fail_jobs([job], e)
+			raise
+		finally:
+			# in order, before anything that is still in the queue.
+			self.waiting_jobs.extendleft(reversed(later))
+		return stop
+
+	# one statement in autocommit mode (no BEGIN around it), e.g. PRAGMA wal_checkpoint or VACUUM.
+	def _run_maintenance(self, job):
+		if not job.future.set_running_or_notify_cancel():
+			return
+		start = time.perf_counter()
+		try:
+			if job.many:
+				# sqlite3 steps a statement without result columns only once. Some pragmas need more steps
+				# (PRAGMA incremental_vacuum frees one page per step), executescript runs them to the end.
+				self.write_connection.executescript(job.query)
+				result = QueryResult()
+			else:
+				cursor = self.write_connection.execute(job.query, job.parameters)
+				rows = cursor.fetchall() if cursor.description else []
+				result = QueryResult(rows, cursor.rowcount, cursor.lastrowid)
+		except Exception as e:
+			job.future.set_exception(e)
+			return
+		result.sqlite_seconds = time.perf_counter() - start
+		job.future.set_result(result)
+
+	# a transaction job without its transaction running (e.g. rollback after the begin was cancelled).
+	def _run_stray_job(self, job):
+		if not job.future.set_running_or_notify_cancel():
+			return
+		if job.kind == "rollback":
+			job.future.set_result(None)
+		else:
+			job.future.set_exception(RuntimeError(f"No transaction running for {job.kind}."))
+
+	"""
+	READERS
+	"""
+
+	def _get_reader_connection(self):
+		connection = getattr(self.reader_local, "connection", None)
+		if connection is None:
+			# mode=ro: these connections can never write, even by accident.
+			uri = pathlib.Path(self.path_to_db).as_uri() + "?mode=ro"
+			connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+			connection.row_factory = sqlite3.Row
+			self.reader_local.connection = connection
+			with self.reader_connections_lock:
+				self.reader_connections.append(connection)
+		return connection
+
+	def _run_read(self, query, parameters):
+		start = time.perf_counter()
+		cursor = self._get_reader_connection().execute(query, parameters)
+		return QueryResult(cursor.fetchall(), cursor.rowcount, cursor.lastrowid, time.perf_counter() - start)
+
+	"""
+	PUBLIC FUNCTIONS (awaitables)
+	"""
+
+	def submit(self, kind, query=None, parameters=(), many=False, transaction=None):
+		if not self.running:
+			raise RuntimeError("Database engine is not running.")
+		job = WriteJob(kind, query, parameters, many, transaction)
+		if kind != "maintenance":
+			self.last_submit = time.monotonic()
+		self.write_queue.put(job)
+		return job.future
+
+	def submit_write(self, query, parameters=(), many=False):
+		return self.submit("write", query, parameters, many)
+
+	async def begin(self):
+		transaction = Transaction(self)
+		future = self.submit("begin", transaction=transaction)
+		try:
+			await asyncio.wrap_future(future)
+		except asyncio.CancelledError:
+			# maybe the writer thread already started it, so make sure it gets closed again.
+			transaction.submit("rollback")
+			transaction.finished = True
+			raise
+		return transaction
+
+	async def write(self, query, parameters=(), many=False):
+		return await asyncio.wrap_future(self.submit_write(query, parameters, many))
+
+	# query runs alone on the writer connection, outside of any transaction (see Maintenance in INFO).
+	# it waits for the writes queued before it, and the writes after it wait for it: keep it short.
+	# script: run it with executescript (no parameters, no rows), see _run_maintenance().
+	async def maintenance(self, query, parameters=(), script=False):
+		return await asyncio.wrap_future(self.submit("maintenance", query, parameters, many=script))
+
+	# seconds since the last write came in, 0 if some are still waiting in the queue.
+	def idle_seconds(self):
+		if self.write_queue.qsize() or self.waiting_jobs:
+			return 0.0
+		return time.monotonic() - self.last_submit
+
+	async def read(self, query, parameters=()):
+		if not self.running:
+			raise RuntimeError("Database engine is not running.")
+		loop = asyncio.get_running_loop()
+		return await loop.run_in_executor(self.reader_pool, self._run_read, query, parameters)
+
+	# only for code that runs BEFORE the event loop (e.g. SkenderDatabaseHandler.__init__).
+	# inside the bot, always use the awaitables above, else we block the event loop again.
+	def write_blocking(self, query, parameters=(), many=False):
+		return self.submit_write(query, parameters, many).result()
+
+	def read_blocking(self, query, parameters=()):
+		if not self.running:
+			raise RuntimeError("Database engine is not running.")
+		return self.reader_pool.submit(self._run_read, query, parameters).result()
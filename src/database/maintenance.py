@@ -0,0 +1,89 @@
+"""
+INFO:
+
+	Automatic upkeep of the SQLite file of the Skender discord bot: WAL checkpoints, statistics and vacuum.
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	imported in database/__init__.py and used there as self.maintenance.xyz() (see run_maintenance()).
+
+	Why ?
+		- WAL: SQLite copies the WAL back into the database by itself every 1000 pages (a PASSIVE checkpoint),
+		  but it never makes the -wal file smaller again, and the checkpoint can't finish while readers
+		  (e.g. a backup) still use old pages. So after a busy moment the file stays big, or keeps growing.
+		- the query planner only knows how big the tables and indexes are after an ANALYZE. Nothing ever ran
+		  one, and PRAGMA optimize (which runs it again only where it's needed) neither.
+		- after +clear-db deleted many users, their pages stay in the file as free pages.
+
+	How ?
+		SkenderDatabaseHandler.maintenance_loop() calls run_maintenance() every check_seconds. plan() decides what
+		to do from the size of the -wal file and how long no write came in (quiet_seconds):
+			- "checkpoint": when the bot is quiet and the WAL is bigger than wal_checkpoint_mb, TRUNCATE (copies
+			  everything and makes the -wal file empty again). If the bot is never quiet and the WAL gets bigger than
+			  wal_force_mb, PASSIVE (copies what it can without waiting, the next writes start at the beginning of
+			  the -wal file again instead of making it longer).
+			- "optimize": PRAGMA optimize every optimize_hours (the first time an ANALYZE if there never was one).
+			- "vacuum": after a big clean_database (see purged()), if more than vacuum_free_percent of the pages
+			  are free: PRAGMA incremental_vacuum, vacuum_pages_per_step pages at a time (the writes of the bot
+			  can go in between), then ANALYZE (the tables are a lot smaller now) and a TRUNCATE checkpoint.
+			  incremental_vacuum needs auto_vacuum=INCREMENTAL. New databases have it (SkenderDatabaseCreator),
+			  an older file gets switched once with a full VACUUM (the whole file is rewritten, only when quiet).
+		Every step is logged with how long it took, and counted in stats().
+
+"""
+
+import time
+
+
+class SkenderMaintenance:
+	def __init__(self, check_seconds=60, quiet_seconds=2, wal_checkpoint_mb=16, wal_force_mb=256,
+				 optimize_hours=6, vacuum_free_percent=10, vacuum_pages_per_step=2048, analysis_limit=1000):
+		self.check_seconds = check_seconds
+		# no write for that long = the bot is quiet, the heavier steps can run.
+		self.quiet_seconds = quiet_seconds
+		self.wal_checkpoint_mb = wal_checkpoint_mb
+		self.wal_force_mb = wal_force_mb
+		self.optimize_hours = optimize_hours
+		self.vacuum_free_percent = vacuum_free_percent
+		# 2048 pages of 4 KiB = 8 MiB per step.
+		self.vacuum_pages_per_step = vacuum_pages_per_step
+		# rows per index ANALYZE looks at (PRAGMA analysis_limit), so it stays fast on big tables.
+		self.analysis_limit = analysis_limit
+		# time.monotonic() of the last PRAGMA optimize, None = not yet.
+		self.last_optimize = None
+		# set by purged(), the vacuum step checks the free pages once it can run.
+		self.vacuum_wanted = False
+		# step -> [runs, total seconds, seconds of the last run]
+		self.steps = {}
+
+	# clean_database deleted rows: check the free pages at the next quiet moment.
+	def purged(self, rows):
+		if rows:
+			self.vacuum_wanted = True
+
+	# what to do now, in order. wal_bytes: size of the -wal file, quiet: no write for quiet_seconds.
+	def plan(self, wal_bytes, quiet, now=None):
+		now = time.monotonic() if now is None else now
+		wal_mb = wal_bytes / 1024 / 1024
+		steps = []
+		if wal_mb >= self.wal_force_mb and not quiet:
+			steps.append(("checkpoint", "PASSIVE"))
+		if not quiet:
+			return steps
+		if self.vacuum_wanted:
+			# (ends with a TRUNCATE checkpoint itself)
+			steps.append(("vacuum", None))
+		elif wal_mb >= self.wal_checkpoint_mb:
+			steps.append(("checkpoint", "TRUNCATE"))
+		if self.optimize_hours and (self.last_optimize is None or now - self.last_optimize >= self.optimize_hours * 3600):
+			steps.append(("optimize", None))
+		return steps
+
+	def record(self, step, seconds, detail=""):
+		runs, total, _ = self.steps.get(step, (0, 0.0, 0.0))
+		self.steps[step] = [runs + 1, total + seconds, seconds]
+		print(f"[LOG]: database maintenance: {step} took {seconds * 1000:.1f} ms{f' ({detail})' if detail else ''}.")
+
+	def stats(self):
+		return {step: {"runs": runs, "total_seconds": total, "last_seconds": last}
+				for step, (runs, total, last) in self.steps.items()}
@@ -0,0 +1,129 @@
+"""
+INFO:
+
+	Action phrases (the "You worked and earned..." messages) of the Skender discord bot, kept in memory.
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	imported in database/__init__.py and used there as self.action_phrases.xyz()
+
+	Before, every +work / +crime / +slut / +rob asked SQLite for "ORDER BY RANDOM() LIMIT 1", so SQLite had
+	to go through (and sort) all phrases of that action each time. Now all phrases are loaded once into one
+	list per (action, "win" / "lose") and we just pick a random position in the list.
+
+	Weights (column "weight" in action_phrases, default 1):
+		a phrase with weight 3 comes 3 times as often as one with weight 1. 0 disables a phrase.
+		To keep the pick O(1) with weights, we use the "alias method" (Walker / Vose): when loading,
+		every slot of the list gets a probability and an "alias" (another phrase). To pick: choose a random slot,
+		then either take it or its alias. Two random numbers, no matter how many phrases there are.
+
+	No repeats:
+		we remember the last N phrases every user got for each action, and pick again if we'd get one of them.
+		Memory is limited: only the last max_keys (user, action, type) are remembered (the least recently used
+		get forgotten). One user who does +work, +slut and +crime takes several of them.
+
+"""
+
+import random
+from collections import OrderedDict, deque
+
+
+class SkenderPhrasePool:
+	def __init__(self, phrases, weights=None):
+		# tuples: can't be changed by accident.
+		self.phrases = tuple(phrases)
+		self.size = len(self.phrases)
+		# alias tables, only if there are different weights. Else a simple random index is enough.
+		self.probabilities, self.aliases = None, None
+		if weights is not None and self.size and len(set(weights)) > 1:
+			self.build_alias_table(weights)
+
+	def build_alias_table(self, weights):
+		size = self.size
+		total = float(sum(weights))
+		# scaled so that the average is 1.
+		scaled = [weight * size / total for weight in weights]
+		probabilities, aliases = [1.0] * size, list(range(size))
+		small = [index for index, value in enumerate(scaled) if value < 1.0]
+		large = [index for index, value in enumerate(scaled) if value >= 1.0]
+		while small and large:
+			less, more = small.pop(), large.pop()
+			probabilities[less] = scaled[less]
+			aliases[less] = more
+			# the big one gives what the small one is missing.
+			scaled[more] = scaled[more] + scaled[less] - 1.0
+			if scaled[more] < 1.0:
+				small.append(more)
+			else:
+				large.append(more)
+		# what's left is (because of float rounding) ~1.0 anyway.
+		for index in small + large:
+			probabilities[index] = 1.0
+		self.probabilities, self.aliases = tuple(probabilities), tuple(aliases)
+
+	def pick_index(self, rng=random):
+		index = rng.randrange(self.size)
+		if self.probabilities is None or rng.random() < self.probabilities[index]:
+			return index
+		return self.aliases[index]
+
+
+class SkenderPhrasePicker:
+	def __init__(self, no_repeat=3, max_keys=10000, max_tries=8):
+		# (action_name, type) -> SkenderPhrasePool
+		self.pools = {}
+		self.loaded = False
+		# don't give a user one of his last no_repeat phrases (0 disables it).
+		self.no_repeat = max(0, int(no_repeat))
+		# how many (user, action_name, type) we remember at most, see self.recent.
+		self.max_keys = max(1, int(max_keys))
+		# if the pool is small, we could need many tries. After max_tries we take what we get.
+		self.max_tries = max(1, int(max_tries))
+		# (user, action_name, type) -> deque of the last phrase indexes, least recently used first.
+		self.recent = OrderedDict()
+
+	# rows: anything with action_name, type, phrase and (optional) weight.
+	def load(self, rows):
+		grouped = {}
+		for row in rows:
+			weight = row["weight"] if "weight" in row.keys() and row["weight"] is not None else 1
+			if weight <= 0:
+				continue
+			phrases, weights = grouped.setdefault((row["action_name"], row["type"]), ([], []))
+			phrases.append(row["phrase"])
+			weights.append(weight)
+		# build everything first, then replace in one go.
+		self.pools = {key: SkenderPhrasePool(phrases, weights) for key, (phrases, weights) in grouped.items()}
+		# the indexes we remember point into the old lists, so forget them.
+		self.recent = OrderedDict()
+		self.loaded = True
+
+	def has(self, action, type_):
+		return (action, type_) in self.pools
+
+	def pick(self, action, type_, user=None, rng=random):
+		pool = self.pools.get((action, type_))
+		if pool is None or pool.size == 0:
+			return None
+
+		# no user or no repeat check wanted: just pick.
+		if user is None or self.no_repeat == 0 or pool.size == 1:
+			return pool.phrases[pool.pick_index(rng)]
+
+		key = (user, action, type_)
+		last_picks = self.recent.get(key)
+		if last_picks is None:
+			# never remember more than the pool can give, else every pick would be a "repeat".
+			last_picks = deque(maxlen=min(self.no_repeat, pool.size - 1))
+			self.recent[key] = last_picks
+			if len(self.recent) > self.max_keys:
+				self.recent.popitem(last=False)
+		else:
+			self.recent.move_to_end(key)
+
+		for _ in range(self.max_tries):
+			index = pool.pick_index(rng)
+			if index not in last_picks:
+				break
+		last_picks.append(index)
+		return pool.phrases[index]
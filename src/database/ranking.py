@@ -0,0 +1,323 @@
+"""
+INFO:
+
+	In-memory leaderboards of the Skender discord bot (rank of a user and pages in O(log n), without SQL).
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	imported in database/__init__.py and used there as self.rank_index.xyz()
+
+	Why ?
+		+lb and +level-lb show a page and "your leaderboard rank". With the indexes on net_worth and total_xp
+		(see SkenderDatabaseCreator), the page is fast, but the rank is still a COUNT(*) of everyone before
+		the user, so it takes longer the more users there are (a few ms at 100k users, for every +lb).
+
+	How ?
+		For each leaderboard (net_worth, cash, bank, total_xp) we keep every user in a SkenderRankList:
+		a sorted list, cut in pieces of about LOAD keys, plus a Fenwick tree (binary indexed tree) with the
+		length of every piece. Finding a key is a bisect over the last key of every piece, then a bisect
+		in that piece, and the Fenwick tree gives how many keys are in the pieces before it.
+		--> rank and page are O(log n). Adding / removing a key moves at most LOAD keys in one piece.
+
+		A key is ONE int (less memory than a tuple): -value * 2 ** FRACTION_BITS * NUMBER_SPACE + user_number.
+		Sorted ascending, that's the biggest value first and, for the same value, who registered first
+		(like the SQL version). Balances can have decimals (blackjack pays bet * 1.5, rob a percentage...),
+		the FRACTION_BITS keep them in the key as an exact int (a float in the key would round the user_number away).
+
+	When is it updated ?
+		Every write on the users table already tells the handler which user changed (user=... for the user
+		cache). The handler marks that user here (mark()), and before the next rank / page lookup, reads the
+		marked users again in one query and updates them (see SkenderDatabaseHandler.refresh_rank_index()).
+		user="all" (bulk changes) --> everything is loaded again.
+		So a write costs nothing more, and a lookup only reads the users that changed since the last one.
+
+	Memory: about 200 bytes per user for the 4 leaderboards and the values (~20 MB for 100k users).
+	With verification on (SkenderDatabaseHandler.rank_index_verify), every lookup is compared with SQL.
+
+"""
+
+from bisect import bisect_left, insort
+
+
+# user_number has to stay below this (AUTOINCREMENT, so that's 4 billion users registered).
+NUMBER_SPACE = 1 << 32
+# bits after the point of the value in the key. * 2 ** 64 only changes the exponent of a float, so the scaled value
+# is exact, and every float from 2 ** -11 up has no bits below 2 ** -64 (SQLite's REAL is the same double).
+FRACTION_BITS = 64
+FRACTION_SCALE = 1 << FRACTION_BITS
+
+# the columns of the users table we keep. net_worth is cash + bank.
+RANK_COLUMNS = ("net_worth", "cash", "bank", "total_xp")
+
+
+# like SQLite stores it in an INTEGER column: NULL is 0 here (COALESCE), a float without decimals becomes an int.
+def rank_value(value):
+	if value is None:
+		return 0
+	if isinstance(value, float) and value.is_integer():
+		return int(value)
+	return value
+
+def rank_key(value, user_number):
+	if isinstance(value, int):
+		scaled = value << FRACTION_BITS
+	else:
+		scaled = int(value * FRACTION_SCALE)
+	return -scaled * NUMBER_SPACE + user_number
+
+def key_user_number(key):
+	# % with a positive number is always positive in python, also for negative keys.
+	return key % NUMBER_SPACE
+
+
+class SkenderRankList:
+	# a piece is split in two when it gets longer than 2 * LOAD.
+	LOAD = 1000
+
+	def __init__(self, keys=()):
+		self.build(keys)
+
+	def build(self, keys):
+		keys = sorted(keys)
+		self.pieces = [keys[index:index + self.LOAD] for index in range(0, len(keys), self.LOAD)]
+		self.maxes = [piece[-1] for piece in self.pieces]
+		self.size = len(keys)
+		self.build_tree()
+
+	def __len__(self):
+		return self.size
+
+	"""
+	FENWICK TREE (how many keys are in the pieces before piece x)
+	"""
+
+	# O(number of pieces), only when pieces are added or removed.
+	def build_tree(self):
+		tree = [0] + [len(piece) for piece in self.pieces]
+		for index in range(1, len(tree)):
+			parent = index + (index & -index)
+			if parent < len(tree):
+				tree[parent] += tree[index]
+		self.tree = tree
+
+	def tree_add(self, piece_index, amount):
+		index = piece_index + 1
+		while index < len(self.tree):
+			self.tree[index] += amount
+			index += index & -index
+
+	# the number of keys in the pieces 0 to piece_index - 1
+	def tree_prefix(self, piece_index):
+		total, index = 0, piece_index
+		while index:
+			total += self.tree[index]
+			index -= index & -index
+		return total
+
+	# position --> (piece, position in that piece), going down the tree.
+	def locate(self, position):
+		piece_index, step = 0, 1 << (len(self.tree) - 1).bit_length()
+		while step:
+			following = piece_index + step
+			if following < len(self.tree) and self.tree[following] <= position:
+				piece_index = following
+				position -= self.tree[following]
+			step >>= 1
+		return piece_index, position
+
+	"""
+	CHANGES
+	"""
+
+	def add(self, key):
+		if not self.pieces:
+			self.build([key])
+			return
+		piece_index = bisect_left(self.maxes, key)
+		if piece_index == len(self.pieces):
+			# bigger than everything: at the end of the last piece.
+			piece_index -= 1
+			self.pieces[piece_index].append(key)
+			self.maxes[piece_index] = key
+		else:
+			insort(self.pieces[piece_index], key)
+		self.size += 1
+
+		piece = self.pieces[piece_index]
+		if len(piece) > 2 * self.LOAD:
+			# split in two, the tree has one piece more now.
+			self.pieces[piece_index:piece_index + 1] = [piece[:self.LOAD], piece[self.LOAD:]]
+			self.maxes[piece_index:piece_index + 1] = [piece[self.LOAD - 1], piece[-1]]
+			self.build_tree()
+		else:
+			self.tree_add(piece_index, 1)
+
+	# returns False if the key wasn't there.
+	def remove(self, key):
+		piece_index = bisect_left(self.maxes, key)
+		if piece_index == len(self.pieces):
+			return False
+		piece = self.pieces[piece_index]
+		index = bisect_left(piece, key)
+		if index == len(piece) or piece[index] != key:
+			return False
+		del piece[index]
+		self.size -= 1
+
+		if not piece:
+			del self.pieces[piece_index]
+			del self.maxes[piece_index]
+			self.build_tree()
+		else:
+			self.maxes[piece_index] = piece[-1]
+			self.tree_add(piece_index, -1)
+		return True
+
+	"""
+	LOOKUPS
+	"""
+
+	# how many keys are smaller (= the 0-based position of key, if it's in the list).
+	def index(self, key):
+		piece_index = bisect_left(self.maxes, key)
+		if piece_index == len(self.pieces):
+			return self.size
+		return self.tree_prefix(piece_index) + bisect_left(self.pieces[piece_index], key)
+
+	# the keys at positions start to start + count - 1.
+	def slice(self, start, count):
+		if start >= self.size or count <= 0:
+			return []
+		piece_index, index = self.locate(start)
+		keys = []
+		while piece_index < len(self.pieces) and len(keys) < count:
+			piece = self.pieces[piece_index]
+			keys.extend(piece[index:index + count - len(keys)])
+			piece_index, index = piece_index + 1, 0
+		return keys
+
+	def __iter__(self):
+		for piece in self.pieces:
+			yield from piece
+
+
+class SkenderRankIndex:
+	def __init__(self):
+		# column --> SkenderRankList
+		self.boards = {column: SkenderRankList() for column in RANK_COLUMNS}
+		# user_id --> (user_number, cash, bank, total_xp), to find the old keys when a user changes.
+		self.users = {}
+		# False until load() was called once (the handler loads it on the first lookup if needed).
+		self.loaded = False
+		# the users written since the last refresh, and "all" for bulk changes.
+		self.dirty = set()
+		self.dirty_all = True
+
+		# counters, see stats()
+		self.rebuilds, self.refreshed_users, self.lookups, self.mismatches = 0, 0, 0, 0
+		# refreshes started (see SkenderDatabaseHandler.refresh_rank_index()).
+		self.refreshes = 0
+
+	@staticmethod
+	def values(cash, bank, total_xp):
+		# net_worth like the generated column: cash + bank, then the INTEGER affinity.
+		return {"net_worth": rank_value(cash + bank), "cash": cash, "bank": bank, "total_xp": total_xp}
+
+	# (user_number, cash, bank, total_xp) with the values like SQLite has them, so an unchanged row is == the old one.
+	@staticmethod
+	def normalize(row):
+		user_number, cash, bank, total_xp = row
+		return user_number, rank_value(cash), rank_value(bank), rank_value(total_xp)
+
+	# rows: (user_id, user_number, cash, bank, total_xp) of EVERY user.
+	def load(self, rows):
+		self.users = {}
+		keys = {column: [] for column in RANK_COLUMNS}
+		for user_id, *row in rows:
+			user_number, cash, bank, total_xp = self.users[user_id] = self.normalize(row)
+			for column, value in self.values(cash, bank, total_xp).items():
+				keys[column].append(rank_key(value, user_number))
+		for column, board in self.boards.items():
+			board.build(keys[column])
+		self.loaded = True
+		self.rebuilds += 1
+
+	# a user was written (or created / deleted) in the database. user: user_id or "all".
+	def mark(self, user):
+		if user == "all":
+			self.dirty_all = True
+			self.dirty.clear()
+		elif not self.dirty_all:
+			self.dirty.add(user)
+
+	def mark_many(self, user_ids):
+		if not self.dirty_all:
+			self.dirty.update(user_ids)
+
+	def needs_load(self):
+		return self.dirty_all or not self.loaded
+
+	# what to refresh: True (everything) or the set of user_ids. Resets the marks, marks coming in
+	# while the handler reads these users stay for the next refresh.
+	def take_dirty(self):
+		if self.needs_load():
+			self.dirty_all = False
+			self.dirty.clear()
+			return True
+		dirty, self.dirty = self.dirty, set()
+		return dirty
+
+	# row: (user_number, cash, bank, total_xp) as it is now in the database, None if the user was deleted.
+	def update(self, user_id, row):
+		if row is not None:
+			row = self.normalize(row)
+		old = self.users.get(user_id)
+		if old == row:
+			return
+		if old is not None:
+			for column, value in self.values(*old[1:]).items():
+				self.boards[column].remove(rank_key(value, old[0]))
+		if row is None:
+			self.users.pop(user_id, None)
+		else:
+			self.users[user_id] = row
+			for column, value in self.values(*row[1:]).items():
+				self.boards[column].add(rank_key(value, row[0]))
+		self.refreshed_users += 1
+
+	"""
+	LOOKUPS
+	"""
+
+	def __len__(self):
+		return len(self.users)
+
+	# 1 = first. None if we don't know the user.
+	def rank(self, column, user_id):
+		self.lookups += 1
+		row = self.users.get(user_id)
+		if row is None:
+			return None
+		value = self.values(*row[1:])[column]
+		return self.boards[column].index(rank_key(value, row[0])) + 1
+
+	# the user_numbers of the users at rank offset + 1 to offset + count, best first.
+	def page(self, column, offset, count):
+		self.lookups += 1
+		return [key_user_number(key) for key in self.boards[column].slice(offset, count)]
+
+	# the whole leaderboard as user_numbers (for the verification against SQL).
+	def order(self, column):
+		return [key_user_number(key) for key in self.boards[column]]
+
+	def stats(self):
+		return {
+			"users": len(self.users),
+			"loaded": self.loaded,
+			"dirty": "all" if self.dirty_all else len(self.dirty),
+			"rebuilds": self.rebuilds,
+			"refreshes": self.refreshes,
+			"refreshed_users": self.refreshed_users,
+			"lookups": self.lookups,
+			"mismatches": self.mismatches,
+		}
@@ -0,0 +1,227 @@
+"""
+INFO:
+
+	Read-only snapshots of the bot configuration (tables "variables" and "actions").
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	imported in database/__init__.py and used there as self.config.xyz (and for the item catalog and levels, see the end).
+
+	Why ?
+		The variables and actions are read for nearly every command (gamble limits, cooldowns, action revenues...),
+		but they only change when an admin changes them. So we load them once (at on_ready), already converted
+		to the right types, and the commands just read attributes instead of asking SQLite every time.
+
+	How ?
+		A snapshot is never changed (frozen). When an admin changes something, the handler loads a NEW snapshot
+		and replaces self.config with it. Commands that are running keep using the snapshot they already have,
+		so nobody ever sees a half-updated config.
+		--> SkenderDatabaseHandler.load_config_snapshot() in database/__init__.py
+
+"""
+
+import json
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+
+# one row of the table "actions". Values that are NULL in the database (e.g. proba for work) stay None.
+@dataclass(frozen=True)
+class SkenderActionConfig:
+	action_name: str
+	delay: Optional[int]
+	proba: Optional[int]
+	min_revenue: Optional[int]
+	max_revenue: Optional[int]
+	min_lose_amount_percentage: Optional[int]
+	max_lose_amount_percentage: Optional[int]
+	min_gain_amount_percentage: Optional[int]
+	max_gain_amount_percentage: Optional[int]
+
+	@classmethod
+	def from_row(cls, row):
+		return cls(
+			action_name=row["action_name"],
+			delay=row["delay"],
+			proba=row["proba"],
+			min_revenue=row["min_revenue"],
+			max_revenue=row["max_revenue"],
+			min_lose_amount_percentage=row["min_lose_amount_percentage"],
+			max_lose_amount_percentage=row["max_lose_amount_percentage"],
+			min_gain_amount_percentage=row["min_gain_amount_percentage"],
+			max_gain_amount_percentage=row["max_gain_amount_percentage"],
+		)
+
+
+@dataclass(frozen=True)
+class SkenderConfigSnapshot:
+	# var_name -> value, already converted with var_type ("int" -> int, everything else stays str, NULL -> None).
+	variables: Mapping[str, Any]
+	# var_name -> var_type as written in the database ("int", "str").
+	variable_types: Mapping[str, str]
+	# action_name -> SkenderActionConfig
+	actions: Mapping[str, SkenderActionConfig]
+
+	@staticmethod
+	def convert_variable(var_type, var_value):
+		if var_value is None:
+			return None
+		if var_type == "int":
+			try:
+				return int(var_value)
+			except (TypeError, ValueError):
+				# keep it as it is, the command using it will complain.
+				return var_value
+		return str(var_value)
+
+	@classmethod
+	def from_rows(cls, variable_rows, action_rows):
+		variables, variable_types = {}, {}
+		for row in variable_rows:
+			variables[row["var_name"]] = cls.convert_variable(row["var_type"], row["var_value"])
+			variable_types[row["var_name"]] = row["var_type"]
+		actions = {row["action_name"]: SkenderActionConfig.from_row(row) for row in action_rows}
+		# MappingProxyType: read-only view, so nobody changes the snapshot by accident.
+		return cls(MappingProxyType(variables), MappingProxyType(variable_types), MappingProxyType(actions))
+
+	def variable(self, var_name, default=None):
+		return self.variables.get(var_name, default)
+
+	def action(self, action_name):
+		return self.actions.get(action_name)
+
+	"""
+	shortcuts for the variables used the most
+	"""
+
+	@property
+	def income_reset(self):
+		# saved as the string 'true' / 'false'
+		return str(self.variables.get("income_reset", "true")).lower().strip() == "true"
+
+	@property
+	def xp_per_msg(self):
+		return int(self.variables.get("xp_per_msg") or 0)
+
+	@property
+	def passive_income_per_msg(self):
+		return int(self.variables.get("passive_income_per_msg") or 0)
+
+	@property
+	def xp_and_passive_income_delay(self):
+		return int(self.variables.get("xp_and_passive_income_delay") or 0)
+
+
+# one row of the table "items_catalog", already parsed for buy_item:
+#	- roles are sets of ints (empty if "none"), so checks are simple set operations.
+#	- "unlimited" / "none" limits become None, numbers become int.
+#	- expiration_date is a datetime (None: never expires).
+# the stock is NOT in here, it changes with every purchase, so it's always read from the database.
+# --> SkenderDatabaseHandler.get_item_catalog() in database/__init__.py
+@dataclass(frozen=True)
+class SkenderCatalogItem:
+	item_name: str
+	display_name: str
+	price: int
+	description: Optional[str]
+	duration: Optional[int]
+	max_amount: Optional[int]
+	max_amount_per_transaction: Optional[int]
+	required_roles: frozenset
+	excluded_roles: frozenset
+	# tuples and not sets: we keep the order in which they get added / removed.
+	given_roles: tuple
+	removed_roles: tuple
+	maximum_balance: Optional[int]
+	reply_message: Optional[str]
+	expiration_date: Optional[datetime]
+	item_img_url: Optional[str]
+
+	@staticmethod
+	def parse_limit(value):
+		# "unlimited", "none", NULL --> no limit
+		if value is None or str(value).lower().strip() in ("unlimited", "none", ""):
+			return None
+		return int(value)
+
+	@staticmethod
+	def parse_roles(value):
+		# saved as json list, ["none"] if there are none.
+		try:
+			roles = json.loads(value) if value else []
+		except (TypeError, json.JSONDecodeError):
+			roles = []
+		return tuple(int(role) for role in roles if str(role).lower() != "none")
+
+	@staticmethod
+	def parse_date(value):
+		if value is None or str(value).lower().strip() in ("none", ""):
+			return None
+		try:
+			return datetime.strptime(str(value), "%Y-%m-%d %H:%M:%S.%f")
+		except ValueError:
+			# e.g. without microseconds
+			return datetime.fromisoformat(str(value))
+
+	@classmethod
+	def from_row(cls, row):
+		return cls(
+			item_name=row["item_name"],
+			display_name=row["display_name"] or row["item_name"],
+			price=row["price"],
+			description=row["description"],
+			duration=row["duration"],
+			max_amount=cls.parse_limit(row["max_amount"]),
+			max_amount_per_transaction=cls.parse_limit(row["max_amount_per_transaction"]),
+			required_roles=frozenset(cls.parse_roles(row["required_roles"])),
+			excluded_roles=frozenset(cls.parse_roles(row["excluded_roles"])),
+			given_roles=cls.parse_roles(row["given_roles"]),
+			removed_roles=cls.parse_roles(row["removed_roles"]),
+			maximum_balance=cls.parse_limit(row["maximum_balance"]),
+			reply_message=row["reply_message"],
+			expiration_date=cls.parse_date(row["expiration_date"]),
+			item_img_url=row["item_img_url"],
+		)
+
+	# item_name -> SkenderCatalogItem. A row that can't be read (e.g. a date or a limit edited by hand) is left out
+	# and logged: only that item can't be bought, and not the whole shop.
+	@classmethod
+	def from_rows(cls, rows):
+		catalog = {}
+		for row in rows:
+			try:
+				catalog[row["item_name"]] = cls.from_row(row)
+			except (ValueError, TypeError) as e:
+				print(f"[LOG]: item {row['item_name']!r} of the items_catalog can't be read, skipped. Error: {e}")
+		return catalog
+
+
+# the table "levels" as two sorted lists (same index = same level), for the xp of every chat message.
+# to find the level of a user, we look where his xp would be inserted in level_xps (binary search, bisect),
+# so no SQL query and no loop over all levels.
+# --> SkenderDatabaseHandler.load_levels() in database/__init__.py
+@dataclass(frozen=True)
+class SkenderLevelTable:
+	# sorted by xp. Tuples: can't be changed by accident.
+	level_xps: tuple
+	level_numbers: tuple
+
+	@classmethod
+	def from_rows(cls, rows):
+		levels = sorted((row["level_xp"], row["level_number"]) for row in rows if row["level_xp"] is not None)
+		return cls(tuple(xp for xp, _ in levels), tuple(number for _, number in levels))
+
+	def __bool__(self):
+		# False if no levels are set up.
+		return bool(self.level_xps)
+
+	# returns (current level, xp of the next level or None if the highest level is reached).
+	def resolve(self, total_xp):
+		# index = how many levels have level_xp <= total_xp.
+		index = bisect_right(self.level_xps, total_xp)
+		current_level = self.level_numbers[index - 1] if index else 0
+		next_level_xp = self.level_xps[index] if index < len(self.level_xps) else None
+		return current_level, next_level_xp
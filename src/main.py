@@ -52,8 +52,14 @@ SETUP_CHANNEL_ID = # info: on pc, right-click on a channel and click "Copy chann
 
 
 # ~~~ init discord and bot ~~~
+class SkenderClient(Bot):
+	# ctrl+c (or anything else stopping the bot): save the chat xp / income still in memory before it goes offline.
+	async def close(self):
+		await skender.on_close()
+		await super().close()
+
 intents = discord.Intents.all()
-client = Bot(command_prefix=BOT_PREFIX, intents=intents)  # init bot
+client = SkenderClient(command_prefix=BOT_PREFIX, intents=intents)  # init bot
 skender = SkenderBot(client, ADMIN_ROLE, BOT_PREFIX)
 
 # ~~~ set custom status ~~~
@@ -65,10 +71,13 @@ async def on_ready():
 # ~~~ react if we manage a message ~~~
 @client.event
 async def on_message(message):
+	# one context for both (see context.py), None for webhooks.
+	ctx = skender.build_context(message)
+	if ctx is None: return
 	# for level and passive chat income things
-	await skender.handle_message_xp_and_passive_income(message)
+	await skender.handle_message_xp_and_passive_income(message, ctx)
 	# handle "normal" messages, e.g. '+balance'
-	await skender.handle_message(message)
+	await skender.handle_message(message, ctx)
 
 print(f"Starting bot on version {BOT_VERSION}")
 client.run(token)
@@ -94,6 +103,8 @@ client.run(token)
 		database/__init__.py handles the "back end" and interacts with the database. Every database operation happens there.
 			It includes asyncio locks to avoid race conditions. Also, the database is kept open throughout the bot usage.
 			To minimize the risk of data loss in cases of abrupt interruptions, every change is directly committed.
+		database/engine.py runs the actual SQLite work on its own threads (one writer thread, read-only readers),
+			so the bot never waits for the disk on the event loop.
 		game_libs/ includes roulette and blackjack. It is called through database/__init__.py
 		
 	The __init__.py are to make the files in the directories importable. They need to stay there, even if they're empty.
@@ -0,0 +1,201 @@
+"""
+INFO:
+
+	Performance measurements of the Skender discord bot (how long do the commands take, and where does the time go).
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	created in database/__init__.py as self.perf, used there (SQL) and in bot.py (commands, +perf) as
+	self.db_handler.perf.
+
+	For every command (and for the xp of chat messages, "(chat)") we keep histograms of:
+		- wall:       the whole command, from the lookup until the handler returned.
+		- lock wait:  time waiting for db_lock (another command was writing / in a transaction).
+		- sqlite:     time SQLite actually worked (measured in the database threads, see database/engine.py).
+		- discord:    time waiting for the discord API (sending messages, adding roles...).
+		- statements: how many SQL statements the command ran.
+
+	How does the database know which command is running ?
+		bot.py does "async with perf.measure(command):" around the handler. That puts a measurement into a
+		ContextVar, and everything awaited inside (also in the database handler) adds its numbers to it.
+
+	Histograms with fixed buckets: memory stays the same no matter how many commands run, and adding
+	a value is one bisect. Percentiles are the upper limit of the bucket (so p95 = 25 ms means "at most 25 ms").
+
+	Shown with the admin command +perf and written every few minutes to a text file (see bot.py).
+
+"""
+
+import contextlib, contextvars, time
+from bisect import bisect_left
+from datetime import datetime
+
+
+# upper limits of the buckets, in milliseconds. Anything above the last one goes into an extra bucket.
+MS_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# for the number of statements.
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500, 1000)
+
+
+class SkenderHistogram:
+	__slots__ = ("bounds", "counts", "count", "total", "max")
+
+	def __init__(self, bounds):
+		self.bounds = bounds
+		self.counts = [0] * (len(bounds) + 1)
+		self.count, self.total, self.max = 0, 0.0, 0.0
+
+	def add(self, value):
+		self.counts[bisect_left(self.bounds, value)] += 1
+		self.count += 1
+		self.total += value
+		if value > self.max:
+			self.max = value
+
+	def mean(self):
+		return self.total / self.count if self.count else 0.0
+
+	def percentile(self, percent):
+		if not self.count:
+			return 0.0
+		# the rank we look for, then go through the buckets until we have that many values.
+		rank = max(1, round(percent / 100 * self.count))
+		seen = 0
+		for index, amount in enumerate(self.counts):
+			seen += amount
+			if seen >= rank:
+				# the last bucket has no upper limit, the max is the best we know.
+				return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+		return self.max
+
+
+# the numbers of ONE running command, filled while it runs.
+class SkenderMeasurement:
+	__slots__ = ("command", "lock_wait", "sqlite", "discord", "statements")
+
+	def __init__(self, command):
+		self.command = command
+		self.lock_wait, self.sqlite, self.discord = 0.0, 0.0, 0.0
+		self.statements = 0
+
+
+# all measurements of one command.
+class SkenderCommandStats:
+	__slots__ = ("wall", "lock_wait", "sqlite", "discord", "statements")
+
+	def __init__(self):
+		self.wall = SkenderHistogram(MS_BUCKETS)
+		self.lock_wait = SkenderHistogram(MS_BUCKETS)
+		self.sqlite = SkenderHistogram(MS_BUCKETS)
+		self.discord = SkenderHistogram(MS_BUCKETS)
+		self.statements = SkenderHistogram(COUNT_BUCKETS)
+
+	def add(self, measurement, wall_seconds):
+		self.wall.add(wall_seconds * 1000)
+		self.lock_wait.add(measurement.lock_wait * 1000)
+		self.sqlite.add(measurement.sqlite * 1000)
+		self.discord.add(measurement.discord * 1000)
+		self.statements.add(measurement.statements)
+
+
+class SkenderPerf:
+	def __init__(self):
+		# command name -> SkenderCommandStats
+		self.stats = {}
+		self.since = datetime.now()
+		# the measurement of the command running in this task (None outside of commands).
+		self.current = contextvars.ContextVar("skender_perf_measurement", default=None)
+
+	@contextlib.asynccontextmanager
+	async def measure(self, command):
+		measurement = SkenderMeasurement(command)
+		token = self.current.set(measurement)
+		start = time.perf_counter()
+		try:
+			yield measurement
+		finally:
+			wall = time.perf_counter() - start
+			self.current.reset(token)
+			stats = self.stats.get(command)
+			if stats is None:
+				stats = self.stats[command] = SkenderCommandStats()
+			stats.add(measurement, wall)
+
+	"""
+	called from the database handler / discord while a command runs (nothing happens outside of commands).
+	"""
+
+	def add_lock_wait(self, seconds):
+		measurement = self.current.get()
+		if measurement is not None:
+			measurement.lock_wait += seconds
+
+	# result: a QueryResult of database/engine.py (knows how long SQLite worked on it).
+	def add_query(self, result):
+		measurement = self.current.get()
+		if measurement is not None:
+			measurement.statements += 1
+			measurement.sqlite += getattr(result, "sqlite_seconds", 0.0)
+
+	def add_sqlite(self, seconds):
+		measurement = self.current.get()
+		if measurement is not None:
+			measurement.sqlite += seconds
+
+	def add_discord(self, seconds):
+		measurement = self.current.get()
+		if measurement is not None:
+			measurement.discord += seconds
+
+	# every discord API call (send, add roles, ...) goes through client.http.request,
+	# so we time it there instead of around every single ctx.channel.send().
+	def install_discord_timer(self, client):
+		http = getattr(client, "http", None)
+		if http is None or getattr(http.request, "skender_timed", False):
+			return
+		request = http.request
+
+		async def timed_request(*args, **kwargs):
+			start = time.perf_counter()
+			try:
+				return await request(*args, **kwargs)
+			finally:
+				self.add_discord(time.perf_counter() - start)
+
+		timed_request.skender_timed = True
+		http.request = timed_request
+
+	"""
+	REPORT
+	"""
+
+	def reset(self):
+		self.stats = {}
+		self.since = datetime.now()
+
+	# a text table, slowest commands (most total time) first. limit: only the first x commands.
+	def report(self, limit=None):
+		lines = [
+			f"since {self.since:%Y-%m-%d %H:%M:%S} ({str(datetime.now() - self.since).split('.')[0]})",
+			f"{'command':<24}{'count':>7}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}"
+			f"{'lock95':>8}{'sql95':>8}{'dc95':>8}{'stmts':>7}",
+		]
+		ordered = sorted(self.stats.items(), key=lambda item: item[1].wall.total, reverse=True)
+		for command, stats in ordered[:limit]:
+			wall = stats.wall
+			lines.append(
+				f"{command[:23]:<24}{wall.count:>7}{wall.percentile(50):>8.1f}{wall.percentile(95):>8.1f}"
+				f"{wall.percentile(99):>8.1f}{wall.max:>8.1f}{stats.lock_wait.percentile(95):>8.1f}"
+				f"{stats.sqlite.percentile(95):>8.1f}{stats.discord.percentile(95):>8.1f}"
+				f"{stats.statements.mean():>7.1f}"
+			)
+		if not ordered:
+			lines.append("(nothing measured yet)")
+		lines.append("times in ms. lock95/sql95/dc95: p95 of db_lock wait, SQLite and discord API time. "
+					 "stmts: average SQL statements.")
+		return "\n".join(lines)
+
+	# appends the report to a text file, for later analysis.
+	def dump(self, path):
+		with open(path, "a", encoding="utf-8") as file:
+			file.write(f"\n===== {datetime.now():%Y-%m-%d %H:%M:%S} =====\n{self.report()}\n")
@@ -0,0 +1,50 @@
+"""
+INFO:
+
+	Shared setup of the tests of the Skender discord bot.
+
+	Official Repo: https://github.com/NoNameSpecified/UnbelievaBoat-Python-Bot
+
+	run from the repository root:
+		python -m pytest -q
+
+	The code lives in src/ (the bot is started from there), so src/ goes on the path like for the benchmarks/.
+	The tests only use the database part, no discord connection: make_handler() gives a SkenderDatabaseHandler
+	on a new file in the temporary folder of the test, closed again at the end.
+	The handler is async, every test runs its steps with one asyncio.run().
+
+"""
+
+import os, sys, types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import database
+
+
+# where the handler sends its messages: keeps the embeds (None for a text message).
+class FakeChannel:
+	id = 1
+
+	def __init__(self):
+		self.embeds = []
+
+	async def send(self, *args, embed=None, **kwargs):
+		self.embeds.append(embed)
+
+
+@pytest.fixture
+def make_handler(tmp_path):
+	handlers = []
+
+	def make(name="database.sqlite"):
+		# the client is only used for discord things (emojis, channels, members), none of it here.
+		handler = database.SkenderDatabaseHandler(types.SimpleNamespace(), "botmaster", path_to_db=str(tmp_path / name))
+		handlers.append(handler)
+		return handler
+
+	yield make
+	for handler in handlers:
+		handler.close_database()
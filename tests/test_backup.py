@@ -0,0 +1,74 @@
+"""
+INFO:
+
+	Tests: the backups of database/backup.py (copy and rotation).
+
+"""
+
+import gzip, os, sqlite3
+from datetime import datetime, timedelta
+
+from database.backup import SkenderBackup
+
+
+# a backup file with the date in its name (and as modification time, like a real one).
+def fake_backup(directory, date, extension=".sqlite.gz"):
+	path = directory / f"{SkenderBackup.PREFIX}{date:%Y-%m-%d_%H-%M-%S}{extension}"
+	path.write_bytes(b"backup")
+	os.utime(path, (date.timestamp(), date.timestamp()))
+	return path.name
+
+
+def test_rotate_keeps_the_newest(tmp_path):
+	now = datetime.now().replace(microsecond=0)
+	names = [fake_backup(tmp_path, now - timedelta(days=days)) for days in range(10)]
+	# not backups: never touched.
+	(tmp_path / "notes.txt").write_text("keep me")
+	unfinished = fake_backup(tmp_path, now, ".sqlite.part")
+
+	backup = SkenderBackup(str(tmp_path), keep=3, max_age_days=0)
+	assert sorted(backup.rotate()) == sorted(names[3:])
+	assert [name for name, _, _ in backup.list_backups()] == names[:3]
+	assert (tmp_path / "notes.txt").exists() and (tmp_path / unfinished).exists()
+	# nothing more to do the second time.
+	assert backup.rotate() == []
+
+
+def test_rotate_removes_too_old_but_never_the_newest(tmp_path):
+	now = datetime.now().replace(microsecond=0)
+	names = [fake_backup(tmp_path, now - timedelta(days=days), ".sqlite") for days in (40, 45, 60)]
+
+	backup = SkenderBackup(str(tmp_path), keep=7, max_age_days=30)
+	# all of them are too old: the newest one stays anyway, better an old backup than none.
+	assert sorted(backup.rotate()) == sorted(names[1:])
+	assert [name for name, _, _ in backup.list_backups()] == names[:1]
+
+
+def test_run_makes_a_complete_copy_and_rotates(tmp_path):
+	source = str(tmp_path / "database.sqlite")
+	connection = sqlite3.connect(source)
+	connection.execute("PRAGMA journal_mode=WAL")
+	connection.execute("CREATE TABLE users (user_id INTEGER PRIMARY KEY, cash INTEGER)")
+	connection.executemany("INSERT INTO users VALUES (?, ?)", [(number, number * 10) for number in range(5000)])
+	connection.commit()
+
+	directory = tmp_path / "backups"
+	backup = SkenderBackup(str(directory), keep=2, pages_per_step=8, pause_ms=0)
+	os.makedirs(directory)
+	old = fake_backup(directory, datetime.now() - timedelta(days=2))
+	older = fake_backup(directory, datetime.now() - timedelta(days=3))
+
+	info = backup.run(source)
+	connection.close()
+	assert info["steps"] > 1 and info["removed"] == [older]
+	assert [name for name, _, _ in backup.list_backups()] == [os.path.basename(info["path"]), old]
+
+	copy = tmp_path / "copy.sqlite"
+	with gzip.open(info["path"], "rb") as compressed:
+		copy.write_bytes(compressed.read())
+	connection = sqlite3.connect(str(copy))
+	try:
+		assert connection.execute("SELECT COUNT(*), SUM(cash) FROM users").fetchone() == (5000, sum(range(5000)) * 10)
+		assert connection.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+	finally:
+		connection.close()
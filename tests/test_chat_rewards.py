@@ -0,0 +1,77 @@
+"""
+INFO:
+
+	Tests: the chat xp / passive income kept in memory (database/chat_rewards.py) and when it gets saved.
+
+"""
+
+import asyncio, sqlite3, types
+
+from conftest import FakeChannel
+
+
+XP_PER_MESSAGE, INCOME_PER_MESSAGE = 5, 20
+
+
+def chat_handler(make_handler, user_ids):
+	handler = make_handler()
+	handler.db_set_up = True
+	handler.channels_level_mode, handler.channels_level_handling = "exclude", []
+	handler.xp_per_msg, handler.passive_income_per_msg = XP_PER_MESSAGE, INCOME_PER_MESSAGE
+	handler.xp_and_passive_income_delay = 0
+	# a long time: nothing gets saved by the task during the test.
+	handler.chat_rewards_flush_seconds = 3600
+	handler.engine.write_blocking(
+		"INSERT INTO users (user_id, user_discord_nick) VALUES (?, ?)",
+		[(user_id, f"user{user_id}") for user_id in user_ids], many=True
+	)
+	# far apart, no level up (it would send a message).
+	handler.engine.write_blocking("INSERT INTO levels (level_number, level_xp) VALUES (1, 100000)")
+	return handler
+
+async def chat(handler, user_id):
+	ctx = types.SimpleNamespace(user=user_id, user_roles=[], user_ctx_obj=None, channel=FakeChannel(), user_mention="")
+	await handler.handle_message_xp_and_passive_income(ctx, user_id)
+
+def saved(path, user_id):
+	connection = sqlite3.connect(path)
+	try:
+		return connection.execute("SELECT total_xp, bank FROM users WHERE user_id = ?", (user_id,)).fetchone()
+	finally:
+		connection.close()
+
+
+def test_shutdown_saves_pending_rewards(make_handler):
+	handler = chat_handler(make_handler, [1, 2, 3])
+
+	async def scenario():
+		await handler.load_levels()
+		handler.start_chat_rewards_flush()
+		for user_id in (1, 2, 3):
+			await chat(handler, user_id)
+		assert handler.chat_rewards.stats()["pending_users"] == 3
+		await handler.shutdown_database()
+
+	asyncio.run(scenario())
+	assert handler.engine is None and handler.chat_rewards_task is None
+	for user_id in (1, 2, 3):
+		assert saved(handler.path_to_db, user_id) == (XP_PER_MESSAGE, INCOME_PER_MESSAGE)
+
+
+def test_balance_shows_pending_income(make_handler):
+	handler = chat_handler(make_handler, [1, 2])
+	handler.currency_symbol = "$"
+	channel = FakeChannel()
+
+	async def scenario():
+		await handler.load_levels()
+		await chat(handler, 1)
+		ctx = types.SimpleNamespace(user=1, nickname="user1", channel=channel)
+		await handler.get_balance(ctx, 1, "user1", None)
+		# nothing written for it, the bank in the database is still 0.
+		assert (await handler.get_user_object(1))["bank"] == 0
+
+	asyncio.run(scenario())
+	fields = {field.name: field.value for field in channel.embeds[0].fields}
+	assert fields["**Bank**"] == f"$ {INCOME_PER_MESSAGE}"
+	assert fields["**Net Worth:**"] == f"$ {INCOME_PER_MESSAGE}"
@@ -0,0 +1,173 @@
+"""
+INFO:
+
+	Tests: the writer thread of database/engine.py (group commit, transactions, errors).
+
+"""
+
+import asyncio, sqlite3
+
+import pytest
+
+from database.engine import SkenderDatabaseEngine
+
+
+# stands in for the write connection, so a statement can fail like a broken disk would make it fail.
+class FailingConnection:
+	def __init__(self, connection):
+		self.connection = connection
+		# statement --> how many more times it fails
+		self.failures = {}
+		# statements whose failure also ends the transaction, like SQLite does it after e.g. a full disk.
+		self.rolls_back = set()
+		# failures that start after such a rollback (e.g. the BEGIN of the new transaction).
+		self.after_rollback = {}
+
+	def execute(self, query, *parameters):
+		if self.failures.get(query):
+			self.failures[query] -= 1
+			if query in self.rolls_back and self.connection.in_transaction:
+				self.connection.execute("ROLLBACK")
+				self.failures.update(self.after_rollback)
+			raise sqlite3.OperationalError(f"injected failure: {query}")
+		return self.connection.execute(query, *parameters)
+
+	def __getattr__(self, name):
+		return getattr(self.connection, name)
+
+
+@pytest.fixture
+def engine(tmp_path):
+	engine = SkenderDatabaseEngine(str(tmp_path / "engine.sqlite"))
+	engine.start()
+	engine.write_blocking("CREATE TABLE items (name TEXT PRIMARY KEY, amount INTEGER NOT NULL)")
+	yield engine
+	engine.stop()
+
+
+def names(engine):
+	return [row["name"] for row in engine.read_blocking("SELECT name FROM items ORDER BY name")]
+
+
+def test_writer_survives_failing_rollback(engine):
+	broken = engine.write_connection = FailingConnection(engine.write_connection)
+	broken.failures = {"COMMIT": 1, "ROLLBACK": 1}
+
+	async def scenario():
+		# COMMIT fails, then the ROLLBACK after it too: the writes get the error, the writer goes on
+		# with a new connection (the old one is still stuck in the transaction).
+		with pytest.raises(sqlite3.OperationalError):
+			await engine.write("INSERT INTO items VALUES ('lost', 1)")
+		await engine.write("INSERT INTO items VALUES ('kept', 1)")
+
+	asyncio.run(asyncio.wait_for(scenario(), 10))
+	assert engine.writer_thread.is_alive()
+	assert engine.write_connection is not broken
+	assert names(engine) == ["kept"]
+
+
+def test_writer_survives_failing_begin_after_auto_rollback(engine):
+	broken = engine.write_connection = FailingConnection(engine.write_connection)
+
+	async def scenario():
+		# hold the writer in a transaction, so the next writes are all queued and run as one batch.
+		transaction = await engine.begin()
+		writes = [asyncio.ensure_future(engine.write(f"INSERT INTO items VALUES ('{name}', 1)"))
+				  for name in ("first", "second", "third")]
+		await asyncio.sleep(0.05)
+		# the first write fails and takes the transaction of the batch with it, then the new BEGIN fails too:
+		# the other writes get that error instead of running outside of a transaction.
+		broken.rolls_back.add("RELEASE skender_write")
+		broken.after_rollback = {"BEGIN": 1}
+		broken.failures = {"RELEASE skender_write": 1}
+		await transaction.commit()
+		results = await asyncio.gather(*writes, return_exceptions=True)
+		broken.failures = {}
+		await engine.write("INSERT INTO items VALUES ('after', 1)")
+		return results
+
+	results = asyncio.run(asyncio.wait_for(scenario(), 10))
+	assert all(isinstance(result, sqlite3.OperationalError) for result in results)
+	assert engine.writer_thread.is_alive()
+	assert names(engine) == ["after"]
+
+
+def test_writer_survives_unexpected_error(engine):
+	calls = []
+	def broken_batch(batch):
+		calls.append(len(batch))
+		raise RuntimeError("bug")
+	engine._run_batch = broken_batch
+
+	async def scenario():
+		with pytest.raises(RuntimeError):
+			await engine.write("INSERT INTO items VALUES ('never', 1)")
+		del engine._run_batch
+		await engine.write("INSERT INTO items VALUES ('later', 1)")
+
+	asyncio.run(asyncio.wait_for(scenario(), 10))
+	assert calls == [1]
+	assert names(engine) == ["later"]
+
+
+def test_failing_write_only_undoes_itself_in_batch(engine):
+	async def scenario():
+		# everything queued while the transaction runs comes as one batch after it.
+		transaction = await engine.begin()
+		writes = [asyncio.ensure_future(engine.write(query)) for query in (
+			"INSERT INTO items VALUES ('first', 1)",
+			"INSERT INTO items VALUES ('first', 2)",
+			"INSERT INTO items VALUES ('third', 3)",
+		)]
+		await asyncio.sleep(0.05)
+		commits_before = engine.commit_count
+		await transaction.commit()
+		results = await asyncio.gather(*writes, return_exceptions=True)
+		return results, engine.commit_count - commits_before
+
+	results, commits = asyncio.run(asyncio.wait_for(scenario(), 10))
+	assert isinstance(results[1], sqlite3.IntegrityError)
+	assert results[0].rowcount == 1 and results[2].rowcount == 1
+	# the transaction, then the three writes in one commit.
+	assert commits == 2
+	assert [row["amount"] for row in engine.read_blocking("SELECT amount FROM items ORDER BY name")] == [1, 3]
+
+
+def test_transaction_sees_own_writes_and_rolls_back(engine):
+	async def scenario():
+		transaction = await engine.begin()
+		await transaction.write("INSERT INTO items VALUES ('maybe', 1)")
+		inside = (await transaction.read("SELECT COUNT(*) FROM items")).fetchone()[0]
+		await transaction.rollback()
+		return inside
+
+	assert asyncio.run(asyncio.wait_for(scenario(), 10)) == 1
+	assert names(engine) == []
+
+
+def test_nested_transaction_without_commit_rolls_back_everything(make_handler):
+	handler = make_handler()
+	add = "INSERT INTO income_roles (role_id, role_income) VALUES (?, ?)"
+
+	async def scenario():
+		# the inner block commits: only the outer commit saves both.
+		async with handler.transaction() as transaction:
+			await handler.execute_commit(add, (1, 10))
+			async with handler.transaction() as inner:
+				await handler.execute_commit(add, (2, 20))
+				await inner.commit()
+			await transaction.commit()
+
+		# the inner block stops before its commit (e.g. "not enough money" and a return): nothing is saved,
+		# even if the outer block tries to commit.
+		with pytest.raises(RuntimeError):
+			async with handler.transaction() as transaction:
+				await handler.execute_commit(add, (3, 30))
+				async with handler.transaction():
+					await handler.execute_commit(add, (4, 40))
+				assert transaction.rollback_only
+				await transaction.commit()
+
+		return [row["role_id"] for row in (await handler.execute("SELECT role_id FROM income_roles ORDER BY role_id")).fetchall()]
+
+	assert asyncio.run(scenario()) == [1, 2]
@@ -0,0 +1,46 @@
+"""
+INFO:
+
+	Tests: the income roles (+collect, see update_incomes_solo() in database/__init__.py).
+
+"""
+
+import asyncio, types
+
+from conftest import FakeChannel
+
+
+def collect_ctx(user_id, role_ids):
+	return types.SimpleNamespace(
+		user=user_id, user_roles=role_ids, username=f"user{user_id}", user_pfp=None, nickname=f"user{user_id}",
+		channel=FakeChannel()
+	)
+
+async def fake_role(ctx, role_id):
+	return types.SimpleNamespace(mention=f"<@&{role_id}>")
+
+
+def test_collect_pays_once_when_sent_twice_at_once(make_handler):
+	handler = make_handler()
+	handler.utils = types.SimpleNamespace(get_role_object=fake_role)
+	handler.currency_symbol = "$"
+	handler.engine.write_blocking(
+		"INSERT INTO income_roles (role_id, role_income) VALUES (?, ?)", [(10, 100), (11, 50), (12, 7)], many=True
+	)
+
+	async def scenario():
+		await handler.load_config_snapshot()
+		await handler.get_user_object(1)
+		first, second = collect_ctx(1, [10, 11]), collect_ctx(1, [10, 11])
+		await asyncio.gather(handler.update_incomes_solo(first), handler.update_incomes_solo(second))
+		# collected before the last global reset (no common_reset_time in this database: it is yesterday): paid again.
+		await handler.execute_commit("UPDATE users SET last_single_collect = last_single_collect - 2 * 86400000", user=1)
+		third = collect_ctx(1, [10, 11, 12])
+		await handler.update_incomes_solo(third)
+		return first, second, third, (await handler.get_user_object(1))["bank"]
+
+	first, second, third, bank = asyncio.run(scenario())
+	descriptions = sorted(embed.description if embed else "" for embed in first.channel.embeds + second.channel.embeds)
+	# one payday, one "already collected" (sent as text, not as an embed).
+	assert len(descriptions) == 2 and descriptions[0] == "" and "Received 1 days' income: $ 150" in descriptions[1]
+	assert bank == 150 + 157
@@ -0,0 +1,168 @@
+"""
+INFO:
+
+	Tests: database/database_migration.py, the legacy JSON import (streamed, resumable) and the schema versions.
+
+"""
+
+import json, sqlite3
+from datetime import datetime
+
+import pytest
+
+import database
+from database import database_migration
+from database.database_migration import SkenderJsonStream, SkenderMigration
+
+
+def legacy_json(user_count):
+	return {
+		"symbols": {"currency": ":coin:", "income_reset": "true"},
+		"userdata": [
+			{"user_id": 1000 + number, "cash": number * 1.5, "bank": -number,
+			 "items": [["apple", number + 1]] if number % 2 else "none", "used_items": "none"}
+			for number in range(user_count)
+		],
+		"variables": {"work": {"delay": 30, "phrases": ["a \"quoted\" phrase, with ] and }"]}},
+		"items": [
+			{"name": "apple", "price": 12345678901, "description": "ünïcödé", "duration": 0, "amount_in_stock": "unlimited",
+			 "required_roles": ["none"], "given_roles": ["none"], "removed_roles": ["none"], "maximum_balance": "none",
+			 "reply_message": "none", "expiration_date": "none"}
+		],
+		"income_roles": [{"role_id": 77, "role_income": 2.5e3, "last_single_called": "2024-01-01"}],
+	}
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 64, 1 << 20])
+def test_json_stream_gives_the_elements_of_the_sections(tmp_path, block_size):
+	path = tmp_path / "database.json"
+	data = legacy_json(25)
+	path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+	stream = SkenderJsonStream(str(path), SkenderMigration.SECTIONS, block_size=block_size)
+	try:
+		elements = list(stream)
+	finally:
+		stream.close()
+	expected = [(section, element) for section in ("userdata", "items", "income_roles") for element in data[section]]
+	assert elements == expected
+
+
+def new_migration(tmp_path, data):
+	source = tmp_path / "database.json"
+	if not source.exists():
+		source.write_text(json.dumps(data), encoding="utf-8")
+	migration = SkenderMigration()
+	migration.path_to_json, migration.path_to_sqlite = str(source), str(tmp_path / "database.sqlite")
+	return migration
+
+def test_json_migration_resumes_after_a_stop(tmp_path, monkeypatch):
+	data = legacy_json(50)
+	monkeypatch.setattr(SkenderMigration, "CHUNK_ROWS", 10)
+
+	# stopped in the middle of the users: the chunks before are saved with their progress.
+	converted, stop_at = [], 33
+	user_rows = SkenderMigration.user_rows
+	def stopping_user_rows(user_object):
+		if len(converted) == stop_at:
+			raise KeyboardInterrupt
+		converted.append(user_object["user_id"])
+		return user_rows(user_object)
+	monkeypatch.setattr(SkenderMigration, "user_rows", staticmethod(stopping_user_rows))
+
+	migration = new_migration(tmp_path, data)
+	migration.start_migration()
+	with pytest.raises(KeyboardInterrupt):
+		migration.import_json()
+	migration.database.close()
+
+	# the next run only converts what wasn't saved.
+	converted, stop_at = [], None
+	migration = new_migration(tmp_path, data)
+	migration.start_migration()
+	resumed = migration.resume_from["userdata"]
+	assert 0 < resumed < 33
+	migration.import_json()
+	migration.close_database()
+	assert converted == [1000 + number for number in range(resumed, 50)]
+
+	connection = sqlite3.connect(str(tmp_path / "database.sqlite"))
+	try:
+		users = connection.execute("SELECT user_id, cash, bank FROM users ORDER BY user_id").fetchall()
+		items = connection.execute("SELECT COUNT(*), SUM(amount) FROM user_items").fetchone()
+		roles = connection.execute("SELECT role_id, role_income FROM income_roles").fetchall()
+		catalog = connection.execute("SELECT item_name, price FROM items_catalog").fetchall()
+		assert not database_migration.table_exists(connection, "json_migration_progress")
+	finally:
+		connection.close()
+	assert users == [(1000 + number, -(-number * 3 // 2), -number) for number in range(50)]
+	assert items == (25, sum(number + 1 for number in range(50) if number % 2))
+	assert roles == [(77, 2500)]
+	assert catalog == [("apple", 12345678901)]
+
+
+# a users table like before version 1: the cooldowns as text, no net_worth.
+def legacy_users_table():
+	table = database.SkenderDatabaseCreator.USERS_TABLE.format(name="users")
+	for column in database_migration.COOLDOWN_COLUMNS:
+		table = table.replace(f"{column} INTEGER DEFAULT 0", f"{column} TEXT DEFAULT 'none'")
+	return table
+
+def legacy_database(path, user_count):
+	database.SkenderDatabaseCreator(path).create_database()
+	connection = sqlite3.connect(path)
+	connection.executescript(f"""
+		DROP TABLE users;
+		DELETE FROM schema_version;
+		{legacy_users_table()};
+	""")
+	connection.executemany(
+		"INSERT INTO users (user_id, user_discord_nick, cash, bank, last_work) VALUES (?, ?, ?, ?, ?)",
+		[(number, f"user{number}", number, 0, "2025-05-04 13:37:00.500000" if number % 2 else "none")
+		 for number in range(1, user_count + 1)]
+	)
+	connection.commit()
+	return connection
+
+def schema(connection):
+	return connection.execute("SELECT type, name, sql FROM sqlite_master ORDER BY name").fetchall()
+
+def test_upgrade_schema_is_idempotent_and_resumes(tmp_path, monkeypatch):
+	path = str(tmp_path / "legacy.sqlite")
+	connection = legacy_database(path, 7)
+	monkeypatch.setattr(database_migration, "SCHEMA_CHUNK_ROWS", 2)
+
+	# stopped after the second chunk of the users rebuild.
+	saves = []
+	save_schema_step = database_migration.save_schema_step
+	def stopping_save(connection, version, name, state, progress):
+		saves.append(progress)
+		if len(saves) == 3:
+			raise KeyboardInterrupt
+		save_schema_step(connection, version, name, state, progress)
+	monkeypatch.setattr(database_migration, "save_schema_step", stopping_save)
+	with pytest.raises(KeyboardInterrupt):
+		database_migration.upgrade_schema(connection)
+	monkeypatch.setattr(database_migration, "save_schema_step", save_schema_step)
+	assert database_migration.current_schema_version(connection) == 0
+	assert connection.execute("SELECT progress FROM schema_version WHERE version = 1").fetchone()[0] == 2
+
+	database_migration.upgrade_schema(connection)
+	assert database_migration.current_schema_version(connection) == database_migration.SCHEMA_VERSION
+	rows = connection.execute(
+		"SELECT user_number, user_id, cash, typeof(last_work), last_work, net_worth FROM users ORDER BY user_number"
+	).fetchall()
+	expected_ms = round(datetime(2025, 5, 4, 13, 37, 0, 500000).timestamp() * 1000)
+	assert rows == [
+		(number, number, number, "integer", expected_ms if number % 2 else 0, number) for number in range(1, 8)
+	]
+
+	# again: nothing changes, and the steps find their change already there even without schema_version.
+	before = schema(connection)
+	database_migration.upgrade_schema(connection)
+	connection.execute("DELETE FROM schema_version")
+	connection.commit()
+	database_migration.upgrade_schema(connection)
+	assert schema(connection) == before
+	assert connection.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 7
+	connection.close()
@@ -0,0 +1,33 @@
+"""
+INFO:
+
+	Tests: the action phrases picked in memory (database/phrases.py).
+
+"""
+
+import random
+
+from database.phrases import SkenderPhrasePicker
+
+
+def rows(action, type_, count):
+	return [{"action_name": action, "type": type_, "phrase": f"{action} {type_} {number}", "weight": 1}
+			for number in range(count)]
+
+
+def test_no_repeat_and_max_keys():
+	picker = SkenderPhrasePicker(no_repeat=3, max_keys=4, max_tries=100)
+	picker.load(rows("work", "win", 5) + rows("crime", "lose", 5))
+	rng = random.Random(3)
+
+	picks = [picker.pick("work", "win", user=1, rng=rng) for _ in range(40)]
+	# never one of the last 3 again.
+	assert all(picks[index] not in picks[max(0, index - 3):index] for index in range(len(picks)))
+
+	# one key per (user, action, type): 2 users x 2 actions fill the 4, the next one forgets the oldest.
+	for user in (1, 2):
+		for action, type_ in (("work", "win"), ("crime", "lose")):
+			picker.pick(action, type_, user=user, rng=rng)
+	picker.pick("work", "win", user=3, rng=rng)
+	assert len(picker.recent) == 4
+	assert (1, "work", "win") not in picker.recent and (3, "work", "win") in picker.recent
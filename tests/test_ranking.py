@@ -0,0 +1,73 @@
+"""
+INFO:
+
+	Tests: the leaderboards in memory (database/ranking.py) against the SQL versions of the handler.
+
+"""
+
+import asyncio, random
+
+from database.ranking import SkenderRankIndex, RANK_COLUMNS
+
+
+def test_float_values_keep_their_user_number():
+	index = SkenderRankIndex()
+	index.load([(7, 7, 3_000_000.0, 0, 0), (9, 9, 100.5, 0, 0), (10, 10, 100.25, 0.5, 3)])
+	assert index.page("cash", 0, 10) == [7, 9, 10]
+	assert index.page("net_worth", 0, 10) == [7, 10, 9]
+	assert index.rank("cash", 9) == 2
+
+
+def test_update_with_same_values_as_float_changes_nothing():
+	index = SkenderRankIndex()
+	index.load([(1, 1, 100, 50, 0), (2, 2, 20.5, 0, 0)])
+	index.update(1, (1, 100.0, 50.0, 0))
+	assert index.refreshed_users == 0
+	index.update(2, (2, 200.25, 0, 0))
+	assert index.page("cash", 0, 10) == [2, 1]
+	assert index.page("net_worth", 0, 10) == [2, 1]
+
+
+def user_rows(count, rng):
+	values = lambda: rng.choice([
+		rng.randint(-1000, 1000), rng.randint(0, 10 ** 9), round(rng.uniform(0, 5000), 2),
+		rng.randint(0, 100) * 1.5, 2_000_001.5, 100, 100.5
+	])
+	return [(1000 + number, f"user{number}", values(), values(), rng.randint(0, 500)) for number in range(count)]
+
+async def compare_with_sql(handler, user_ids):
+	for column in RANK_COLUMNS:
+		page_count, _, _ = await handler.get_leaderboard_page_sql(column, 1)
+		for page_number in range(1, page_count + 1):
+			from_index = await handler.get_leaderboard_page(column, page_number)
+			from_sql = await handler.get_leaderboard_page_sql(column, page_number)
+			assert [row["user_id"] for row in from_index[2]] == [row["user_id"] for row in from_sql[2]], (column, page_number)
+		for user_id in user_ids:
+			assert await handler.get_leaderboard_rank(column, user_id) == \
+				   await handler.get_leaderboard_rank_sql(column, user_id), (column, user_id)
+
+def test_rank_index_matches_sql_with_fractional_balances(make_handler):
+	handler = make_handler()
+	rng = random.Random(1)
+	rows = user_rows(300, rng)
+	user_ids = [row[0] for row in rows]
+
+	async def scenario():
+		await handler.executemany(
+			"INSERT INTO users (user_id, user_discord_nick, cash, bank, total_xp) VALUES (?, ?, ?, ?, ?)", rows, user="all"
+		)
+		# verification mode: every lookup is compared with SQL, a mismatch is counted.
+		handler.rank_index_verify = True
+		await handler.load_rank_index()
+		assert set((await handler.verify_rank_index()).values()) == {0}
+		await compare_with_sql(handler, user_ids)
+
+		# then changes like the games do them (bet * 1.5, percentages), refreshed user by user.
+		for user_id in rng.sample(user_ids, 100):
+			await handler.change_balance(user_id, rng.choice([12.5, 1.5 * 33, 0.1, 7]), rng.choice(["cash", "bank"]), "add")
+		await handler.execute_commit("DELETE FROM users WHERE user_id = ?", (user_ids[0],), user=user_ids[0])
+		await compare_with_sql(handler, user_ids[1:])
+		assert set((await handler.verify_rank_index()).values()) == {0}
+		assert handler.rank_index.mismatches == 0
+
+	asyncio.run(scenario())
@@ -0,0 +1,47 @@
+"""
+INFO:
+
+	Tests: the parsed config / catalog / levels snapshots (database/snapshots.py).
+
+"""
+
+from datetime import datetime
+
+from database.snapshots import SkenderCatalogItem, SkenderLevelTable
+
+
+def catalog_row(name, **changes):
+	row = {
+		"item_name": name, "display_name": None, "price": 100, "description": "an item", "duration": 3,
+		"max_amount": "unlimited", "max_amount_per_transaction": "5", "required_roles": '["none"]',
+		"excluded_roles": '["12", "13"]', "given_roles": '["14"]', "removed_roles": '["none"]',
+		"maximum_balance": "none", "reply_message": "thanks", "expiration_date": "2030-01-02 03:04:05.000006",
+		"item_img_url": "EMPTY",
+	}
+	row.update(changes)
+	return row
+
+
+def test_catalog_skips_unreadable_rows():
+	catalog = SkenderCatalogItem.from_rows([
+		catalog_row("apple"),
+		catalog_row("broken date", expiration_date="soon"),
+		catalog_row("broken limit", max_amount="a lot"),
+		catalog_row("forever", expiration_date="none"),
+	])
+	assert sorted(catalog) == ["apple", "forever"]
+
+	apple = catalog["apple"]
+	assert apple.display_name == "apple" and apple.max_amount is None and apple.max_amount_per_transaction == 5
+	assert apple.required_roles == frozenset() and apple.excluded_roles == {12, 13} and apple.given_roles == (14,)
+	assert apple.expiration_date == datetime(2030, 1, 2, 3, 4, 5, 6)
+	assert catalog["forever"].expiration_date is None
+
+
+def test_level_table_resolve():
+	levels = SkenderLevelTable.from_rows([
+		{"level_number": 2, "level_xp": 300}, {"level_number": 1, "level_xp": 100}, {"level_number": 3, "level_xp": None}
+	])
+	assert levels.resolve(0) == (0, 100)
+	assert levels.resolve(100) == (1, 300)
+	assert levels.resolve(10 ** 9) == (2, None)